@@ -9,6 +9,8 @@ from app.core.auth import get_current_user
 from app.models.user import User, UserRole
 from app.core.permissions import is_manager_or_above
 from app.core.activity_logger import log_activity
+from app.core.cache import clear_all_caches
+from app.core.company_metrics import rebuild_company_metrics
 
 router = APIRouter(prefix="/admin/reset", tags=["Admin Reset"])
 
@@ -38,7 +40,11 @@ def reset_customers(
         # Then delete customers
         db.execute(text("DELETE FROM customers"))
         
+        # Raw SQL skips the rollup hooks; recompute it from what is left
+        rebuild_company_metrics(db)
+        
         db.commit()
+        clear_all_caches()
         
         # Log activity
         log_activity(
@@ -47,7 +53,8 @@ def reset_customers(
             action="reset all customer data",
             module="admin_reset",
             target_id=None,
-            details="Deleted all customers and related transaction data"
+            details="Deleted all customers and related transaction data",
+            sync=True
         )
         
         return {"message": "Customer data reset successfully", "reset_by": current_user.username}
@@ -79,7 +86,11 @@ def reset_repairs(
         db.execute(text("DELETE FROM repairs"))
         db.execute(text("DELETE FROM repair_items"))
         
+        # Raw SQL skips the rollup hooks; recompute it from what is left
+        rebuild_company_metrics(db)
+        
         db.commit()
+        clear_all_caches()
         
         # Log activity
         log_activity(
@@ -88,7 +99,8 @@ def reset_repairs(
             action="reset all repair data",
             module="admin_reset",
             target_id=None,
-            details="Deleted all repairs, repair items, and repair sales data"
+            details="Deleted all repairs, repair items, and repair sales data",
+            sync=True
         )
         
         return {"message": "Repair data reset successfully", "reset_by": current_user.username}
@@ -121,7 +133,11 @@ def reset_products(
         db.execute(text("DELETE FROM pos_sale_items"))
         db.execute(text("DELETE FROM products"))
         
+        # Raw SQL skips the rollup hooks; recompute it from what is left
+        rebuild_company_metrics(db)
+        
         db.commit()
+        clear_all_caches()
         
         # Log activity
         log_activity(
@@ -130,7 +146,8 @@ def reset_products(
             action="reset all product data",
             module="admin_reset",
             target_id=None,
-            details="Deleted all products, stock movements, and related sales data"
+            details="Deleted all products, stock movements, and related sales data",
+            sync=True
         )
         
         return {"message": "Product data reset successfully", "reset_by": current_user.username}
@@ -165,7 +182,11 @@ def reset_sales(
         db.execute(text("DELETE FROM pending_resales"))
         db.execute(text("DELETE FROM repair_sales"))
         
+        # Raw SQL skips the rollup hooks; recompute it from what is left
+        rebuild_company_metrics(db)
+        
         db.commit()
+        clear_all_caches()
         
         # Log activity
         log_activity(
@@ -174,7 +195,8 @@ def reset_sales(
             action="reset all sales data",
             module="admin_reset",
             target_id=None,
-            details="Deleted all sales, swaps, POS sales, and transaction data"
+            details="Deleted all sales, swaps, POS sales, and transaction data",
+            sync=True
         )
         
         return {"message": "Sales data reset successfully", "reset_by": current_user.username}
@@ -206,6 +228,7 @@ def reset_users(
         db.execute(text("DELETE FROM users WHERE role != 'super_admin'"))
         
         db.commit()
+        clear_all_caches()
         
         # Log activity
         log_activity(
@@ -214,7 +237,8 @@ def reset_users(
             action="reset all user accounts",
             module="admin_reset",
             target_id=None,
-            details="Deleted all user accounts except super admin"
+            details="Deleted all user accounts except super admin",
+            sync=True
         )
         
         return {"message": "User data reset successfully", "reset_by": current_user.username}
@@ -273,7 +297,11 @@ def reset_all_data(
         db.execute(text("DELETE FROM customers"))
         db.execute(text("DELETE FROM users WHERE role != 'super_admin'"))
         
+        # Raw SQL skips the rollup hooks; recompute it from what is left
+        rebuild_company_metrics(db)
+        
         db.commit()
+        clear_all_caches()
         
         # Log activity
         log_activity(
@@ -282,7 +310,8 @@ def reset_all_data(
             action="complete system reset",
             module="admin_reset",
             target_id=None,
-            details="Deleted all system data except super admin account"
+            details="Deleted all system data except super admin account",
+            sync=True
         )
         
         return {"message": "Complete system reset successful", "reset_by": current_user.username}
@@ -12,6 +12,7 @@ from app.models.product_sale import ProductSale
 from app.models.product import StockMovement
 from app.core.permissions import is_manager_or_above
 from app.core.activity_logger import log_activity
+from app.core.cache import clear_all_caches
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -45,7 +46,8 @@ def verify_manager_password(
                 action="verified manager password for reset operation",
                 module="admin_reset",
                 target_id=None,
-                details="Password verification successful"
+                details="Password verification successful",
+                sync=True
             )
             
             return {"verified": True, "message": "Password verified successfully"}
@@ -57,7 +59,8 @@ def verify_manager_password(
                 action="failed manager password verification for reset operation",
                 module="admin_reset",
                 target_id=None,
-                details="Invalid password provided"
+                details="Invalid password provided",
+                sync=True
             )
             
             return {"verified": False, "message": "Invalid password"}
@@ -111,6 +114,7 @@ def clear_all_pos_sales(
         ).delete()
         
         db.commit()
+        clear_all_caches()
         
         return {
             "success": True,
@@ -4,12 +4,14 @@ Provides business insights, statistics, and reports
 """
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, extract
-from datetime import datetime, timedelta
+from sqlalchemy import func
 from typing import Optional
 from app.core.database import get_db
 from app.core.auth import get_current_user
 from app.core.company_filter import get_company_user_ids
+from app.core.cache import cached_route
+from app.core.aggregates import aggregate, count_if, sum_if
+from app.core.time_windows import TimeWindow, calendar_month_window, in_window, last_days_window, local_today
 from app.models.user import User
 from app.models.customer import Customer
 from app.models.phone import Phone
@@ -20,8 +22,70 @@ from app.models.product import Product
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
+# Company-filtered analytics are cached per company and role and dropped by company-scoped writes
+ANALYTICS_CACHE_ENTITIES = ["customers", "repairs", "sales", "swaps", "phones", "users"]
+
+
+def _company_filter(column, company_user_ids):
+    """Owner filter for one table ([] when the caller sees every company)"""
+    return [] if company_user_ids is None else [column.in_(company_user_ids)]
+
+
+# ---------- per-table totals (one statement each, shared by the summaries below) ----------
+
+def _customer_totals(db: Session, company_user_ids) -> dict:
+    return aggregate(db, Customer, {"total": count_if()},
+                     *_company_filter(Customer.created_by_user_id, company_user_ids))
+
+
+def _repair_totals(db: Session, company_user_ids, recent: Optional[TimeWindow] = None) -> dict:
+    metrics = {
+        "total": count_if(),
+        "pending": count_if(Repair.status == "Pending"),
+        "in_progress": count_if(Repair.status == "In Progress"),
+        "completed": count_if(Repair.status == "Completed"),
+        "delivered": count_if(Repair.status == "Delivered"),
+        "revenue": sum_if(Repair.cost),
+    }
+    if recent is not None:
+        metrics["recent_revenue"] = sum_if(Repair.cost, in_window(Repair.created_at, recent))
+    return aggregate(db, Repair, metrics, *_company_filter(Repair.created_by_user_id, company_user_ids))
+
+
+def _sale_totals(db: Session, company_user_ids, recent: Optional[TimeWindow] = None) -> dict:
+    metrics = {
+        "total": count_if(),
+        "revenue": sum_if(Sale.amount_paid),
+        # Profit = Amount paid - Phone value (sales without a phone are left out)
+        "profit": sum_if(Sale.amount_paid - Phone.value),
+    }
+    if recent is not None:
+        metrics["recent_revenue"] = sum_if(Sale.amount_paid, in_window(Sale.created_at, recent))
+    return aggregate(db, Sale, metrics, *_company_filter(Sale.created_by_user_id, company_user_ids),
+                     outerjoins=[(Phone, Phone.id == Sale.phone_id)])
+
+
+def _swap_totals(db: Session, company_user_ids) -> dict:
+    # Swaps are filtered by company through the customer's created_by_user_id
+    joins = [(Customer, Customer.id == Swap.customer_id)] if company_user_ids is not None else []
+    return aggregate(db, Swap, {
+        "total": count_if(),
+        "revenue": sum_if(Swap.balance_paid),
+        # Profit = (Given phone value + Balance paid) - New phone value
+        "profit": sum_if(Swap.given_phone_value + Swap.balance_paid - Phone.value),
+    }, *_company_filter(Customer.created_by_user_id, company_user_ids),
+        joins=joins, outerjoins=[(Phone, Phone.id == Swap.new_phone_id)])
+
+
+def _phone_totals(db: Session, company_user_ids) -> dict:
+    return aggregate(db, Phone, {
+        "total": count_if(),
+        "available": count_if(Phone.is_available == True),
+    }, *_company_filter(Phone.created_by_user_id, company_user_ids))
+
 
 @router.get("/overview")
+@cached_route(seconds=900, entities=ANALYTICS_CACHE_ENTITIES, per_user=False)
 def get_overview(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -34,45 +98,18 @@ def get_overview(
     # Get company user IDs for filtering
     company_user_ids = get_company_user_ids(db, current_user)
     
-    # Build base queries with company filtering
-    customer_query = db.query(Customer)
-    repair_query = db.query(Repair)
-    sale_query = db.query(Sale)
-    swap_query = db.query(Swap)
-    phone_query = db.query(Phone)
+    # One aggregate statement per table
+    customers = _customer_totals(db, company_user_ids)
+    repairs = _repair_totals(db, company_user_ids)
+    sales = _sale_totals(db, company_user_ids)
+    swaps = _swap_totals(db, company_user_ids)
+    phones = _phone_totals(db, company_user_ids)
+    total_revenue = repairs["revenue"] + sales["revenue"] + swaps["revenue"]
     
-    # Apply company filtering
-    if company_user_ids is not None:
-        customer_query = customer_query.filter(Customer.created_by_user_id.in_(company_user_ids))
-        repair_query = repair_query.filter(Repair.created_by_user_id.in_(company_user_ids))
-        sale_query = sale_query.filter(Sale.created_by_user_id.in_(company_user_ids))
-        # For swaps, filter through customer's created_by_user_id
-        swap_query = swap_query.join(Customer).filter(Customer.created_by_user_id.in_(company_user_ids))
-        phone_query = phone_query.filter(Phone.created_by_user_id.in_(company_user_ids))
-    
-    # Total counts
-    total_customers = customer_query.count()
-    total_repairs = repair_query.count()
-    total_sales = sale_query.count()
-    total_swaps = swap_query.count()
-    total_phones = phone_query.count()
-    available_phones = phone_query.filter(Phone.is_available == True).count()
-    
-    # Revenue calculations
-    repair_revenue = repair_query.with_entities(func.sum(Repair.cost)).scalar() or 0.0
-    sales_revenue = sale_query.with_entities(func.sum(Sale.amount_paid)).scalar() or 0.0
-    swap_revenue = swap_query.with_entities(func.sum(Swap.balance_paid)).scalar() or 0.0
-    total_revenue = repair_revenue + sales_revenue + swap_revenue
-    
-    # Repair status breakdown
-    pending_repairs = repair_query.filter(Repair.status == "Pending").count()
-    in_progress_repairs = repair_query.filter(Repair.status == "In Progress").count()
-    completed_repairs = repair_query.filter(Repair.status == "Completed").count()
-    delivered_repairs = repair_query.filter(Repair.status == "Delivered").count()
-    
-    # Recent repairs (last 5) - use filtered query
+    # Recent repairs (last 5)
     recent_repairs = (
-        repair_query
+        db.query(Repair)
+        .filter(*_company_filter(Repair.created_by_user_id, company_user_ids))
         .order_by(Repair.created_at.desc())
         .limit(5)
         .all()
@@ -80,24 +117,24 @@ def get_overview(
     
     return {
         "totals": {
-            "customers": total_customers,
-            "repairs": total_repairs,
-            "sales": total_sales,
-            "swaps": total_swaps,
-            "phones_in_inventory": total_phones,
-            "available_phones": available_phones
+            "customers": customers["total"],
+            "repairs": repairs["total"],
+            "sales": sales["total"],
+            "swaps": swaps["total"],
+            "phones_in_inventory": phones["total"],
+            "available_phones": phones["available"]
         },
         "revenue": {
             "total": round(total_revenue, 2),
-            "from_repairs": round(repair_revenue, 2),
-            "from_sales": round(sales_revenue, 2),
-            "from_swaps": round(swap_revenue, 2)
+            "from_repairs": round(repairs["revenue"], 2),
+            "from_sales": round(sales["revenue"], 2),
+            "from_swaps": round(swaps["revenue"], 2)
         },
         "repair_status": {
-            "pending": pending_repairs,
-            "in_progress": in_progress_repairs,
-            "completed": completed_repairs,
-            "delivered": delivered_repairs
+            "pending": repairs["pending"],
+            "in_progress": repairs["in_progress"],
+            "completed": repairs["completed"],
+            "delivered": repairs["delivered"]
         },
         "recent_repairs": [
             {
@@ -113,13 +150,17 @@ def get_overview(
 
 
 @router.get("/weekly-stats")
-def weekly_stats(db: Session = Depends(get_db)):
+def weekly_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
     """
     Statistics for the last 7 days
     Returns daily repair counts and revenue for charts
+    Scoped to the caller's company by the session's tenant criteria
     """
-    today = datetime.utcnow().date()
-    week_ago = today - timedelta(days=7)
+    # Bucketing by date() is fine in the SELECT; the WHERE stays a plain range
+    last_7_days = last_days_window(7)
     
     # Group repairs by date
     repairs_by_date = (
@@ -128,7 +169,7 @@ def weekly_stats(db: Session = Depends(get_db)):
             func.count(Repair.id).label("count"),
             func.sum(Repair.cost).label("revenue")
         )
-        .filter(Repair.created_at >= week_ago)
+        .filter(in_window(Repair.created_at, last_7_days))
         .group_by(func.date(Repair.created_at))
         .all()
     )
@@ -140,7 +181,7 @@ def weekly_stats(db: Session = Depends(get_db)):
             func.count(Sale.id).label("count"),
             func.sum(Sale.amount_paid).label("revenue")
         )
-        .filter(Sale.created_at >= week_ago)
+        .filter(in_window(Sale.created_at, last_7_days))
         .group_by(func.date(Sale.created_at))
         .all()
     )
@@ -152,7 +193,7 @@ def weekly_stats(db: Session = Depends(get_db)):
             func.count(Swap.id).label("count"),
             func.sum(Swap.balance_paid).label("revenue")
         )
-        .filter(Swap.created_at >= week_ago)
+        .filter(in_window(Swap.created_at, last_7_days))
         .group_by(func.date(Swap.created_at))
         .all()
     )
@@ -185,24 +226,28 @@ def weekly_stats(db: Session = Depends(get_db)):
 
 
 @router.get("/monthly-stats")
-def monthly_stats(year: int = None, month: int = None, db: Session = Depends(get_db)):
+def monthly_stats(
+    year: int = None,
+    month: int = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
     """
     Monthly statistics for a specific month or current month
     Returns detailed monthly breakdown
+    Scoped to the caller's company by the session's tenant criteria
     """
     if not year or not month:
-        now = datetime.utcnow()
-        year = now.year
-        month = now.month
+        today = local_today()
+        year = today.year
+        month = today.month
     
-    # Filter by year and month
+    # Filter by year and month (as a created_at range, so the index is used)
+    month_range = calendar_month_window(year, month)
     repairs = (
         db.query(Repair)
         .filter(
-            and_(
-                extract('year', Repair.created_at) == year,
-                extract('month', Repair.created_at) == month
-            )
+            in_window(Repair.created_at, month_range)
         )
         .all()
     )
@@ -210,10 +255,7 @@ def monthly_stats(year: int = None, month: int = None, db: Session = Depends(get
     sales = (
         db.query(Sale)
         .filter(
-            and_(
-                extract('year', Sale.created_at) == year,
-                extract('month', Sale.created_at) == month
-            )
+            in_window(Sale.created_at, month_range)
         )
         .all()
     )
@@ -221,10 +263,7 @@ def monthly_stats(year: int = None, month: int = None, db: Session = Depends(get
     swaps = (
         db.query(Swap)
         .filter(
-            and_(
-                extract('year', Swap.created_at) == year,
-                extract('month', Swap.created_at) == month
-            )
+            in_window(Swap.created_at, month_range)
         )
         .all()
     )
@@ -534,6 +573,7 @@ def inventory_report(db: Session = Depends(get_db)):
 
 
 @router.get("/profit-loss")
+@cached_route(seconds=900, entities=ANALYTICS_CACHE_ENTITIES, per_user=False)
 def profit_loss_analysis(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -546,73 +586,73 @@ def profit_loss_analysis(
     # Get company user IDs for filtering
     company_user_ids = get_company_user_ids(db, current_user)
     
-    # Get swaps with phone data, filtered by company
-    swap_query = db.query(Swap)
+    # Totals in one statement per table; only the listed transactions are loaded
+    swap_totals = _swap_totals(db, company_user_ids)
+    sale_totals = _sale_totals(db, company_user_ids)
+    
+    # Latest 10 swaps with their new phone, filtered by company
+    swap_query = db.query(Swap, Phone).join(Phone, Phone.id == Swap.new_phone_id)
     if company_user_ids is not None:
         # Filter swaps by company through customer's created_by_user_id
-        swap_query = swap_query.join(Customer).filter(Customer.created_by_user_id.in_(company_user_ids))
-    
-    swaps = swap_query.all()
+        swap_query = swap_query.join(Customer, Swap.customer_id == Customer.id).filter(
+            Customer.created_by_user_id.in_(company_user_ids)
+        )
+    swap_rows = swap_query.order_by(Swap.created_at.desc()).limit(10).all()
     
     swap_analysis = []
-    total_profit = 0.0
-    
-    for swap in swaps:
-        # Get the new phone value
-        phone = db.query(Phone).filter(Phone.id == swap.new_phone_id).first()
-        if phone:
-            # Profit = (Given phone value + Balance paid) - New phone original value
-            # This is simplified - in real scenario, we'd track original purchase price
-            profit = swap.total_transaction_value - phone.value
-            total_profit += profit
-            
-            swap_analysis.append({
-                "swap_id": swap.id,
-                "given_phone_value": swap.given_phone_value,
-                "balance_paid": swap.balance_paid,
-                "total_received": swap.total_transaction_value,
-                "phone_value": phone.value,
-                "estimated_profit": round(profit, 2),
-                "created_at": swap.created_at.isoformat()
-            })
-    
-    # Sales profit (simplified)
-    sales = db.query(Sale).all()
-    sales_profit_data = []
-    total_sales_profit = 0.0
-    
-    for sale in sales:
-        phone = db.query(Phone).filter(Phone.id == sale.phone_id).first()
-        if phone:
-            # Profit = Amount paid - Phone value
-            profit = sale.amount_paid - phone.value
-            total_sales_profit += profit
-            
-            sales_profit_data.append({
-                "sale_id": sale.id,
-                "amount_paid": sale.amount_paid,
-                "phone_value": phone.value,
-                "profit": round(profit, 2)
-            })
+    for swap, phone in swap_rows:
+        # Profit = (Given phone value + Balance paid) - New phone original value
+        # This is simplified - in real scenario, we'd track original purchase price
+        profit = swap.total_transaction_value - phone.value
+        swap_analysis.append({
+            "swap_id": swap.id,
+            "given_phone_value": swap.given_phone_value,
+            "balance_paid": swap.balance_paid,
+            "total_received": swap.total_transaction_value,
+            "phone_value": phone.value,
+            "estimated_profit": round(profit, 2),
+            "created_at": swap.created_at.isoformat()
+        })
+    
+    # Sales profit (simplified): Amount paid - Phone value
+    sale_query = db.query(Sale, Phone).join(Phone, Phone.id == Sale.phone_id).filter(
+        *_company_filter(Sale.created_by_user_id, company_user_ids)
+    )
+    sale_rows = sale_query.order_by(Sale.created_at.desc()).limit(10).all()
+    
+    sales_profit_data = [
+        {
+            "sale_id": sale.id,
+            "amount_paid": sale.amount_paid,
+            "phone_value": phone.value,
+            "profit": round(sale.amount_paid - phone.value, 2)
+        } for sale, phone in sale_rows
+    ]
+    
+    total_profit = swap_totals["profit"]
+    total_sales_profit = sale_totals["profit"]
+    swap_count = swap_totals["total"]
+    sale_count = sale_totals["total"]
     
     return {
         "swaps": {
-            "total_count": len(swaps),
+            "total_count": swap_count,
             "total_profit": round(total_profit, 2),
-            "average_profit": round(total_profit / len(swaps), 2) if swaps else 0.0,
-            "transactions": swap_analysis[:10]  # Last 10
+            "average_profit": round(total_profit / swap_count, 2) if swap_count else 0.0,
+            "transactions": swap_analysis  # Last 10
         },
         "sales": {
-            "total_count": len(sales),
+            "total_count": sale_count,
             "total_profit": round(total_sales_profit, 2),
-            "average_profit": round(total_sales_profit / len(sales), 2) if sales else 0.0,
-            "transactions": sales_profit_data[:10]  # Last 10
+            "average_profit": round(total_sales_profit / sale_count, 2) if sale_count else 0.0,
+            "transactions": sales_profit_data  # Last 10
         },
         "combined_profit": round(total_profit + total_sales_profit, 2)
     }
 
 
 @router.get("/dashboard-summary")
+@cached_route(seconds=900, entities=ANALYTICS_CACHE_ENTITIES, per_user=False)
 def dashboard_summary(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -625,46 +665,21 @@ def dashboard_summary(
     # Get company user IDs for filtering
     company_user_ids = get_company_user_ids(db, current_user)
     
-    # Build base queries with company filtering
-    customer_query = db.query(Customer)
-    repair_query = db.query(Repair)
-    phone_query = db.query(Phone)
-    sale_query = db.query(Sale)
-    
-    # Apply company filtering
-    if company_user_ids is not None:
-        customer_query = customer_query.filter(Customer.created_by_user_id.in_(company_user_ids))
-        repair_query = repair_query.filter(Repair.created_by_user_id.in_(company_user_ids))
-        phone_query = phone_query.filter(Phone.created_by_user_id.in_(company_user_ids))
-        sale_query = sale_query.filter(Sale.created_by_user_id.in_(company_user_ids))
-    
-    # Quick stats
-    total_customers = customer_query.count()
-    total_repairs = repair_query.count()
-    pending_repairs = repair_query.filter(Repair.status == "Pending").count()
-    available_phones = phone_query.filter(Phone.is_available == True).count()
-    
-    # Revenue (last 30 days)
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    recent_repair_revenue = (
-        repair_query
-        .filter(Repair.created_at >= thirty_days_ago)
-        .with_entities(func.sum(Repair.cost))
-        .scalar() or 0.0
-    )
-    recent_sales_revenue = (
-        sale_query
-        .filter(Sale.created_at >= thirty_days_ago)
-        .with_entities(func.sum(Sale.amount_paid))
-        .scalar() or 0.0
-    )
+    # Same per-table aggregates as the overview, with last-30-days revenue
+    last_30_days = last_days_window(30)
+    customers = _customer_totals(db, company_user_ids)
+    repairs = _repair_totals(db, company_user_ids, recent=last_30_days)
+    sales = _sale_totals(db, company_user_ids, recent=last_30_days)
+    phones = _phone_totals(db, company_user_ids)
     
-    monthly_revenue = recent_repair_revenue + recent_sales_revenue
+    pending_repairs = repairs["pending"]
+    available_phones = phones["available"]
+    monthly_revenue = repairs["recent_revenue"] + sales["recent_revenue"]
     
     return {
         "quick_stats": {
-            "total_customers": total_customers,
-            "total_repairs": total_repairs,
+            "total_customers": customers["total"],
+            "total_repairs": repairs["total"],
             "pending_repairs": pending_repairs,
             "available_phones": available_phones,
             "monthly_revenue": round(monthly_revenue, 2)
@@ -6,7 +6,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from pydantic import BaseModel
 from app.core.database import get_db
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, get_current_user_row
 from app.models.user import User, UserRole
 from app.models.customer import Customer
 from app.models.phone import Phone
@@ -54,7 +54,7 @@ def get_my_audit_code(
 
 @router.post("/regenerate-audit-code")
 def regenerate_audit_code(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_row),
     db: Session = Depends(get_db)
 ):
     """
@@ -11,8 +11,11 @@ from app.core.database import get_db
 from app.core.auth import (
     create_access_token,
     get_current_user,
+    get_current_user_row,
     get_current_active_admin
 )
+from app.core.principal import invalidate_principal
+from app.core.company_filter import invalidate_company_cache
 from app.models.user import User, UserRole
 from app.models.user_session import UserSession
 from app.schemas.user import (
@@ -84,6 +87,7 @@ def register_user(
     # Generate unique ID based on role
     new_user.generate_unique_id(db)
     db.commit()
+    invalidate_company_cache(current_user, "users")
     db.refresh(new_user)
     
     # Log the activity
@@ -94,7 +98,8 @@ def register_user(
         action=f"created user {new_user.username}",
         module="users",
         target_id=new_user.id,
-        details=f"Created {target_role.value} account"
+        details=f"Created {target_role.value} account",
+        sync=True
     )
     
     # Send welcome SMS with credentials - Using database SMS config!
@@ -381,6 +386,8 @@ def update_user(
             user.is_active = new_active
     
     db.commit()
+    invalidate_company_cache(current_user, "users")
+    invalidate_principal(user_id)
     db.refresh(user)
     
     # Log activity
@@ -392,7 +399,8 @@ def update_user(
             action=f"updated user {user.username}",
             module="users",
             target_id=user.id,
-            details=", ".join(changes)
+            details=", ".join(changes),
+            sync=True
         )
     
     return user
@@ -511,6 +519,8 @@ def delete_user(
     
     db.delete(user)
     db.commit()
+    invalidate_company_cache(current_user, "users")
+    invalidate_principal(user_id)
     
     return None
 
@@ -520,7 +530,7 @@ def change_password(
     new_password: str,
     confirm_password: str = None,
     current_password: str = None,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_row),
     db: Session = Depends(get_db)
 ):
     """
@@ -567,7 +577,7 @@ def change_password(
 
 
 @router.post("/logout")
-def logout(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def logout(current_user: User = Depends(get_current_user_row), db: Session = Depends(get_db)):
     """
     Logout current user and close session
     """
@@ -579,6 +589,8 @@ def logout(current_user: User = Depends(get_current_user), db: Session = Depends
             current_user.current_session_id = None
             db.commit()
     
+    invalidate_principal(current_user.id)
+    
     return {"message": "Logged out successfully"}
 
 
@@ -692,7 +704,8 @@ def admin_change_user_password(
         action=f"changed password for user {target_user.username}",
         module="users",
         target_id=target_user.id,
-        details=f"Admin {current_user.username} changed password for {target_user.username}"
+        details=f"Admin {current_user.username} changed password for {target_user.username}",
+        sync=True
     )
     
     return {
@@ -8,7 +8,8 @@ from app.core.database import get_db
 from app.core.auth import get_current_user
 from app.core.permissions import require_manager
 from app.core.activity_logger import log_activity
-from app.core.company_filter import get_company_user_ids
+from app.core.company_filter import get_company_user_ids, invalidate_company_cache
+from app.middleware.etag import conditional_etag
 from app.models.brand import Brand
 from app.models.user import User
 from app.schemas.brand import BrandCreate, BrandUpdate, BrandResponse
@@ -16,7 +17,7 @@ from app.schemas.brand import BrandCreate, BrandUpdate, BrandResponse
 router = APIRouter(prefix="/brands", tags=["brands"])
 
 
-@router.get("/", response_model=List[BrandResponse])
+@router.get("/", response_model=List[BrandResponse], dependencies=[conditional_etag("brands")])
 def get_all_brands(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -98,6 +99,7 @@ def create_brand(
     
     db.add(brand)
     db.commit()
+    invalidate_company_cache(current_user, "brands")
     db.refresh(brand)
     
     # Log activity
@@ -153,6 +155,7 @@ def update_brand(
         brand.logo_url = brand_data.logo_url
     
     db.commit()
+    invalidate_company_cache(current_user, "brands")
     db.refresh(brand)
     
     # Log activity
@@ -202,6 +205,7 @@ def delete_brand(
     brand_name = brand.name
     db.delete(brand)
     db.commit()
+    invalidate_company_cache(current_user, "brands")
     
     # Log activity
     log_activity(
@@ -5,7 +5,6 @@ Handles Excel file uploads for phones and products
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
-import pandas as pd
 import io
 from datetime import datetime
 
@@ -14,9 +13,13 @@ from app.models.user import User
 from app.models.phone import Phone, PhoneStatus
 from app.models.product import Product
 from app.core.permissions import require_role
+from app.core.company_filter import invalidate_company_cache
 
 router = APIRouter(prefix="/bulk-upload", tags=["Bulk Upload"])
 
+# pandas (and openpyxl behind it) is imported inside each handler: it is heavy
+# and only needed for the occasional upload, not by every worker at startup
+
 
 @router.get("/phones/template")
 async def download_phones_template(
@@ -24,6 +27,7 @@ async def download_phones_template(
     db: Session = Depends(get_db)
 ):
     """Download Excel template with 100 sample phones - uses actual brands from database"""
+    import pandas as pd
     # Get actual brands from database
     from app.models.brand import Brand
     brands = db.query(Brand).all()
@@ -308,6 +312,7 @@ async def bulk_upload_phones(
     db: Session = Depends(get_db)
 ):
     """Upload phones in bulk from Excel file"""
+    import pandas as pd
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="Only Excel files (.xlsx, .xls) are allowed")
     
@@ -327,7 +332,7 @@ async def bulk_upload_phones(
         
         # Get the next available unique_id number
         from sqlalchemy import func
-        max_unique_id_row = db.query(Phone.unique_id).filter(
+        max_unique_id_row = db.query(Phone.unique_id).execution_options(tenant_unscoped=True).filter(
             Phone.unique_id.like('PHON-%')
         ).order_by(Phone.unique_id.desc()).first()
         
@@ -418,6 +423,7 @@ async def bulk_upload_phones(
                 })
         
         db.commit()
+        invalidate_company_cache(current_user, "phones")
         
         return {
             'success': True,
@@ -438,6 +444,7 @@ async def download_products_template(
     db: Session = Depends(get_db)
 ):
     """Download Excel template with 100 sample products ready to use"""
+    import pandas as pd
     # Get actual categories from database
     from app.models.category import Category
     categories = db.query(Category).limit(10).all()
@@ -620,6 +627,7 @@ async def bulk_upload_products(
     db: Session = Depends(get_db)
 ):
     """Upload products in bulk from Excel file"""
+    import pandas as pd
     print(f"📤 Starting bulk upload: {file.filename} by {current_user.username}")
     
     if not file.filename.endswith(('.xlsx', '.xls')):
@@ -653,7 +661,7 @@ async def bulk_upload_products(
         
         # Get the next available unique_id number
         from sqlalchemy import func
-        max_unique_id_row = db.query(Product.unique_id).filter(
+        max_unique_id_row = db.query(Product.unique_id).execution_options(tenant_unscoped=True).filter(
             Product.unique_id.like('PROD-%')
         ).order_by(Product.unique_id.desc()).first()
         
@@ -750,6 +758,7 @@ async def bulk_upload_products(
                 })
         
         db.commit()
+        invalidate_company_cache(current_user, "products")
         
         # Return detailed response
         if len(added_products) == 0 and len(errors) > 0:
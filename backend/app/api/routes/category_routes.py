@@ -8,7 +8,8 @@ from typing import List
 from app.core.database import get_db
 from app.core.auth import get_current_user
 from app.core.activity_logger import log_activity
-from app.core.company_filter import get_company_user_ids
+from app.core.company_filter import get_company_user_ids, invalidate_company_cache
+from app.middleware.etag import conditional_etag
 from app.models.user import User, UserRole
 from app.models.category import Category
 from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
@@ -16,7 +17,7 @@ from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryRespons
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
 
-@router.get("/", response_model=List[CategoryResponse])
+@router.get("/", response_model=List[CategoryResponse], dependencies=[conditional_etag("categories")])
 def get_all_categories(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -112,6 +113,7 @@ def create_category(
     
     db.add(new_category)
     db.commit()
+    invalidate_company_cache(current_user, "categories")
     db.refresh(new_category)
     
     # Log activity
@@ -181,6 +183,7 @@ def update_category(
         category.description = category_data.description
     
     db.commit()
+    invalidate_company_cache(current_user, "categories")
     db.refresh(category)
     
     # Log activity
@@ -232,6 +235,7 @@ def delete_category(
     category_name = category.name
     db.delete(category)
     db.commit()
+    invalidate_company_cache(current_user, "categories")
     
     # Log activity
     log_activity(
@@ -8,7 +8,7 @@ from app.core.database import get_db
 from app.core.auth import get_current_user
 from app.core.permissions import can_manage_customers, can_create_customers, can_view_customers, can_delete_customers
 from app.core.activity_logger import log_activity
-from app.core.company_filter import get_company_user_ids
+from app.core.company_filter import get_company_user_ids, invalidate_company_cache
 from app.models.user import User, UserRole
 from app.models.customer import Customer
 from app.schemas.customer import CustomerCreate, CustomerUpdate, CustomerResponse
@@ -29,7 +29,7 @@ def create_customer(
             detail=f"You do not have permission to create customers. Only Repairers and ShopKeepers can create customers. Your role: {current_user.role.value}"
         )
     # Check if customer with this phone number already exists
-    existing = db.query(Customer).filter(Customer.phone_number == customer.phone_number).first()
+    existing = db.query(Customer).execution_options(tenant_unscoped=True).filter(Customer.phone_number == customer.phone_number).first()
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -48,6 +48,7 @@ def create_customer(
     new_customer.generate_deletion_code()
     
     db.commit()
+    invalidate_company_cache(current_user, "customers")
     db.refresh(new_customer)
     
     # Log activity
@@ -101,8 +102,16 @@ def list_customers(
             Customer.created_by_user_id.in_(company_user_ids)
         ).offset(skip).limit(limit).all()
     
+    # Creator names/roles for the whole page in one query
+    creator_ids = {c.created_by_user_id for c in customers if c.created_by_user_id}
+    creators = {
+        user_id: (username, role)
+        for user_id, username, role in db.query(User.id, User.username, User.role).filter(User.id.in_(creator_ids))
+    } if creator_ids else {}
+    
     # Build customer list with proper permissions
     result = []
+    codes_generated = False
     for customer in customers:
         # Determine if current user created this customer
         is_creator = (
@@ -111,13 +120,10 @@ def list_customers(
         )
         
         # Get creator info
-        creator_username = None
-        creator_role = None
-        if hasattr(customer, 'created_by_user_id') and customer.created_by_user_id:
-            creator = db.query(User).filter(User.id == customer.created_by_user_id).first()
-            if creator:
-                creator_username = creator.username
-                creator_role = creator.role.value
+        creator_username, creator_role = None, None
+        if customer.created_by_user_id in creators:
+            creator_username, role = creators[customer.created_by_user_id]
+            creator_role = role.value
         
         customer_dict = {
             "id": customer.id,
@@ -141,13 +147,17 @@ def list_customers(
             # Generate deletion code if it doesn't exist (for old customers created before this feature)
             if not customer.deletion_code:
                 customer.generate_deletion_code()
-                db.commit()
+                codes_generated = True
             
             customer_dict["deletion_code"] = customer.deletion_code
             customer_dict["code_generated_at"] = customer.code_generated_at.isoformat() if customer.code_generated_at else None
         
         result.append(customer_dict)
     
+    # One commit for every code generated on this page (after the rows are serialized)
+    if codes_generated:
+        db.commit()
+    
     return result
 
 
@@ -368,7 +378,7 @@ def update_customer(
     
     # Check if phone number is being updated and if it's already taken
     if customer_update.phone_number and customer_update.phone_number != customer.phone_number:
-        existing = db.query(Customer).filter(Customer.phone_number == customer_update.phone_number).first()
+        existing = db.query(Customer).execution_options(tenant_unscoped=True).filter(Customer.phone_number == customer_update.phone_number).first()
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -380,6 +390,7 @@ def update_customer(
         setattr(customer, field, value)
     
     db.commit()
+    invalidate_company_cache(current_user, "customers")
     db.refresh(customer)
     
     # Log activity
@@ -542,6 +553,7 @@ def delete_customer(
         db.delete(customer)
         
         db.commit()
+        invalidate_company_cache(current_user, "customers", "repairs", "swaps", "sales", "product_sales", "pos_sales")
         
         print(f"✅ Customer deleted with cascade: {customer_details}")
         if deleted_records:
@@ -8,7 +8,12 @@ from datetime import datetime, timedelta
 from app.core.database import get_db
 from app.core.auth import get_current_user
 from app.core.permissions import can_view_analytics, can_manage_swaps, can_manage_repairs
-from app.core.company_filter import get_company_user_ids
+from app.core.company_filter import get_company_id, get_company_user_ids
+from app.core.company_metrics import PRODUCTS_HUB, REPAIRS_HUB, company_metrics
+from app.core.cache import cached_route
+from app.core.aggregates import aggregate, count_if, sum_if
+from app.core.fan_out import fan_out
+from app.core.time_windows import in_window, today_window
 from app.models.user import User, UserRole
 from app.models.swap import Swap, ResaleStatus
 from app.models.sale import Sale
@@ -23,7 +28,19 @@ from app.models.product import Product
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
+# Dashboard responses are cached per user and dropped by company-scoped writes
+# to any table the cards read (swaps and phone sales feed the hub totals)
+DASHBOARD_CACHE_ENTITIES = ["customers", "products", "product_sales", "pos_sales", "repairs", "pending_resales",
+                            "swaps", "sales", "users"]
+
+
 @router.get("/cards")
+@cached_route(
+    seconds=900,
+    entities=DASHBOARD_CACHE_ENTITIES,
+    should_cache=lambda result: result.get("status") == "success",  # Never "partial" (a metric query failed)
+    stale_seconds=900  # Serve up to 30 min old cards while refreshing in the background
+)
 def get_dashboard_cards(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -33,6 +50,7 @@ def get_dashboard_cards(
     """
     try:
         cards = []
+        failed_metrics = []
         
         # Basic role-based cards without complex queries
         if current_user.role in [UserRole.ADMIN, UserRole.SUPER_ADMIN]:
@@ -60,6 +78,7 @@ def get_dashboard_cards(
             # Manager/CEO cards - CLEAN ORGANIZED METRICS
             
             # Get company user IDs for filtering
+            company_id = get_company_id(current_user)
             try:
                 company_user_ids = get_company_user_ids(db, current_user)
                 if company_user_ids is None:
@@ -68,87 +87,92 @@ def get_dashboard_cards(
                 print(f"Error getting company user IDs: {e}")
                 company_user_ids = [current_user.id]
             
+            # The metrics below are independent of each other: run them concurrently
+            def staff_ids(session, role):
+                return [row.id for row in session.query(User.id).filter(
+                    User.parent_user_id == current_user.id,
+                    User.role == role
+                )]
+            
+            def shopkeeper_sales(session):
+                ids = staff_ids(session, UserRole.SHOP_KEEPER)
+                if not ids:
+                    return None
+                return session.query(ProductSale).filter(ProductSale.created_by_user_id.in_(ids)).count()
+            
+            def repairer_repairs(session):
+                ids = staff_ids(session, UserRole.REPAIRER)
+                if not ids:
+                    return None
+                return session.query(Repair).filter(Repair.staff_id.in_(ids)).count()
+            
+            metrics = fan_out(db, {
+                "today_revenue": lambda session: company_metrics(session, company_id, today_window())[PRODUCTS_HUB]["revenue"],
+                "customers": lambda session: session.query(Customer).filter(
+                    Customer.created_by_user_id.in_(company_user_ids)
+                ).count(),
+                # Available / low stock counts and stock value in one scan
+                "inventory": lambda session: aggregate(session, Product, {
+                    "available": count_if(),
+                    "low_stock": count_if(Product.quantity <= 5),
+                    "value": sum_if(Product.quantity * Product.selling_price),
+                }, Product.quantity > 0, Product.is_active == True, Product.created_by_user_id.in_(company_user_ids)),
+                # All-time hub totals from the daily rollup
+                "hubs": lambda session: company_metrics(session, company_id),
+                # Swapping Hub Profit (from pending resales)
+                "swapping_profit": lambda session: session.query(func.sum(PendingResale.profit_amount)).filter(
+                    PendingResale.attending_staff_id.in_(company_user_ids),
+                    PendingResale.incoming_phone_status == PhoneSaleStatus.SOLD
+                ).scalar() or 0.0,
+                "shopkeeper_sales": shopkeeper_sales,
+                "repairer_repairs": repairer_repairs,
+            }, label="dashboard cards")
+            # Cards of failed or timed-out queries are left out; the response says so
+            failed_metrics = sorted(metrics.failed)
+            
             # ========== CORE BUSINESS METRICS ==========
             
             # TODAY'S PERFORMANCE
-            try:
-                today = datetime.now().date()
-                today_sales = db.query(func.sum(ProductSale.total_amount)).filter(
-                    func.date(ProductSale.created_at) == today,
-                    ProductSale.created_by_user_id.in_(company_user_ids)
-                ).scalar() or 0.0
-                
+            if "today_revenue" in metrics:
                 cards.append({
                     "id": "today_revenue",
                     "title": "Today's Revenue",
-                    "value": f"₵{today_sales:.2f}",
+                    "value": f"₵{metrics['today_revenue']:.2f}",
                     "icon": "faMoneyBillWave",
                     "color": "green",
                     "visible_to": ["ceo", "manager"]
                 })
-            except Exception as e:
-                print(f"Error getting today's revenue: {e}")
             
             # TOTAL CUSTOMERS
-            try:
-                customer_count = db.query(Customer).filter(
-                    Customer.created_by_user_id.in_(company_user_ids)
-                ).count()
+            if "customers" in metrics:
                 cards.append({
                     "id": "total_customers",
                     "title": "Total Customers",
-                    "value": str(customer_count),
+                    "value": str(metrics["customers"]),
                     "icon": "faUsers",
                     "color": "blue",
                     "visible_to": ["ceo", "manager"]
                 })
-            except Exception as e:
-                print(f"Error getting customer count: {e}")
             
             # INVENTORY STATUS
-            try:
-                available_products = db.query(Product).filter(
-                    Product.quantity > 0,
-                    Product.is_active == True,
-                    Product.created_by_user_id.in_(company_user_ids)
-                ).count()
-                
-                low_stock_products = db.query(Product).filter(
-                    Product.quantity <= 5,
-                    Product.quantity > 0,
-                    Product.is_active == True,
-                    Product.created_by_user_id.in_(company_user_ids)
-                ).count()
-                
+            inventory = metrics.get("inventory")
+            if inventory is not None:
                 cards.append({
                     "id": "inventory_status",
                     "title": "Inventory Status",
-                    "value": f"{available_products} items",
-                    "subtitle": f"{low_stock_products} low stock",
+                    "value": f"{inventory['available']} items",
+                    "subtitle": f"{inventory['low_stock']} low stock",
                     "icon": "faBox",
-                    "color": "orange" if low_stock_products > 0 else "green",
+                    "color": "orange" if inventory["low_stock"] > 0 else "green",
                     "visible_to": ["ceo", "manager"]
                 })
-            except Exception as e:
-                print(f"Error getting inventory status: {e}")
             
             # ========== HUB PROFIT METRICS ==========
             
-            # PRODUCT HUB METRICS
-            try:
-                # Product Hub Revenue
-                product_hub_revenue = db.query(func.sum(ProductSale.total_amount)).filter(
-                    ProductSale.created_by_user_id.in_(company_user_ids)
-                ).scalar() or 0.0
-                
-                # Product Hub Cost
-                product_hub_cost = db.query(func.sum(ProductSale.quantity * Product.cost_price)).join(Product).filter(
-                    ProductSale.created_by_user_id.in_(company_user_ids)
-                ).scalar() or 0.0
-                
+            hub_totals = metrics.get("hubs")
+            if hub_totals is not None:
                 # Product Hub Profit
-                product_hub_profit = product_hub_revenue - product_hub_cost
-                
+                product_hub_profit = hub_totals[PRODUCTS_HUB]["profit"]
                 cards.append({
                     "id": "product_hub_profit",
                     "title": "Product Hub Profit",
@@ -158,33 +182,9 @@ def get_dashboard_cards(
                     "visible_to": ["ceo", "manager"]
                 })
                 
-            except Exception as e:
-                print(f"Error getting product hub metrics: {e}")
-            
-            # REPAIRER HUB METRICS
-            try:
-                # Repairer Hub Service Revenue
-                repairer_service_revenue = db.query(func.sum(Repair.cost)).filter(
-                    Repair.created_by_user_id.in_(company_user_ids),
-                    Repair.status.in_(['Completed', 'Delivered'])
-                ).scalar() or 0.0
-                
-                # Repairer Hub Items Revenue (from repair sales)
-                repairer_items_revenue = db.query(func.sum(RepairSale.unit_price * RepairSale.quantity)).join(Repair).filter(
-                    Repair.created_by_user_id.in_(company_user_ids)
-                ).scalar() or 0.0
-                
-                # Repairer Hub Items Cost
-                repairer_items_cost = db.query(func.sum(RepairSale.cost_price * RepairSale.quantity)).join(Repair).filter(
-                    Repair.created_by_user_id.in_(company_user_ids)
-                ).scalar() or 0.0
-                
-                # Repairer Hub Items Profit
-                repairer_items_profit = repairer_items_revenue - repairer_items_cost
-                
-                # Total Repairer Hub Profit (service is 100% profit + items profit)
-                repairer_total_profit = repairer_service_revenue + repairer_items_profit
-                
+                # Repairer Hub Profit: completed/delivered service revenue plus
+                # profit on items used in repairs (service is 100% profit)
+                repairer_total_profit = hub_totals[REPAIRS_HUB]["profit"]
                 cards.append({
                     "id": "repairer_hub_profit",
                     "title": "Repairer Hub Profit",
@@ -193,18 +193,10 @@ def get_dashboard_cards(
                     "color": "green" if repairer_total_profit >= 0 else "red",
                     "visible_to": ["ceo", "manager"]
                 })
-                
-            except Exception as e:
-                print(f"Error getting repairer hub metrics: {e}")
             
             # SWAPPING HUB METRICS
-            try:
-                # Swapping Hub Profit (from pending resales)
-                swapping_hub_profit = db.query(func.sum(PendingResale.profit_amount)).filter(
-                    PendingResale.attending_staff_id.in_(company_user_ids),
-                    PendingResale.incoming_phone_status == PhoneSaleStatus.SOLD
-                ).scalar() or 0.0
-                
+            if "swapping_profit" in metrics:
+                swapping_hub_profit = metrics["swapping_profit"]
                 cards.append({
                     "id": "swapping_hub_profit",
                     "title": "Swapping Hub Profit",
@@ -213,22 +205,12 @@ def get_dashboard_cards(
                     "color": "green" if swapping_hub_profit >= 0 else "red",
                     "visible_to": ["ceo", "manager"]
                 })
-                
-            except Exception as e:
-                print(f"Error getting swapping hub metrics: {e}")
             
             # ========== TOTAL SYSTEM METRICS ==========
             
-            # TOTAL SYSTEM PROFIT (All Hubs Combined)
-            try:
-                # Calculate total profit from all sources
-                total_system_profit = 0.0
-                
-                # Add all hub profits
-                total_system_profit += product_hub_profit
-                total_system_profit += repairer_total_profit
-                total_system_profit += swapping_hub_profit
-                
+            # TOTAL SYSTEM PROFIT (All Hubs Combined) - only when every hub loaded
+            if hub_totals is not None and "swapping_profit" in metrics:
+                total_system_profit = product_hub_profit + repairer_total_profit + swapping_hub_profit
                 cards.append({
                     "id": "total_system_profit",
                     "title": "Total System Profit",
@@ -237,86 +219,41 @@ def get_dashboard_cards(
                     "color": "green" if total_system_profit >= 0 else "red",
                     "visible_to": ["ceo", "manager"]
                 })
-                
-            except Exception as e:
-                print(f"Error getting total system profit: {e}")
             
-            # TOTAL INVENTORY VALUE
-            try:
-                # Total value of all products (phones + accessories)
-                total_product_value = db.query(func.sum(Product.quantity * Product.selling_price)).filter(
-                    Product.created_by_user_id.in_(company_user_ids),
-                    Product.is_active == True,
-                    Product.quantity > 0
-                ).scalar() or 0.0
-                
+            # TOTAL INVENTORY VALUE (phones + accessories)
+            if inventory is not None:
                 cards.append({
                     "id": "total_inventory_value",
                     "title": "Total Inventory Value",
-                    "value": f"₵{total_product_value:.2f}",
+                    "value": f"₵{inventory['value']:.2f}",
                     "icon": "faWarehouse",
                     "color": "blue",
                     "visible_to": ["ceo", "manager"]
                 })
-                
-            except Exception as e:
-                print(f"Error getting total inventory value: {e}")
             
             # ========== STAFF PERFORMANCE ==========
             
             # SHOPKEEPER PERFORMANCE
-            try:
-                # Get shopkeeper user IDs (staff with shop_keeper role)
-                shopkeeper_ids = db.query(User.id).filter(
-                    User.parent_user_id == current_user.id,
-                    User.role == UserRole.SHOP_KEEPER
-                ).all()
-                shopkeeper_ids = [s.id for s in shopkeeper_ids]
-                
-                if shopkeeper_ids:
-                    # Shopkeeper Sales Count
-                    shopkeeper_sales_count = db.query(ProductSale).filter(
-                        ProductSale.created_by_user_id.in_(shopkeeper_ids)
-                    ).count()
-                    
-                    cards.append({
-                        "id": "shopkeeper_performance",
-                        "title": "Shopkeeper Performance",
-                        "value": f"{shopkeeper_sales_count} sales",
-                        "icon": "faStore",
-                        "color": "purple",
-                        "visible_to": ["ceo", "manager"]
-                    })
-                
-            except Exception as e:
-                print(f"Error getting shopkeeper performance: {e}")
+            if metrics.get("shopkeeper_sales") is not None:
+                cards.append({
+                    "id": "shopkeeper_performance",
+                    "title": "Shopkeeper Performance",
+                    "value": f"{metrics['shopkeeper_sales']} sales",
+                    "icon": "faStore",
+                    "color": "purple",
+                    "visible_to": ["ceo", "manager"]
+                })
             
             # REPAIRER PERFORMANCE
-            try:
-                # Get repairer user IDs (staff with repairer role)
-                repairer_ids = db.query(User.id).filter(
-                    User.parent_user_id == current_user.id,
-                    User.role == UserRole.REPAIRER
-                ).all()
-                repairer_ids = [r.id for r in repairer_ids]
-                
-                if repairer_ids:
-                    # Repairer Repairs Count
-                    repairer_repairs_count = db.query(Repair).filter(
-                        Repair.staff_id.in_(repairer_ids)
-                    ).count()
-                    
-                    cards.append({
-                        "id": "repairer_performance",
-                        "title": "Repairer Performance",
-                        "value": f"{repairer_repairs_count} repairs",
-                        "icon": "faTools",
-                        "color": "orange",
-                        "visible_to": ["ceo", "manager"]
-                    })
-                
-            except Exception as e:
-                print(f"Error getting repairer performance: {e}")
+            if metrics.get("repairer_repairs") is not None:
+                cards.append({
+                    "id": "repairer_performance",
+                    "title": "Repairer Performance",
+                    "value": f"{metrics['repairer_repairs']} repairs",
+                    "icon": "faTools",
+                    "color": "orange",
+                    "visible_to": ["ceo", "manager"]
+                })
         
         elif current_user.role == UserRole.REPAIRER:
             # Repairer cards - REAL REPAIR METRICS
@@ -374,10 +311,10 @@ def get_dashboard_cards(
             
             # TODAY'S REPAIRS
             try:
-                today = datetime.now().date()
+                today = today_window()
                 today_repairs = db.query(Repair).filter(
                     Repair.staff_id == current_user.id,
-                    func.date(Repair.created_at) == today
+                    in_window(Repair.created_at, today)
                 ).count()
                 cards.append({
                     "id": "today_repairs",
@@ -411,9 +348,9 @@ def get_dashboard_cards(
             
             # TODAY'S SALES
             try:
-                today = datetime.now().date()
+                today = today_window()
                 today_sales = db.query(ProductSale).filter(
-                    func.date(ProductSale.created_at) == today,
+                    in_window(ProductSale.created_at, today),
                     ProductSale.created_by_user_id == current_user.id
                 ).count()
                 cards.append({
@@ -429,9 +366,9 @@ def get_dashboard_cards(
             
             # TODAY'S REVENUE
             try:
-                today = datetime.now().date()
+                today = today_window()
                 today_revenue = db.query(func.sum(ProductSale.total_amount)).filter(
-                    func.date(ProductSale.created_at) == today,
+                    in_window(ProductSale.created_at, today),
                     ProductSale.created_by_user_id == current_user.id
                 ).scalar() or 0.0
                 cards.append({
@@ -533,7 +470,8 @@ def get_dashboard_cards(
             "cards": cards,
             "user_role": current_user.role.value,
             "total_cards": len(cards),
-            "status": "success"
+            "status": "partial" if failed_metrics else "success",
+            "failed_metrics": failed_metrics
         }
         
     except Exception as e:
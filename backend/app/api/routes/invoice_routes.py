@@ -8,7 +8,6 @@ from typing import List
 from app.core.database import get_db
 from app.core.auth import get_current_user
 from app.core.invoice_generator import get_invoice_by_number, format_invoice_data, get_invoices_by_customer
-from app.core.pdf_generator import generate_invoice_pdf
 from app.models.user import User
 from app.models.invoice import Invoice
 
@@ -114,6 +113,7 @@ def download_invoice_pdf(
     invoice_data = format_invoice_data(invoice)
     
     # Generate PDF
+    from app.core.pdf_generator import generate_invoice_pdf  # reportlab loads on first download
     pdf_buffer = generate_invoice_pdf(invoice_data)
     
     # Return as streaming response
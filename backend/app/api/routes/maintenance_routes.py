@@ -29,6 +29,7 @@ from app.models.product import Product
 from app.models.product_sale import ProductSale
 from app.models.pending_resale import PendingResale
 from app.core.auth import get_current_active_admin, get_current_user
+from app.core.cache import clear_all_caches
 
 router = APIRouter(prefix="/maintenance", tags=["Maintenance"])
 
@@ -364,6 +365,7 @@ def clear_all_data(
         db.query(ActivityLog).delete()
         
         db.commit()
+        clear_all_caches()
         
         return {
             "success": True,
@@ -408,6 +410,7 @@ def clear_customers(
         # Step 5: Delete customers (now safe - phones.current_owner_id cleared)
         db.query(Customer).delete()
         db.commit()
+        clear_all_caches()
         
         return {
             "success": True,
@@ -447,6 +450,7 @@ def clear_phones(
         # Step 3: Delete phones
         db.query(Phone).delete()
         db.commit()
+        clear_all_caches()
         
         return {
             "success": True,
@@ -483,6 +487,7 @@ def clear_swaps(
         # Now delete swaps
         db.query(Swap).delete()
         db.commit()
+        clear_all_caches()
         
         return {
             "success": True,
@@ -516,6 +521,7 @@ def clear_sales(
         # Now delete sales
         db.query(Sale).delete()
         db.commit()
+        clear_all_caches()
         
         return {
             "success": True,
@@ -554,6 +560,7 @@ def clear_repairs(
         # Now delete repairs
         db.query(Repair).delete()
         db.commit()
+        clear_all_caches()
         
         return {
             "success": True,
@@ -656,6 +663,7 @@ def clear_pos_sales(
         ).delete()
         
         db.commit()
+        clear_all_caches()
         
         return {
             "success": True,
@@ -797,6 +805,7 @@ def clear_users(
         ).delete(synchronize_session=False)
         
         db.commit()
+        clear_all_caches()
         
         return {
             "success": True,
@@ -935,6 +944,7 @@ def clear_company_data(
         db.query(ActivityLog).filter(ActivityLog.user_id.in_(company_user_ids)).delete()
         
         db.commit()
+        clear_all_caches()
         
         return {
             "success": True,
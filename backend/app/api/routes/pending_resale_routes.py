@@ -9,6 +9,7 @@ from app.core.database import get_db
 from app.core.auth import get_current_user
 from app.core.permissions import can_manage_swaps, can_view_swaps
 from app.core.activity_logger import log_activity
+from app.core.company_filter import invalidate_company_cache
 from app.models.user import User
 from app.models.pending_resale import PendingResale, TransactionType, PhoneSaleStatus, ProfitStatus
 from app.models.phone import Phone, PhoneStatus
@@ -94,6 +95,7 @@ def create_pending_resale(
     )
     
     db.commit()
+    invalidate_company_cache(current_user, "pending_resales", "phones")
     db.refresh(new_resale)
     
     return new_resale
@@ -296,6 +298,7 @@ def mark_incoming_phone_sold(
     )
     
     db.commit()
+    invalidate_company_cache(current_user, "pending_resales", "phones")
     db.refresh(resale)
     
     return resale
@@ -348,6 +351,7 @@ def update_pending_resale(
     resale.updated_at = datetime.utcnow()
     
     db.commit()
+    invalidate_company_cache(current_user, "pending_resales")
     db.refresh(resale)
     
     return resale
@@ -385,6 +389,7 @@ def delete_pending_resale(
     
     db.delete(resale)
     db.commit()
+    invalidate_company_cache(current_user, "pending_resales")
     
     return None
 
@@ -9,7 +9,7 @@ from app.core.database import get_db
 from app.core.auth import get_current_user
 from app.core.permissions import can_create_phones, can_view_phones, can_manage_phones
 from app.core.activity_logger import log_activity
-from app.core.company_filter import get_company_user_ids
+from app.core.company_filter import get_company_user_ids, invalidate_company_cache
 from app.models.user import User, UserRole
 from app.models.phone import Phone
 from app.schemas.phone import PhoneCreate, PhoneUpdate, PhoneResponse
@@ -41,6 +41,7 @@ def add_phone(
     # Generate unique ID
     new_phone.generate_unique_id(db)
     db.commit()
+    invalidate_company_cache(current_user, "phones")
     db.refresh(new_phone)
     
     # Log activity
@@ -194,6 +195,7 @@ def update_phone(
         setattr(phone, field, value)
     
     db.commit()
+    invalidate_company_cache(current_user, "phones")
     db.refresh(phone)
     
     # Log activity
@@ -231,6 +233,7 @@ def toggle_availability(
     
     phone.is_available = is_available
     db.commit()
+    invalidate_company_cache(current_user, "phones")
     db.refresh(phone)
     return phone
 
@@ -317,6 +320,7 @@ def delete_phone(
         db.query(Phone).filter(Phone.id == phone_id).delete()
         
         db.commit()
+        invalidate_company_cache(current_user, "phones")
         
         # Log the cascade deletion
         log_activity(
@@ -418,6 +422,7 @@ def bulk_delete_phones(
             })
         
         db.commit()
+        invalidate_company_cache(current_user, "phones")
         
         # Log activity
         phone_names = [f"{p['brand']} {p['model']}" for p in deleted_phones]
@@ -32,8 +32,10 @@ def health_check():
     """
     Alternative health check endpoint
     """
+    from app.core.startup import startup_summary
     return {
         "status": "ok",
-        "service": "SwapSync API"
+        "service": "SwapSync API",
+        "startup": startup_summary()
     }
 
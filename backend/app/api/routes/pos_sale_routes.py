@@ -3,23 +3,34 @@ POS Sale API Routes - Point of Sale system for multi-item transactions
 Handles selling multiple products in a single transaction
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from pydantic import ValidationError
+from sqlalchemy import case, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.auth import get_current_user
+from app.middleware.idempotency import IdempotentRoute, idempotent
 from app.core.permissions import require_shopkeeper
 from app.models.pos_sale import POSSale, POSSaleItem
 from app.models.product_sale import ProductSale
 from app.models.product import Product, StockMovement
 from app.models.customer import Customer
 from app.models.user import User, UserRole
-from app.schemas.pos_sale import POSSaleCreate, POSSaleResponse, POSItemResponse, POSSaleSummary
+from app.schemas.pos_sale import (
+    POSSaleBatchCreate, POSSaleBatchEntry, POSSaleBatchResponse, POSSaleBatchResult,
+    POSSaleCreate, POSSaleResponse, POSItemResponse, POSSaleSummary,
+)
 from app.core.sms import get_sms_service, get_sms_sender_name
 from app.core.activity_logger import log_activity
+from app.core.company_filter import invalidate_company_cache
+from app.core.tenant import unscoped
+from app.core.time_windows import TimeWindow, in_window, local_today, range_window
 
-router = APIRouter(prefix="/pos-sales", tags=["POS Sales"])
+router = APIRouter(prefix="/pos-sales", tags=["POS Sales"], route_class=IdempotentRoute)
 
 
 def send_pos_receipt_sms_background(
@@ -90,94 +101,142 @@ def send_pos_receipt_sms_background(
         print(f"❌ Failed to send POS receipt SMS: {e}")
 
 
-@router.post("/", response_model=POSSaleResponse, status_code=status.HTTP_201_CREATED)
-def create_pos_sale(
-    sale: POSSaleCreate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """
-    Create a POS sale with multiple items in one transaction
-    Automatically reduces stock for all items and sends receipt
-    """
-    # Only shopkeepers can record sales
-    require_shopkeeper(current_user)
-    
-    # Verify customer if provided, or create/get walk-in customer
-    customer = None
-    actual_customer_id = sale.customer_id
-    
-    if not actual_customer_id:
-        # Create or get the default "Walk-In Customer" for sales without customer records
-        try:
-            # First, try to find existing walk-in customer
-            walk_in_customer = db.query(Customer).filter(
-                Customer.full_name == "Walk-In Customer"
-            ).first()
-            
-            if not walk_in_customer:
-                print("📝 Creating Walk-In Customer record...")
-                # Create the walk-in customer record
-                walk_in_customer = Customer(
-                    full_name="Walk-In Customer",
-                    phone_number="0000000000",
-                    email=None
-                )
-                db.add(walk_in_customer)
-                db.flush()  # Get the ID
-                
-                # Generate unique ID
-                try:
-                    walk_in_customer.generate_unique_id(db)
-                    db.flush()
-                except Exception as e:
-                    print(f"⚠️ Could not generate unique_id: {e}")
-                    # Continue anyway, unique_id is nullable
-                
-                print(f"✅ Walk-In Customer created with ID: {walk_in_customer.id}")
-            
-            actual_customer_id = walk_in_customer.id
-            customer = walk_in_customer
-            
-        except Exception as e:
-            print(f"❌ Error creating/getting Walk-In Customer: {e}")
-            import traceback
-            traceback.print_exc()
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to create walk-in customer: {str(e)}"
-            )
-    else:
+def _resolve_customer_id(db: Session, sale: POSSaleCreate) -> int:
+    """Customer of the sale: the given one, or the shared "Walk-In Customer" record"""
+    if sale.customer_id:
         customer = db.query(Customer).filter(Customer.id == sale.customer_id).first()
         if not customer:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Customer with ID {sale.customer_id} not found"
             )
+        return customer.id
+    
+    # Create or get the default "Walk-In Customer" for sales without customer records
+    try:
+        # First, try to find existing walk-in customer (one shared record, owned by no company)
+        with unscoped(db):
+            walk_in_customer = db.query(Customer).filter(
+                Customer.full_name == "Walk-In Customer",
+                Customer.phone_number == "0000000000"
+            ).first()
+        
+        if not walk_in_customer:
+            print("📝 Creating Walk-In Customer record...")
+            # Create the walk-in customer record
+            walk_in_customer = Customer(
+                full_name="Walk-In Customer",
+                phone_number="0000000000",
+                email=None
+            )
+            db.add(walk_in_customer)
+            db.flush()  # Get the ID
+            
+            # Generate unique ID
+            try:
+                walk_in_customer.generate_unique_id(db)
+                db.flush()
+            except Exception as e:
+                print(f"⚠️ Could not generate unique_id: {e}")
+                # Continue anyway, unique_id is nullable
+            
+            print(f"✅ Walk-In Customer created with ID: {walk_in_customer.id}")
+        
+        return walk_in_customer.id
+    
+    except Exception as e:
+        print(f"❌ Error creating/getting Walk-In Customer: {e}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create walk-in customer: {str(e)}"
+        )
+
+
+def _take_stock(db: Session, products: Dict[int, Product], requested: Dict[int, int]):
+    """
+    Decrement stock for every cart product in one conditional UPDATE
+    
+    `quantity >= n` is re-checked by the database on the locked row, so when two
+    tills race for the last units only one of them gets them; the other gets a 422.
+    """
+    amount = case(requested, value=Product.id)
+    remaining = Product.quantity - amount
+    statement = (
+        update(Product)
+        .where(Product.id.in_(list(requested)), Product.quantity >= amount)
+        .values(quantity=remaining, is_available=case((remaining == 0, False), else_=Product.is_available))
+        .execution_options(synchronize_session=False)
+    )
+    returning = db.get_bind().dialect.update_returning
+    if returning:
+        statement = statement.returning(Product.id)
+    result = db.execute(statement)
+    taken = {row.id for row in result} if returning else None
+    
+    if (len(taken) if returning else result.rowcount) != len(requested):
+        short = [products[product_id].name for product_id in requested if taken is not None and product_id not in taken]
+        names = ", ".join(f"'{name}'" for name in short) or "some items"
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Insufficient stock for {names}: sold by another checkout just now"
+        )
+    
+    for product in products.values():
+        db.expire(product, ["quantity", "is_available", "updated_at"])
+
+
+def _insert_product_sales(db: Session, sale_rows: List[dict]) -> List[int]:
+    """Insert the cart's product sales; returns their ids in cart-line order"""
+    if db.get_bind().dialect.insert_executemany_returning:
+        # One INSERT. RETURNING promises no row order, so the ids are matched
+        # back by each row's line_number
+        inserted = db.execute(
+            insert(ProductSale).returning(ProductSale.id, ProductSale.line_number),
+            sale_rows
+        )
+        ids = {row.line_number: row.id for row in inserted}
+        return [ids[row["line_number"]] for row in sale_rows]
+    
+    # No multi-row INSERT .. RETURNING (e.g. SQLite < 3.35): let the ORM fetch the ids
+    product_sales = [ProductSale(**row) for row in sale_rows]
+    db.add_all(product_sales)
+    db.flush()
+    return [product_sale.id for product_sale in product_sales]
+
+
+def _checkout(db: Session, sale: POSSaleCreate, current_user: User,
+              sold_at: Optional[datetime] = None, client_id: Optional[str] = None) -> Tuple[POSSale, List[dict]]:
+    """
+    Validate a cart, take its stock and add the sale rows (the caller commits)
+    
+    Set-based, so the work barely grows with the cart: one IN query loads the
+    products, one conditional UPDATE takes the stock and the rows go out as
+    batched INSERTs. On HTTPException the caller must roll back, since stock of
+    other items may already be taken. Returns (POS sale, receipt items for SMS).
+    `sold_at` (naive UTC) dates a sale recorded earlier by an offline till.
+    """
+    actual_customer_id = _resolve_customer_id(db, sale)
     
     # Validate all products and check stock
-    products_data = []
+    product_ids = {item.product_id for item in sale.items}
+    products = {
+        product.id: product
+        for product in db.query(Product).filter(Product.id.in_(product_ids), Product.is_active == True)
+    }
+    
+    requested: Dict[int, int] = {}
     subtotal = 0.0
     
     for item in sale.items:
-        product = db.query(Product).filter(
-            Product.id == item.product_id,
-            Product.is_active == True
-        ).first()
-        
+        product = products.get(item.product_id)
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Product with ID {item.product_id} not found or inactive"
             )
-        
-        # Check stock
-        if product.quantity < item.quantity:
-            raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail=f"Insufficient stock for '{product.name}'. Available: {product.quantity}, Requested: {item.quantity}"
-            )
+        requested[product.id] = requested.get(product.id, 0) + item.quantity
         
         # Calculate item subtotal
         item_subtotal = (item.unit_price * item.quantity) - item.discount_amount
@@ -189,12 +248,15 @@ def create_pos_sale(
             )
         
         subtotal += item_subtotal
-        
-        products_data.append({
-            'product': product,
-            'item': item,
-            'item_subtotal': item_subtotal
-        })
+    
+    # Check stock (the same product may be on several cart lines)
+    for product_id, quantity in requested.items():
+        product = products[product_id]
+        if product.quantity < quantity:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Insufficient stock for '{product.name}'. Available: {product.quantity}, Requested: {quantity}"
+            )
     
     # Calculate total amount
     total_amount = subtotal - sale.overall_discount
@@ -205,13 +267,17 @@ def create_pos_sale(
             detail="Total amount cannot be negative after discount"
         )
     
-    # Generate transaction ID
-    transaction_id = POSSale.generate_transaction_id(db)
+    # Reduce stock - atomically, before anything is written for the sale
+    _take_stock(db, products, requested)
+    
+    # Generate transaction ID (numbered on the day of the sale)
+    now = sold_at or datetime.utcnow()
+    transaction_id = POSSale.generate_transaction_id(db, day=local_today(now) if sold_at else None)
     
     # Create POS sale record
     db_pos_sale = POSSale(
         transaction_id=transaction_id,
-        customer_id=actual_customer_id,  # Use actual_customer_id instead of sale.customer_id
+        customer_id=actual_customer_id,
         customer_name=sale.customer_name,
         customer_phone=sale.customer_phone,
         customer_email=sale.customer_email,
@@ -222,72 +288,70 @@ def create_pos_sale(
         items_count=len(sale.items),
         total_quantity=sum(item.quantity for item in sale.items),
         notes=sale.notes,
-        created_by_user_id=current_user.id
+        client_id=client_id,
+        created_by_user_id=current_user.id,
+        created_at=now
     )
     
     db.add(db_pos_sale)
-    db.flush()  # Get the ID without committing
+    db.flush()  # Get the sale ID (and its stamped company_id)
+    
+    # Create individual product sales, in one INSERT where the database can return
+    # the ids. The bulk insert skips before_flush, so company_id is set here; the
+    # daily metrics pick the rows up from the statement's parameters
+    # (app/core/company_metrics.py).
+    sale_rows = [
+        {
+            "customer_id": actual_customer_id,
+            "product_id": item.product_id,
+            "quantity": item.quantity,
+            "unit_price": item.unit_price,
+            "discount_amount": item.discount_amount,
+            "total_amount": (item.unit_price * item.quantity) - item.discount_amount,
+            "line_number": line_number,
+            "customer_phone": sale.customer_phone,
+            "customer_email": sale.customer_email,
+            "created_by_user_id": current_user.id,
+            "company_id": db_pos_sale.company_id,
+            "created_at": now,
+        }
+        for line_number, item in enumerate(sale.items, start=1)
+    ]
+    product_sale_ids = _insert_product_sales(db, sale_rows)
     
-    # Create individual product sales and POS sale items
+    # POS sale items and stock movements need no IDs back: one executemany INSERT each
+    pos_items = []
+    movements = []
     sms_items = []
-    
-    for data in products_data:
-        product = data['product']
-        item = data['item']
-        item_subtotal = data['item_subtotal']
-        
-        # Create product sale record
-        db_product_sale = ProductSale(
-            customer_id=actual_customer_id,  # Use actual_customer_id instead of sale.customer_id
-            product_id=product.id,
-            quantity=item.quantity,
-            unit_price=item.unit_price,
-            discount_amount=item.discount_amount,
-            total_amount=item_subtotal,
-            customer_phone=sale.customer_phone,
-            customer_email=sale.customer_email,
-            created_by_user_id=current_user.id
-        )
-        db.add(db_product_sale)
-        db.flush()  # Get product_sale ID
-        
-        # Create POS sale item
-        db_pos_item = POSSaleItem(
-            pos_sale_id=db_pos_sale.id,
-            product_sale_id=db_product_sale.id,
-            product_id=product.id,
-            product_name=product.name,
-            product_brand=product.brand,
-            quantity=item.quantity,
-            unit_price=item.unit_price,
-            discount_amount=item.discount_amount,
-            subtotal=item_subtotal
-        )
-        db.add(db_pos_item)
-        
-        # Reduce stock
-        try:
-            product.reduce_stock(item.quantity)
-        except ValueError as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail=f"Stock error for '{product.name}': {str(e)}"
-            )
+    for item, sale_row, product_sale_id in zip(sale.items, sale_rows, product_sale_ids):
+        product = products[item.product_id]
+        item_subtotal = sale_row["total_amount"]
         
-        # Log stock movement
-        stock_movement = StockMovement(
-            product_id=product.id,
-            movement_type="sale",
-            quantity=-item.quantity,
-            unit_price=item.unit_price,
-            total_amount=item_subtotal,
-            reference_type="pos_sale",
-            reference_id=db_pos_sale.id,
-            notes=f"POS Sale {transaction_id}",
-            created_by_user_id=current_user.id
-        )
-        db.add(stock_movement)
+        pos_items.append({
+            "pos_sale_id": db_pos_sale.id,
+            "product_sale_id": product_sale_id,
+            "product_id": product.id,
+            "product_name": product.name,
+            "product_brand": product.brand,
+            "quantity": item.quantity,
+            "unit_price": item.unit_price,
+            "discount_amount": item.discount_amount,
+            "subtotal": item_subtotal,
+            "created_at": now,
+        })
+        movements.append({
+            "product_id": product.id,
+            "movement_type": "sale",
+            "quantity": -item.quantity,
+            "unit_price": item.unit_price,
+            "total_amount": item_subtotal,
+            "reference_type": "pos_sale",
+            "reference_id": db_pos_sale.id,
+            "notes": f"POS Sale {transaction_id}",
+            "created_by_user_id": current_user.id,
+            "company_id": db_pos_sale.company_id,
+            "created_at": now,
+        })
         
         # Prepare for SMS
         sms_items.append({
@@ -297,33 +361,68 @@ def create_pos_sale(
             'discount': item.discount_amount,
             'subtotal': item_subtotal
         })
+    db.execute(insert(POSSaleItem), pos_items)
+    db.execute(insert(StockMovement), movements)
     
-    # Commit all changes
-    db.commit()
-    db.refresh(db_pos_sale)
-    
-    # Get company name for SMS
+    return db_pos_sale, sms_items
+
+
+def _receipt_sender_name(current_user: User) -> str:
+    """SMS sender name of the seller's company"""
     manager_id = None
     if current_user.parent_user_id:
         manager_id = current_user.parent_user_id
     elif current_user.is_manager:
         manager_id = current_user.id
     
-    company_name = get_sms_sender_name(manager_id, "SwapSync")
-    
-    # Schedule SMS receipt in background
+    return get_sms_sender_name(manager_id, "SwapSync")
+
+
+def _schedule_receipt(background_tasks: BackgroundTasks, pos_sale: POSSale, sale: POSSaleCreate,
+                      sms_items: List[dict], company_name: str):
     background_tasks.add_task(
         send_pos_receipt_sms_background,
-        pos_sale_id=db_pos_sale.id,
+        pos_sale_id=pos_sale.id,
         customer_phone=sale.customer_phone,
         customer_name=sale.customer_name,
-        transaction_id=transaction_id,
+        transaction_id=pos_sale.transaction_id,
         items=sms_items,
-        subtotal=subtotal,
+        subtotal=pos_sale.subtotal,
         overall_discount=sale.overall_discount,
-        total_amount=total_amount,
+        total_amount=pos_sale.total_amount,
         company_name=company_name
     )
+
+
+@router.post("/", response_model=POSSaleResponse, status_code=status.HTTP_201_CREATED, dependencies=[idempotent()])
+def create_pos_sale(
+    sale: POSSaleCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Create a POS sale with multiple items in one transaction
+    Automatically reduces stock for all items and sends receipt
+    """
+    # Only shopkeepers can record sales
+    require_shopkeeper(current_user)
+    
+    try:
+        db_pos_sale, sms_items = _checkout(db, sale, current_user)
+    except HTTPException:
+        db.rollback()
+        raise
+    transaction_id = db_pos_sale.transaction_id
+    total_amount = db_pos_sale.total_amount
+    
+    # Commit all changes
+    db.commit()
+    invalidate_company_cache(current_user, "pos_sales", "product_sales", "products", "customers")
+    db.refresh(db_pos_sale)
+    
+    # Schedule SMS receipt in background
+    _schedule_receipt(background_tasks, db_pos_sale, sale, sms_items, _receipt_sender_name(current_user))
     
     # Log activity
     log_activity(
@@ -338,6 +437,152 @@ def create_pos_sale(
     return db_pos_sale
 
 
+def _begin_outer_transaction(db: Session):
+    """
+    Open the request's transaction before any SAVEPOINT
+    pysqlite only issues BEGIN before a write, so a SAVEPOINT emitted first would
+    start (and its RELEASE commit) a transaction of its own on SQLite. IMMEDIATE
+    also takes the write lock up front instead of upgrading mid-batch.
+    """
+    connection = db.connection()
+    if connection.dialect.name == "sqlite" and not connection.connection.dbapi_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def _synced_at(client_time: Optional[datetime]) -> Optional[datetime]:
+    """
+    Till timestamp as naive UTC, never later than now (till clocks drift)
+    Timestamps older than POS_SYNC_MAX_AGE_HOURS are rejected rather than
+    backdating a sale into reports that have already been read
+    """
+    if client_time is None:
+        return None
+    if client_time.tzinfo is not None:
+        client_time = client_time.astimezone(timezone.utc).replace(tzinfo=None)
+    now = datetime.utcnow()
+    if client_time < now - timedelta(hours=settings.POS_SYNC_MAX_AGE_HOURS):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"created_at is more than {settings.POS_SYNC_MAX_AGE_HOURS} hours old"
+        )
+    return min(client_time, now)
+
+
+def _validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" if e["loc"] else e["msg"]
+        for e in error.errors()
+    )
+
+
+@router.post("/batch", response_model=POSSaleBatchResponse)
+def sync_pos_sales(
+    batch: POSSaleBatchCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Record POS sales a till queued while offline, in one request and one transaction
+    
+    Each sale goes through the same checkout as POST /pos-sales/ inside its own
+    savepoint, so one that fails (invalid, out of stock, unknown product) is
+    reported and skipped without undoing the others. Sales whose client_id was
+    synced before come back as duplicates with their recorded IDs, so a batch
+    whose response was lost can simply be sent again.
+    """
+    # Only shopkeepers can record sales
+    require_shopkeeper(current_user)
+    
+    results: List[POSSaleBatchResult] = []
+    entries: List[Tuple[int, POSSaleBatchEntry]] = []
+    for index, raw in enumerate(batch.sales):
+        try:
+            entries.append((index, POSSaleBatchEntry.model_validate(raw)))
+        except ValidationError as e:
+            results.append(POSSaleBatchResult(
+                index=index, client_id=str(raw.get("client_id") or "") or None, status="failed",
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, error=_validation_error(e)
+            ))
+    
+    # Sales recorded by an earlier attempt, in one query
+    _begin_outer_transaction(db)
+    recorded = {
+        client_id: (sale_id, transaction_id)
+        for client_id, sale_id, transaction_id in db.query(
+            POSSale.client_id, POSSale.id, POSSale.transaction_id
+        ).filter(POSSale.client_id.in_({entry.client_id for _, entry in entries}))
+    }
+    
+    created = []
+    for index, entry in entries:
+        if entry.client_id in recorded:
+            sale_id, transaction_id = recorded[entry.client_id]
+            results.append(POSSaleBatchResult(index=index, client_id=entry.client_id, status="duplicate",
+                                              id=sale_id, transaction_id=transaction_id))
+            continue
+        try:
+            with db.begin_nested():
+                pos_sale, sms_items = _checkout(db, entry, current_user, sold_at=_synced_at(entry.created_at),
+                                                client_id=entry.client_id)
+        except HTTPException as e:
+            results.append(POSSaleBatchResult(index=index, client_id=entry.client_id, status="failed",
+                                              status_code=e.status_code, error=str(e.detail)))
+            continue
+        except IntegrityError:
+            # The same sale committed by a concurrent sync of this batch
+            results.append(POSSaleBatchResult(
+                index=index, client_id=entry.client_id, status="failed", status_code=status.HTTP_409_CONFLICT,
+                error="A sale with this client_id is being recorded by another request"
+            ))
+            continue
+        recorded[entry.client_id] = (pos_sale.id, pos_sale.transaction_id)
+        created.append((entry, pos_sale, sms_items))
+        results.append(POSSaleBatchResult(index=index, client_id=entry.client_id, status="created",
+                                          id=pos_sale.id, transaction_id=pos_sale.transaction_id))
+    
+    db.commit()
+    results.sort(key=lambda result: result.index)
+    summary = POSSaleBatchResponse(
+        created=len(created),
+        duplicates=sum(1 for result in results if result.status == "duplicate"),
+        failed=sum(1 for result in results if result.status == "failed"),
+        results=results
+    )
+    
+    if created:
+        invalidate_company_cache(current_user, "pos_sales", "product_sales", "products", "customers")
+        if batch.send_receipts:
+            company_name = _receipt_sender_name(current_user)
+            for entry, pos_sale, sms_items in created:
+                _schedule_receipt(background_tasks, pos_sale, entry, sms_items, company_name)
+    
+    log_activity(
+        db=db,
+        user=current_user,
+        action="pos_sales_synced",
+        module="pos_sales",
+        details=f"Offline sync: {summary.created} POS sales recorded, {summary.duplicates} already synced, "
+                f"{summary.failed} failed"
+    )
+    
+    return summary
+
+
+def _date_range(start_date: Optional[str], end_date: Optional[str]) -> Optional[TimeWindow]:
+    """Shop-local YYYY-MM-DD filter dates (end date inclusive) as a created_at window"""
+    for name, value in (("start_date", start_date), ("end_date", end_date)):
+        if value:
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f"Invalid {name} format. Use YYYY-MM-DD"
+                )
+    return range_window(start_date, end_date)
+
+
 @router.get("/", response_model=List[POSSaleResponse])
 def list_pos_sales(
     skip: int = Query(0, ge=0),
@@ -360,35 +605,18 @@ def list_pos_sales(
             detail=f"Access denied. Your role ({current_user.role.value}) cannot view POS sales."
         )
     
-    # Start with base query
-    query = db.query(POSSale).order_by(POSSale.created_at.desc())
+    # Start with base query (items and creator loaded for the whole page, not per sale)
+    query = db.query(POSSale).options(
+        selectinload(POSSale.items),
+        selectinload(POSSale.created_by)
+    ).order_by(POSSale.created_at.desc())
     
     # Shop keepers only see their own sales
     if current_user.role == UserRole.SHOP_KEEPER:
         query = query.filter(POSSale.created_by_user_id == current_user.id)
     
     # Date filtering FIRST (before product check)
-    if start_date:
-        try:
-            start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
-            query = query.filter(POSSale.created_at >= start_datetime)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail="Invalid start_date format. Use YYYY-MM-DD"
-            )
-    
-    if end_date:
-        try:
-            end_datetime = datetime.strptime(end_date, "%Y-%m-%d")
-            # Add one day to include the entire end date
-            end_datetime = end_datetime.replace(hour=23, minute=59, second=59)
-            query = query.filter(POSSale.created_at <= end_datetime)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail="Invalid end_date format. Use YYYY-MM-DD"
-            )
+    query = query.filter(in_window(POSSale.created_at, _date_range(start_date, end_date)))
     
     sales = query.offset(skip).limit(limit).all()
     
@@ -416,35 +644,17 @@ def get_pos_sales_summary(
             detail=f"Access denied. Your role ({current_user.role.value}) cannot view POS summary."
         )
     
-    # Get POS sales with date filtering
-    query = db.query(POSSale)
+    # Get POS sales with date filtering (items and their products for profit in two extra queries)
+    query = db.query(POSSale).options(
+        selectinload(POSSale.items).selectinload(POSSaleItem.product)
+    )
     
     # Shop keepers only see their own sales
     if current_user.role == UserRole.SHOP_KEEPER:
         query = query.filter(POSSale.created_by_user_id == current_user.id)
     
     # Apply date filters
-    if start_date:
-        try:
-            start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
-            query = query.filter(POSSale.created_at >= start_datetime)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail="Invalid start_date format. Use YYYY-MM-DD"
-            )
-    
-    if end_date:
-        try:
-            end_datetime = datetime.strptime(end_date, "%Y-%m-%d")
-            # Add one day to include the entire end date
-            end_datetime = end_datetime.replace(hour=23, minute=59, second=59)
-            query = query.filter(POSSale.created_at <= end_datetime)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail="Invalid end_date format. Use YYYY-MM-DD"
-            )
+    query = query.filter(in_window(POSSale.created_at, _date_range(start_date, end_date)))
     
     sales = query.all()
     
@@ -663,6 +873,7 @@ def delete_pos_sale(
         # Delete the sale
         db.delete(sale)
         db.commit()
+        invalidate_company_cache(current_user, "pos_sales")
         
         return {
             "message": "POS sale deleted successfully",
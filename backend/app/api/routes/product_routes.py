@@ -13,7 +13,8 @@ from app.core.database import get_db
 from app.core.auth import get_current_user
 from app.core.permissions import require_manager, can_record_sales, is_manager_or_above
 from app.core.activity_logger import log_activity
-from app.core.company_filter import get_company_user_ids
+from app.core.company_filter import get_company_user_ids, invalidate_company_cache
+from app.middleware.etag import conditional_etag
 from app.models.product import Product, StockMovement
 from app.models.user import User, UserRole
 from app.models.category import Category
@@ -48,7 +49,7 @@ def create_product(
     
     # Check for duplicate SKU if provided
     if product.sku:
-        existing = db.query(Product).filter(Product.sku == product.sku).first()
+        existing = db.query(Product).execution_options(tenant_unscoped=True).filter(Product.sku == product.sku).first()
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -57,7 +58,7 @@ def create_product(
     
     # Check for duplicate barcode if provided
     if product.barcode:
-        existing = db.query(Product).filter(Product.barcode == product.barcode).first()
+        existing = db.query(Product).execution_options(tenant_unscoped=True).filter(Product.barcode == product.barcode).first()
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -66,7 +67,7 @@ def create_product(
     
     # Check for duplicate IMEI if provided (for phones)
     if product.imei:
-        existing = db.query(Product).filter(Product.imei == product.imei).first()
+        existing = db.query(Product).execution_options(tenant_unscoped=True).filter(Product.imei == product.imei).first()
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -86,6 +87,7 @@ def create_product(
     # Generate unique ID
     db_product.generate_unique_id(db)
     db.commit()
+    invalidate_company_cache(current_user, "products")
     db.refresh(db_product)
     
     # Log initial stock if quantity > 0
@@ -137,7 +139,7 @@ def create_phone_product(
         )
     
     # Check for duplicate IMEI (case-insensitive)
-    existing_phone = db.query(Product).filter(
+    existing_phone = db.query(Product).execution_options(tenant_unscoped=True).filter(
         func.lower(Product.imei) == func.lower(phone_product.imei)
     ).first()
     if existing_phone:
@@ -148,7 +150,7 @@ def create_phone_product(
     
     # Check for duplicate SKU if provided
     if phone_product.sku:
-        existing_product = db.query(Product).filter(Product.sku == phone_product.sku).first()
+        existing_product = db.query(Product).execution_options(tenant_unscoped=True).filter(Product.sku == phone_product.sku).first()
         if existing_product:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -202,6 +204,7 @@ def create_phone_product(
     
     # Commit everything in one transaction
     db.commit()
+    invalidate_company_cache(current_user, "products")
     db.refresh(db_phone_product)
     
     # Log activity (non-blocking)
@@ -221,7 +224,7 @@ def create_phone_product(
     return db_phone_product
 
 
-@router.get("/init-data")
+@router.get("/init-data", dependencies=[conditional_etag("products", "categories")])
 def get_products_init_data(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -273,7 +276,7 @@ def get_products_init_data(
     }
 
 
-@router.get("/", response_model=List[ProductResponse])
+@router.get("/", response_model=List[ProductResponse], dependencies=[conditional_etag("products", "categories")])
 def list_products(
     category_id: Optional[int] = Query(None, description="Filter by category"),
     brand: Optional[str] = Query(None, description="Filter by brand"),
@@ -522,7 +525,7 @@ def update_product(
     
     # Check for duplicate SKU if being updated
     if "sku" in update_data and update_data["sku"]:
-        existing = db.query(Product).filter(
+        existing = db.query(Product).execution_options(tenant_unscoped=True).filter(
             Product.sku == update_data["sku"],
             Product.id != product_id
         ).first()
@@ -534,7 +537,7 @@ def update_product(
     
     # Check for duplicate barcode if being updated
     if "barcode" in update_data and update_data["barcode"]:
-        existing = db.query(Product).filter(
+        existing = db.query(Product).execution_options(tenant_unscoped=True).filter(
             Product.barcode == update_data["barcode"],
             Product.id != product_id
         ).first()
@@ -550,6 +553,7 @@ def update_product(
     product.updated_at = datetime.utcnow()
     
     db.commit()
+    invalidate_company_cache(current_user, "products")
     db.refresh(product)
     
     # Log activity
@@ -612,6 +616,7 @@ def adjust_stock(
     
     db.add(stock_movement)
     db.commit()
+    invalidate_company_cache(current_user, "products")
     db.refresh(product)
     
     return product
@@ -690,6 +695,7 @@ def delete_product(
         db.delete(product)
         
         db.commit()
+        invalidate_company_cache(current_user, "products", "pos_sales", "product_sales")
         
         # Log activity
         log_activity(
@@ -788,6 +794,7 @@ def bulk_delete_products(
             total_deleted_sales += len(affected_sale_ids)
         
         db.commit()
+        invalidate_company_cache(current_user, "products")
         
         # Log activity
         log_activity(
@@ -3,12 +3,13 @@ Product Sale API Routes
 Handles selling products (earbuds, chargers, batteries, etc.)
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager, selectinload
 from typing import List
 from datetime import datetime
 
 from app.core.database import get_db
 from app.core.auth import get_current_user
+from app.middleware.idempotency import IdempotentRoute, idempotent
 from app.core.permissions import require_shopkeeper
 from app.models.product_sale import ProductSale
 from app.models.product import Product, StockMovement
@@ -17,8 +18,9 @@ from app.models.user import User
 from app.schemas.product_sale import ProductSaleCreate, ProductSaleResponse, ProductSaleSummary
 from app.core.sms import get_sms_service
 from app.core.activity_logger import log_activity
+from app.core.company_filter import invalidate_company_cache
 
-router = APIRouter(prefix="/product-sales", tags=["Product Sales"])
+router = APIRouter(prefix="/product-sales", tags=["Product Sales"], route_class=IdempotentRoute)
 
 
 def send_product_sale_sms_background(
@@ -79,7 +81,7 @@ def send_product_sale_sms_background(
         print(f"❌ Failed to send SMS receipt in background: {e}")
 
 
-@router.post("/", response_model=ProductSaleResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=ProductSaleResponse, status_code=status.HTTP_201_CREATED, dependencies=[idempotent()])
 def create_product_sale(
     sale: ProductSaleCreate,
     background_tasks: BackgroundTasks,
@@ -171,6 +173,7 @@ def create_product_sale(
     
     # Commit changes
     db.commit()
+    invalidate_company_cache(current_user, "product_sales", "products", "customers")
     db.refresh(db_sale)
     
     # Get company name using dynamic branding helper
@@ -227,8 +230,12 @@ def list_product_sales(
     List all product sales (Manager and Shopkeeper can view)
     Only shows sales for active products (excludes deleted products)
     """
+    # The joined product fills sale.product; creators load in one extra query
     sales = db.query(ProductSale).join(
         Product, ProductSale.product_id == Product.id
+    ).options(
+        contains_eager(ProductSale.product),
+        selectinload(ProductSale.created_by)
     ).filter(
         Product.is_active == True
     ).order_by(
@@ -249,6 +256,8 @@ def get_product_sales_summary(
     """
     sales = db.query(ProductSale).join(
         Product, ProductSale.product_id == Product.id
+    ).options(
+        contains_eager(ProductSale.product)
     ).filter(
         Product.is_active == True
     ).all()
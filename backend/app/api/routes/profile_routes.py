@@ -6,7 +6,8 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 from app.core.database import get_db
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, get_current_user_row
+from app.core.principal import invalidate_principal
 from app.core.activity_logger import log_activity
 from app.models.user import User
 
@@ -63,7 +64,7 @@ def get_my_profile(
 def update_my_profile(
     profile_update: ProfileUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_row)
 ):
     """
     Update current user's profile
@@ -97,7 +98,7 @@ def update_my_profile(
 def update_my_account(
     account_update: AccountUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_row)
 ):
     """
     Update current user's full account details
@@ -165,6 +166,7 @@ def update_my_account(
         )
     
     db.commit()
+    invalidate_principal(current_user.id)
     db.refresh(current_user)
     
     # Log activity
@@ -184,7 +186,7 @@ def update_my_account(
 def change_my_password(
     password_change: PasswordChange,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_row)
 ):
     """
     Change current user's password
@@ -230,7 +232,8 @@ def change_my_password(
         action="changed password",
         module="security",
         target_id=current_user.id,
-        details="User changed their own password"
+        details="User changed their own password",
+        sync=True
     )
     
     return {
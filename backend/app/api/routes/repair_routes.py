@@ -7,6 +7,7 @@ from typing import List
 from datetime import datetime
 from app.core.database import get_db
 from app.core.auth import get_current_user
+from app.middleware.idempotency import IdempotentRoute, idempotent
 from app.core.permissions import can_manage_repairs
 from app.core.activity_logger import log_activity
 from app.models.user import User
@@ -15,8 +16,9 @@ from app.models.customer import Customer
 from app.models.phone import Phone, PhoneStatus, PhoneOwnershipHistory
 from app.schemas.repair import RepairCreate, RepairUpdate, RepairResponse
 from app.core.sms import get_sms_service, send_repair_created_sms, send_repair_status_update_sms
+from app.core.company_filter import invalidate_company_cache
 
-router = APIRouter(prefix="/repairs", tags=["Repairs"])
+router = APIRouter(prefix="/repairs", tags=["Repairs"], route_class=IdempotentRoute)
 
 
 def send_repair_completion_sms_background(
@@ -75,7 +77,7 @@ def send_repair_completion_sms_background(
         print(f"❌ Failed to send repair completion SMS in background: {e}")
 
 
-@router.post("/", response_model=RepairResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=RepairResponse, status_code=status.HTTP_201_CREATED, dependencies=[idempotent()])
 def create_repair(
     repair: RepairCreate, 
     db: Session = Depends(get_db),
@@ -196,6 +198,7 @@ def create_repair(
             db.add(ownership_change)
     
     db.commit()
+    invalidate_company_cache(current_user, "repairs", "customers")
     db.refresh(new_repair)
     
     # Log activity
@@ -355,6 +358,7 @@ def update_repair(
             db.add(ownership_change)
     
     db.commit()
+    invalidate_company_cache(current_user, "repairs")
     db.refresh(repair)
     
     # Log activity
@@ -441,6 +445,7 @@ def update_repair_status(
         repair.delivery_notified = True
     
     db.commit()
+    invalidate_company_cache(current_user, "repairs")
     db.refresh(repair)
     
     # Log activity
@@ -625,6 +630,7 @@ def delete_repair(
     
     db.delete(repair)
     db.commit()
+    invalidate_company_cache(current_user, "repairs")
     
     # Log activity
     log_activity(
@@ -733,6 +739,7 @@ def add_repair_item(
         repair.cost = repair.service_cost + repair.items_cost
         
         db.commit()
+        invalidate_company_cache(current_user, "repairs", "products")
         db.refresh(repair_sale)
         db.refresh(product)
         db.refresh(repair)
@@ -877,6 +884,7 @@ def remove_repair_item(
         # Delete repair_sale
         db.delete(repair_sale)
         db.commit()
+        invalidate_company_cache(current_user, "repairs", "products")
         
         # Log activity
         log_activity(
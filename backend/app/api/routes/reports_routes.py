@@ -5,12 +5,12 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, or_
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional
 from app.core.database import get_db
 from app.core.auth import get_current_user
 from app.core.permissions import can_manage_swaps, can_manage_repairs, can_view_analytics
-from app.core.pdf_generator import generate_sales_report_pdf
+from app.core.time_windows import TimeWindow, in_window, last_days_window, today_window
 from app.models.user import User, UserRole
 from app.models.swap import Swap, ResaleStatus
 from app.models.sale import Sale
@@ -22,6 +22,17 @@ from app.models.invoice import Invoice
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
 
+def _report_window(period: str) -> Optional[TimeWindow]:
+    """Report period in shop-local days: today, the last 7 or 30 days, or None for all"""
+    if period == "today":
+        return today_window()
+    if period == "week":
+        return last_days_window(7)
+    if period == "month":
+        return last_days_window(30)
+    return None
+
+
 @router.get("/sales-swaps")
 def get_sales_swaps_report(
     start_date: Optional[str] = None,
@@ -52,7 +63,10 @@ def get_sales_swaps_report(
     
     # Get sales (direct purchases - no exchange)
     if transaction_type in [None, 'sale']:
-        sales_query = db.query(Sale).join(Customer).join(Phone)
+        # Customer and phone come from the join, not one lookup per sale
+        sales_query = db.query(Sale, Customer, Phone).join(
+            Customer, Sale.customer_id == Customer.id
+        ).join(Phone, Sale.phone_id == Phone.id)
         
         if start:
             sales_query = sales_query.filter(Sale.created_at >= start)
@@ -65,10 +79,7 @@ def get_sales_swaps_report(
         
         sales = sales_query.order_by(Sale.created_at.desc()).offset(skip).limit(limit).all()
         
-        for sale in sales:
-            customer = db.query(Customer).filter(Customer.id == sale.customer_id).first()
-            phone = db.query(Phone).filter(Phone.id == sale.phone_id).first()
-            
+        for sale, customer, phone in sales:
             profit = sale.amount_paid - (phone.value if phone else 0)
             
             results.append({
@@ -99,7 +110,9 @@ def get_sales_swaps_report(
     
     # Get swaps (exchange + cash)
     if transaction_type in [None, 'swap']:
-        swaps_query = db.query(Swap).join(Customer)
+        swaps_query = db.query(Swap, Customer, Phone).join(
+            Customer, Swap.customer_id == Customer.id
+        ).outerjoin(Phone, Swap.new_phone_id == Phone.id)
         
         if start:
             swaps_query = swaps_query.filter(Swap.created_at >= start)
@@ -112,10 +125,7 @@ def get_sales_swaps_report(
         
         swaps = swaps_query.order_by(Swap.created_at.desc()).offset(skip).limit(limit).all()
         
-        for swap in swaps:
-            customer = db.query(Customer).filter(Customer.id == swap.customer_id).first()
-            new_phone = db.query(Phone).filter(Phone.id == swap.new_phone_id).first()
-            
+        for swap, customer, new_phone in swaps:
             # Calculate profit (only if resold)
             if swap.resale_status == ResaleStatus.SOLD:
                 profit = swap.profit_or_loss
@@ -182,7 +192,9 @@ def get_pending_resales_report(
         )
     
     pending_swaps = (
-        db.query(Swap)
+        db.query(Swap, Customer, Phone)
+        .outerjoin(Customer, Swap.customer_id == Customer.id)
+        .outerjoin(Phone, Swap.new_phone_id == Phone.id)
         .filter(Swap.resale_status == ResaleStatus.PENDING)
         .filter(Swap.given_phone_value > 0)
         .order_by(Swap.created_at.desc())
@@ -192,10 +204,7 @@ def get_pending_resales_report(
     results = []
     total_pending_value = 0
     
-    for swap in pending_swaps:
-        customer = db.query(Customer).filter(Customer.id == swap.customer_id).first()
-        new_phone = db.query(Phone).filter(Phone.id == swap.new_phone_id).first()
-        
+    for swap, customer, new_phone in pending_swaps:
         # Calculate expected profit if sold at original value
         expected_profit = swap.given_phone_value + swap.final_price - (new_phone.value if new_phone else 0)
         
@@ -241,47 +250,43 @@ def get_profit_summary_report(
         )
     
     # Calculate date range
-    now = datetime.utcnow()
-    if period == "today":
-        start_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    elif period == "week":
-        start_date = now - timedelta(days=7)
-    elif period == "month":
-        start_date = now - timedelta(days=30)
-    else:
-        start_date = None
-    
-    # Sales profit
-    sales_query = db.query(Sale).join(Phone)
-    if start_date:
-        sales_query = sales_query.filter(Sale.created_at >= start_date)
-    
-    sales = sales_query.all()
-    sales_profit = sum(sale.amount_paid - (db.query(Phone).filter(Phone.id == sale.phone_id).first().value if db.query(Phone).filter(Phone.id == sale.phone_id).first() else 0) for sale in sales)
+    window = _report_window(period)
+    
+    # Sales profit (amount paid minus the phone's value), aggregated in the database
+    sales_query = db.query(
+        func.count(Sale.id),
+        func.coalesce(func.sum(Sale.amount_paid - Phone.value), 0)
+    ).join(Phone, Sale.phone_id == Phone.id)
+    if window:
+        sales_query = sales_query.filter(in_window(Sale.created_at, window))
+    
+    sales_count, sales_profit = sales_query.one()
     
     # Swaps profit (only completed/sold)
-    swaps_query = db.query(Swap).filter(Swap.resale_status == ResaleStatus.SOLD)
-    if start_date:
-        swaps_query = swaps_query.filter(Swap.created_at >= start_date)
+    swaps_query = db.query(
+        func.count(Swap.id),
+        func.coalesce(func.sum(Swap.profit_or_loss), 0)
+    ).filter(Swap.resale_status == ResaleStatus.SOLD)
+    if window:
+        swaps_query = swaps_query.filter(in_window(Swap.created_at, window))
     
-    swaps = swaps_query.all()
-    swaps_profit = sum(swap.profit_or_loss for swap in swaps)
+    swaps_count, swaps_profit = swaps_query.one()
     
     # Repairs revenue
     repairs_query = db.query(Repair)
-    if start_date:
-        repairs_query = repairs_query.filter(Repair.created_at >= start_date)
+    if window:
+        repairs_query = repairs_query.filter(in_window(Repair.created_at, window))
     
     repairs_revenue = repairs_query.with_entities(func.sum(Repair.cost)).scalar() or 0
     
     # Total discounts given
     total_discounts = (
         db.query(func.sum(Swap.discount_amount)).filter(
-            Swap.created_at >= start_date if start_date else True
+            in_window(Swap.created_at, window)
         ).scalar() or 0
     ) + (
         db.query(func.sum(Sale.discount_amount)).filter(
-            Sale.created_at >= start_date if start_date else True
+            in_window(Sale.created_at, window)
         ).scalar() or 0
     )
     
@@ -296,8 +301,8 @@ def get_profit_summary_report(
             "total": round(total_profit, 2)
         },
         "transactions_count": {
-            "sales": len(sales),
-            "swaps": len(swaps),
+            "sales": sales_count,
+            "swaps": swaps_count,
             "repairs": repairs_query.count()
         },
         "discounts_given": round(total_discounts, 2),
@@ -322,20 +327,12 @@ def get_repair_analytics(
         )
     
     # Calculate date range
-    now = datetime.utcnow()
-    if period == "today":
-        start_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    elif period == "week":
-        start_date = now - timedelta(days=7)
-    elif period == "month":
-        start_date = now - timedelta(days=30)
-    else:
-        start_date = None
+    window = _report_window(period)
     
     # Query repairs
     repairs_query = db.query(Repair)
-    if start_date:
-        repairs_query = repairs_query.filter(Repair.created_at >= start_date)
+    if window:
+        repairs_query = repairs_query.filter(in_window(Repair.created_at, window))
     
     repairs = repairs_query.all()
     
@@ -501,6 +498,7 @@ def export_report_pdf(
     }
     
     # Generate PDF
+    from app.core.pdf_generator import generate_sales_report_pdf  # reportlab loads on first export
     pdf_buffer = generate_sales_report_pdf(transactions, filters)
     
     # Return as streaming response
@@ -11,6 +11,7 @@ from app.core.permissions import can_manage_swaps  # Sales use same permission a
 from app.core.invoice_generator import create_sale_invoice
 from app.core.activity_logger import log_activity
 from app.core.sms import send_sale_completion_sms
+from app.core.company_filter import invalidate_company_cache
 from app.models.user import User
 from app.models.sale import Sale
 from app.models.customer import Customer
@@ -110,6 +111,7 @@ def create_sale(
     )
     
     db.commit()
+    invalidate_company_cache(current_user, "sales", "phones", "customers")
     db.refresh(new_sale)
     
     # Send SMS receipt to customer
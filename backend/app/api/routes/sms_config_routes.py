@@ -162,7 +162,8 @@ def update_sms_config(
         user=current_user,
         action="updated SMS configuration",
         module="settings",
-        details=f"Arkasel: {'enabled' if config.get_arkasel_api_key() else 'disabled'}, Hubtel: {'enabled' if config.get_hubtel_client_id() else 'disabled'}"
+        details=f"Arkasel: {'enabled' if config.get_arkasel_api_key() else 'disabled'}, Hubtel: {'enabled' if config.get_hubtel_client_id() else 'disabled'}",
+        sync=True
     )
     
     sms_service = get_sms_service()
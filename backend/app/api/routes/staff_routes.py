@@ -2,12 +2,15 @@
 Staff Management Routes - For CEOs to manage their staff
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from app.core.database import get_db
 from app.core.auth import get_current_user, get_password_hash
 from app.core.activity_logger import get_staff_activities, get_all_activities, get_user_activities
+from app.core.company_filter import invalidate_company_cache
+from app.core.principal import invalidate_principal, invalidate_company_principals
 from app.models.user import User, UserRole
 from app.models.activity_log import ActivityLog
 from app.schemas.user import UserResponse
@@ -263,6 +266,8 @@ def update_user(
     user_to_update.is_active = 1 if update_data.is_active else 0
     
     db.commit()
+    invalidate_company_cache(current_user, "users")
+    invalidate_principal(user_id)
     db.refresh(user_to_update)
     
     return user_to_update
@@ -323,7 +328,8 @@ def reset_user_password(
         action=f"reset password for user {user_to_update.username}",
         module="users",
         target_id=user_to_update.id,
-        details=f"Password reset by admin {current_user.username}"
+        details=f"Password reset by admin {current_user.username}",
+        sync=True
     )
     
     return {
@@ -436,7 +442,8 @@ def delete_user(
                     action=f"cascade deleted staff member {staff_member.username}",
                     module="users",
                     target_id=staff_id,
-                    details=f"Staff member deleted as part of manager {deleted_username} deletion"
+                    details=f"Staff member deleted as part of manager {deleted_username} deletion",
+                    sync=True
                 )
             except Exception as e:
                 print(f"❌ Error deleting staff member {staff_member.id}: {e}")
@@ -500,6 +507,8 @@ def delete_user(
         # Delete user (will cascade to other related records based on model relationships)
         db.delete(user_to_delete)
         db.commit()
+        invalidate_company_cache(current_user, "users")
+        invalidate_principal(user_id)
     except Exception as e:
         db.rollback()
         print(f"❌ Error deleting user {user_id}: {e}")
@@ -516,7 +525,8 @@ def delete_user(
         action=f"deleted user {deleted_username}",
         module="users",
         target_id=user_id,
-        details=f"User deleted by admin {current_user.username}"
+        details=f"User deleted by admin {current_user.username}",
+        sync=True
     )
     
     return {
@@ -559,6 +569,8 @@ def lock_manager(
         s.is_active = 0
     
     db.commit()
+    invalidate_company_cache(current_user, "users")
+    invalidate_company_principals(manager_id)
     
     return {
         "message": f"Manager {manager.username} and {len(staff)} staff members locked",
@@ -600,6 +612,8 @@ def unlock_manager(
         s.is_active = 1
     
     db.commit()
+    invalidate_company_cache(current_user, "users")
+    invalidate_company_principals(manager_id)
     
     return {
         "message": f"Manager {manager.username} and {len(staff)} staff members unlocked",
@@ -627,16 +641,36 @@ def get_all_companies(
     # Get all managers
     managers = db.query(User).filter(User.role.in_([UserRole.MANAGER, UserRole.CEO])).all()
     
+    manager_ids = [manager.id for manager in managers]
+    
+    # Staff of every company in one query
+    staff_by_manager = {manager_id: [] for manager_id in manager_ids}
+    if manager_ids:
+        for s in db.query(User).filter(User.parent_user_id.in_(manager_ids)).all():
+            staff_by_manager[s.parent_user_id].append(s)
+    
+    # Latest 10 activities per company in one query (ranked within each company_id)
+    activities_by_manager = {manager_id: [] for manager_id in manager_ids}
+    if manager_ids:
+        ranked = db.query(
+            ActivityLog.id.label("id"),
+            func.row_number().over(
+                partition_by=ActivityLog.company_id,
+                order_by=ActivityLog.timestamp.desc()
+            ).label("rank")
+        ).filter(ActivityLog.company_id.in_(manager_ids)).subquery()
+        recent = db.query(ActivityLog).join(ranked, ranked.c.id == ActivityLog.id).filter(
+            ranked.c.rank <= 10
+        ).order_by(ActivityLog.timestamp.desc()).all()
+        for log in recent:
+            activities_by_manager[log.company_id].append(log)
+    
     companies = []
     for manager in managers:
-        # Get staff under this manager
-        staff = db.query(User).filter(User.parent_user_id == manager.id).all()
-        
-        # Get recent activities for this manager and their staff
-        all_user_ids = [manager.id] + [s.id for s in staff]
-        recent_activities = db.query(ActivityLog).filter(
-            ActivityLog.user_id.in_(all_user_ids)
-        ).order_by(ActivityLog.timestamp.desc()).limit(10).all()
+        staff = staff_by_manager[manager.id]
+        recent_activities = activities_by_manager[manager.id]
+        # Activity authors are the manager or their staff - no per-log user lookup
+        usernames = {manager.id: manager.username, **{s.id: s.username for s in staff}}
         
         companies.append({
             "manager": {
@@ -666,7 +700,7 @@ def get_all_companies(
             "recent_activities": [{
                 "id": log.id,
                 "user_id": log.user_id,
-                "username": log.user.username if log.user else "Unknown",
+                "username": usernames.get(log.user_id, "Unknown"),
                 "action": log.action,
                 "module": log.module,
                 "timestamp": log.timestamp.isoformat(),
@@ -890,7 +924,8 @@ def get_manager_business_stats(
         import logging
         logger = logging.getLogger(__name__)
         
-        from sqlalchemy import func
+        from app.core.aggregates import aggregate, count_if, sum_if
+        from app.core.fan_out import fan_out
         from app.models.customer import Customer
         from app.models.phone import Phone
         from app.models.swap import Swap
@@ -925,103 +960,39 @@ def get_manager_business_stats(
         
         logger.info(f"Manager {manager_id} has staff IDs: {staff_ids}")
         
-        # Get business statistics with error handling
-        try:
-            total_customers = db.query(Customer).filter(Customer.created_by_id.in_(staff_ids)).count()
-            logger.info(f"Total customers for manager {manager_id}: {total_customers}")
-        except Exception as e:
-            logger.error(f"Error fetching customers: {e}")
-            total_customers = 0
-            
-        try:
-            total_phones = db.query(Phone).filter(Phone.created_by_id.in_(staff_ids)).count()
-            logger.info(f"Total phones for manager {manager_id}: {total_phones}")
-        except Exception as e:
-            logger.error(f"Error fetching phones: {e}")
-            total_phones = 0
-            
-        try:
-            total_swaps = db.query(Swap).filter(Swap.staff_id.in_(staff_ids)).count()
-        except Exception as e:
-            total_swaps = 0
-            
-        try:
-            total_sales = db.query(Sale).filter(Sale.created_by_user_id.in_(staff_ids)).count()
-            logger.info(f"Total sales for manager {manager_id}: {total_sales}")
-        except Exception as e:
-            logger.error(f"Error fetching sales: {e}")
-            total_sales = 0
-            
-        try:
-            total_pos_sales = db.query(POSSale).filter(POSSale.created_by_user_id.in_(staff_ids)).count()
-            logger.info(f"Total POS sales for manager {manager_id}: {total_pos_sales}")
-        except Exception as e:
-            logger.error(f"Error fetching POS sales: {e}")
-            total_pos_sales = 0
-            
-        try:
-            total_repairs = db.query(Repair).filter(Repair.staff_id.in_(staff_ids)).count()
-        except Exception as e:
-            total_repairs = 0
+        # Independent aggregates, run concurrently; one that fails counts as 0
+        stats = fan_out(db, {
+            "customers": lambda session: session.query(Customer).filter(Customer.created_by_user_id.in_(staff_ids)).count(),
+            "phones": lambda session: session.query(Phone).filter(Phone.created_by_user_id.in_(staff_ids)).count(),
+            "swaps": lambda session: session.query(Swap).filter(Swap.company_id == manager_id).count(),
+            "sales": lambda session: aggregate(session, Sale, {
+                "count": count_if(), "revenue": sum_if(Sale.amount_paid),
+            }, Sale.created_by_user_id.in_(staff_ids)),
+            "pos_sales": lambda session: aggregate(session, POSSale, {
+                "count": count_if(), "revenue": sum_if(POSSale.total_amount),
+            }, POSSale.created_by_user_id.in_(staff_ids)),
+            "repairs": lambda session: aggregate(session, Repair, {
+                "count": count_if(),
+                "revenue": sum_if(Repair.cost, Repair.status.in_(['Completed', 'Delivered'])),
+            }, Repair.staff_id.in_(staff_ids)),
+        }, defaults={
+            "customers": 0, "phones": 0, "swaps": 0,
+            "sales": {"count": 0, "revenue": 0.0},
+            "pos_sales": {"count": 0, "revenue": 0.0},
+            "repairs": {"count": 0, "revenue": 0.0},
+        }, label=f"business stats for manager {manager_id}")
         
-        # Revenue calculations with error handling
-        try:
-            sales_revenue = db.query(func.sum(Sale.amount_paid)).filter(Sale.created_by_user_id.in_(staff_ids)).scalar() or 0.0
-            logger.info(f"Sales revenue for manager {manager_id}: {sales_revenue}")
-        except Exception as e:
-            logger.error(f"Error fetching sales revenue: {e}")
-            sales_revenue = 0.0
-            
-        try:
-            pos_sales_revenue = db.query(func.sum(POSSale.total_amount)).filter(POSSale.created_by_user_id.in_(staff_ids)).scalar() or 0.0
-            logger.info(f"POS sales revenue for manager {manager_id}: {pos_sales_revenue}")
-        except Exception as e:
-            logger.error(f"Error fetching POS sales revenue: {e}")
-            pos_sales_revenue = 0.0
-            
-        try:
-            repair_revenue = db.query(func.sum(Repair.cost)).filter(
-                Repair.staff_id.in_(staff_ids),
-                Repair.status.in_(['Completed', 'Delivered'])
-            ).scalar() or 0.0
-            logger.info(f"Repair revenue for manager {manager_id}: {repair_revenue}")
-        except Exception as e:
-            logger.error(f"Error fetching repair revenue: {e}")
-            repair_revenue = 0.0
-        
-        # If no staff found, try to get data directly for the manager
-        if not staff_ids or len(staff_ids) == 1:
-            logger.info(f"No staff found for manager {manager_id}, checking direct data...")
-            # Check if manager has direct data
-            direct_customers = db.query(Customer).filter(Customer.created_by_id == manager_id).count()
-            direct_phones = db.query(Phone).filter(Phone.created_by_id == manager_id).count()
-            direct_sales = db.query(Sale).filter(Sale.created_by_user_id == manager_id).count()
-            direct_repairs = db.query(Repair).filter(Repair.staff_id == manager_id).count()
-            
-            logger.info(f"Direct data for manager {manager_id}: customers={direct_customers}, phones={direct_phones}, sales={direct_sales}, repairs={direct_repairs}")
-            
-            # Use direct data if it's higher than staff data
-            if direct_customers > total_customers:
-                total_customers = direct_customers
-            if direct_phones > total_phones:
-                total_phones = direct_phones
-            if direct_sales > total_sales:
-                total_sales = direct_sales
-            if direct_repairs > total_repairs:
-                total_repairs = direct_repairs
-                
-            # Check direct POS sales
-            direct_pos_sales = db.query(POSSale).filter(POSSale.created_by_user_id == manager_id).count()
-            direct_pos_revenue = db.query(func.sum(POSSale.total_amount)).filter(POSSale.created_by_user_id == manager_id).scalar() or 0.0
-            
-            if direct_pos_sales > total_pos_sales:
-                total_pos_sales = direct_pos_sales
-            if direct_pos_revenue > pos_sales_revenue:
-                pos_sales_revenue = direct_pos_revenue
+        total_customers = stats["customers"]
+        total_phones = stats["phones"]
+        total_swaps = stats["swaps"]
+        total_repairs = stats["repairs"]["count"]
+        repair_revenue = stats["repairs"]["revenue"]
+        logger.info(f"Business stats for manager {manager_id}: customers={total_customers}, phones={total_phones}, "
+                    f"sales={stats['sales']['count']}, pos_sales={stats['pos_sales']['count']}, repairs={total_repairs}")
         
         # Combine all sales and revenue
-        total_all_sales = total_sales + total_pos_sales
-        total_all_revenue = sales_revenue + pos_sales_revenue
+        total_all_sales = stats["sales"]["count"] + stats["pos_sales"]["count"]
+        total_all_revenue = stats["sales"]["revenue"] + stats["pos_sales"]["revenue"]
         
         return {
             "manager_id": manager_id,
@@ -7,8 +7,9 @@ from typing import List
 from datetime import datetime
 from app.core.database import get_db
 from app.core.auth import get_current_user
+from app.middleware.idempotency import IdempotentRoute, idempotent
 from app.core.permissions import can_manage_swaps, can_view_swaps
-from app.core.company_filter import get_company_user_ids
+from app.core.company_filter import get_company_user_ids, invalidate_company_cache
 from app.core.invoice_generator import create_swap_invoice
 from app.core.activity_logger import log_activity
 from app.core.sms import send_swap_completion_sms
@@ -19,7 +20,7 @@ from app.models.phone import Phone, PhoneStatus, PhoneOwnershipHistory
 from app.models.pending_resale import PendingResale, TransactionType, PhoneSaleStatus, ProfitStatus
 from app.schemas.swap import SwapCreate, SwapResponse, SwapResaleUpdate
 
-router = APIRouter(prefix="/swaps", tags=["Swaps"])
+router = APIRouter(prefix="/swaps", tags=["Swaps"], route_class=IdempotentRoute)
 
 
 def send_swap_sms_background(
@@ -52,7 +53,7 @@ def send_swap_sms_background(
         print(f"❌ Failed to send swap SMS in background: {e}")
 
 
-@router.post("/", response_model=SwapResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=SwapResponse, status_code=status.HTTP_201_CREATED, dependencies=[idempotent()])
 def create_swap(
     swap: SwapCreate,
     background_tasks: BackgroundTasks,
@@ -240,6 +241,7 @@ def create_swap(
     )
     
     db.commit()
+    invalidate_company_cache(current_user, "swaps", "phones", "pending_resales", "customers")
     db.refresh(new_swap)
     
     # Determine manager for SMS branding
@@ -532,6 +534,7 @@ def update_resale(
     swap.profit_or_loss = total_recovered - original_phone_cost
     
     db.commit()
+    invalidate_company_cache(current_user, "swaps")
     db.refresh(swap)
     
     return swap
@@ -17,6 +17,7 @@ from app.models.sale import Sale
 from app.models.repair import Repair
 from app.models.product_sale import ProductSale
 from app.core.permissions import require_role
+from app.core.cache import clear_all_caches
 
 router = APIRouter(prefix="/system-cleanup", tags=["System Cleanup"])
 
@@ -86,6 +87,7 @@ async def delete_system_data(
             deleted_counts['product_sales'] = count
         
         db.commit()
+        clear_all_caches()
         
         return {
             'success': True,
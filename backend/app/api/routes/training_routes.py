@@ -6,14 +6,11 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
 from app.models.user import User, UserRole
 from app.core.auth import get_current_user
-from app.core.training_manuals import (
-    generate_shopkeeper_manual,
-    generate_manager_manual,
-    generate_repairer_manual
-)
 
 router = APIRouter(prefix="/training", tags=["Training"])
 
+# Manuals are built with reportlab, so app.core.training_manuals is imported on first download
+
 
 @router.get("/shopkeeper-manual")
 def download_shopkeeper_manual(
@@ -29,6 +26,7 @@ def download_shopkeeper_manual(
         )
     
     try:
+        from app.core.training_manuals import generate_shopkeeper_manual
         pdf_buffer = generate_shopkeeper_manual()
         
         return StreamingResponse(
@@ -59,6 +57,7 @@ def download_manager_manual(
         )
     
     try:
+        from app.core.training_manuals import generate_manager_manual
         pdf_buffer = generate_manager_manual()
         
         return StreamingResponse(
@@ -89,6 +88,7 @@ def download_repairer_manual(
         )
     
     try:
+        from app.core.training_manuals import generate_repairer_manual
         pdf_buffer = generate_repairer_manual()
         
         return StreamingResponse(
@@ -1,11 +1,296 @@
 """
 Activity logging utilities
+log_activity() hands entries to a buffered writer: a bounded in-process queue
+that a background thread drains in batches with one bulk INSERT each, so write
+endpoints no longer pay a second transaction for their activity line.
+
+- Audit-critical actions (resets, password changes, user deletions) pass
+  sync=True and are written and committed in the caller's session as before
+- A full buffer makes the caller wait up to settings.ACTIVITY_LOG_PUT_TIMEOUT
+  seconds for room (backpressure), then write synchronously
+- A log issued after the caller flushed or bulk-wrote in its open transaction
+  is held on the session and buffered from its after_commit; a rollback (or
+  closing without commit) drops it with the work it describes
+- Sessions with unsaved changes (the old commit saved them too), engines sharing
+  one connection (in-memory SQLite), ACTIVITY_LOG_ASYNC=false and serverless
+  functions (VERCEL set; they are frozen after the response) write synchronously
+- stop_activity_log_writer() (app shutdown) writes whatever is still buffered;
+  calls made after it write synchronously until start_activity_log_writer()
+  (app startup) enables buffering again
+
+Buffered rows are dropped only on hard process death (no clean shutdown).
 """
+from sqlalchemy import event, insert
 from sqlalchemy.orm import Session
 from app.models.activity_log import ActivityLog
 from app.models.user import User
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional, Tuple
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_FLUSH_INTERVAL = 0.5  # seconds the writer waits to fill a batch
+DEFAULT_PUT_TIMEOUT = 0.5  # seconds a caller waits for room in a full buffer
+
+_STOP = object()
+PENDING_KEY = "activity_logs_pending"  # session.info: (bind, row) waiting for the caller's commit
+WRITES_KEY = "activity_logs_after_writes"  # session.info: the open transaction has written rows
+
+
+def _settings():
+    from app.core.config import settings
+    return settings
+
+
+class ActivityLogWriter:
+    """Bounded buffer of activity rows written by one background thread in batches"""
+
+    def __init__(self, max_size: int = DEFAULT_QUEUE_SIZE, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.failed = 0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    def submit(self, bind, row: dict, timeout: float = DEFAULT_PUT_TIMEOUT) -> bool:
+        """Buffer one row for `bind`; False when the buffer stayed full for `timeout` seconds or the writer stopped"""
+        if not self._start():
+            return False
+        try:
+            self.queue.put((bind, row), timeout=timeout)
+            return True
+        except queue.Full:
+            return False
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything buffered so far is written; False on timeout"""
+        deadline = time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stop(self, timeout: float = 10.0):
+        """Write what is buffered and stop the thread; later submits are refused"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stopped = True
+        if thread is None:
+            return
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.error("❌ Activity log writer did not drain before shutdown")
+            return
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.error("❌ Activity log writer did not finish before shutdown")
+            return
+        # Rows a caller queued behind the stop marker
+        leftover = []
+        while True:
+            try:
+                leftover.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if leftover:
+            self._write(leftover)
+            for _ in leftover:
+                self.queue.task_done()
+
+    def stats(self) -> dict:
+        return {"buffered": self.queue.qsize(), "written": self.written, "failed": self.failed}
+
+    def _start(self) -> bool:
+        with self._lock:
+            if self._stopped:
+                return False
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="activity-log-writer", daemon=True)
+                self._thread.start()
+            return True
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            batch: List[Tuple[object, dict]] = []
+            stopping = item is _STOP
+            if not stopping:
+                batch.append(item)
+            # Collect more rows for up to flush_interval so busy periods share one INSERT
+            deadline = time.monotonic() + self.flush_interval
+            while not stopping and len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+            try:
+                self._write(batch)
+            finally:
+                for _ in range(len(batch) + (1 if stopping else 0)):
+                    self.queue.task_done()
+            if stopping:
+                return
+
+    def _write(self, batch: List[Tuple[object, dict]]):
+        by_bind = {}
+        for bind, row in batch:
+            by_bind.setdefault(bind, []).append(row)
+        for bind, rows in by_bind.items():
+            db = Session(bind=bind)
+            try:
+                db.execute(insert(ActivityLog), rows)
+                db.commit()
+                self.written += len(rows)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"❌ Activity log batch of {len(rows)} failed ({e}); writing rows one by one")
+                self._write_each(db, rows)
+            finally:
+                db.close()
+
+    def _write_each(self, db: Session, rows: List[dict]):
+        for row in rows:
+            try:
+                db.execute(insert(ActivityLog), [row])
+                db.commit()
+                self.written += 1
+            except Exception as e:
+                db.rollback()
+                self.failed += 1
+                logger.error(f"❌ Dropped activity log '{row.get('action')}' by user {row.get('user_id')}: {e}")
+
+
+_writer: Optional[ActivityLogWriter] = None
+_writer_lock = threading.Lock()
+# Set by stop_activity_log_writer(); nothing would flush a writer started afterwards
+_stopped = False
+
+
+def start_activity_log_writer():
+    """Buffer activity logs again after a stop (app startup); the thread starts on the first log"""
+    global _stopped
+    with _writer_lock:
+        _stopped = False
+
+
+def get_activity_log_writer() -> Optional[ActivityLogWriter]:
+    """The shared writer, or None once it has been stopped"""
+    global _writer
+    with _writer_lock:
+        if _stopped:
+            return None
+        if _writer is None:
+            settings = _settings()
+            _writer = ActivityLogWriter(
+                max_size=getattr(settings, "ACTIVITY_LOG_QUEUE_SIZE", DEFAULT_QUEUE_SIZE),
+                batch_size=getattr(settings, "ACTIVITY_LOG_BATCH_SIZE", DEFAULT_BATCH_SIZE),
+                flush_interval=getattr(settings, "ACTIVITY_LOG_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL),
+            )
+        return _writer
+
+
+def flush_activity_logs(timeout: float = 5.0) -> bool:
+    """Wait until buffered activity logs are written (tests, maintenance)"""
+    return _writer.flush(timeout) if _writer is not None else True
+
+
+def stop_activity_log_writer(timeout: float = 10.0):
+    """Write buffered activity logs and stop the writer thread (app shutdown)"""
+    global _writer, _stopped
+    with _writer_lock:
+        writer, _writer = _writer, None
+        _stopped = True
+    if writer is not None:
+        writer.stop(timeout)
+        logger.info(f"✅ Activity log writer stopped ({writer.written} written, {writer.failed} failed)")
+
+
+def _submit(bind, row: dict) -> bool:
+    """Hand one row to the shared writer; False when the caller has to write it"""
+    timeout = getattr(_settings(), "ACTIVITY_LOG_PUT_TIMEOUT", DEFAULT_PUT_TIMEOUT)
+    writer = get_activity_log_writer()
+    if writer is not None and writer.submit(bind, row, timeout):
+        return True
+    if writer is not None:
+        logger.warning("⚠️ Activity log buffer full; writing synchronously")
+    return False
+
+
+def _write_now(bind, row: dict):
+    """Write one row in its own session (the caller's has already committed)"""
+    db = Session(bind=bind)
+    try:
+        db.execute(insert(ActivityLog), [row])
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Dropped activity log '{row.get('action')}' by user {row.get('user_id')}: {e}")
+    finally:
+        db.close()
+
+
+# ---------- session hooks ----------
+
+@event.listens_for(Session, "after_flush")
+def _note_flush(session, flush_context):
+    session.info[WRITES_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_bulk_write(execute_state):
+    if execute_state.is_insert or execute_state.is_update or execute_state.is_delete:
+        execute_state.session.info[WRITES_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _submit_pending(session):
+    """The caller's work is committed; its activity rows can go to the writer now"""
+    if session.in_nested_transaction():
+        return  # A savepoint was released; the outer transaction can still roll back
+    for bind, row in session.info.pop(PENDING_KEY, ()):
+        if not _submit(bind, row):
+            _write_now(bind, row)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending(session, transaction):
+    if transaction.parent is None:
+        # Committed rows were already handed over; anything left was rolled back
+        session.info.pop(PENDING_KEY, None)
+        session.info.pop(WRITES_KEY, None)
+
+
+def _buffered(db: Session) -> bool:
+    """Whether this call may go through the writer instead of the caller's session"""
+    from app.core.fan_out import can_run_concurrently
+    if _stopped or not getattr(_settings(), "ACTIVITY_LOG_ASYNC", True):
+        return False
+    # Serverless functions are frozen after the response, stranding the writer thread
+    if os.getenv("VERCEL"):
+        return False
+    # The old commit also saved the caller's pending changes; keep doing that for them
+    if db.new or db.dirty or db.deleted:
+        return False
+    return can_run_concurrently(db)
 
 
 def log_activity(
@@ -15,7 +300,8 @@ def log_activity(
     module: str,
     target_id: Optional[int] = None,
     details: Optional[str] = None,
-    ip_address: Optional[str] = None
+    ip_address: Optional[str] = None,
+    sync: bool = False
 ):
     """
     Log a user activity
@@ -28,8 +314,12 @@ def log_activity(
         target_id: ID of affected record (optional)
         details: Additional details as JSON string (optional)
         ip_address: User's IP address (optional)
+        sync: Write and commit now in `db` (audit-critical actions); otherwise buffered,
+              after `db` commits if it has flushed work
+    
+    Returns the ActivityLog row when written synchronously, None when buffered.
     """
-    log_entry = ActivityLog(
+    fields = dict(
         user_id=user.id,
         action=action,
         module=module,
@@ -39,6 +329,19 @@ def log_activity(
         ip_address=ip_address
     )
     
+    if not sync and _buffered(db):
+        from app.core.company_filter import get_company_id
+        # The bulk INSERT skips before_flush, so company_id is set here
+        row = dict(fields, company_id=get_company_id(user))
+        if db.info.get(WRITES_KEY):
+            # Flushed but uncommitted work may still roll back; the row waits for the commit
+            db.info.setdefault(PENDING_KEY, []).append((db.get_bind(), row))
+            return None
+        if _submit(db.get_bind(), row):
+            return None
+    
+    log_entry = ActivityLog(**fields)
+    
     db.add(log_entry)
     db.commit()
     
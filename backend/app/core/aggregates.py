@@ -0,0 +1,87 @@
+"""
+Single-pass conditional aggregation
+Evaluates several COUNT/SUM metrics over one table in a single statement, e.g.
+total repairs, repairs per status and repair revenue in one scan instead of
+one query each:
+
+    totals = aggregate(db, Repair, {
+        "total": count_if(),
+        "pending": count_if(Repair.status == "Pending"),
+        "revenue": sum_if(Repair.cost),
+    }, Repair.company_id == company_id)
+
+Conditions compile to `COUNT(*) FILTER (WHERE ...)` on PostgreSQL and SQLite
+3.30+, and to `SUM(CASE WHEN ... END)` on other databases.
+"""
+from typing import Dict, Iterable, NamedTuple, Tuple
+import sqlite3
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+# SQLite learned aggregate FILTER clauses in 3.30
+SQLITE_FILTER_VERSION = (3, 30, 0)
+
+
+class Metric(NamedTuple):
+    """One aggregate: COUNT(*) or SUM(column), optionally only over rows matching `where`"""
+    kind: str
+    column: object = None
+    where: object = None
+
+
+def count_if(where=None) -> Metric:
+    """COUNT(*) of rows matching `where` (all rows when None)"""
+    return Metric("count", None, where)
+
+
+def sum_if(column, where=None) -> Metric:
+    """SUM(column) over rows matching `where` (0 when there are none)"""
+    return Metric("sum", column, where)
+
+
+def supports_filter_clause(dialect) -> bool:
+    if dialect.name == "postgresql":
+        return True
+    if dialect.name == "sqlite":
+        return sqlite3.sqlite_version_info >= SQLITE_FILTER_VERSION
+    return False
+
+
+def metric_column(metric: Metric, use_filter: bool):
+    """SQL expression for one metric"""
+    if metric.kind == "count":
+        if metric.where is None:
+            return func.count()
+        if use_filter:
+            return func.count().filter(metric.where)
+        return func.coalesce(func.sum(case((metric.where, 1), else_=0)), 0)
+
+    if metric.where is None:
+        total = func.sum(metric.column)
+    elif use_filter:
+        total = func.sum(metric.column).filter(metric.where)
+    else:
+        total = func.sum(case((metric.where, metric.column), else_=None))
+    return func.coalesce(total, 0)
+
+
+def aggregate(db: Session, model, metrics: Dict[str, Metric], *criteria,
+              joins: Iterable[Tuple[object, object]] = (), outerjoins: Iterable[Tuple[object, object]] = ()) -> dict:
+    """
+    Evaluate all metrics over `model` rows matching `criteria` in one statement
+    `joins`/`outerjoins` are (target, onclause) pairs for metrics or criteria on other tables.
+    """
+    use_filter = supports_filter_clause(db.get_bind().dialect)
+    names = list(metrics)
+    query = db.query(*[metric_column(metrics[name], use_filter).label(name) for name in names]).select_from(model)
+    for target, onclause in joins:
+        query = query.join(target, onclause)
+    for target, onclause in outerjoins:
+        query = query.outerjoin(target, onclause)
+    row = query.filter(*criteria).one()
+    return {
+        name: float(value or 0) if metrics[name].kind == "sum" else int(value or 0)
+        for name, value in zip(names, row)
+    }
+
@@ -9,8 +9,13 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.principal import Principal, principal_cache_key, get_cached_principal, cache_principal
+from app.core.tenant import scope_session
 from app.models.user import User, UserRole
 from app.schemas.user import TokenData
+import logging
+
+logger = logging.getLogger(__name__)
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
@@ -63,12 +68,25 @@ def verify_token(token: str, credentials_exception):
         raise credentials_exception
 
 
+def _decode_token(token: str, credentials_exception) -> dict:
+    """Decode a JWT, raising credentials_exception if invalid or missing a subject"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+    if payload.get("sub") is None:
+        raise credentials_exception
+    return payload
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> User:
+) -> Principal:
     """
     Get current authenticated user from JWT token
+    Returns a lightweight Principal served from the principal cache when possible;
+    it behaves like the User row (other attributes load the row on first use).
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -77,25 +95,44 @@ async def get_current_user(
     )
     
     try:
-        token_data = verify_token(token, credentials_exception)
+        payload = _decode_token(token, credentials_exception)
     except HTTPException as e:
-        print(f"❌ Token verification failed: {e.detail}")
+        logger.info(f"❌ Token verification failed: {e.detail}")
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == token_data.username).first()
-    if user is None:
-        print(f"❌ User not found: {token_data.username}")
-        raise credentials_exception
+    username = payload["sub"]
+    session_id = payload.get("session_id")
+    cache_key = principal_cache_key(token, username, session_id)
+    
+    principal = get_cached_principal(cache_key, db)
+    if principal is None:
+        user = db.query(User).filter(User.username == username).first()
+        if user is None:
+            logger.info(f"❌ User not found: {username}")
+            raise credentials_exception
+        principal = Principal.from_user(user, db, session_id)
+        cache_principal(cache_key, principal)
     
-    if not user.is_active:
-        print(f"❌ User inactive: {user.username}")
+    if not principal.is_active:
+        logger.info(f"❌ User inactive: {principal.username}")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is inactive"
         )
     
-    print(f"✅ Authenticated: {user.username} (Role: {user.role.value})")
-    return user
+    # Every ORM select in this request is limited to the user's company
+    scope_session(db, principal)
+    return principal
+
+
+async def get_current_user_row(
+    current_user: Principal = Depends(get_current_user)
+) -> User:
+    """
+    Get the full User row of the current user
+    For routes that modify or refresh the current user's own record
+    """
+    return current_user.load()
 
 
 async def get_current_active_admin(
@@ -1,18 +1,421 @@
 """
 Simple in-memory caching for Railway $5 plan optimization
 Reduces database queries for frequently accessed data like dashboard stats
+
+All cached data lives in one shared backend so a long-running worker cannot
+grow without limit. Both `timed_cache` (this module) and `cache_response`
+(app/middleware/caching.py) are built on top of it. By default that is the
+bounded in-process CacheEngine (LRU + TTL); with CACHE_BACKEND=redis every
+worker shares one Redis-protocol server (see app/core/cache_backend.py).
 """
-from functools import lru_cache, wraps
-from datetime import datetime, timedelta
-from typing import Callable, Any, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from datetime import datetime
+from typing import Callable, Any, Optional, Dict, Tuple, Iterable, Set, Union
+import asyncio
 import hashlib
+import inspect
 import json
+import logging
+import sys
+import threading
+import time
+import uuid
+
+from app.core.cache_backend import CacheBackend, _MISSING, build_redis_backend
+from app.core.single_flight import single_flight, SingleFlightTimeout
+from app.core.tenant import scope_session
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the shared engine (overridable via settings)
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024  # 32 MB
+DEFAULT_SWEEP_INTERVAL = 60  # seconds
+
+
+class _CacheEntry:
+    """A single cached value with its expiry and estimated size"""
+    __slots__ = ("value", "expires_at", "stale_until", "size", "created_at", "tags")
+
+    def __init__(self, value: Any, expires_at: float, size: int, tags: Iterable[str] = (), stale_until: Optional[float] = None):
+        self.value = value
+        self.expires_at = expires_at
+        # Past expires_at the value is stale; it may still be served until stale_until
+        self.stale_until = expires_at if stale_until is None else stale_until
+        self.size = size
+        self.created_at = time.time()
+        self.tags = frozenset(tags)
+
+
+class _Namespace:
+    """LRU-ordered entries for one namespace plus its own limits"""
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+
+
+class CacheEngine(CacheBackend):
+    """
+    Bounded in-process cache with LRU eviction and TTL expiry
+
+    - Global limits: max_entries / max_bytes across all namespaces
+    - Per-namespace limits: configure_namespace("dashboard", max_entries=200)
+    - Expired entries are dropped on read and by a background sweeper thread
+    - Entries can carry tags; invalidate_tags() drops every entry with a tag
+    - Entries set with stale_ttl stay readable through lookup_stale() after expiry
+    """
+    name = "memory"
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        sweep_interval: int = DEFAULT_SWEEP_INTERVAL
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self._namespaces: Dict[str, _Namespace] = {}
+        # Global LRU order across namespaces: (namespace, key) -> None
+        self._lru: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self._total_bytes = 0
+        # Tag index: tag -> {(namespace, key), ...}
+        self._tags: Dict[str, Set[Tuple[str, str]]] = {}
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+        self._stale_hits = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    # ---------- configuration ----------
+
+    def configure_namespace(self, namespace: str, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        """Set (or update) the limits for a namespace"""
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            if ns is None:
+                self._namespaces[namespace] = _Namespace(max_entries, max_bytes)
+            else:
+                ns.max_entries = max_entries
+                ns.max_bytes = max_bytes
+                self._enforce_namespace_limits(namespace, ns)
+
+    def _get_namespace(self, namespace: str) -> _Namespace:
+        ns = self._namespaces.get(namespace)
+        if ns is None:
+            ns = _Namespace()
+            self._namespaces[namespace] = ns
+        return ns
+
+    # ---------- core operations ----------
+
+    def lookup(self, namespace: str, key: str) -> Any:
+        """Return the cached value or the module-level _MISSING sentinel"""
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            entry = ns.entries.get(key) if ns else None
+            if entry is None:
+                self._misses += 1
+                return _MISSING
+
+            now = time.time()
+            if entry.expires_at <= now:
+                # Stale entries are kept for lookup_stale() until their ceiling
+                if entry.stale_until <= now:
+                    self._remove(namespace, key)
+                    self._expirations += 1
+                self._misses += 1
+                return _MISSING
+
+            self._touch(namespace, ns, key)
+            self._hits += 1
+            return entry.value
+
+    def lookup_stale(self, namespace: str, key: str) -> Any:
+        """(value, created_at, is_stale) while within the staleness ceiling, else _MISSING"""
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            entry = ns.entries.get(key) if ns else None
+            now = time.time()
+            if entry is None or entry.stale_until <= now:
+                if entry is not None:
+                    self._remove(namespace, key)
+                    self._expirations += 1
+                self._misses += 1
+                return _MISSING
+
+            self._touch(namespace, ns, key)
+            is_stale = entry.expires_at <= now
+            if is_stale:
+                self._stale_hits += 1
+            else:
+                self._hits += 1
+            return entry.value, entry.created_at, is_stale
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float, tags: Iterable[str] = (), stale_ttl: float = 0):
+        """Store a value for ttl seconds (+ stale_ttl servable as stale), evicting LRU entries if needed"""
+        size = _estimate_size(value)
+
+        with self._lock:
+            # A single value bigger than the whole budget is never cached
+            ns = self._get_namespace(namespace)
+            byte_limits = [b for b in (self.max_bytes, ns.max_bytes) if b]
+            if byte_limits and size > min(byte_limits):
+                return
+
+            if key in ns.entries:
+                self._remove(namespace, key)
+
+            expires_at = time.time() + ttl
+            entry = _CacheEntry(value, expires_at, size, tags, stale_until=expires_at + stale_ttl)
+            ns.entries[key] = entry
+            ns.total_bytes += size
+            self._lru[(namespace, key)] = None
+            self._total_bytes += size
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add((namespace, key))
+
+            self._enforce_namespace_limits(namespace, ns)
+            self._enforce_global_limits()
+
+        self._ensure_sweeper()
+
+    def delete(self, namespace: str, key: str) -> bool:
+        """Remove a single entry; returns True if it existed"""
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            if ns and key in ns.entries:
+                self._remove(namespace, key)
+                return True
+            return False
+
+    def delete_matching(self, predicate: Callable[[str, str], bool]) -> int:
+        """Remove every (namespace, key) for which predicate returns True"""
+        with self._lock:
+            doomed = [nk for nk in self._lru if predicate(*nk)]
+            for namespace, key in doomed:
+                self._remove(namespace, key)
+            return len(doomed)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Remove every entry carrying any of the given tags"""
+        with self._lock:
+            doomed = set()
+            for tag in tags:
+                doomed.update(self._tags.get(tag, ()))
+            for namespace, key in doomed:
+                self._remove(namespace, key)
+            return len(doomed)
+
+    def clear(self, namespace: Optional[str] = None):
+        """Clear one namespace, or everything when namespace is None"""
+        with self._lock:
+            if namespace is None:
+                for ns in self._namespaces.values():
+                    ns.entries.clear()
+                    ns.total_bytes = 0
+                self._lru.clear()
+                self._tags.clear()
+                self._total_bytes = 0
+                return
 
-# Simple time-based cache storage
-_cache_store = {}
+            ns = self._namespaces.get(namespace)
+            if ns:
+                for key in list(ns.entries.keys()):
+                    self._remove(namespace, key)
 
+    def sweep_expired(self) -> int:
+        """Drop all expired entries; returns how many were removed"""
+        now = time.time()
+        with self._lock:
+            expired = [
+                (name, key)
+                for name, ns in self._namespaces.items()
+                for key, entry in ns.entries.items()
+                if entry.stale_until <= now
+            ]
+            for namespace, key in expired:
+                self._remove(namespace, key)
+            self._expirations += len(expired)
+        return len(expired)
 
-def timed_cache(seconds: int = 300):
+    def stats(self) -> dict:
+        """Cache statistics for monitoring endpoints"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "backend": self.name,
+                "total_entries": len(self._lru),
+                "total_bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "stale_hits": self._stale_hits,
+                "hit_rate": round(self._hits / total, 3) if total else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "tags": len(self._tags),
+                "namespaces": {
+                    name: {
+                        "entries": len(ns.entries),
+                        "bytes": ns.total_bytes,
+                        "max_entries": ns.max_entries,
+                        "max_bytes": ns.max_bytes
+                    }
+                    for name, ns in self._namespaces.items()
+                    if ns.entries or ns.max_entries or ns.max_bytes
+                }
+            }
+
+    def entry_created_at(self, namespace: str, key: str) -> Optional[float]:
+        """Timestamp at which the current entry was stored (None if missing)"""
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            entry = ns.entries.get(key) if ns else None
+            return entry.created_at if entry else None
+
+    # ---------- eviction helpers (caller holds the lock) ----------
+
+    def _touch(self, namespace: str, ns: _Namespace, key: str):
+        """Mark an entry as most recently used"""
+        ns.entries.move_to_end(key)
+        self._lru.move_to_end((namespace, key))
+
+    def _remove(self, namespace: str, key: str):
+        ns = self._namespaces[namespace]
+        entry = ns.entries.pop(key)
+        ns.total_bytes -= entry.size
+        self._total_bytes -= entry.size
+        self._lru.pop((namespace, key), None)
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard((namespace, key))
+                if not keys:
+                    del self._tags[tag]
+
+    def _enforce_namespace_limits(self, namespace: str, ns: _Namespace):
+        while ns.entries and (
+            (ns.max_entries is not None and len(ns.entries) > ns.max_entries) or
+            (ns.max_bytes is not None and ns.total_bytes > ns.max_bytes)
+        ):
+            oldest_key = next(iter(ns.entries))
+            self._remove(namespace, oldest_key)
+            self._evictions += 1
+
+    def _enforce_global_limits(self):
+        while self._lru and (
+            (self.max_entries and len(self._lru) > self.max_entries) or
+            (self.max_bytes and self._total_bytes > self.max_bytes)
+        ):
+            namespace, key = next(iter(self._lru))
+            self._remove(namespace, key)
+            self._evictions += 1
+
+    # ---------- background sweeper ----------
+
+    def _ensure_sweeper(self):
+        """Start the expiry sweeper thread on first write"""
+        if self._sweeper is not None or not self.sweep_interval:
+            return
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._stop_event.clear()
+            self._sweeper = threading.Thread(
+                target=self._sweep_loop,
+                name="cache-sweeper",
+                daemon=True
+            )
+            self._sweeper.start()
+
+    def _sweep_loop(self):
+        while not self._stop_event.wait(self.sweep_interval):
+            try:
+                removed = self.sweep_expired()
+                if removed:
+                    logger.debug(f"🧹 Cache sweep removed {removed} expired entries")
+            except Exception as e:
+                logger.warning(f"⚠️ Cache sweep failed: {e}")
+
+    def stop_sweeper(self):
+        """Stop the background sweeper (called on application shutdown)"""
+        thread = self._sweeper
+        if thread is None:
+            return
+        self._stop_event.set()
+        thread.join(timeout=5)
+        self._sweeper = None
+
+
+def _estimate_size(value: Any) -> int:
+    """
+    Approximate footprint of a cached value in bytes
+
+    Walks containers and counts string/bytes payloads by length instead of
+    serializing the value, so set() doesn't pay for a second json.dumps.
+    """
+    size = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, (str, bytes, bytearray)):
+            size += len(item)
+        elif isinstance(item, dict):
+            size += 2
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            size += 2
+            stack.extend(item)
+        elif item is None or isinstance(item, (bool, int, float)):
+            size += 8
+        else:
+            size += sys.getsizeof(item)
+    return size
+
+
+def _build_engine() -> CacheBackend:
+    """Pick the cache backend from settings (in-process unless CACHE_BACKEND=redis)"""
+    try:
+        from app.core.config import settings
+    except Exception:
+        return CacheEngine()
+
+    if settings.CACHE_BACKEND.lower() == "redis":
+        try:
+            backend = build_redis_backend(
+                settings.CACHE_REDIS_URL,
+                serializer=settings.CACHE_SERIALIZER,
+                prefix=settings.CACHE_KEY_PREFIX,
+                max_value_bytes=settings.CACHE_MAX_BYTES
+            )
+            logger.info(f"✅ Shared Redis cache enabled ({backend.serializer.name} payloads)")
+            return backend
+        except Exception as e:
+            logger.warning(f"⚠️ Redis cache unavailable ({e}) - using in-process cache")
+
+    return CacheEngine(
+        max_entries=settings.CACHE_MAX_ENTRIES,
+        max_bytes=settings.CACHE_MAX_BYTES,
+        sweep_interval=settings.CACHE_SWEEP_INTERVAL
+    )
+
+
+# Shared backend used by every cache decorator in the app
+cache_engine = _build_engine()
+
+
+def timed_cache(seconds: int = 300, namespace: Optional[str] = None, max_entries: Optional[int] = None):
     """
     Decorator for caching function results with expiration
     
@@ -24,28 +427,33 @@ def timed_cache(seconds: int = 300):
     
     Args:
         seconds: Cache lifetime in seconds (default 5 minutes)
+        namespace: Cache namespace (default: the function name)
+        max_entries: Optional per-namespace entry limit
     """
     def decorator(func: Callable) -> Callable:
+        ns = namespace or func.__name__
+        if max_entries is not None:
+            cache_engine.configure_namespace(ns, max_entries=max_entries)
+
         @wraps(func)
         def wrapper(*args, **kwargs):
             # Create cache key from function name and arguments
             cache_key = f"{func.__name__}:{_make_cache_key(args, kwargs)}"
             
             # Check if cached result exists and is not expired
-            if cache_key in _cache_store:
-                cached_result, expiry_time = _cache_store[cache_key]
-                if datetime.utcnow() < expiry_time:
-                    return cached_result
+            cached_result = cache_engine.lookup(ns, cache_key)
+            if cached_result is not _MISSING:
+                return cached_result
             
             # Execute function and cache result
             result = func(*args, **kwargs)
-            expiry_time = datetime.utcnow() + timedelta(seconds=seconds)
-            _cache_store[cache_key] = (result, expiry_time)
+            cache_engine.set(ns, cache_key, result, seconds)
             
             return result
         
         # Add cache clearing method
-        wrapper.clear_cache = lambda: _cache_store.clear()
+        wrapper.clear_cache = lambda: cache_engine.clear(ns)
+        wrapper.cache_namespace = ns
         
         return wrapper
     return decorator
@@ -83,11 +491,388 @@ def _is_unpicklable(obj: Any) -> bool:
 
 def clear_all_caches():
     """Clear all cached data - useful after data updates"""
-    _cache_store.clear()
+    cache_engine.clear()
+
+
+def get_cache_stats() -> dict:
+    """Statistics for the shared cache backend"""
+    return cache_engine.stats()
+
+
+# ---------- company-scoped tags ----------
+#
+# Entries are tagged "<scope>:<entity>" where scope is the company (manager) id,
+# or "all" for super admin views that span every company. Every entry also
+# carries "*:<entity>" so a system-wide write can drop it regardless of scope.
+#
+# Entity types: customers, products, pos_sales, product_sales, sales, repairs,
+# swaps, phones, pending_resales, categories, brands, users
+
+def company_cache_tags(company_id: Optional[int], entities: Iterable[str]) -> list:
+    """Tags for an entry computed from the given entity types of one company"""
+    scope = "all" if company_id is None else str(company_id)
+    tags = []
+    for entity in entities:
+        tags.append(f"{scope}:{entity}")
+        tags.append(f"*:{entity}")
+    return tags
+
+
+def invalidate_company_tags(company_id: Optional[int], entities: Iterable[str]) -> int:
+    """
+    Drop cached entries of one company that depend on the given entity types
+    Admin-wide ("all") views are dropped too since they include every company.
+    With company_id=None the entities are invalidated for every company.
+    """
+    entities = tuple(entities)
+    tags = []
+    for entity in entities:
+        if company_id is None:
+            tags.append(f"*:{entity}")
+        else:
+            tags.append(f"{company_id}:{entity}")
+            tags.append(f"all:{entity}")
+    bump_company_versions(company_id, entities)
+    return cache_engine.invalidate_tags(tags)
+
+
+# ---------- company data versions ----------
+#
+# Each (scope, entity) has an opaque version token that changes on every write,
+# using the same scopes as the tags above. Tokens are random rather than counters
+# so a token lost to eviction or a restart is simply re-seeded with a new value;
+# that can only make a version look changed, never unchanged.
+
+VERSIONS_NAMESPACE = "versions"
+VERSION_TTL = 7 * 24 * 3600  # 1 week
+
+
+def _version_token(scope: str, entity: str) -> str:
+    key = f"{scope}:{entity}"
+    token = cache_engine.lookup(VERSIONS_NAMESPACE, key)
+    if token is _MISSING:
+        token = uuid.uuid4().hex[:12]
+        cache_engine.set(VERSIONS_NAMESPACE, key, token, VERSION_TTL)
+    return token
+
+
+def bump_company_versions(company_id: Optional[int], entities: Iterable[str]):
+    """Change the data version of one company (or every company when None)"""
+    scopes = ["*"] if company_id is None else [str(company_id), "all"]
+    for entity in entities:
+        for scope in scopes:
+            cache_engine.set(VERSIONS_NAMESPACE, f"{scope}:{entity}", uuid.uuid4().hex[:12], VERSION_TTL)
+
+
+def get_company_version(company_id: Optional[int], entities: Iterable[str]) -> str:
+    """
+    Current data version of these entity types for one company
+    company_id=None is the admin-wide view across all companies.
+    """
+    scope = "all" if company_id is None else str(company_id)
+    return ".".join(
+        f"{_version_token('*', entity)}{_version_token(scope, entity)}"
+        for entity in entities
+    )
+
+
+def _still_computing():
+    """503 for a request that gave up waiting on an identical in-flight request"""
+    from fastapi import HTTPException, status
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="These statistics are still being computed, please retry shortly",
+        headers={"Retry-After": "5"}
+    )
+
+
+def _set_age_headers(response, cache_status: str, created_at: float):
+    """Expose how old the served value is so the frontend can show "as of" times"""
+    if response is None:
+        return
+    response.headers["X-Cache"] = cache_status
+    response.headers["Age"] = str(max(0, int(time.time() - created_at)))
+    response.headers["X-Cache-Generated-At"] = datetime.utcfromtimestamp(created_at).isoformat() + "Z"
+
+
+# ---------- background refresh (stale-while-revalidate) ----------
+
+_refresh_lock = threading.Lock()
+_refreshing: Set[Any] = set()
+_refresh_tasks: Set[asyncio.Task] = set()
+_refresh_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _claim_refresh(key) -> bool:
+    """Only one background refresh per entry at a time"""
+    with _refresh_lock:
+        if key in _refreshing:
+            return False
+        _refreshing.add(key)
+        return True
+
+
+def _release_refresh(key):
+    with _refresh_lock:
+        _refreshing.discard(key)
+
+
+def _refresh_in_thread(key, job: Callable[[], Any]):
+    """Run a sync refresh job on the small shared refresh pool"""
+    global _refresh_executor
+    if not _claim_refresh(key):
+        return
+    with _refresh_lock:
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+
+    def run():
+        try:
+            job()
+        except Exception as e:
+            logger.warning(f"⚠️ Background refresh of {key[0]} failed: {e}")
+        finally:
+            _release_refresh(key)
+
+    _refresh_executor.submit(run)
+
+
+def _refresh_in_task(key, job: Callable[[], Any]):
+    """Run an async refresh job as a task on the running event loop"""
+    if not _claim_refresh(key):
+        return
+
+    async def run():
+        try:
+            await job()
+        except Exception as e:
+            logger.warning(f"⚠️ Background refresh of {key[0]} failed: {e}")
+        finally:
+            _release_refresh(key)
+
+    task = asyncio.get_running_loop().create_task(run())
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+def stop_background_refresh():
+    """Stop the refresh pool (called on application shutdown)"""
+    global _refresh_executor
+    with _refresh_lock:
+        executor, _refresh_executor = _refresh_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Route parameters that never take part in the cache key
+_NON_KEY_PARAMS = {"db", "current_user", "background_tasks", "request", "response"}
+
+
+class _RouteCall:
+    """Cache key, tags and flight key of one cached_route call"""
+    __slots__ = ("cache_key", "tags", "flight_key", "company_id")
+
+    def __init__(self, cache_key: str, tags: list, flight_key: tuple, company_id: Optional[int]):
+        self.cache_key = cache_key
+        self.tags = tags
+        self.flight_key = flight_key
+        self.company_id = company_id
+
+
+def _with_response_param(func: Callable) -> Optional[inspect.Signature]:
+    """Signature with an extra `response: Response` so FastAPI injects one (None if already there)"""
+    from fastapi import Response
+
+    signature = inspect.signature(func)
+    if "response" in signature.parameters:
+        return None
+    params = list(signature.parameters.values())
+    extra = inspect.Parameter("response", inspect.Parameter.KEYWORD_ONLY, annotation=Response)
+    if params and params[-1].kind == inspect.Parameter.VAR_KEYWORD:
+        params.insert(len(params) - 1, extra)
+    else:
+        params.append(extra)
+    return signature.replace(parameters=params)
+
+
+def cached_route(
+    seconds: int,
+    entities: Iterable[str],
+    namespace: Optional[str] = None,
+    should_cache: Optional[Callable[[Any], bool]] = None,
+    coalesce: bool = True,
+    stale_seconds: int = 0,
+    per_user: Union[bool, Callable[[Any], bool]] = True
+):
+    """
+    Cache a FastAPI route per user (or per company and role), tagged by company and entity type
+
+    Usage:
+        @router.get("/cards")
+        @cached_route(seconds=900, entities=["products", "pos_sales"])
+        def get_dashboard_cards(db = Depends(get_db), current_user = Depends(get_current_user)):
+            ...
+
+    Write routes call company_filter.invalidate_company_cache(current_user, "products")
+    so only the writing company's entries are dropped. Works for sync and async routes.
+    On a miss, concurrent identical requests (same route, company, user and params)
+    share one computation through app/core/single_flight.py.
+
+    Routes whose output depends only on the company and role pass per_user=False
+    (or a predicate on the user saying when it is per user): staff of one company
+    with the same role then share the cache entry and the in-flight computation.
+    Per-user routes today: /dashboard/cards (per-staff filters, username in the
+    body) and the period stats of repairers (their own repairs).
+
+    With stale_seconds, an expired value is still served for that long while a
+    background refresh recomputes it (stale-while-revalidate). Responses carry
+    Age, X-Cache (HIT/STALE/MISS) and X-Cache-Generated-At headers.
+
+    Args:
+        seconds: Cache lifetime in seconds
+        entities: Entity types the response is computed from
+        namespace: Cache namespace (default: module.function name)
+        should_cache: Optional predicate; results for which it returns False are not stored
+        coalesce: Share one in-flight computation between concurrent identical misses
+        stale_seconds: How long past expiry a value may still be served (hard staleness ceiling)
+        per_user: Key by user (True), by company and role (False), or decide per user with a predicate
+    """
+    entities = tuple(entities)
+
+    def decorator(func: Callable) -> Callable:
+        ns = namespace or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+        response_signature = _with_response_param(func)
+
+        def _prepare(kwargs: dict) -> _RouteCall:
+            from app.core.company_filter import get_company_id
+
+            current_user = kwargs.get("current_user")
+            company_id = get_company_id(current_user) if current_user is not None else None
+            params = {k: v for k, v in kwargs.items() if k not in _NON_KEY_PARAMS}
+            if current_user is not None and not (per_user(current_user) if callable(per_user) else per_user):
+                role = getattr(current_user.role, "value", current_user.role)
+                principal = f"company:{company_id}:{role}"
+            else:
+                principal = str(getattr(current_user, "id", None))
+            cache_key = f"{principal}:{_make_cache_key((), params)}"
+            return _RouteCall(cache_key, company_cache_tags(company_id, entities), (ns, company_id, cache_key), company_id)
+
+        def _pop_response(kwargs: dict):
+            if response_signature is not None:
+                return kwargs.pop("response", None)
+            return kwargs.get("response")
+
+        def _store(call: _RouteCall, result: Any, version: str):
+            if should_cache is not None and not should_cache(result):
+                return
+            # A write committed while we were computing; its invalidation must win
+            if get_company_version(call.company_id, entities) != version:
+                return
+            cache_engine.set(ns, call.cache_key, result, seconds, tags=call.tags, stale_ttl=stale_seconds)
+
+        def _refresh_kwargs(kwargs: dict, db) -> dict:
+            refreshed = dict(kwargs)
+            if "db" in refreshed:
+                refreshed["db"] = db
+            # A Principal lazily loads from its request's session; rebind it to ours
+            current_user = refreshed.get("current_user")
+            if hasattr(type(current_user), "with_session"):
+                refreshed["current_user"] = current_user.with_session(db)
+                scope_session(db, current_user)
+            return refreshed
+
+        if asyncio.iscoroutinefunction(func):
+            async def _compute_async(call, args, kwargs):
+                version = get_company_version(call.company_id, entities)
+                result = await func(*args, **kwargs)
+                _store(call, result, version)
+                return result
+
+            async def _coalesced_async(call, args, kwargs):
+                if not coalesce:
+                    return await _compute_async(call, args, kwargs)
+                try:
+                    return await single_flight.do_async(call.flight_key, _compute_async, call, args, kwargs)
+                except SingleFlightTimeout:
+                    raise _still_computing()
+
+            def _schedule_refresh_async(call, args, kwargs):
+                async def job():
+                    from app.core.database import SessionLocal
+                    db = SessionLocal()
+                    try:
+                        await _coalesced_async(call, args, _refresh_kwargs(kwargs, db))
+                    finally:
+                        db.close()
+                _refresh_in_task(call.flight_key, job)
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                response = _pop_response(kwargs)
+                call = _prepare(kwargs)
+                cached = cache_engine.lookup_stale(ns, call.cache_key)
+                if cached is not _MISSING:
+                    value, created_at, is_stale = cached
+                    if is_stale:
+                        _schedule_refresh_async(call, args, kwargs)
+                    _set_age_headers(response, "STALE" if is_stale else "HIT", created_at)
+                    return value
+                result = await _coalesced_async(call, args, kwargs)
+                _set_age_headers(response, "MISS", time.time())
+                return result
+
+            wrapper = async_wrapper
+        else:
+            def _compute(call, args, kwargs):
+                version = get_company_version(call.company_id, entities)
+                result = func(*args, **kwargs)
+                _store(call, result, version)
+                return result
+
+            def _coalesced(call, args, kwargs):
+                if not coalesce:
+                    return _compute(call, args, kwargs)
+                try:
+                    return single_flight.do(call.flight_key, _compute, call, args, kwargs)
+                except SingleFlightTimeout:
+                    raise _still_computing()
+
+            def _schedule_refresh(call, args, kwargs):
+                def job():
+                    from app.core.database import SessionLocal
+                    db = SessionLocal()
+                    try:
+                        _coalesced(call, args, _refresh_kwargs(kwargs, db))
+                    finally:
+                        db.close()
+                _refresh_in_thread(call.flight_key, job)
+
+            @wraps(func)
+            def sync_wrapper(*args, **kwargs):
+                response = _pop_response(kwargs)
+                call = _prepare(kwargs)
+                cached = cache_engine.lookup_stale(ns, call.cache_key)
+                if cached is not _MISSING:
+                    value, created_at, is_stale = cached
+                    if is_stale:
+                        _schedule_refresh(call, args, kwargs)
+                    _set_age_headers(response, "STALE" if is_stale else "HIT", created_at)
+                    return value
+                result = _coalesced(call, args, kwargs)
+                _set_age_headers(response, "MISS", time.time())
+                return result
+
+            wrapper = sync_wrapper
+
+        if response_signature is not None:
+            wrapper.__signature__ = response_signature
+        wrapper.clear_cache = lambda: cache_engine.clear(ns)
+        wrapper.cache_namespace = ns
+        return wrapper
+    return decorator
 
 
 # Pre-configured cache decorators for common use cases
 cache_5min = timed_cache(seconds=300)    # 5 minutes
 cache_15min = timed_cache(seconds=900)   # 15 minutes
 cache_1hour = timed_cache(seconds=3600)  # 1 hour
-
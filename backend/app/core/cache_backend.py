@@ -0,0 +1,378 @@
+"""
+Cache backends for the shared cache
+Lets several uvicorn workers share one cache instead of each building its own
+
+- CacheBackend: the interface every decorator in app/core/cache.py talks to
+- CacheEngine (app/core/cache.py): bounded in-process LRU + TTL store (default)
+- RedisCacheBackend: any Redis-protocol server, values stored serialized
+- Serializers: orjson (default), msgpack or json for the dict payloads routes return
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Iterable, List, Optional
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Returned by lookup() on a miss so that None can be cached
+_MISSING = object()
+
+DEFAULT_KEY_PREFIX = "swapsync:cache:"
+
+
+# ---------- serialization ----------
+
+def _encode_default(obj: Any) -> Any:
+    """Fallback encoder for types the serializers don't handle natively"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Type is not cache serializable: {type(obj).__name__}")
+
+
+class JsonSerializer:
+    """Standard library json (always available)"""
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, default=_encode_default, separators=(",", ":")).encode()
+
+    def loads(self, raw: bytes) -> Any:
+        return json.loads(raw)
+
+
+class OrjsonSerializer:
+    """orjson - fast, handles datetime/UUID/enum natively"""
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+        self._options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, value: Any) -> bytes:
+        return self._orjson.dumps(value, default=_encode_default, option=self._options)
+
+    def loads(self, raw: bytes) -> Any:
+        return self._orjson.loads(raw)
+
+
+class MsgpackSerializer:
+    """msgpack - compact binary payloads"""
+    name = "msgpack"
+
+    def __init__(self):
+        import msgpack
+        self._msgpack = msgpack
+
+    def dumps(self, value: Any) -> bytes:
+        return self._msgpack.packb(value, default=_encode_default, use_bin_type=True)
+
+    def loads(self, raw: bytes) -> Any:
+        return self._msgpack.unpackb(raw, raw=False, strict_map_key=False)
+
+
+_SERIALIZERS = {
+    "orjson": OrjsonSerializer,
+    "msgpack": MsgpackSerializer,
+    "json": JsonSerializer,
+}
+
+
+def get_serializer(name: str = "orjson"):
+    """Build a serializer by name, falling back to json if its package is missing"""
+    factory = _SERIALIZERS.get((name or "json").lower())
+    if factory is None:
+        raise ValueError(f"Unknown cache serializer '{name}' (expected one of {sorted(_SERIALIZERS)})")
+    try:
+        return factory()
+    except ImportError:
+        logger.warning(f"⚠️ Cache serializer '{name}' not installed - falling back to json")
+        return JsonSerializer()
+
+
+# ---------- backend interface ----------
+
+class CacheBackend:
+    """
+    Interface shared by all cache backends
+
+    Values are grouped by namespace and may carry tags; invalidate_tags()
+    drops every entry with any of the given tags.
+    """
+    name = "base"
+
+    def configure_namespace(self, namespace: str, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        """Set per-namespace limits (backends that evict globally may ignore this)"""
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        """Return the cached value, or default if missing/expired"""
+        value = self.lookup(namespace, key)
+        return default if value is _MISSING else value
+
+    def lookup(self, namespace: str, key: str) -> Any:
+        """Return the cached value or the _MISSING sentinel"""
+        raise NotImplementedError
+
+    def lookup_stale(self, namespace: str, key: str) -> Any:
+        """(value, created_at, is_stale) while within the staleness ceiling, else _MISSING"""
+        value = self.lookup(namespace, key)
+        if value is _MISSING:
+            return _MISSING
+        return value, self.entry_created_at(namespace, key) or time.time(), False
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float, tags: Iterable[str] = (), stale_ttl: float = 0):
+        """Store a value for ttl seconds, servable as stale for stale_ttl more seconds"""
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str) -> bool:
+        """Remove a single entry; returns True if it existed"""
+        raise NotImplementedError
+
+    def delete_matching(self, predicate: Callable[[str, str], bool]) -> int:
+        """Remove every (namespace, key) for which predicate returns True"""
+        raise NotImplementedError
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Remove every entry carrying any of the given tags"""
+        raise NotImplementedError
+
+    def clear(self, namespace: Optional[str] = None):
+        """Clear one namespace, or everything when namespace is None"""
+        raise NotImplementedError
+
+    def sweep_expired(self) -> int:
+        """Drop expired entries (no-op for backends that expire on their own)"""
+        return 0
+
+    def entry_created_at(self, namespace: str, key: str) -> Optional[float]:
+        """Timestamp at which the current entry was stored (None if missing)"""
+        return None
+
+    def stats(self) -> dict:
+        """Cache statistics for monitoring endpoints"""
+        raise NotImplementedError
+
+    def stop_sweeper(self):
+        """Release background resources on application shutdown"""
+
+
+# ---------- Redis-protocol backend ----------
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Cache stored in a Redis-protocol server (Redis, Valkey, KeyDB, fakeredis...)
+
+    Key layout (prefix defaults to "swapsync:cache:"):
+        <prefix>e:<namespace>:<key>  ->  serialized [created_at, value, fresh_until],
+                                         expires after TTL + stale TTL
+        <prefix>t:<tag>              ->  set of entry keys carrying the tag
+
+    Only needs get/set/delete/sadd/smembers/pttl/pexpire/scan_iter from the client,
+    so any redis-py compatible client works. Server errors never break a request:
+    reads become misses and writes are skipped.
+    """
+    name = "redis"
+
+    def __init__(self, client, serializer=None, prefix: str = DEFAULT_KEY_PREFIX, max_value_bytes: int = 0):
+        self.client = client
+        self.serializer = serializer or get_serializer("orjson")
+        self.prefix = prefix
+        self.max_value_bytes = max_value_bytes
+        self._hits = 0
+        self._misses = 0
+        self._stale_hits = 0
+        self._errors = 0
+
+    # ---------- key helpers ----------
+
+    def _entry_key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}e:{namespace}:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}t:{tag}"
+
+    def _split_entry_key(self, raw_key) -> Optional[tuple]:
+        """(namespace, key) for an entry key, None for anything else"""
+        if isinstance(raw_key, bytes):
+            raw_key = raw_key.decode()
+        entry_prefix = f"{self.prefix}e:"
+        if not raw_key.startswith(entry_prefix):
+            return None
+        namespace, _, key = raw_key[len(entry_prefix):].partition(":")
+        return namespace, key
+
+    def _scan(self, pattern: str) -> List:
+        return list(self.client.scan_iter(match=pattern, count=500))
+
+    def _delete_keys(self, keys: List) -> int:
+        removed = 0
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            if chunk:
+                removed += self.client.delete(*chunk)
+        return removed
+
+    def _failed(self, action: str, error: Exception):
+        self._errors += 1
+        logger.warning(f"⚠️ Redis cache {action} failed: {error}")
+
+    # ---------- core operations ----------
+
+    def _read(self, namespace: str, key: str) -> Optional[list]:
+        try:
+            raw = self.client.get(self._entry_key(namespace, key))
+        except Exception as e:
+            self._failed("get", e)
+            return None
+        if raw is None:
+            return None
+        try:
+            return self.serializer.loads(raw)
+        except Exception as e:
+            self._failed("decode", e)
+            return None
+
+    def lookup(self, namespace: str, key: str) -> Any:
+        envelope = self._read(namespace, key)
+        if envelope is None or envelope[2] <= time.time():
+            self._misses += 1
+            return _MISSING
+        self._hits += 1
+        return envelope[1]
+
+    def lookup_stale(self, namespace: str, key: str) -> Any:
+        envelope = self._read(namespace, key)
+        if envelope is None:
+            self._misses += 1
+            return _MISSING
+        created_at, value, fresh_until = envelope
+        is_stale = fresh_until <= time.time()
+        if is_stale:
+            self._stale_hits += 1
+        else:
+            self._hits += 1
+        return value, created_at, is_stale
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float, tags: Iterable[str] = (), stale_ttl: float = 0):
+        now = time.time()
+        try:
+            raw = self.serializer.dumps([now, value, now + ttl])
+        except Exception as e:
+            # Values the serializer can't encode are simply not cached
+            logger.debug(f"Cache value for {namespace} not serializable: {e}")
+            return
+
+        if self.max_value_bytes and len(raw) > self.max_value_bytes:
+            return
+
+        ttl_ms = max(int((ttl + stale_ttl) * 1000), 1)
+        entry_key = self._entry_key(namespace, key)
+        try:
+            self.client.set(entry_key, raw, px=ttl_ms)
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+                self.client.sadd(tag_key, entry_key)
+                # Tag sets live as long as their longest-lived entry
+                if self.client.pttl(tag_key) < ttl_ms:
+                    self.client.pexpire(tag_key, ttl_ms)
+        except Exception as e:
+            self._failed("set", e)
+
+    def delete(self, namespace: str, key: str) -> bool:
+        try:
+            return bool(self.client.delete(self._entry_key(namespace, key)))
+        except Exception as e:
+            self._failed("delete", e)
+            return False
+
+    def delete_matching(self, predicate: Callable[[str, str], bool]) -> int:
+        try:
+            doomed = []
+            for raw_key in self._scan(f"{self.prefix}e:*"):
+                parts = self._split_entry_key(raw_key)
+                if parts and predicate(*parts):
+                    doomed.append(raw_key)
+            return self._delete_keys(doomed)
+        except Exception as e:
+            self._failed("delete_matching", e)
+            return 0
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        try:
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+                members = list(self.client.smembers(tag_key))
+                removed += self._delete_keys(members)
+                self.client.delete(tag_key)
+        except Exception as e:
+            self._failed("invalidate_tags", e)
+        return removed
+
+    def clear(self, namespace: Optional[str] = None):
+        pattern = f"{self.prefix}*" if namespace is None else f"{self.prefix}e:{namespace}:*"
+        try:
+            self._delete_keys(self._scan(pattern))
+        except Exception as e:
+            self._failed("clear", e)
+
+    def entry_created_at(self, namespace: str, key: str) -> Optional[float]:
+        envelope = self._read(namespace, key)
+        return envelope[0] if envelope is not None else None
+
+    def stats(self) -> dict:
+        namespaces = {}
+        total_entries = 0
+        try:
+            for raw_key in self._scan(f"{self.prefix}e:*"):
+                parts = self._split_entry_key(raw_key)
+                if parts:
+                    namespaces.setdefault(parts[0], {"entries": 0})["entries"] += 1
+                    total_entries += 1
+        except Exception as e:
+            self._failed("stats", e)
+
+        total = self._hits + self._misses
+        return {
+            "backend": self.name,
+            "serializer": self.serializer.name,
+            "total_entries": total_entries,
+            "hits": self._hits,
+            "misses": self._misses,
+            "stale_hits": self._stale_hits,
+            "hit_rate": round(self._hits / total, 3) if total else 0.0,
+            "errors": self._errors,
+            "namespaces": namespaces
+        }
+
+    def stop_sweeper(self):
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+
+def build_redis_backend(url: str, serializer: str = "orjson", prefix: str = DEFAULT_KEY_PREFIX,
+                        max_value_bytes: int = 0) -> RedisCacheBackend:
+    """Connect to a Redis-protocol server (requires the optional `redis` package)"""
+    import redis
+
+    client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+    client.ping()
+    return RedisCacheBackend(
+        client,
+        serializer=get_serializer(serializer),
+        prefix=prefix,
+        max_value_bytes=max_value_bytes
+    )
@@ -7,6 +7,7 @@ from datetime import datetime, timedelta
 from app.models.activity_log import ActivityLog
 from app.models.sms_log import SMSLog
 from app.models.user_session import UserSession
+from app.models.idempotency_key import IdempotencyKey
 import logging
 
 logger = logging.getLogger(__name__)
@@ -87,6 +88,29 @@ def clean_old_sessions(db: Session, days: int = 30):
         raise
 
 
+def clean_expired_idempotency_keys(db: Session):
+    """
+    Delete Idempotency-Key records past their expiry
+    Expired keys are never replayed, so they only take up space
+    """
+    try:
+        now = datetime.utcnow()
+        
+        deleted_count = db.query(IdempotencyKey).filter(
+            IdempotencyKey.expires_at < now
+        ).delete()
+        
+        db.commit()
+        
+        logger.info(f"✅ Cleaned {deleted_count} expired idempotency keys")
+        return {"deleted": deleted_count, "cutoff_date": now.isoformat()}
+        
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Error cleaning idempotency keys: {e}")
+        raise
+
+
 def run_full_cleanup(db: Session):
     """
     Run all cleanup tasks
@@ -97,6 +121,7 @@ def run_full_cleanup(db: Session):
         "activity_logs": clean_old_activity_logs(db, days=90),
         "sms_logs": clean_old_sms_logs(db, days=60),
         "sessions": clean_old_sessions(db, days=30),
+        "idempotency_keys": clean_expired_idempotency_keys(db),
         "timestamp": datetime.utcnow().isoformat()
     }
     
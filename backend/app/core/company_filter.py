@@ -1,10 +1,201 @@
 """
 Company Data Isolation Utility
 Provides helper functions to filter data by company (CEO/Manager + their staff)
+
+Company membership (manager -> staff ids) comes from an in-memory index loaded
+with one query and reloaded only after users are created, reassigned or deleted,
+so tenant-filtered endpoints don't pay for hierarchy lookups on every request.
 """
+from sqlalchemy import event, func, inspect as sa_inspect, select
 from sqlalchemy.orm import Session
 from app.models.user import User, UserRole
-from typing import List
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# id_counters row bumped in the same transaction as every membership change
+MEMBERSHIP_COUNTER = "membership"
+DEFAULT_CHECK_SECONDS = 2.0
+
+
+def _company_for(user_id: int, parent_user_id: Optional[int], role: UserRole) -> Optional[int]:
+    """Same rule as get_company_id, from raw column values"""
+    if role in [UserRole.SUPER_ADMIN, UserRole.ADMIN]:
+        return None
+    if role in [UserRole.CEO, UserRole.MANAGER]:
+        return user_id
+    return parent_user_id or user_id
+
+
+def _database_version(db: Session) -> Tuple:
+    """(user count, highest user id, membership counter) - changes with every membership write"""
+    from app.models.id_counter import IdCounter
+    counter = select(IdCounter.value).where(IdCounter.name == MEMBERSHIP_COUNTER).scalar_subquery()
+    return tuple(db.execute(select(func.count(User.id), func.max(User.id), counter)).one())
+
+
+class CompanyMembershipIndex:
+    """
+    In-memory map of manager id -> staff ids
+
+    The index remembers the database version it was built from: user count,
+    highest id and a counter that user writes bump inside their own transaction.
+    A worker compares that version (one small statement) at most every
+    settings.MEMBERSHIP_CHECK_SECONDS and reloads when it moved, so changes made
+    by other workers or scripts show up within that interval. The worker that
+    made the change reloads right after its commit.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._children: Dict[int, List[int]] = {}
+        self._user_ids: Set[int] = set()
+        self._company_of: Dict[int, Optional[int]] = {}
+        self._version: Optional[Tuple] = None
+        self._checked_at = 0.0
+        self.reloads = 0
+
+    def _check_seconds(self) -> float:
+        from app.core.config import settings
+        return getattr(settings, "MEMBERSHIP_CHECK_SECONDS", DEFAULT_CHECK_SECONDS)
+
+    def load(self, db: Session, version: Optional[Tuple] = None):
+        """(Re)build the index from the users table"""
+        # Read the version before the rows so a concurrent change forces another reload
+        if version is None:
+            version = _database_version(db)
+        rows = db.query(User.id, User.parent_user_id, User.role).all()
+
+        children: Dict[int, List[int]] = {}
+        company_of: Dict[int, Optional[int]] = {}
+        for user_id, parent_id, role in rows:
+            if parent_id is not None:
+                children.setdefault(parent_id, []).append(user_id)
+            company_of[user_id] = _company_for(user_id, parent_id, role)
+
+        with self._lock:
+            self._children = children
+            self._user_ids = {row[0] for row in rows}
+            self._company_of = company_of
+            self._version = version
+            self._checked_at = time.monotonic()
+            self.reloads += 1
+        logger.debug(f"👥 Company membership index loaded ({len(rows)} users)")
+
+    def ensure_fresh(self, db: Session):
+        if self._version is None:
+            self.load(db)
+            return
+        if time.monotonic() - self._checked_at < self._check_seconds():
+            return
+        version = _database_version(db)
+        self._checked_at = time.monotonic()
+        if version != self._version:
+            self.load(db, version)
+
+    def mark_changed(self):
+        """Reload on next use (this worker; others notice the database version within the check interval)"""
+        self._version = None
+
+    def company_user_ids(self, db: Session, manager_id: int) -> List[int]:
+        """[manager_id] + ids of every user created by that manager"""
+        self.ensure_fresh(db)
+        return [manager_id] + list(self._children.get(manager_id, ()))
+
+    def user_exists(self, db: Session, user_id: int) -> bool:
+        self.ensure_fresh(db)
+        return user_id in self._user_ids
+
+    def company_of(self, db: Session, user_id: int) -> Optional[int]:
+        """Company id of a user (None for admins and unknown users)"""
+        self.ensure_fresh(db)
+        return self._company_of.get(user_id)
+
+
+# Shared index used by get_company_user_ids
+membership_index = CompanyMembershipIndex()
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_delete")
+def _user_membership_written(mapper, connection, target):
+    from app.core.sequences import reserve
+    # Same transaction as the user write, so other workers see both or neither
+    reserve(connection, MEMBERSHIP_COUNTER)
+    session = Session.object_session(target)
+    if session is not None:
+        session.info["membership_changed"] = True
+
+
+@event.listens_for(User, "after_update")
+def _user_membership_updated(mapper, connection, target):
+    attrs = sa_inspect(target).attrs
+    if attrs.parent_user_id.history.has_changes() or attrs.role.history.has_changes():
+        _user_membership_written(mapper, connection, target)
+
+
+@event.listens_for(Session, "after_commit")
+def _refresh_membership_after_commit(session):
+    if session.info.pop("membership_changed", False):
+        membership_index.mark_changed()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_membership_change(session):
+    session.info.pop("membership_changed", None)
+
+
+# Tables carrying a denormalized company_id:
+#   table -> (user column whose company owns the row, customer column used as fallback)
+COMPANY_SCOPED_TABLES = {
+    "customers": ("created_by_user_id", None),
+    "products": ("created_by_user_id", None),
+    "stock_movements": ("created_by_user_id", None),
+    "pos_sales": ("created_by_user_id", None),
+    "product_sales": ("created_by_user_id", "customer_id"),
+    "sales": ("created_by_user_id", "customer_id"),
+    "repairs": ("created_by_user_id", "customer_id"),
+    "phones": ("created_by_user_id", None),
+    "swaps": (None, "customer_id"),
+    "invoices": ("staff_id", "customer_id"),
+    "activity_logs": ("user_id", None),
+}
+
+
+def company_of_user(db: Session, user_id: Optional[int]) -> Optional[int]:
+    """Company id for a user id (index first, then the session for uncommitted users)"""
+    if user_id is None:
+        return None
+    if membership_index.user_exists(db, user_id):
+        return membership_index.company_of(db, user_id)
+    user = db.get(User, user_id)
+    return get_company_id(user) if user is not None else None
+
+
+def _resolve_company_id(db: Session, obj, user_column: Optional[str], customer_column: Optional[str]) -> Optional[int]:
+    company_id = company_of_user(db, getattr(obj, user_column)) if user_column else None
+    if company_id is None and customer_column:
+        customer = getattr(obj, "customer", None)
+        if customer is None and getattr(obj, customer_column) is not None:
+            from app.models.customer import Customer
+            customer = db.get(Customer, getattr(obj, customer_column))
+        if customer is not None:
+            company_id = customer.company_id or company_of_user(db, customer.created_by_user_id)
+    return company_id
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_company_id(session, flush_context, instances):
+    """Fill company_id on new tenant-scoped rows so no writer has to remember it"""
+    pending = [obj for obj in session.new if getattr(obj, "__tablename__", None) in COMPANY_SCOPED_TABLES]
+    # Customers first so swaps/invoices created in the same flush can inherit from them
+    pending.sort(key=lambda obj: obj.__tablename__ != "customers")
+    for obj in pending:
+        if obj.company_id is None:
+            obj.company_id = _resolve_company_id(session, obj, *COMPANY_SCOPED_TABLES[obj.__tablename__])
 
 
 def get_company_user_ids(db: Session, current_user: User) -> List[int]:
@@ -17,6 +208,7 @@ def get_company_user_ids(db: Session, current_user: User) -> List[int]:
     - For SHOP_KEEPER/REPAIRER: [their_id] + [their CEO id] + [all siblings' IDs]
     
     This ensures complete data isolation between companies.
+    Served from the in-memory membership index (no query per call).
     """
     # Super admins see everything (no filtering)
     if current_user.role in [UserRole.SUPER_ADMIN, UserRole.ADMIN]:
@@ -24,22 +216,39 @@ def get_company_user_ids(db: Session, current_user: User) -> List[int]:
     
     # If CEO/Manager, get their ID + all their staff
     if current_user.role in [UserRole.CEO, UserRole.MANAGER]:
-        staff = db.query(User).filter(User.parent_user_id == current_user.id).all()
-        return [current_user.id] + [s.id for s in staff]
+        return membership_index.company_user_ids(db, current_user.id)
     
     # If staff member, get their manager + all sibling staff
-    if current_user.parent_user_id:
-        # Get the manager/CEO
-        manager = db.query(User).filter(User.id == current_user.parent_user_id).first()
-        if manager:
-            # Get all staff under this manager
-            staff = db.query(User).filter(User.parent_user_id == manager.id).all()
-            return [manager.id] + [s.id for s in staff]
+    if current_user.parent_user_id and membership_index.user_exists(db, current_user.parent_user_id):
+        return membership_index.company_user_ids(db, current_user.parent_user_id)
     
     # Fallback: only return current user's ID
     return [current_user.id]
 
 
+def get_company_id(current_user: User) -> Optional[int]:
+    """
+    Get the company (manager/CEO user id) the current user belongs to.
+
+    Returns:
+    - For SUPER_ADMIN/ADMIN: None (not tied to one company)
+    - For CEO/MANAGER: their own id
+    - For staff: their manager's id (their own id if they have no manager)
+
+    Matches the first id returned by get_company_user_ids without any query.
+    """
+    return _company_for(current_user.id, current_user.parent_user_id, current_user.role)
+
+
+def invalidate_company_cache(current_user: User, *entities: str) -> int:
+    """
+    Drop cached responses of the current user's company built from these entity types
+    Call after a write commits, e.g. invalidate_company_cache(current_user, "products", "pos_sales")
+    """
+    from app.core.cache import invalidate_company_tags
+    return invalidate_company_tags(get_company_id(current_user), entities)
+
+
 def filter_by_company(query, current_user: User, db: Session, field_name: str = 'created_by_user_id'):
     """
     Apply company filtering to a SQLAlchemy query.
@@ -0,0 +1,436 @@
+"""
+Daily company metrics rollup
+Keeps daily_company_metrics (company, shop-local day, hub -> revenue, cost,
+profit, transactions, units) in step with the source tables, inside the same
+transaction as the write, so dashboards read a handful of rows per day instead
+of scanning every sale, repair and swap.
+
+Hubs and where their numbers come from:
+- products: product_sales (revenue, cost at the product's cost price, units);
+            pos_sales add one transaction each and subtract the overall discount
+- phones:   sales (amount paid, phone cost price)
+- repairs:  repairs (one transaction each; the repair cost counts as revenue once
+            Completed/Delivered) plus repair_sales items (revenue, cost, units)
+- swaps:    swaps (balance paid; profit_or_loss once the trade-in is sold)
+
+ORM inserts, updates and deletes are applied as deltas after each flush. Bulk
+query().update()/delete() on a source table can't be diffed, so the companies
+and days of the rows it matches are rebuilt from the source tables before the
+transaction commits. Raw SQL skips these hooks; its callers rebuild themselves.
+`python rebuild_company_metrics.py` recomputes any range for backfill or drift
+repair (e.g. after raw SQL edits or product cost price changes).
+"""
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, Optional, Tuple
+import logging
+
+from sqlalchemy import event, inspect as sa_inspect, select
+from sqlalchemy.orm import Session
+
+from app.core.time_windows import TimeWindow, in_window, local_day, range_window, utc_now, window_days
+
+logger = logging.getLogger(__name__)
+
+PRODUCTS_HUB = "products"
+PHONES_HUB = "phones"
+REPAIRS_HUB = "repairs"
+SWAPS_HUB = "swaps"
+HUBS = (PRODUCTS_HUB, PHONES_HUB, REPAIRS_HUB, SWAPS_HUB)
+
+METRIC_FIELDS = ("revenue", "cost", "profit", "transactions", "units")
+KEY_COLUMNS = ("company_id", "day", "hub")
+
+# Repairs earn their cost once they reach one of these statuses
+REPAIR_REVENUE_STATUSES = ("Completed", "Delivered")
+
+# Source table -> columns a metric is computed from (other column changes are ignored)
+TRACKED_COLUMNS = {
+    "pos_sales": ("company_id", "created_at", "overall_discount"),
+    "product_sales": ("company_id", "created_at", "product_id", "quantity", "total_amount"),
+    "sales": ("company_id", "created_at", "phone_id", "amount_paid"),
+    "repairs": ("company_id", "created_at", "status", "cost"),
+    "repair_sales": ("repair_id", "created_at", "quantity", "unit_price", "cost_price"),
+    "swaps": ("company_id", "created_at", "balance_paid", "resale_status", "profit_or_loss"),
+}
+
+# session.info key: company_id -> local days whose rows were bulk-written (None = all days)
+STALE_KEY = "company_metrics_stale"
+
+MetricKey = Tuple[int, date, str]
+
+
+class MetricDeltas:
+    """Accumulated metric changes keyed by (company_id, day, hub)"""
+
+    def __init__(self):
+        self.rows: Dict[MetricKey, list] = {}
+
+    def add(self, company_id: Optional[int], moment, hub: str, sign: int = 1, revenue: float = 0.0,
+            cost: float = 0.0, profit: Optional[float] = None, transactions: int = 0, units: int = 0):
+        if company_id is None:
+            return  # Rows without a company (admin test data) have no dashboard
+        if profit is None:
+            profit = revenue - cost
+        key = (company_id, local_day(moment or utc_now()), hub)
+        row = self.rows.setdefault(key, [0.0, 0.0, 0.0, 0, 0])
+        for i, amount in enumerate((revenue, cost, profit, transactions, units)):
+            row[i] += sign * amount
+
+    def items(self) -> Iterable[Tuple[MetricKey, dict]]:
+        """(key, field values) of every non-zero entry"""
+        for key, row in self.rows.items():
+            if any(abs(v) > 1e-9 for v in row):
+                yield key, dict(zip(METRIC_FIELDS, row))
+
+
+def _number(value) -> float:
+    return float(value or 0)
+
+
+def contribute(deltas: MetricDeltas, table: str, value: Callable[[str], object], lookup, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) one source row's share of the metrics"""
+    from app.models.swap import ResaleStatus
+
+    moment = value("created_at")
+    if table == "pos_sales":
+        discount = _number(value("overall_discount"))
+        deltas.add(value("company_id"), moment, PRODUCTS_HUB, sign, revenue=-discount, transactions=1)
+    elif table == "product_sales":
+        quantity = int(value("quantity") or 0)
+        deltas.add(value("company_id"), moment, PRODUCTS_HUB, sign, revenue=_number(value("total_amount")),
+                   cost=lookup.product_cost(value("product_id")) * quantity, units=quantity)
+    elif table == "sales":
+        deltas.add(value("company_id"), moment, PHONES_HUB, sign, revenue=_number(value("amount_paid")),
+                   cost=lookup.phone_cost(value("phone_id")), transactions=1, units=1)
+    elif table == "repairs":
+        revenue = _number(value("cost")) if value("status") in REPAIR_REVENUE_STATUSES else 0.0
+        deltas.add(value("company_id"), moment, REPAIRS_HUB, sign, revenue=revenue, transactions=1)
+    elif table == "repair_sales":
+        quantity = int(value("quantity") or 0)
+        deltas.add(lookup.repair_company(value("repair_id")), moment, REPAIRS_HUB, sign,
+                   revenue=_number(value("unit_price")) * quantity,
+                   cost=_number(value("cost_price")) * quantity, units=quantity)
+    elif table == "swaps":
+        profit = _number(value("profit_or_loss")) if value("resale_status") == ResaleStatus.SOLD else 0.0
+        deltas.add(value("company_id"), moment, SWAPS_HUB, sign, revenue=_number(value("balance_paid")),
+                   profit=profit, transactions=1)
+
+
+class _SessionLookup:
+    """Costs and owners for rows being flushed (identity map first, then one get per id)"""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def _get(self, model, ident):
+        if ident is None:
+            return None
+        from app.core.tenant import UNSCOPED_KEY
+        return self.session.get(model, ident, execution_options={UNSCOPED_KEY: True})
+
+    def product_cost(self, product_id) -> float:
+        from app.models.product import Product
+        product = self._get(Product, product_id)
+        return _number(product.cost_price) if product else 0.0
+
+    def phone_cost(self, phone_id) -> float:
+        from app.models.phone import Phone
+        phone = self._get(Phone, phone_id)
+        return _number(phone.cost_price) if phone else 0.0
+
+    def repair_company(self, repair_id) -> Optional[int]:
+        from app.models.repair import Repair
+        repair = self._get(Repair, repair_id)
+        return repair.company_id if repair else None
+
+
+class _TableLookup:
+    """Same lookups from maps loaded with one query per table (rebuilds)"""
+
+    def __init__(self, db: Session):
+        from app.core.tenant import UNSCOPED_KEY
+        from app.models.phone import Phone
+        from app.models.product import Product
+        from app.models.repair import Repair
+
+        def load(*columns):
+            return dict(db.query(*columns).execution_options(**{UNSCOPED_KEY: True}).all())
+
+        self.product_costs = load(Product.id, Product.cost_price)
+        self.phone_costs = load(Phone.id, Phone.cost_price)
+        self.repair_companies = load(Repair.id, Repair.company_id)
+
+    def product_cost(self, product_id) -> float:
+        return _number(self.product_costs.get(product_id))
+
+    def phone_cost(self, phone_id) -> float:
+        return _number(self.phone_costs.get(phone_id))
+
+    def repair_company(self, repair_id) -> Optional[int]:
+        return self.repair_companies.get(repair_id)
+
+
+def _old_value(obj) -> Callable[[str], object]:
+    """Column values as they were before this flush"""
+    state = sa_inspect(obj)
+
+    def value(name):
+        history = state.attrs[name].history
+        if history.deleted:
+            return history.deleted[0]
+        if history.added:
+            return None
+        return getattr(obj, name)
+    return value
+
+
+def _changed(obj, table: str) -> bool:
+    state = sa_inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in TRACKED_COLUMNS[table])
+
+
+def _upsert(connection, key: MetricKey, values: dict):
+    """Add values to one metric row, creating it when missing"""
+    from app.models.daily_company_metric import DailyCompanyMetric
+
+    table = DailyCompanyMetric.__table__
+    row = dict(zip(KEY_COLUMNS, key), updated_at=utc_now(), **values)
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).values(**row)
+        increments = {field: table.c[field] + stmt.excluded[field] for field in METRIC_FIELDS}
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=list(KEY_COLUMNS), set_={**increments, "updated_at": stmt.excluded.updated_at}
+        ))
+        return
+
+    key_filter = [table.c[column] == row[column] for column in KEY_COLUMNS]
+    updated = connection.execute(
+        table.update().where(*key_filter).values(
+            updated_at=row["updated_at"], **{field: table.c[field] + values[field] for field in METRIC_FIELDS}
+        )
+    ).rowcount
+    if not updated:
+        connection.execute(table.insert().values(**row))
+
+
+# ---------- session hooks ----------
+
+@event.listens_for(Session, "after_flush")
+def _apply_flush_deltas(session, flush_context):
+    """Turn this flush's inserts, updates and deletes of source rows into metric deltas"""
+    deltas = MetricDeltas()
+    lookup = _SessionLookup(session)
+    for obj in session.new:
+        table = getattr(obj, "__tablename__", None)
+        if table in TRACKED_COLUMNS:
+            contribute(deltas, table, lambda name, obj=obj: getattr(obj, name), lookup)
+    for obj in session.deleted:
+        table = getattr(obj, "__tablename__", None)
+        if table in TRACKED_COLUMNS:
+            contribute(deltas, table, _old_value(obj), lookup, sign=-1)
+    for obj in session.dirty:
+        table = getattr(obj, "__tablename__", None)
+        if table in TRACKED_COLUMNS and _changed(obj, table):
+            contribute(deltas, table, _old_value(obj), lookup, sign=-1)
+            contribute(deltas, table, lambda name, obj=obj: getattr(obj, name), lookup)
+
+    _apply_deltas(session, deltas)
+
+
+def _apply_deltas(session, deltas: MetricDeltas):
+    if deltas.rows:
+        connection = session.connection()
+        for key, values in deltas.items():
+            _upsert(connection, key, values)
+
+
+def _matched_rows(session, model, table: str, criteria):
+    """(id, company_id, created_at) of the source rows a bulk statement's criteria match"""
+    from app.core.tenant import UNSCOPED_KEY
+
+    if table == "repair_sales":
+        from app.models.repair import Repair
+        stmt = select(model.id, Repair.company_id, model.created_at).outerjoin(Repair, Repair.id == model.repair_id)
+    else:
+        stmt = select(model.id, model.company_id, model.created_at)
+    if criteria is not None:
+        stmt = stmt.where(criteria)
+    return session.execute(stmt, execution_options={UNSCOPED_KEY: True}).all()
+
+
+def _mark_stale(session, rows):
+    stale = session.info.setdefault(STALE_KEY, {})
+    for _, company_id, created_at in rows:
+        if company_id is not None and stale.get(company_id, ()) is not None:
+            stale.setdefault(company_id, set()).add(local_day(created_at or utc_now()))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_bulk_writes(execute_state):
+    """
+    Bulk writes of a source table
+    INSERTs with parameter rows (`db.execute(insert(Model), rows)`, rows carrying
+    company_id) are applied as deltas. For UPDATE/DELETE the matching rows'
+    companies and days are looked up first (and again after an UPDATE, which may
+    move them) and only those days are rebuilt before commit.
+    """
+    if not (execute_state.is_insert or execute_state.is_update or execute_state.is_delete):
+        return
+    mapper = execute_state.bind_mapper
+    table = getattr(mapper.class_, "__tablename__", None) if mapper is not None else None
+    if table not in TRACKED_COLUMNS:
+        return
+
+    session = execute_state.session
+    rows = execute_state.parameters
+    if execute_state.is_insert:
+        if rows:
+            deltas = MetricDeltas()
+            lookup = _SessionLookup(session)
+            for row in ([rows] if isinstance(rows, dict) else rows):
+                contribute(deltas, table, row.get, lookup)
+            _apply_deltas(session, deltas)
+            return
+        # INSERT .. SELECT: the new rows can't be told apart from the old ones
+        from app.core.tenant import get_tenant
+        company_id = get_tenant(session)
+        if company_id is None:
+            logger.warning(f"⚠️ Bulk insert into {table} isn't in the metrics rollup; "
+                           f"run rebuild_company_metrics.py")
+        else:
+            session.info.setdefault(STALE_KEY, {})[company_id] = None
+        return
+
+    model = mapper.class_
+    if execute_state.is_update and isinstance(rows, list) and rows:
+        # ORM bulk UPDATE by primary key: the rows name their targets
+        criteria = model.id.in_([row["id"] for row in rows])
+    else:
+        criteria = execute_state.statement.whereclause
+    matched = _matched_rows(session, model, table, criteria)
+    _mark_stale(session, matched)
+    if execute_state.is_update and matched:
+        result = execute_state.invoke_statement()
+        _mark_stale(session, _matched_rows(session, model, table, model.id.in_([row[0] for row in matched])))
+        return result
+
+
+@event.listens_for(Session, "before_commit")
+def _rebuild_stale_companies(session):
+    stale = session.info.pop(STALE_KEY, None)
+    if not stale:
+        return
+    for company_id, days in stale.items():
+        if days is None:
+            rebuild_company_metrics(session, company_id=company_id)
+        else:
+            rebuild_company_metrics(session, company_id=company_id, start_date=min(days), end_date=max(days))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale_companies(session):
+    session.info.pop(STALE_KEY, None)
+
+
+# ---------- rebuild / read ----------
+
+def _source_rows(db: Session, window: Optional[TimeWindow], company_id: Optional[int]):
+    """(table, value getter) for every source row in range, as plain column tuples"""
+    from app.core.tenant import UNSCOPED_KEY
+    from app.models.pos_sale import POSSale
+    from app.models.product_sale import ProductSale
+    from app.models.repair import Repair
+    from app.models.repair_sale import RepairSale
+    from app.models.sale import Sale
+    from app.models.swap import Swap
+
+    for model in (POSSale, ProductSale, Sale, Repair, RepairSale, Swap):
+        table = model.__tablename__
+        query = db.query(*[getattr(model, name) for name in TRACKED_COLUMNS[table]]).filter(
+            in_window(model.created_at, window)
+        )
+        if company_id is not None:
+            if model is RepairSale:
+                query = query.join(Repair, Repair.id == RepairSale.repair_id).filter(Repair.company_id == company_id)
+            else:
+                query = query.filter(model.company_id == company_id)
+        for row in query.execution_options(**{UNSCOPED_KEY: True}).yield_per(1000):
+            yield table, row._mapping.get
+
+
+def rebuild_company_metrics(db: Session, company_id: Optional[int] = None, start_date=None, end_date=None,
+                            dry_run: bool = False) -> dict:
+    """
+    Recompute daily_company_metrics from the source tables
+
+    Scope: one company (None = all) and an optional inclusive range of local days
+    (YYYY-MM-DD or date). Rows in scope are replaced inside the caller's
+    transaction; with dry_run nothing is written and only the drift is reported.
+    """
+    from app.models.daily_company_metric import DailyCompanyMetric
+
+    window = range_window(start_date, end_date)
+    lookup = _TableLookup(db)
+    deltas = MetricDeltas()
+    sources = 0
+    for table, value in _source_rows(db, window, company_id):
+        contribute(deltas, table, value, lookup)
+        sources += 1
+    fresh = dict(deltas.items())
+
+    metric = DailyCompanyMetric
+    scope = []
+    if company_id is not None:
+        scope.append(metric.company_id == company_id)
+    if start_date:
+        scope.append(metric.day >= local_day(window.start))
+    if end_date:
+        scope.append(metric.day <= local_day(window.end - timedelta(microseconds=1)))
+    stored = {
+        (row.company_id, row.day, row.hub): {field: getattr(row, field) for field in METRIC_FIELDS}
+        for row in db.query(metric.company_id, metric.day, metric.hub,
+                            *[getattr(metric, field) for field in METRIC_FIELDS]).filter(*scope)
+    }
+
+    drifted = [
+        key for key in set(fresh) | set(stored)
+        if any(abs(_number(fresh.get(key, {}).get(f)) - _number(stored.get(key, {}).get(f))) > 0.005
+               for f in METRIC_FIELDS)
+    ]
+
+    if not dry_run:
+        db.query(metric).filter(*scope).delete(synchronize_session=False)
+        if fresh:
+            now = utc_now()
+            db.execute(metric.__table__.insert(), [
+                dict(zip(KEY_COLUMNS, key), updated_at=now, **values) for key, values in fresh.items()
+            ])
+        db.flush()
+
+    summary = {"source_rows": sources, "rows": len(fresh), "drifted": len(drifted), "dry_run": dry_run}
+    logger.info(f"📊 Company metrics rebuilt (company={company_id or 'all'}): {summary}")
+    return summary
+
+
+def company_metrics(db: Session, company_id: int, window: Optional[TimeWindow] = None) -> Dict[str, dict]:
+    """Per-hub totals of one company over whole local days (all history when window is None)"""
+    from sqlalchemy import func
+    from app.models.daily_company_metric import DailyCompanyMetric
+
+    query = db.query(
+        DailyCompanyMetric.hub,
+        *[func.coalesce(func.sum(getattr(DailyCompanyMetric, field)), 0) for field in METRIC_FIELDS]
+    ).filter(DailyCompanyMetric.company_id == company_id)
+    if window is not None:
+        first_day, last_day = window_days(window)
+        query = query.filter(DailyCompanyMetric.day >= first_day, DailyCompanyMetric.day <= last_day)
+
+    totals = {hub: dict.fromkeys(METRIC_FIELDS, 0) for hub in HUBS}
+    for hub, *values in query.group_by(DailyCompanyMetric.hub):
+        totals[hub] = dict(zip(METRIC_FIELDS, values))
+    return totals
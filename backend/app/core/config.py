@@ -1,6 +1,7 @@
 """
 Configuration management for SwapSync API
 """
+from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings
 from typing import Optional
 import os
@@ -29,6 +30,8 @@ class Settings(BaseSettings):
     
     # Database - Use env var if set, otherwise default to SQLite
     DATABASE_URL: str = os.getenv("DATABASE_URL", get_database_path())
+    SQLITE_PROFILE: str = "production"  # production, safe or off - see app/core/sqlite_pragmas.py
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # How long a SQLite writer waits for a lock before failing
     
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
@@ -53,6 +56,48 @@ class Settings(BaseSettings):
     TWILIO_PHONE_NUMBER: Optional[str] = None
     ENABLE_SMS: bool = False  # Set to True to enable SMS notifications
     
+    # In-memory cache limits (shared by timed_cache and cache_response)
+    CACHE_MAX_ENTRIES: int = 2048
+    CACHE_MAX_BYTES: int = 32 * 1024 * 1024  # 32 MB
+    CACHE_SWEEP_INTERVAL: int = 60  # Seconds between expired-entry sweeps
+    
+    # Shared cache backend - "memory" (per process) or "redis" (shared by all workers)
+    CACHE_BACKEND: str = "memory"
+    CACHE_REDIS_URL: str = Field(  # CACHE_REDIS_URL, or the conventional REDIS_URL (environment or .env)
+        "redis://localhost:6379/0", validation_alias=AliasChoices("CACHE_REDIS_URL", "REDIS_URL")
+    )
+    CACHE_SERIALIZER: str = "orjson"  # orjson, msgpack or json
+    CACHE_KEY_PREFIX: str = "swapsync:cache:"
+    PRINCIPAL_CACHE_TTL: int = 60  # Seconds an authenticated user stays cached per session
+    MEMBERSHIP_CHECK_SECONDS: float = 2.0  # How often a worker checks the users table for company membership changes
+    SINGLE_FLIGHT_TIMEOUT: float = 30.0  # Seconds a request waits on an identical in-flight request
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24  # How long a create request's Idempotency-Key replays its response
+    IDEMPOTENCY_WAIT: float = 10.0  # Seconds a duplicate waits for the first request before answering 409
+    POS_SYNC_MAX_AGE_HOURS: int = 168  # Oldest till timestamp an offline-synced POS sale may carry
+    
+    # Buffered activity-log writer - see app/core/activity_logger.py
+    ACTIVITY_LOG_ASYNC: bool = True  # Queue activity logs for a background writer (False: write in the request)
+    ACTIVITY_LOG_QUEUE_SIZE: int = 10000  # Entries buffered before callers wait for room
+    ACTIVITY_LOG_BATCH_SIZE: int = 200  # Entries per bulk INSERT
+    ACTIVITY_LOG_FLUSH_INTERVAL: float = 0.5  # Seconds the writer waits to fill a batch
+    ACTIVITY_LOG_PUT_TIMEOUT: float = 0.5  # Seconds a caller waits on a full buffer before writing itself
+    
+    # Shop timezone for "today / this week / this month" filters - see app/core/time_windows.py
+    SHOP_TIMEZONE: str = "Africa/Accra"
+    
+    # Per-request SQL instrumentation - see app/core/query_stats.py
+    SERVER_TIMING_ENABLED: bool = True  # Server-Timing header with DB time and query count
+    N_PLUS_ONE_THRESHOLD: int = 10  # Warn when one statement shape runs more often in a request
+    
+    # Concurrent dashboard aggregates - see app/core/fan_out.py
+    QUERY_FANOUT_WORKERS: int = 4  # Threads (and so pooled connections) shared by all fan-outs; 0 = sequential
+    QUERY_FANOUT_DEADLINE: float = 5.0  # Seconds a fan-out waits before dropping slow queries
+    QUERY_FANOUT_POOL_TIMEOUT: float = 1.0  # Seconds a fan-out worker waits for one of its own connections
+    ID_BLOCK_SIZE: int = 20  # Display-ID numbers each worker reserves at once (server databases; see app/core/sequences.py)
+    
+    # Boot phases to run: "full", "web" (serverless / extra web workers) or "worker" - see app/core/startup.py
+    STARTUP_PROFILE: str = "full"
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
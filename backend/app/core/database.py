@@ -5,6 +5,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.sqlite_pragmas import apply_sqlite_pragmas
 
 # Database URL from settings
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
@@ -15,16 +16,37 @@ connect_args = {}
 if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
     connect_args = {"check_same_thread": False}
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args=connect_args,
+
+def _create_engine(pool_size: int, max_overflow: int, pool_timeout: float = 30):
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args=connect_args,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=300,         # Recycle connections every 5 minutes
+        pool_pre_ping=True,       # Verify connections before use
+        echo=False                # Disable SQL query logging in production
+    )
+    # WAL, busy timeout and cache pragmas for SQLite deployments (desktop build, single server)
+    if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+        apply_sqlite_pragmas(engine, settings.SQLITE_PROFILE, settings.SQLITE_BUSY_TIMEOUT_MS)
+    return engine
+
+
+engine = _create_engine(
     pool_size=5,              # Small pool for Railway $5 plan
-    max_overflow=2,           # Allow 2 extra connections in bursts
-    pool_recycle=300,         # Recycle connections every 5 minutes
-    pool_pre_ping=True,       # Verify connections before use
-    echo=False                # Disable SQL query logging in production
+    max_overflow=2            # Allow 2 extra connections in bursts
 )
 
+
+def create_fanout_engine(pool_size: int, pool_timeout: float):
+    """
+    Engine with its own pool for app/core/fan_out.py workers, so concurrent
+    dashboard queries neither wait on nor starve the request connections above
+    """
+    return _create_engine(pool_size=pool_size, max_overflow=0, pool_timeout=pool_timeout)
+
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
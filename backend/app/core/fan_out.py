@@ -0,0 +1,174 @@
+"""
+Concurrent read-only queries
+Dashboards run a dozen independent aggregates (customers, inventory, hub
+profits, staff performance); issued one after another on the request session
+their latency adds up. `fan_out` runs them at the same time on pooled
+connections, so the request waits roughly as long as the slowest one:
+
+    results = fan_out(db, {
+        "customers": lambda s: s.query(Customer).count(),
+        "revenue": lambda s: s.query(func.sum(Sale.amount_paid)).scalar() or 0.0,
+    }, deadline=2.0)
+    if "customers" in results: ...
+
+- Each query gets its own short-lived session, scoped to the same tenant; it
+  sees committed data only, so only use it for reads
+- A query that raises or misses the deadline is logged and left out of the
+  results (or given its default), the others still return
+- A process-wide pool of settings.QUERY_FANOUT_WORKERS threads runs them. For the
+  app engine the workers get a connection pool of their own with one connection
+  per thread (create_fanout_engine), so they never compete with requests for the
+  main pool, and a query still running past its deadline only holds a worker's
+  connection. A checkout waits at most QUERY_FANOUT_POOL_TIMEOUT seconds
+- Engines that can't serve connections concurrently (in-memory SQLite on a
+  StaticPool / SingletonThreadPool) or QUERY_FANOUT_WORKERS=0 run the queries
+  in sequence on the request session instead, with the same error handling
+"""
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+import contextvars
+import logging
+import threading
+import time
+
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import SingletonThreadPool, StaticPool
+
+from app.core.tenant import TENANT_KEY, UNSCOPED_KEY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+DEFAULT_DEADLINE = 5.0  # seconds
+DEFAULT_POOL_TIMEOUT = 1.0  # seconds a worker waits for a connection
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_fanout_engine = None
+
+
+class FanOutResults(dict):
+    """Query name -> result; `failed` maps names that raised or timed out to the reason"""
+
+    def __init__(self):
+        super().__init__()
+        self.failed: Dict[str, str] = {}
+
+
+def _settings():
+    from app.core.config import settings
+    return settings
+
+
+def _get_executor() -> Optional[ThreadPoolExecutor]:
+    global _executor
+    workers = getattr(_settings(), "QUERY_FANOUT_WORKERS", DEFAULT_WORKERS)
+    if workers <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="query-fanout")
+        return _executor
+
+
+def _worker_bind(db: Session):
+    """Where worker sessions connect: the app engine's fan-out twin, any other engine itself"""
+    global _fanout_engine
+    from app.core import database
+
+    bind = db.get_bind()
+    if bind is not database.engine:
+        return bind
+    with _executor_lock:
+        if _fanout_engine is None:
+            settings = _settings()
+            _fanout_engine = database.create_fanout_engine(
+                pool_size=getattr(settings, "QUERY_FANOUT_WORKERS", DEFAULT_WORKERS),
+                pool_timeout=getattr(settings, "QUERY_FANOUT_POOL_TIMEOUT", DEFAULT_POOL_TIMEOUT),
+            )
+        return _fanout_engine
+
+
+def shutdown():
+    """Stop the worker threads and close their connections (app shutdown, tests)"""
+    global _executor, _fanout_engine
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+        if _fanout_engine is not None:
+            _fanout_engine.dispose()
+            _fanout_engine = None
+
+
+def can_run_concurrently(db: Session) -> bool:
+    """True when the session's engine can hand out several connections at once"""
+    bind = db.get_bind()
+    return not isinstance(getattr(bind, "pool", None), (StaticPool, SingletonThreadPool))
+
+
+def _run_in_own_session(db: Session, bind, fn: Callable[[Session], Any]) -> Any:
+    """Run one query on a fresh session on `bind`, scoped to the same tenant as `db`"""
+    session = Session(bind=bind, autoflush=False)
+    session.info[TENANT_KEY] = db.info.get(TENANT_KEY)
+    session.info[UNSCOPED_KEY] = db.info.get(UNSCOPED_KEY, False)
+    try:
+        return fn(session)
+    finally:
+        session.close()
+
+
+def _sequential(db: Session, queries: Dict[str, Callable], results: FanOutResults, deadline: float):
+    started = time.monotonic()
+    for name, fn in queries.items():
+        if time.monotonic() - started > deadline:
+            results.failed[name] = "deadline"
+            continue
+        try:
+            results[name] = fn(db)
+        except Exception as e:
+            results.failed[name] = repr(e)
+
+
+def fan_out(db: Session, queries: Dict[str, Callable[[Session], Any]],
+            defaults: Optional[Dict[str, Any]] = None, deadline: Optional[float] = None,
+            label: str = "fan-out") -> FanOutResults:
+    """
+    Run independent read-only queries concurrently and gather their results
+
+    Each value in `queries` is called with a Session and returns the query result.
+    Failed or late queries get `defaults[name]` when given, otherwise they are
+    missing from the results; either way they are listed in `results.failed`.
+    `deadline` defaults to settings.QUERY_FANOUT_DEADLINE seconds.
+    """
+    if deadline is None:
+        deadline = getattr(_settings(), "QUERY_FANOUT_DEADLINE", DEFAULT_DEADLINE)
+    results = FanOutResults()
+    executor = _get_executor()
+
+    if executor is None or len(queries) < 2 or not can_run_concurrently(db):
+        _sequential(db, queries, results, deadline)
+    else:
+        bind = _worker_bind(db)
+        futures = {
+            # Copy the context so per-request query stats count the worker's statements
+            executor.submit(contextvars.copy_context().run, _run_in_own_session, db, bind, fn): name
+            for name, fn in queries.items()
+        }
+        done, pending = wait(futures, timeout=deadline)
+        for future in pending:
+            # Queued ones never start; running ones finish on their worker's own connection
+            future.cancel()
+            results.failed[futures[future]] = "deadline"
+        for future in done:
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results.failed[name] = repr(e)
+
+    for name, reason in results.failed.items():
+        logger.warning(f"⚠️ {label}: query '{name}' failed ({reason})")
+        if defaults and name in defaults:
+            results[name] = defaults[name]
+    return results
@@ -4,6 +4,7 @@ Invoice Generation Utilities
 from datetime import datetime
 from typing import Optional, List
 from sqlalchemy.orm import Session
+from app.core.sequences import next_code
 from app.models.invoice import Invoice
 from app.models.swap import Swap
 from app.models.sale import Sale
@@ -13,10 +14,9 @@ from app.models.user import User
 import json
 
 
-def generate_invoice_number() -> str:
-    """Generate a unique invoice number based on timestamp"""
-    timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-    return f"INV-{timestamp}"
+def generate_invoice_number(db: Session) -> str:
+    """Generate a unique invoice number in format INV-YYYYMMDD-0001 (numbered per day)"""
+    return next_code(db, "INV", Invoice.invoice_number, daily=True)
 
 
 def create_swap_invoice(
@@ -29,7 +29,7 @@ def create_swap_invoice(
     """
     Create an invoice for a swap transaction
     """
-    invoice_number = generate_invoice_number()
+    invoice_number = generate_invoice_number(db)
     
     # Build items description
     items = {
@@ -82,7 +82,7 @@ def create_sale_invoice(
     """
     Create an invoice for a direct sale transaction
     """
-    invoice_number = generate_invoice_number()
+    invoice_number = generate_invoice_number(db)
     
     # Build items description
     items = {
@@ -0,0 +1,246 @@
+"""
+Versioned migration engine
+Applies the backend/migrate_*.py scripts in-process, in name order, and records
+each one in a `schema_migrations` table so later runs skip it with a set lookup
+instead of launching a Python interpreter per script on every start/release.
+
+Two kinds of migration script are supported:
+- Scripts defining `upgrade(conn)`: run inside one transaction together with
+  their schema_migrations row, so a failure leaves nothing half-applied
+- Legacy scripts (everything else): executed as `__main__` in this process,
+  exactly like `python migrate_xxx.py`, and recorded once they finish cleanly:
+  no exception, exit status 0 and no failure reported. Many of them catch their
+  own errors and only print "❌ ..." (or log it at ERROR), so such a line counts
+  as a failure too. Each runs on its own thread and is abandoned (left pending)
+  after LEGACY_TIMEOUT seconds, like the old runner's 30 s subprocess limit
+
+A failed migration is logged and not recorded, so it is retried next run.
+On PostgreSQL an advisory lock keeps concurrent workers/releases from racing.
+"""
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Set
+import ast
+import io
+import importlib.util
+import logging
+import runpy
+import sys
+import threading
+import time
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select, text
+
+logger = logging.getLogger(__name__)
+
+# backend/ - where the migrate_*.py scripts live
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2]
+MIGRATION_PATTERN = "migrate_*.py"
+
+# Arbitrary constant identifying the migration lock on PostgreSQL
+ADVISORY_LOCK_ID = 720_411_903
+
+# Seconds a legacy script may run before it is given up on
+LEGACY_TIMEOUT = 30.0
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", String(255), primary_key=True),
+    Column("applied_at", DateTime, nullable=False),
+    Column("duration_ms", Integer, nullable=True),
+)
+
+
+class Migration:
+    """One migration script; its version is the file name without .py"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.version = path.stem
+
+    def __repr__(self) -> str:
+        return f"<Migration {self.version}>"
+
+
+def discover_migrations(directory: Optional[Path] = None) -> List[Migration]:
+    """All migration scripts in apply order"""
+    directory = Path(directory or MIGRATIONS_DIR)
+    return [Migration(path) for path in sorted(directory.glob(MIGRATION_PATTERN))]
+
+
+def applied_versions(engine) -> Set[str]:
+    """Versions already recorded in schema_migrations"""
+    schema_migrations.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def _record(conn, migration: Migration, started: float):
+    conn.execute(schema_migrations.insert().values(
+        version=migration.version,
+        applied_at=datetime.utcnow(),
+        duration_ms=int((time.perf_counter() - started) * 1000)
+    ))
+
+
+def _load_module(migration: Migration):
+    spec = importlib.util.spec_from_file_location(f"_migration_{migration.version}", migration.path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _defines_upgrade(migration: Migration) -> bool:
+    """True if the script has a top-level upgrade() (checked without running it)"""
+    tree = ast.parse(migration.path.read_text(encoding="utf-8"))
+    return any(isinstance(node, ast.FunctionDef) and node.name == "upgrade" for node in tree.body)
+
+
+# What legacy scripts print (or log) when they swallow an error
+FAILURE_MARKER = "❌"
+
+
+class _FailureWatch(io.TextIOBase):
+    """Passes output through and remembers the script thread's lines reporting a failure"""
+
+    def __init__(self, stream, thread: threading.Thread):
+        self.stream = stream
+        self.thread = thread
+        self.failures: List[str] = []
+
+    def write(self, text: str) -> int:
+        if threading.current_thread() is self.thread:
+            for line in text.splitlines():
+                if FAILURE_MARKER in line:
+                    self.failures.append(line.strip())
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+class _FailureLogHandler(logging.Handler):
+    def __init__(self, watch: _FailureWatch):
+        super().__init__(logging.ERROR)
+        self.watch = watch
+
+    def emit(self, record: logging.LogRecord):
+        # Errors other threads (requests, the scheduler) log meanwhile aren't the script's
+        if record.thread == self.watch.thread.ident:
+            self.watch.failures.append(record.getMessage().strip())
+
+
+@contextmanager
+def _watch_failures(thread: threading.Thread):
+    """Collect failures the legacy script running on `thread` reports on stdout or through logging"""
+    watch = _FailureWatch(sys.stdout, thread)
+    handler = _FailureLogHandler(watch)
+    root = logging.getLogger()
+    root.addHandler(handler)
+    try:
+        with redirect_stdout(watch):
+            yield watch
+    finally:
+        root.removeHandler(handler)
+
+
+def _run_legacy(migration: Migration, timeout: float) -> List[str]:
+    """Execute a legacy script as __main__ on its own thread; returns the failures it reported"""
+    outcome = {}
+
+    def run():
+        try:
+            runpy.run_path(str(migration.path), run_name="__main__")
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                outcome["error"] = RuntimeError(f"exited with status {e.code}")
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run, name=f"migration-{migration.version}", daemon=True)
+    with _watch_failures(thread) as watch:
+        thread.start()
+        thread.join(timeout)
+    if thread.is_alive():
+        # A thread can't be killed; it is left behind and the script stays pending
+        raise RuntimeError(f"timed out after {timeout:.0f}s")
+    if "error" in outcome:
+        raise outcome["error"]
+    return watch.failures
+
+
+def _apply(engine, migration: Migration, timeout: float = LEGACY_TIMEOUT):
+    """Run one migration and record it; raises on failure"""
+    started = time.perf_counter()
+
+    if _defines_upgrade(migration):
+        module = _load_module(migration)
+        with engine.begin() as conn:
+            module.upgrade(conn)
+            _record(conn, migration, started)
+        return
+
+    failures = _run_legacy(migration, timeout)
+    if failures:
+        raise RuntimeError(f"reported a failure: {failures[0]}")
+    with engine.begin() as conn:
+        _record(conn, migration, started)
+
+
+def run_pending_migrations(engine=None, directory: Optional[Path] = None, timeout: float = LEGACY_TIMEOUT) -> dict:
+    """
+    Apply every migration not yet in schema_migrations
+
+    Returns {"applied": [...], "failed": [...], "skipped": <count>}
+    """
+    if engine is None:
+        from app.core.database import engine
+    directory = Path(directory or MIGRATIONS_DIR)
+    # Scripts import the app as `app.*`, like when run from backend/
+    if str(MIGRATIONS_DIR) not in sys.path:
+        sys.path.insert(0, str(MIGRATIONS_DIR))
+
+    lock_conn = None
+    if engine.dialect.name == "postgresql":
+        lock_conn = engine.connect()
+        lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID})
+
+    try:
+        done = applied_versions(engine)
+        pending = [m for m in discover_migrations(directory) if m.version not in done]
+        summary = {"applied": [], "failed": [], "skipped": len(done)}
+
+        if not pending:
+            logger.info(f"✅ Database schema up to date ({len(done)} migrations applied)")
+            return summary
+
+        logger.info(f"📋 {len(pending)} pending migration(s)")
+        for migration in pending:
+            started = time.perf_counter()
+            try:
+                _apply(engine, migration, timeout)
+                summary["applied"].append(migration.version)
+                logger.info(f"✅ {migration.version} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+            except Exception as e:
+                # Don't block startup; the migration stays pending and is retried next run
+                summary["failed"].append(migration.version)
+                logger.warning(f"⚠️ {migration.version} failed: {str(e)[:200]}")
+        return summary
+    finally:
+        if lock_conn is not None:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID})
+            lock_conn.close()
+
+
+def migration_status(engine=None, directory: Optional[Path] = None) -> dict:
+    """Applied and pending versions (for the CLI and monitoring)"""
+    if engine is None:
+        from app.core.database import engine
+    done = applied_versions(engine)
+    versions = [m.version for m in discover_migrations(directory)]
+    return {
+        "applied": [v for v in versions if v in done],
+        "pending": [v for v in versions if v not in done]
+    }
@@ -0,0 +1,146 @@
+"""
+Authenticated principal cache
+get_current_user resolves the JWT to a lightweight Principal kept in the shared
+cache for a short TTL, so most requests skip the `users` lookup entirely
+"""
+from typing import Any, Optional
+import hashlib
+
+from sqlalchemy.orm import Session
+
+from app.models.user import User, UserRole
+
+PRINCIPAL_NAMESPACE = "principals"
+DEFAULT_PRINCIPAL_TTL = 60  # seconds
+
+
+class Principal:
+    """
+    Lightweight authenticated user returned by get_current_user
+
+    Holds id, username, role, parent_user_id, company_id and is_active.
+    Any other attribute (email, company_name, verify_password()...) loads the
+    full User row once from the request's session, and attribute writes go to
+    that row, so existing `current_user.xxx` code keeps working unchanged.
+    """
+    _FIELDS = ("id", "username", "role", "parent_user_id", "company_id", "is_active", "session_id")
+    __slots__ = _FIELDS + ("_db", "_user")
+
+    def __init__(
+        self,
+        db: Optional[Session],
+        id: int,
+        username: str,
+        role: UserRole,
+        parent_user_id: Optional[int],
+        company_id: Optional[int],
+        is_active: int,
+        session_id: Optional[int] = None,
+        user: Optional[User] = None
+    ):
+        object.__setattr__(self, "_db", db)
+        object.__setattr__(self, "_user", user)
+        object.__setattr__(self, "id", id)
+        object.__setattr__(self, "username", username)
+        object.__setattr__(self, "role", role)
+        object.__setattr__(self, "parent_user_id", parent_user_id)
+        object.__setattr__(self, "company_id", company_id)
+        object.__setattr__(self, "is_active", is_active)
+        object.__setattr__(self, "session_id", session_id)
+
+    @classmethod
+    def from_user(cls, user: User, db: Optional[Session], session_id: Optional[int] = None) -> "Principal":
+        from app.core.company_filter import get_company_id
+        return cls(
+            db, user.id, user.username, user.role, user.parent_user_id,
+            get_company_id(user), user.is_active, session_id, user=user
+        )
+
+    @classmethod
+    def from_cache(cls, data: dict, db: Optional[Session]) -> "Principal":
+        return cls(
+            db, data["id"], data["username"], UserRole(data["role"]), data["parent_user_id"],
+            data["company_id"], data["is_active"], data.get("session_id")
+        )
+
+    def to_cache(self) -> dict:
+        return {
+            "id": self.id,
+            "username": self.username,
+            "role": self.role.value,
+            "parent_user_id": self.parent_user_id,
+            "company_id": self.company_id,
+            "is_active": self.is_active,
+            "session_id": self.session_id
+        }
+
+    def load(self) -> User:
+        """The full User row (queried once, from the request's session)"""
+        if self._user is None:
+            user = self._db.get(User, self.id) if self._db is not None else None
+            if user is None:
+                raise AttributeError(f"User {self.id} is no longer available")
+            object.__setattr__(self, "_user", user)
+        return self._user
+
+    def with_session(self, db: Session) -> "Principal":
+        """Copy bound to another session (e.g. for background work after the request)"""
+        return Principal(
+            db, self.id, self.username, self.role, self.parent_user_id,
+            self.company_id, self.is_active, self.session_id
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes that aren't principal fields
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self.load(), name, value)
+        if name in self._FIELDS:
+            object.__setattr__(self, name, value)
+
+    def __repr__(self) -> str:
+        return f"<Principal(#{self.id}, {self.username}, {self.role})>"
+
+
+def principal_cache_key(token: str, username: str, session_id: Optional[int]) -> str:
+    """Cache key for a token: its login session when present, else a token hash"""
+    if session_id:
+        return f"s:{session_id}:{username}"
+    return f"t:{hashlib.sha256(token.encode()).hexdigest()[:32]}"
+
+
+def _principal_tags(principal: Principal) -> list:
+    tags = [f"principal-user:{principal.id}"]
+    if principal.company_id is not None:
+        tags.append(f"principal-company:{principal.company_id}")
+    return tags
+
+
+def get_cached_principal(cache_key: str, db: Session) -> Optional[Principal]:
+    from app.core.cache import cache_engine
+    data = cache_engine.get(PRINCIPAL_NAMESPACE, cache_key)
+    return Principal.from_cache(data, db) if data else None
+
+
+def cache_principal(cache_key: str, principal: Principal):
+    from app.core.cache import cache_engine
+    from app.core.config import settings
+    cache_engine.set(
+        PRINCIPAL_NAMESPACE, cache_key, principal.to_cache(),
+        settings.PRINCIPAL_CACHE_TTL, tags=_principal_tags(principal)
+    )
+
+
+def invalidate_principal(user_id: int) -> int:
+    """Drop cached principals of one user (call after changing or deleting them)"""
+    from app.core.cache import cache_engine
+    return cache_engine.invalidate_tags([f"principal-user:{user_id}"])
+
+
+def invalidate_company_principals(company_id: int) -> int:
+    """Drop cached principals of a manager and all their staff"""
+    from app.core.cache import cache_engine
+    return cache_engine.invalidate_tags([f"principal-user:{company_id}", f"principal-company:{company_id}"])
@@ -0,0 +1,154 @@
+"""
+Per-request SQL instrumentation
+Engine events count the statements and database time of the current request;
+app/middleware/query_stats.py reports them as a Server-Timing header and logs a
+warning when one statement shape repeats too often (an N+1 pattern, e.g. one
+Customer lookup per sale in a report loop).
+
+The stats live in a context variable, so they follow the request into the
+threadpool where sync routes and dependencies run. Statements executed outside
+a request (startup, scheduler jobs) are not counted.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+import logging
+import re
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_N_PLUS_ONE_THRESHOLD = 10
+
+# Literals and bind placeholders collapse so "WHERE id = 1" and "WHERE id = 2" share a shape
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_RE = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Statement with literals and parameters replaced by '?'"""
+    shape = _STRING_RE.sub("?", statement)
+    shape = _PARAM_RE.sub("?", shape)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _IN_LIST_RE.sub("(?)", shape)
+    return _SPACE_RE.sub(" ", shape).strip()
+
+
+class QueryStats:
+    """Statements and database time of one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.db_seconds = 0.0
+        # Keyed by raw statement text (bound parameters are already separate);
+        # shapes are only computed when reporting
+        self.statements: Counter = Counter()
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.db_seconds += seconds
+            self.statements[statement] += 1
+
+    @property
+    def db_ms(self) -> float:
+        return self.db_seconds * 1000
+
+    @property
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def repeated(self, threshold: int = DEFAULT_N_PLUS_ONE_THRESHOLD) -> List[tuple]:
+        """(shape, count) pairs executed more than `threshold` times, most frequent first"""
+        shapes: Counter = Counter()
+        for statement, n in self.statements.items():
+            shapes[statement_shape(statement)] += n
+        return [(shape, n) for shape, n in shapes.most_common() if n > threshold]
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: database time/count and total app time"""
+        return (
+            f'db;dur={self.db_ms:.1f};desc="{self.count} queries", '
+            f"app;dur={self.total_ms:.1f}"
+        )
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def begin_request() -> tuple:
+    """Start counting for the current context; returns (stats, reset token)"""
+    stats = QueryStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+@contextmanager
+def count_queries():
+    """
+    Count the statements run inside the block (tests, scripts)
+
+    Usage:
+        with count_queries() as stats:
+            client.get("/api/customers")
+        assert stats.count <= 3
+    """
+    stats, token = begin_request()
+    try:
+        yield stats
+    finally:
+        end_request(token)
+
+
+def log_repeated_statements(stats: QueryStats, label: str, threshold: int = DEFAULT_N_PLUS_ONE_THRESHOLD):
+    """Warn about statement shapes repeated more than `threshold` times"""
+    for shape, n in stats.repeated(threshold):
+        logger.warning(f"⚠️ Possible N+1 in {label}: {n}x {shape[:200]}")
+
+
+# ---------- engine hooks (every Engine, so test engines are counted too) ----------
+
+_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context rather than the connection, so a statement
+    # that raises leaves nothing behind for the next one to pop
+    if _current.get() is not None and context is not None:
+        context._query_stats_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    started = getattr(context, "_query_stats_start", None)
+    if started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def install():
+    """Register the engine hooks once per process"""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _installed = True
@@ -0,0 +1,149 @@
+"""
+Human-readable ID sequences
+Hands out CUST-0001, PROD-0042, POS-20250120-007, INV-20250120-0001 and the
+other display IDs from counters in the id_counters table, instead of counting
+or MAX()-ing the rows of each table (a full scan per insert, and two writers
+that count at the same time get the same number):
+
+    customer.unique_id = next_code(db, "CUST", Customer.unique_id)
+    transaction_id = next_code(db, "POS", POSSale.transaction_id, width=3, daily=True)
+
+- A counter starts after the highest ID already stored for its scope, so moving
+  onto it (or starting a new day) never reissues an existing ID
+- On server databases each worker reserves a block of settings.ID_BLOCK_SIZE
+  numbers in its own short transaction and serves the block from memory; IDs
+  stay unique but can have gaps (unused block on restart) and workers interleave.
+  The reservation runs outside the allocator's lock: it checks out a second
+  pooled connection, and threads already holding theirs mustn't queue behind it
+- On SQLite (one writer at a time anyway) and shared-connection engines each
+  number is taken inside the caller's transaction, so a rollback returns it
+"""
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple
+import threading
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import SingletonThreadPool, StaticPool
+
+from app.core.time_windows import local_today
+
+DEFAULT_BLOCK_SIZE = 20
+
+
+def _counters():
+    from app.models.id_counter import IdCounter
+    return IdCounter.__table__
+
+
+def highest_suffix(conn, column, scope: str) -> int:
+    """Largest N among stored "<scope>-N" values of `column` (0 when there are none)"""
+    highest = 0
+    prefix = f"{scope}-"
+    for (value,) in conn.execute(select(column).where(column.like(f"{prefix}%"))):
+        suffix = value[len(prefix):]
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+    return highest
+
+
+def reserve(conn, name: str, count: int = 1, seed: Optional[Callable] = None) -> int:
+    """
+    Advance counter `name` by `count` on this connection; returns the new highest value
+    A missing counter is created at seed(conn) (default 0) first.
+    """
+    counters = _counters()
+    advance = counters.update().where(counters.c.name == name).values(value=counters.c.value + count)
+    if not conn.execute(advance).rowcount:
+        start = seed(conn) if seed else 0
+        if not _insert_if_missing(conn, name, start + count):
+            conn.execute(advance)  # Another writer created it first
+    return conn.execute(select(counters.c.value).where(counters.c.name == name)).scalar_one()
+
+
+def _insert_if_missing(conn, name: str, value: int) -> bool:
+    counters = _counters()
+    dialect = conn.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(counters).values(name=name, value=value).on_conflict_do_nothing(index_elements=["name"])
+        return bool(conn.execute(statement).rowcount)
+    conn.execute(counters.insert().values(name=name, value=value))
+    return True
+
+
+def uses_own_transaction(bind) -> bool:
+    """Blocks are reserved in a separate transaction only where that can't wait on the caller's own locks"""
+    if bind.dialect.name == "sqlite":
+        return False
+    return not isinstance(getattr(bind, "pool", None), (StaticPool, SingletonThreadPool))
+
+
+class SequenceAllocator:
+    """Per-process dispenser of counter values, block by block"""
+
+    def __init__(self, block_size: Optional[int] = None):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        # (database url, counter name) -> reserved blocks, each [next value, last value]
+        self._blocks: Dict[Tuple[str, str], List[list]] = {}
+
+    def _block_size(self) -> int:
+        if self.block_size is not None:
+            return self.block_size
+        from app.core.config import settings
+        return max(1, getattr(settings, "ID_BLOCK_SIZE", DEFAULT_BLOCK_SIZE))
+
+    def next(self, db: Session, name: str, seed: Optional[Callable] = None) -> int:
+        """Next value of counter `name`"""
+        bind = db.get_bind()
+        if not uses_own_transaction(bind):
+            return reserve(db.connection(), name, 1, seed)
+
+        key = (str(bind.url), name)
+        while True:
+            with self._lock:
+                value = self._take(key)
+            if value is not None:
+                return value
+            # Threads that run dry together each reserve a block; the spare one is used next
+            size = self._block_size()
+            with bind.begin() as conn:
+                last = reserve(conn, name, size, seed)
+            with self._lock:
+                self._blocks.setdefault(key, []).append([last - size + 1, last])
+
+    def _take(self, key) -> Optional[int]:
+        """Next number of the first non-empty block (caller holds the lock)"""
+        blocks = self._blocks.get(key, [])
+        while blocks and blocks[0][0] > blocks[0][1]:
+            blocks.pop(0)
+        if not blocks:
+            return None
+        value = blocks[0][0]
+        blocks[0][0] += 1
+        return value
+
+    def reset(self):
+        """Forget reserved blocks (tests; the unused numbers become gaps)"""
+        with self._lock:
+            self._blocks.clear()
+
+
+# Shared allocator used by next_code
+allocator = SequenceAllocator()
+
+
+def next_code(db: Session, prefix: str, column, width: int = 4, daily: bool = False,
+              day: Optional[date] = None) -> str:
+    """
+    Next display ID "<prefix>-0001" (or "<prefix>-YYYYMMDD-001" with daily=True,
+    numbered per shop-local day; `day` defaults to today). `column` holds these
+    IDs; it is read once to start a new counter after the highest existing one.
+    """
+    scope = f"{prefix}-{(day or local_today()):%Y%m%d}" if daily else prefix
+    number = allocator.next(db, scope, seed=lambda conn: highest_suffix(conn, column, scope))
+    return f"{scope}-{str(number).zfill(width)}"
@@ -0,0 +1,156 @@
+"""
+Single-flight request coalescing
+Concurrent identical requests share one in-flight computation instead of each
+running the same aggregate queries (e.g. every browser opening the dashboard at 8am)
+
+The first caller for a key (the leader) runs the function; callers arriving while
+it runs wait for its result, or get its exception re-raised. Waiting is bounded by
+a timeout. Works for sync functions (threads) and coroutines (event loop).
+"""
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 30.0  # seconds a follower waits for the leader
+
+
+class SingleFlightTimeout(TimeoutError):
+    """Raised in a follower when the leader did not finish in time"""
+
+
+class _Call:
+    """One in-flight synchronous computation"""
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key
+
+    Usage:
+        flight = SingleFlight()
+        stats = flight.do(("dashboard", company_id), compute_stats, db)
+        stats = await flight.do_async(("today", company_id), compute_today, db)
+    """
+
+    def __init__(self, default_timeout: float = DEFAULT_TIMEOUT):
+        self.default_timeout = default_timeout
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        # (id(loop), key) -> Future, so coroutines on different loops never mix
+        self._futures: Dict[Tuple[int, Hashable], asyncio.Future] = {}
+        self._leaders = 0
+        self._coalesced = 0
+        self._timeouts = 0
+
+    def do(self, key: Hashable, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) once for all concurrent callers with this key"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self._leaders += 1
+                leader = True
+            else:
+                call.followers += 1
+                self._coalesced += 1
+                leader = False
+
+        if not leader:
+            wait_for = self.default_timeout if timeout is None else timeout
+            if not call.done.wait(wait_for):
+                with self._lock:
+                    self._timeouts += 1
+                raise SingleFlightTimeout(f"Timed out after {wait_for}s waiting for in-flight call {key!r}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+            if call.followers:
+                logger.debug(f"🔗 Single-flight {key!r} shared with {call.followers} waiting request(s)")
+
+    async def do_async(self, key: Hashable, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Await fn(*args, **kwargs) once for all concurrent callers with this key"""
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+
+        with self._lock:
+            future = self._futures.get(loop_key)
+            if future is None:
+                future = loop.create_future()
+                self._futures[loop_key] = future
+                self._leaders += 1
+                leader = True
+            else:
+                self._coalesced += 1
+                leader = False
+
+        if not leader:
+            wait_for = self.default_timeout if timeout is None else timeout
+            try:
+                # shield: a timed-out follower must not cancel the shared result
+                return await asyncio.wait_for(asyncio.shield(future), wait_for)
+            except asyncio.TimeoutError:
+                with self._lock:
+                    self._timeouts += 1
+                raise SingleFlightTimeout(f"Timed out after {wait_for}s waiting for in-flight call {key!r}")
+
+        try:
+            result = fn(*args, **kwargs)
+            if asyncio.iscoroutine(result):
+                result = await result
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unwatched failure doesn't log "never retrieved"
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                self._futures.pop(loop_key, None)
+
+    def stats(self) -> dict:
+        """Coalescing statistics for monitoring endpoints"""
+        with self._lock:
+            return {
+                "in_flight": len(self._calls) + len(self._futures),
+                "leaders": self._leaders,
+                "coalesced": self._coalesced,
+                "timeouts": self._timeouts
+            }
+
+
+def _build_single_flight() -> SingleFlight:
+    try:
+        from app.core.config import settings
+        return SingleFlight(default_timeout=settings.SINGLE_FLIGHT_TIMEOUT)
+    except Exception:
+        return SingleFlight()
+
+
+# Shared coalescer used by cached_route
+single_flight = _build_single_flight()
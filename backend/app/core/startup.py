@@ -0,0 +1,209 @@
+"""
+Startup profiles
+Decides which boot phases run, skips DDL when the schema hasn't changed and
+reports how long each phase took.
+
+Profiles (settings.STARTUP_PROFILE / STARTUP_PROFILE env var):
+- full:   schema, migrations, default admin, membership index, SMS, scheduler
+          (default - one long-running process does everything)
+- web:    schema check + pending migrations + SMS; for serverless / extra web
+          workers where no scheduler should run. Platforms without a release
+          step (Vercel) rely on this to migrate existing databases; when the
+          release step already ran them it costs one schema_migrations lookup
+- worker: schema check + SMS + scheduler; for a dedicated background process
+
+The schema phase fingerprints the model metadata (compiled CREATE TABLE /
+CREATE INDEX statements) and only runs create_all when that fingerprint isn't
+recorded in schema_migrations yet.
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+PROFILES: Dict[str, Tuple[str, ...]] = {
+    "full": ("schema", "migrations", "default_admin", "membership_index", "sms", "scheduler"),
+    "web": ("schema", "migrations", "sms"),
+    "worker": ("schema", "sms", "scheduler"),
+}
+DEFAULT_PROFILE = "full"
+FINGERPRINT_PREFIX = "schema:"
+
+
+class StartupReport:
+    """Per-phase timings of one application boot"""
+
+    def __init__(self, profile: str, imports_ms: Optional[float] = None):
+        self.profile = profile
+        self.phases: List[dict] = []
+        if imports_ms is not None:
+            self.phases.append({"phase": "imports", "ms": round(imports_ms, 1), "status": "ok"})
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        entry = {"phase": name, "ms": 0.0, "status": "ok"}
+        try:
+            yield entry
+        except Exception as e:
+            entry["status"] = "error"
+            logger.error(f"❌ Startup phase '{name}' failed: {e}")
+        finally:
+            entry["ms"] = round((time.perf_counter() - started) * 1000, 1)
+            self.phases.append(entry)
+
+    @property
+    def total_ms(self) -> float:
+        return round(sum(p["ms"] for p in self.phases), 1)
+
+    def to_dict(self) -> dict:
+        return {"profile": self.profile, "total_ms": self.total_ms, "phases": self.phases}
+
+    def log(self):
+        logger.info(f"⏱️ Startup ({self.profile}) finished in {self.total_ms:.0f} ms")
+        for p in self.phases:
+            suffix = "" if p["status"] == "ok" else f" [{p['status']}]"
+            logger.info(f"   {p['phase']:<18} {p['ms']:>8.1f} ms{suffix}")
+
+
+# Report of the last boot (exposed by /api/health)
+last_report: Optional[StartupReport] = None
+
+
+def resolve_profile(profile: Optional[str] = None) -> str:
+    if profile is None:
+        from app.core.config import settings
+        profile = settings.STARTUP_PROFILE
+    profile = (profile or DEFAULT_PROFILE).lower()
+    if profile not in PROFILES:
+        logger.warning(f"⚠️ Unknown startup profile '{profile}', using '{DEFAULT_PROFILE}'")
+        profile = DEFAULT_PROFILE
+    return profile
+
+
+# ---------- schema fingerprint ----------
+
+def schema_fingerprint(metadata, dialect) -> str:
+    """Hash of the DDL the models would create on this dialect"""
+    from sqlalchemy.schema import CreateIndex, CreateTable
+
+    digest = hashlib.sha256()
+    for _, table in sorted(metadata.tables.items()):
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda ix: ix.name or ""):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+    return digest.hexdigest()[:16]
+
+
+def ensure_schema(engine=None) -> bool:
+    """create_all only when the model fingerprint is new; returns True if DDL ran"""
+    from app import models  # noqa: F401 - register every table
+    from app.core.database import Base
+    from app.core.migrations import schema_migrations, applied_versions
+
+    if engine is None:
+        from app.core.database import engine
+    version = FINGERPRINT_PREFIX + schema_fingerprint(Base.metadata, engine.dialect)
+    if version in applied_versions(engine):
+        logger.info(f"✅ Schema unchanged ({version}), skipping create_all")
+        return False
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        # Older fingerprints are dropped so the table holds one current value
+        conn.execute(schema_migrations.delete().where(schema_migrations.c.version.like(f"{FINGERPRINT_PREFIX}%")))
+        conn.execute(schema_migrations.insert().values(version=version, applied_at=datetime.utcnow()))
+    logger.info(f"✅ Schema created/updated ({version})")
+    return True
+
+
+# ---------- phases ----------
+
+def _run_migrations():
+    from app.core.migrations import run_pending_migrations
+    summary = run_pending_migrations()
+    logger.info(f"✅ Migrations completed ({len(summary['applied'])} applied, {len(summary['failed'])} failed)")
+
+
+def _default_admin():
+    from app.core.auth import create_default_admin
+    from app.core.database import SessionLocal
+    db = SessionLocal()
+    try:
+        create_default_admin(db)
+    finally:
+        db.close()
+
+
+def _membership_index():
+    from app.core.company_filter import membership_index
+    from app.core.database import SessionLocal
+    db = SessionLocal()
+    try:
+        membership_index.load(db)
+        logger.info("✅ Company membership index loaded")
+    finally:
+        db.close()
+
+
+def _sms():
+    from app.core.database import SessionLocal
+    from app.core.sms import configure_sms
+    from app.models.sms_config import SMSConfig
+
+    db = SessionLocal()
+    try:
+        sms_config = db.query(SMSConfig).first()
+        if sms_config:
+            # Configure with decrypted values from database
+            configure_sms(
+                arkasel_api_key=sms_config.get_arkasel_api_key() or "",
+                arkasel_sender_id=sms_config.arkasel_sender_id or "SwapSync",
+                hubtel_client_id=sms_config.get_hubtel_client_id() or "",
+                hubtel_client_secret=sms_config.get_hubtel_client_secret() or "",
+                hubtel_sender_id=sms_config.hubtel_sender_id or "SwapSync"
+            )
+            logger.info("✅ SMS service configured from database")
+            logger.info(f"   📱 Arkasel: {'✅ Enabled' if sms_config.arkasel_enabled else '❌ Disabled'}")
+            logger.info(f"   📱 Hubtel: {'✅ Enabled' if sms_config.hubtel_enabled else '❌ Disabled'}")
+        else:
+            logger.warning("⚠️ No SMS config in database. SMS service not configured.")
+            logger.warning("   💡 Configure SMS in Settings page")
+    finally:
+        db.close()
+
+
+def _scheduler():
+    from app.core.scheduler import start_scheduler
+    start_scheduler()
+    logger.info("✅ Background scheduler initialized")
+
+
+PHASES = {
+    "schema": ensure_schema,
+    "migrations": _run_migrations,
+    "default_admin": _default_admin,
+    "membership_index": _membership_index,
+    "sms": _sms,
+    "scheduler": _scheduler,
+}
+
+
+def run_startup(profile: Optional[str] = None, imports_ms: Optional[float] = None) -> StartupReport:
+    """Run the boot phases of a profile; a failing phase is logged and the boot continues"""
+    global last_report
+    report = StartupReport(resolve_profile(profile), imports_ms)
+    for name in PROFILES[report.profile]:
+        with report.phase(name):
+            PHASES[name]()
+    report.log()
+    last_report = report
+    return report
+
+
+def startup_summary() -> Optional[dict]:
+    return last_report.to_dict() if last_report else None
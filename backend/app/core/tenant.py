@@ -0,0 +1,83 @@
+"""
+Automatic tenant scoping
+Once a session is scoped to a company (get_current_user does this for every
+authenticated request), every ORM SELECT on a company-owned model only returns
+that company's rows - routes no longer need their own `company_user_ids` filters
+to stay isolated.
+
+- Super admins (no company) are never scoped
+- `with unscoped(db):` lifts scoping for code that must look across companies
+  (global uniqueness checks, ID generators, super-admin maintenance)
+- `.execution_options(tenant_unscoped=True)` does the same for a single query
+
+Relationship and column lazy loads are left alone: they follow rows that were
+already scoped when first selected.
+"""
+from contextlib import contextmanager
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, with_loader_criteria
+
+TENANT_KEY = "tenant_company_id"
+UNSCOPED_KEY = "tenant_unscoped"
+
+_tenant_models: Optional[List[type]] = None
+
+
+def tenant_models() -> List[type]:
+    """Mapped classes whose table carries a company_id (see company_filter.COMPANY_SCOPED_TABLES)"""
+    global _tenant_models
+    if _tenant_models is None:
+        from app.core.company_filter import COMPANY_SCOPED_TABLES
+        from app.core.database import Base
+        _tenant_models = [
+            mapper.class_ for mapper in Base.registry.mappers
+            if getattr(mapper.class_, "__tablename__", None) in COMPANY_SCOPED_TABLES
+        ]
+    return _tenant_models
+
+
+def set_tenant(db: Session, company_id: Optional[int]):
+    """Scope all later ORM selects in this session to one company (None = unscoped)"""
+    db.info[TENANT_KEY] = company_id
+
+
+def scope_session(db: Session, current_user) -> Session:
+    """Scope a session to the company of an authenticated user"""
+    set_tenant(db, getattr(current_user, "company_id", None))
+    return db
+
+
+def get_tenant(db: Session) -> Optional[int]:
+    """Company the session is currently scoped to (None when unscoped)"""
+    if db.info.get(UNSCOPED_KEY):
+        return None
+    return db.info.get(TENANT_KEY)
+
+
+@contextmanager
+def unscoped(db: Session):
+    """Temporarily see every company's rows in this session"""
+    previous = db.info.get(UNSCOPED_KEY, False)
+    db.info[UNSCOPED_KEY] = True
+    try:
+        yield db
+    finally:
+        db.info[UNSCOPED_KEY] = previous
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _apply_tenant_criteria(execute_state):
+    if not execute_state.is_select or execute_state.is_relationship_load or execute_state.is_column_load:
+        return
+    if execute_state.execution_options.get(UNSCOPED_KEY):
+        return
+    company_id = get_tenant(execute_state.session)
+    if company_id is None:
+        return
+
+    execute_state.statement = execute_state.statement.options(*[
+        with_loader_criteria(model, lambda cls: cls.company_id == company_id, include_aliases=True)
+        for model in tenant_models()
+    ])
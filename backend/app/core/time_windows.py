@@ -0,0 +1,155 @@
+"""
+Shop-local time windows for date filters
+Turns "today", "this week", "this month", "last N days" and explicit date
+ranges - as the shop sees them in settings.SHOP_TIMEZONE (Africa/Accra) - into
+half-open [start, end) ranges in naive UTC, the form created_at is stored in.
+
+Filter with `in_window(Model.created_at, window)` instead of
+`func.date(col) == today` or `extract(...)`: a plain range on the column can
+use the (company_id, created_at) indexes, a function of the column can't.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import NamedTuple, Optional, Union
+import logging
+
+from sqlalchemy import and_, true
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEZONE = "Africa/Accra"
+
+
+class TimeWindow(NamedTuple):
+    """Half-open [start, end) range in naive UTC"""
+    start: datetime
+    end: datetime
+
+    def contains(self, moment: datetime) -> bool:
+        return self.start <= moment < self.end
+
+
+@lru_cache(maxsize=8)
+def shop_timezone(name: Optional[str] = None):
+    """The configured shop timezone (UTC if the zone database doesn't know it)"""
+    if name is None:
+        from app.core.config import settings
+        name = settings.SHOP_TIMEZONE or DEFAULT_TIMEZONE
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(name)
+    except Exception:
+        # e.g. a Windows desktop build without tzdata; Accra is UTC+0 anyway
+        logger.warning(f"⚠️ Unknown timezone '{name}', using UTC for date filters")
+        return timezone.utc
+
+
+def utc_now() -> datetime:
+    """Current time as naive UTC (matches datetime.utcnow() defaults on the models)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def local_today(now: Optional[datetime] = None, tz=None) -> date:
+    """The shop's current calendar date; `now` is naive UTC"""
+    tz = tz or shop_timezone()
+    now = now or utc_now()
+    return now.replace(tzinfo=timezone.utc).astimezone(tz).date()
+
+
+def local_midnight_utc(day: date, tz=None) -> datetime:
+    """Start of a shop-local calendar day as naive UTC"""
+    tz = tz or shop_timezone()
+    return datetime.combine(day, time.min, tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def days_window(first_day: date, last_day: date, tz=None) -> TimeWindow:
+    """Whole local days first_day..last_day (inclusive) as [start, end)"""
+    return TimeWindow(local_midnight_utc(first_day, tz), local_midnight_utc(last_day + timedelta(days=1), tz))
+
+
+def local_day(moment: datetime, tz=None) -> date:
+    """Shop-local calendar date of a naive UTC timestamp"""
+    return local_today(moment, tz)
+
+
+def window_days(window: TimeWindow, tz=None) -> tuple:
+    """(first, last) shop-local days covered by a window of whole days"""
+    return local_day(window.start, tz), local_day(window.end - timedelta(microseconds=1), tz)
+
+
+def today_window(now: Optional[datetime] = None, tz=None) -> TimeWindow:
+    today = local_today(now, tz)
+    return days_window(today, today, tz)
+
+
+def week_window(now: Optional[datetime] = None, tz=None) -> TimeWindow:
+    """Monday of this week up to the end of today"""
+    today = local_today(now, tz)
+    return days_window(today - timedelta(days=today.weekday()), today, tz)
+
+
+def month_window(now: Optional[datetime] = None, tz=None) -> TimeWindow:
+    """First day of this month up to the end of today"""
+    today = local_today(now, tz)
+    return days_window(today.replace(day=1), today, tz)
+
+
+def calendar_month_window(year: int, month: int, tz=None) -> TimeWindow:
+    """The whole of one calendar month"""
+    first = date(year, month, 1)
+    next_first = date(year + (month == 12), month % 12 + 1, 1)
+    return TimeWindow(local_midnight_utc(first, tz), local_midnight_utc(next_first, tz))
+
+
+def last_days_window(days: int, now: Optional[datetime] = None, tz=None) -> TimeWindow:
+    """The last `days` local days, today included"""
+    today = local_today(now, tz)
+    return days_window(today - timedelta(days=days - 1), today, tz)
+
+
+def period_window(period: str, now: Optional[datetime] = None, tz=None) -> Optional[TimeWindow]:
+    """'today' / 'week' / 'month' (calendar, shop-local); None for 'all'"""
+    if period == "today":
+        return today_window(now, tz)
+    if period == "week":
+        return week_window(now, tz)
+    if period == "month":
+        return month_window(now, tz)
+    return None
+
+
+def _parse_day(value: Union[str, date, datetime, None]) -> Optional[date]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value[:10], "%Y-%m-%d").date()
+
+
+def range_window(start_date=None, end_date=None, tz=None) -> Optional[TimeWindow]:
+    """
+    Explicit local date range (YYYY-MM-DD strings or dates, both days inclusive)
+
+    Either side may be omitted; None when neither is given. Raises ValueError
+    on a malformed date, like datetime.strptime.
+    """
+    first, last = _parse_day(start_date), _parse_day(end_date)
+    if first is None and last is None:
+        return None
+    start = local_midnight_utc(first, tz) if first else datetime.min
+    end = local_midnight_utc(last + timedelta(days=1), tz) if last else datetime.max
+    return TimeWindow(start, end)
+
+
+def in_window(column, window: Optional[TimeWindow]):
+    """Index-friendly `start <= column < end` predicate (no-op for None)"""
+    if window is None:
+        return true()
+    clauses = []
+    if window.start != datetime.min:
+        clauses.append(column >= window.start)
+    if window.end != datetime.max:
+        clauses.append(column < window.end)
+    return and_(*clauses) if clauses else true()
@@ -1,15 +1,16 @@
 """
 Caching middleware for performance optimization
+Backed by the shared bounded engine in app/core/cache.py
 """
 from functools import wraps
-from typing import Optional, Any
-import hashlib
-import json
-from datetime import datetime, timedelta
+from typing import Optional
+from datetime import datetime
+
+from app.core.cache import cache_engine, _make_cache_key, _MISSING
+
+# All cache_response entries live in this namespace of the shared engine
+RESPONSE_NAMESPACE = "responses"
 
-# Simple in-memory cache
-_cache = {}
-_cache_timestamps = {}
 
 def cache_response(ttl_seconds: int = 300):
     """
@@ -22,18 +23,16 @@ def cache_response(ttl_seconds: int = 300):
         @wraps(func)
         def wrapper(*args, **kwargs):
             # Create cache key from function name and arguments
-            cache_key = f"{func.__name__}_{hash(str(args))}_{hash(str(kwargs))}"
+            cache_key = f"{func.__name__}_{_make_cache_key(args, kwargs)}"
             
             # Check if cached and not expired
-            if cache_key in _cache:
-                timestamp = _cache_timestamps.get(cache_key)
-                if timestamp and (datetime.now() - timestamp).total_seconds() < ttl_seconds:
-                    return _cache[cache_key]
+            cached = cache_engine.lookup(RESPONSE_NAMESPACE, cache_key)
+            if cached is not _MISSING:
+                return cached
             
             # Call function and cache result
             result = func(*args, **kwargs)
-            _cache[cache_key] = result
-            _cache_timestamps[cache_key] = datetime.now()
+            cache_engine.set(RESPONSE_NAMESPACE, cache_key, result, ttl_seconds)
             
             return result
         return wrapper
@@ -47,23 +46,20 @@ def invalidate_cache(pattern: Optional[str] = None):
         pattern: If provided, only invalidate keys containing this pattern
                  If None, clear entire cache
     """
-    global _cache, _cache_timestamps
-    
     if pattern is None:
-        _cache.clear()
-        _cache_timestamps.clear()
+        cache_engine.clear(RESPONSE_NAMESPACE)
     else:
-        keys_to_remove = [k for k in _cache.keys() if pattern in k]
-        for key in keys_to_remove:
-            _cache.pop(key, None)
-            _cache_timestamps.pop(key, None)
+        cache_engine.delete_matching(
+            lambda namespace, key: namespace == RESPONSE_NAMESPACE and pattern in key
+        )
 
 def get_cache_stats():
     """Get cache statistics"""
+    stats = cache_engine.stats()
+    responses = stats["namespaces"].get(RESPONSE_NAMESPACE, {})
     return {
-        "total_entries": len(_cache),
-        "cache_size_bytes": sum(len(str(v)) for v in _cache.values()),
-        "oldest_entry": min(_cache_timestamps.values()) if _cache_timestamps else None,
-        "newest_entry": max(_cache_timestamps.values()) if _cache_timestamps else None
+        "total_entries": responses.get("entries", 0),
+        "cache_size_bytes": responses.get("bytes", 0),
+        "engine": stats,
+        "generated_at": datetime.utcnow().isoformat()
     }
-
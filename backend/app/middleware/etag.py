@@ -0,0 +1,99 @@
+"""
+Conditional responses (ETag / If-None-Match) for catalog and list endpoints
+The ETag comes from the company's rows in the database: row count, latest
+updated_at and highest id of each entity the listing reads. That is one small
+aggregate statement, sees writes from every worker, script and service,
+and lets an unchanged catalog return an empty 304 without loading or
+serializing anything.
+"""
+from typing import Iterable
+import hashlib
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import func, or_, select, true
+from sqlalchemy.orm import Session
+
+from app.core.auth import get_current_user
+from app.core.company_filter import get_company_user_ids
+from app.core.database import get_db
+from app.models.brand import Brand
+from app.models.category import Category
+from app.models.product import Product
+from app.models.user import User
+
+# entity -> (model, whether rows without a creator are shown to every company)
+VERSIONED_ENTITIES = {
+    "products": (Product, True),  # Legacy products without a creator are listed for everyone
+    "categories": (Category, False),
+    "brands": (Brand, False),
+}
+
+
+def data_version(db: Session, current_user: User, entities: Iterable[str]) -> str:
+    """Version of the rows of these entities the user's company can list (one statement)"""
+    company_user_ids = get_company_user_ids(db, current_user)
+    columns = []
+    for entity in entities:
+        model, include_unowned = VERSIONED_ENTITIES[entity]
+        condition = true()
+        if company_user_ids is not None:
+            condition = model.created_by_user_id.in_(company_user_ids)
+            if include_unowned:
+                condition = or_(condition, model.created_by_user_id.is_(None))
+        for aggregate in (func.count(model.id), func.max(model.updated_at), func.max(model.id)):
+            columns.append(select(aggregate).where(condition).scalar_subquery())
+    return "|".join(str(value) for value in db.execute(select(*columns)).one())
+
+
+def make_etag(request: Request, db: Session, current_user: User, entities: Iterable[str]) -> str:
+    """Weak ETag for this URL, user and company data version"""
+    version = data_version(db, current_user, entities)
+    role = getattr(current_user.role, "value", current_user.role)
+    raw = f"{request.url.path}?{request.url.query}|{current_user.id}|{role}|{version}"
+    return f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Compare weakly: W/"x" and "x" are the same version
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
+
+
+def conditional_etag(*entities: str):
+    """
+    Route dependency returning 304 Not Modified while the data is unchanged
+
+    Usage:
+        @router.get("/", dependencies=[conditional_etag("products", "categories")])
+
+    Entities must be listed in VERSIONED_ENTITIES.
+    """
+    unknown = set(entities) - set(VERSIONED_ENTITIES)
+    if unknown:
+        raise ValueError(f"No data version for {sorted(unknown)}")
+
+    def check_etag(
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+    ):
+        etag = make_etag(request, db, current_user, entities)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if _etag_matches(request.headers.get("if-none-match", ""), etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response.headers.update(headers)
+
+    return Depends(check_etag)
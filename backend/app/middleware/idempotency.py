@@ -0,0 +1,203 @@
+"""
+Idempotency-Key handling for create endpoints
+Shops run on flaky mobile data and the frontend retries POSTs; a retried
+checkout must not sell, take stock and text a receipt twice. A create route
+opts in through its router's route class and a dependency:
+
+    router = APIRouter(prefix="/pos-sales", route_class=IdempotentRoute)
+
+    @router.post("/", dependencies=[idempotent()])
+
+- A request with an Idempotency-Key header claims (user, key) in the
+  idempotency_keys table before the route runs; its 2xx response is stored
+- A repeat gets the stored response back (with Idempotent-Replayed: true)
+  without running the route; a repeat arriving while the first is still running
+  waits up to settings.IDEMPOTENCY_WAIT seconds for it, then gets a 409
+- Reusing a key for a different request (method, path or body) is a 422
+- A failed request (4xx/5xx) releases its key so the retry runs again; the
+  create routes roll back before failing, so nothing was written
+- Keys expire after settings.IDEMPOTENCY_KEY_TTL_HOURS; requests without the
+  header behave as before
+"""
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import time
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.database import get_db
+from app.models.idempotency_key import IdempotencyKey
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+STALE_CLAIM_SECONDS = 300  # An in-progress claim this old belongs to a request that died mid-way
+
+# Outcomes of trying to claim a key
+CLAIMED, REPLAY, RUNNING, MISMATCH = "claimed", "replay", "running", "mismatch"
+
+
+class _Replay(Exception):
+    """Raised by the dependency to short-circuit the route with a stored response"""
+
+    def __init__(self, response: Response):
+        self.response = response
+
+
+def request_hash(method: str, path: str, body: bytes) -> str:
+    """SHA-256 identifying a request, so a key can't be reused for a different one"""
+    digest = hashlib.sha256(f"{method} {path}\n".encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def claim_key(bind, user_id: int, key: str, fingerprint: str) -> Tuple[str, Optional[object]]:
+    """
+    Claim (user, key) in its own transaction
+    Returns (CLAIMED, row id), (REPLAY, stored Response), (RUNNING, None) or (MISMATCH, None).
+    """
+    db = Session(bind=bind, autoflush=False)
+    try:
+        while True:
+            now = datetime.utcnow()
+            row = db.query(IdempotencyKey).filter(
+                IdempotencyKey.user_id == user_id, IdempotencyKey.key == key
+            ).first()
+            stale = row is not None and row.status == IN_PROGRESS and \
+                row.created_at < now - timedelta(seconds=STALE_CLAIM_SECONDS)
+            if row is not None and (row.expires_at <= now or stale):
+                db.delete(row)
+                db.flush()
+                row = None
+
+            if row is None:
+                row = IdempotencyKey(
+                    user_id=user_id, key=key, request_hash=fingerprint, status=IN_PROGRESS, created_at=now,
+                    expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+                )
+                db.add(row)
+                try:
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()  # A concurrent duplicate claimed it first; look again
+                    continue
+                return CLAIMED, row.id
+
+            if row.request_hash != fingerprint:
+                return MISMATCH, None
+            if row.status == COMPLETED:
+                response = Response(content=row.response_body or "", status_code=row.response_status,
+                                    media_type=row.media_type, headers={REPLAYED_HEADER: "true"})
+                return REPLAY, response
+            return RUNNING, None
+    finally:
+        db.close()
+
+
+def finish_key(bind, row_id: int, response: Optional[Response]):
+    """Store the response of a claimed request, or release the claim when there is none to keep"""
+    db = Session(bind=bind, autoflush=False)
+    try:
+        row = db.get(IdempotencyKey, row_id)
+        if row is None:
+            return
+        body = getattr(response, "body", None) if response is not None else None
+        if body is None or not 200 <= response.status_code < 300:
+            db.delete(row)
+        else:
+            row.status = COMPLETED
+            row.response_status = response.status_code
+            row.response_body = body.decode("utf-8")
+            row.media_type = response.media_type or response.headers.get("content-type")
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Could not record idempotency key {row_id}: {e}")
+    finally:
+        db.close()
+
+
+def idempotent():
+    """
+    Route dependency honouring the Idempotency-Key header (needs route_class=IdempotentRoute)
+
+    Usage:
+        @router.post("/", dependencies=[idempotent()])
+    """
+    async def claim_idempotency_key(
+        request: Request,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+    ):
+        key = (request.headers.get(HEADER) or "").strip()
+        if not key:
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail=f"{HEADER} must be at most {MAX_KEY_LENGTH} characters")
+
+        fingerprint = request_hash(request.method, request.url.path, await request.body())
+        bind = db.get_bind()
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+        delay = 0.05
+        while True:
+            outcome, value = await run_in_threadpool(claim_key, bind, current_user.id, key, fingerprint)
+            if outcome == CLAIMED:
+                request.state.idempotency_claim = (bind, value)
+                return
+            if outcome == REPLAY:
+                logger.info(f"🔁 Replaying {request.method} {request.url.path} for {HEADER} {key!r}")
+                raise _Replay(value)
+            if outcome == MISMATCH:
+                raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                    detail=f"{HEADER} was already used for a different request")
+            if time.monotonic() >= deadline:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                    detail=f"A request with this {HEADER} is still being processed; retry shortly")
+            # The first request with this key is still running; wait for its response
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    return Depends(claim_idempotency_key)
+
+
+class IdempotentRoute(APIRoute):
+    """Route class storing or replaying responses for requests claimed by idempotent()"""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def idempotent_handler(request: Request) -> Response:
+            try:
+                response = await handler(request)
+            except _Replay as replay:
+                return replay.response
+            except BaseException:
+                await _finish(request, None)
+                raise
+            await _finish(request, response)
+            return response
+
+        return idempotent_handler
+
+
+async def _finish(request: Request, response: Optional[Response]):
+    claim = getattr(request.state, "idempotency_claim", None)
+    if claim is not None:
+        request.state.idempotency_claim = None
+        bind, row_id = claim
+        await run_in_threadpool(finish_key, bind, row_id, response)
@@ -0,0 +1,41 @@
+"""
+SQL instrumentation middleware
+Adds a Server-Timing header (database time, query count, total time) to every
+HTTP response and logs statement shapes repeated more than
+settings.N_PLUS_ONE_THRESHOLD times in one request (see app/core/query_stats.py).
+
+Plain ASGI middleware: the stats are set in the request's context before the
+app runs, and the header is added when the response starts.
+"""
+from app.core import query_stats
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app, n_plus_one_threshold: int = query_stats.DEFAULT_N_PLUS_ONE_THRESHOLD,
+                 server_timing: bool = True):
+        self.app = app
+        self.threshold = n_plus_one_threshold
+        self.server_timing = server_timing
+        query_stats.install()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = query_stats.begin_request()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            query_stats.end_request(token)
+            query_stats.log_repeated_statements(
+                stats, f"{scope.get('method', '')} {scope.get('path', '')}", self.threshold
+            )
@@ -24,6 +24,9 @@ from app.models.audit_code import AuditCode
 from app.models.otp_session import OTPSession
 from app.models.sms_config import SMSConfig
 from app.models.pending_resale import PendingResale, TransactionType, PhoneSaleStatus, ProfitStatus
+from app.models.daily_company_metric import DailyCompanyMetric
+from app.models.id_counter import IdCounter
+from app.models.idempotency_key import IdempotencyKey
 
 __all__ = [
     "Customer", "Phone", "PhoneStatus", "PhoneOwnershipHistory", "Swap", "Sale", "Repair", 
@@ -32,6 +35,9 @@ __all__ = [
     "SMSLog", "Category", "Brand", "Product", "StockMovement", "ProductSale",
     "POSSale", "POSSaleItem",
     "UserSession", "AuditCode", "OTPSession", "SMSConfig", "PendingResale",
-    "TransactionType", "PhoneSaleStatus", "ProfitStatus"
+    "TransactionType", "PhoneSaleStatus", "ProfitStatus", "DailyCompanyMetric", "IdCounter",
+    "IdempotencyKey"
 ]
 
+# Keeps daily_company_metrics in step with sale/repair/swap writes
+import app.core.company_metrics  # noqa: E402,F401
@@ -1,7 +1,7 @@
 """
 Activity Log Model - Track all user actions for transparency
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -13,9 +13,13 @@ class ActivityLog(Base):
     Immutable for transparency and audit trail
     """
     __tablename__ = "activity_logs"
+    __table_args__ = (
+        Index("ix_activity_logs_company_timestamp", "company_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    company_id = Column(Integer, nullable=True)  # Owning company (manager's user id), stamped on insert
     action = Column(String, nullable=False)  # Description of action
     module = Column(String, nullable=False)  # customers, phones, swaps, sales, repairs
     target_id = Column(Integer, nullable=True)  # ID of affected record
@@ -20,6 +20,7 @@ class Brand(Base):
     logo_url = Column(String, nullable=True)  # Optional brand logo URL
     created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Drives the listing ETag
     
     # Relationships
     created_by = relationship("User", foreign_keys=[created_by_user_id])
@@ -20,6 +20,7 @@ class Category(Base):
     icon = Column(String, nullable=True)  # Icon name for UI
     created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Drives the listing ETag
     
     # Note: name is unique per company, not globally
     
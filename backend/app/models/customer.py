@@ -1,7 +1,7 @@
 """
 Customer Model - Represents shop clients (buyers, swappers, repair customers)
 """
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -14,6 +14,9 @@ class Customer(Base):
     Customer model for storing client information
     """
     __tablename__ = "customers"
+    __table_args__ = (
+        Index("ix_customers_company_created_at", "company_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     unique_id = Column(String(20), unique=True, nullable=True, index=True)  # CUST-0001
@@ -22,6 +25,7 @@ class Customer(Base):
     email = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=True)
     created_by_user_id = Column(Integer, nullable=True, server_default=None)  # Who created this customer (for deletion code privacy)
+    company_id = Column(Integer, nullable=True)  # Owning company (manager's user id), stamped on insert
     
     # Security: Dynamic deletion code
     deletion_code = Column(String(20), nullable=True)
@@ -32,9 +36,9 @@ class Customer(Base):
 
     def generate_unique_id(self, db_session):
         """Generate unique customer ID in format CUST-0001"""
-        from sqlalchemy import func
-        max_id = db_session.query(func.max(Customer.id)).scalar() or 0
-        self.unique_id = f"CUST-{str(max_id + 1).zfill(4)}"
+        from app.core.sequences import next_code
+        # IDs are global across companies
+        self.unique_id = next_code(db_session, "CUST", Customer.unique_id)
         return self.unique_id
 
     def generate_deletion_code(self):
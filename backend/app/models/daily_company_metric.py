@@ -0,0 +1,34 @@
+"""
+Daily Company Metric Model - Per-company, per-day, per-hub sales rollup
+Maintained by app/core/company_metrics.py on every sale/repair/swap write
+"""
+from sqlalchemy import Column, Integer, Float, Date, DateTime, String, UniqueConstraint
+from datetime import datetime
+from app.core.database import Base
+
+
+class DailyCompanyMetric(Base):
+    """
+    One row per (company, shop-local day, hub) with running totals
+    Dashboards sum a few of these rows instead of scanning every transaction
+    """
+    __tablename__ = "daily_company_metrics"
+    __table_args__ = (
+        UniqueConstraint("company_id", "day", "hub", name="uq_daily_company_metrics_company_day_hub"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, nullable=False)  # Manager's user id
+    day = Column(Date, nullable=False)  # Calendar day in settings.SHOP_TIMEZONE
+    hub = Column(String(20), nullable=False)  # products, phones, repairs, swaps
+
+    revenue = Column(Float, nullable=False, default=0.0)
+    cost = Column(Float, nullable=False, default=0.0)
+    profit = Column(Float, nullable=False, default=0.0)
+    transactions = Column(Integer, nullable=False, default=0)  # Checkouts, phone sales, repairs booked, swaps
+    units = Column(Integer, nullable=False, default=0)  # Items sold
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<DailyCompanyMetric company={self.company_id} {self.day} {self.hub}: ₵{self.revenue}>"
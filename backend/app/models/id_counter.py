@@ -0,0 +1,22 @@
+"""
+ID Counter Model - Last number handed out per human-readable ID sequence
+Used by app/core/sequences.py for CUST-0001, POS-20250120-001, INV-20250120-0001, ...
+"""
+from sqlalchemy import Column, BigInteger, DateTime, String
+from datetime import datetime
+from app.core.database import Base
+
+
+class IdCounter(Base):
+    """
+    One row per sequence scope: a prefix ("CUST") or a prefix and day ("POS-20250120")
+    Global across companies, like the IDs it numbers
+    """
+    __tablename__ = "id_counters"
+
+    name = Column(String(50), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)  # Highest number reserved so far
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<IdCounter {self.name}: {self.value}>"
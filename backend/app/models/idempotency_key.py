@@ -0,0 +1,34 @@
+"""
+Idempotency Key Model - Stored outcome of a create request sent with an Idempotency-Key header
+Used by app/middleware/idempotency.py so retried POSTs replay the first response
+"""
+from sqlalchemy import Column, Integer, DateTime, String, Text, UniqueConstraint
+from datetime import datetime
+from app.core.database import Base
+
+
+class IdempotencyKey(Base):
+    """
+    One row per (user, key): claimed while the first request runs, then holds its response
+    Rows past expires_at are ignored and reused; cleanup deletes them
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    key = Column(String(255), nullable=False)  # Client-chosen Idempotency-Key header value
+    request_hash = Column(String(64), nullable=False)  # SHA-256 of method, path and body
+    status = Column(String(20), nullable=False, default="in_progress")  # in_progress, completed
+
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    media_type = Column(String(100), nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<IdempotencyKey user={self.user_id} {self.key}: {self.status}>"
@@ -1,7 +1,7 @@
 """
 Invoice Model - For tracking generated invoices/receipts
 """
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -12,6 +12,9 @@ class Invoice(Base):
     Invoice/Receipt model for swaps and sales
     """
     __tablename__ = "invoices"
+    __table_args__ = (
+        Index("ix_invoices_company_created_at", "company_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     invoice_number = Column(String, unique=True, nullable=False, index=True)
@@ -28,6 +31,7 @@ class Invoice(Base):
     # Staff info
     staff_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     staff_name = Column(String, nullable=True)
+    company_id = Column(Integer, nullable=True)  # Owning company (manager's user id), stamped on insert
     
     # Pricing details
     original_price = Column(Float, nullable=False)
@@ -86,9 +86,8 @@ class PendingResale(Base):
 
     def generate_unique_id(self, db_session):
         """Generate unique resale ID in format PRSL-0001"""
-        from sqlalchemy import func
-        max_id = db_session.query(func.count(PendingResale.id)).scalar() or 0
-        self.unique_id = f"PRSL-{str(max_id + 1).zfill(4)}"
+        from app.core.sequences import next_code
+        self.unique_id = next_code(db_session, "PRSL", PendingResale.unique_id)
         return self.unique_id
 
     def __repr__(self):
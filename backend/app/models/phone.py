@@ -1,7 +1,7 @@
 """
 Phone Model - Represents phones in inventory (new or used)
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Enum as SQLEnum, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Enum as SQLEnum, DateTime, JSON, Index
 from sqlalchemy.orm import relationship
 from enum import Enum as PyEnum
 from datetime import datetime
@@ -22,6 +22,9 @@ class Phone(Base):
     Tracks phones available for sale or received through swaps
     """
     __tablename__ = "phones"
+    __table_args__ = (
+        Index("ix_phones_company_created_at", "company_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     unique_id = Column(String(20), unique=True, nullable=True, index=True)  # PHON-0001
@@ -39,6 +42,7 @@ class Phone(Base):
     is_swappable = Column(Boolean, default=True, nullable=False)  # Can this phone be used in swaps?
     swapped_from_id = Column(Integer, ForeignKey("swaps.id"), nullable=True)
     created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # Who added this phone
+    company_id = Column(Integer, nullable=True)  # Owning company (manager's user id), stamped on insert
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Ownership tracking
@@ -53,9 +57,8 @@ class Phone(Base):
 
     def generate_unique_id(self, db_session):
         """Generate unique phone ID in format PHON-0001"""
-        from sqlalchemy import func
-        max_id = db_session.query(func.count(Phone.id)).scalar() or 0
-        self.unique_id = f"PHON-{str(max_id + 1).zfill(4)}"
+        from app.core.sequences import next_code
+        self.unique_id = next_code(db_session, "PHON", Phone.unique_id)
         return self.unique_id
 
     def __repr__(self):
@@ -1,7 +1,7 @@
 """
 POS Sale Model - For Point of Sale batch transactions (multiple items in one sale)
 """
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String, Text
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -13,6 +13,10 @@ class POSSale(Base):
     Acts as a parent record for multiple product_sales
     """
     __tablename__ = "pos_sales"
+    __table_args__ = (
+        Index("ix_pos_sales_company_created_at", "company_id", "created_at"),
+        Index("uq_pos_sales_company_client_id", "company_id", "client_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     transaction_id = Column(String(50), unique=True, nullable=False, index=True)  # e.g., POS-20250120-001
@@ -33,6 +37,7 @@ class POSSale(Base):
     items_count = Column(Integer, default=0)  # Number of different products
     total_quantity = Column(Integer, default=0)  # Total quantity of all items
     notes = Column(Text, nullable=True)
+    client_id = Column(String(64), nullable=True)  # UUID from the till for sales synced after going offline
     
     # Receipt Tracking
     sms_sent = Column(Integer, default=0)  # 0 = not sent, 1 = sent
@@ -40,6 +45,7 @@ class POSSale(Base):
     
     # Tracking
     created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    company_id = Column(Integer, nullable=True)  # Owning company (manager's user id), stamped on insert
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -52,17 +58,11 @@ class POSSale(Base):
         return f"<POSSale {self.transaction_id}: {self.items_count} items = ₵{self.total_amount}>"
     
     @staticmethod
-    def generate_transaction_id(db_session):
-        """Generate unique transaction ID in format POS-YYYYMMDD-XXX"""
-        from sqlalchemy import func
-        today = datetime.utcnow().strftime("%Y%m%d")
-        
-        # Count transactions today
-        today_count = db_session.query(func.count(POSSale.id)).filter(
-            POSSale.transaction_id.like(f"POS-{today}-%")
-        ).scalar() or 0
-        
-        return f"POS-{today}-{str(today_count + 1).zfill(3)}"
+    def generate_transaction_id(db_session, day=None):
+        """Generate unique transaction ID in format POS-YYYYMMDD-XXX (for `day`, default today)"""
+        from app.core.sequences import next_code
+        # Numbered per day, globally across companies
+        return next_code(db_session, "POS", POSSale.transaction_id, width=3, daily=True, day=day)
     
     @property
     def profit(self):
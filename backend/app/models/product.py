@@ -1,7 +1,7 @@
 """
 Product/Inventory Model - For all items sold (phones, accessories, etc.)
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -13,6 +13,9 @@ class Product(Base):
     Handles: Phones, Earbuds, Chargers, Batteries, Cases, Screen Protectors, etc.
     """
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_company_created_at", "company_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     unique_id = Column(String(20), unique=True, nullable=True, index=True)  # PROD-0001
@@ -57,6 +60,7 @@ class Product(Base):
     
     # Tracking
     created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    company_id = Column(Integer, nullable=True)  # Owning company (manager's user id), stamped on insert
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -66,9 +70,9 @@ class Product(Base):
     
     def generate_unique_id(self, db_session):
         """Generate unique product ID in format PROD-0001"""
-        from sqlalchemy import func
-        max_id = db_session.query(func.count(Product.id)).scalar() or 0
-        self.unique_id = f"PROD-{str(max_id + 1).zfill(4)}"
+        from app.core.sequences import next_code
+        # IDs are global across companies
+        self.unique_id = next_code(db_session, "PROD", Product.unique_id)
         return self.unique_id
     
     def __repr__(self):
@@ -143,6 +147,9 @@ class StockMovement(Base):
     Track all stock movements (purchases, sales, returns, adjustments)
     """
     __tablename__ = "stock_movements"
+    __table_args__ = (
+        Index("ix_stock_movements_company_created_at", "company_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
@@ -164,6 +171,7 @@ class StockMovement(Base):
     
     # Tracking
     created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    company_id = Column(Integer, nullable=True)  # Owning company (manager's user id), stamped on insert
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -1,7 +1,7 @@
 """
 Product Sale Model - For tracking product (non-phone) sales
 """
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -13,6 +13,9 @@ class ProductSale(Base):
     Separate from Phone Sales for clarity
     """
     __tablename__ = "product_sales"
+    __table_args__ = (
+        Index("ix_product_sales_company_created_at", "company_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     
@@ -25,6 +28,7 @@ class ProductSale(Base):
     unit_price = Column(Float, nullable=False)  # Price per unit
     discount_amount = Column(Float, default=0.0)
     total_amount = Column(Float, nullable=False)  # (unit_price * quantity) - discount
+    line_number = Column(Integer, nullable=True)  # Position on the POS cart (links the line to its POS sale item)
     
     # Customer Contact (for receipts)
     customer_phone = Column(String, nullable=False)  # Required for SMS
@@ -36,6 +40,7 @@ class ProductSale(Base):
     
     # Tracking
     created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    company_id = Column(Integer, nullable=True)  # Owning company (manager's user id), stamped on insert
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
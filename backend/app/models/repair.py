@@ -1,7 +1,7 @@
 """
 Repair Model - Tracks phone repairs and their progress
 """
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import random
@@ -14,6 +14,9 @@ class Repair(Base):
     Manages customer phone repairs, diagnostics, and delivery notifications
     """
     __tablename__ = "repairs"
+    __table_args__ = (
+        Index("ix_repairs_company_created_at", "company_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     unique_id = Column(String(20), unique=True, nullable=True, index=True, server_default=None)  # REP-0001, REP-0002, etc.
@@ -22,6 +25,7 @@ class Repair(Base):
     phone_id = Column(Integer, ForeignKey("phones.id"), nullable=True)  # Link to phone if in inventory
     staff_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # Repairer assigned
     created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # Who created this repair
+    company_id = Column(Integer, nullable=True)  # Owning company (manager's user id), stamped on insert
     
     # Phone and issue details
     phone_description = Column(String, nullable=False)  # e.g., "Samsung Galaxy S21"
@@ -64,11 +68,9 @@ class Repair(Base):
     
     def generate_unique_id(self, db_session):
         """Generate unique repair ID (REP-0001, REP-0002, etc.)"""
-        from sqlalchemy import func
-        
-        # Count existing repairs
-        count = db_session.query(func.count(Repair.id)).scalar() or 0
-        self.unique_id = f"REP-{str(count + 1).zfill(4)}"
+        from app.core.sequences import next_code
+        # IDs are global across companies
+        self.unique_id = next_code(db_session, "REP", Repair.unique_id)
         return self.unique_id
 
     def __repr__(self):
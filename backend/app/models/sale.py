@@ -1,7 +1,7 @@
 """
 Sale Model - For direct phone purchases (no swap involved)
 """
-from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, String
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, String, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -13,6 +13,9 @@ class Sale(Base):
     Customer purchases a phone without trading in an old one
     """
     __tablename__ = "sales"
+    __table_args__ = (
+        Index("ix_sales_company_created_at", "company_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
@@ -36,6 +39,7 @@ class Sale(Base):
     
     # Tracking who made the sale
     created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    company_id = Column(Integer, nullable=True)  # Owning company (manager's user id), stamped on insert
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
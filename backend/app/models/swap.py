@@ -1,7 +1,7 @@
 """
 Swap Model - Handles swap transactions between customer and shop with resale tracking
 """
-from sqlalchemy import Column, Integer, Float, ForeignKey, String, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, Integer, Float, ForeignKey, String, DateTime, Enum as SQLEnum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from enum import Enum as PyEnum
@@ -22,6 +22,9 @@ class Swap(Base):
     Tracks resale of trade-in phones and calculates profit/loss
     """
     __tablename__ = "swaps"
+    __table_args__ = (
+        Index("ix_swaps_company_created_at", "company_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
@@ -50,6 +53,7 @@ class Swap(Base):
     # Invoice tracking
     invoice_number = Column(String, nullable=True, unique=True)  # Unique invoice number
     
+    company_id = Column(Integer, nullable=True)  # Owning company (manager's user id), stamped on insert
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
@@ -50,7 +50,7 @@ class User(Base):
 
     def generate_unique_id(self, db_session):
         """Generate role-based unique ID"""
-        from sqlalchemy import func
+        from app.core.sequences import next_code
         
         role_prefixes = {
             'super_admin': 'ADM',
@@ -64,9 +64,8 @@ class User(Base):
         role_str = str(self.role.value if hasattr(self.role, 'value') else self.role)
         prefix = role_prefixes.get(role_str, 'USER')
         
-        # Count existing users with same role
-        count = db_session.query(func.count(User.id)).filter(User.role == self.role).scalar() or 0
-        self.unique_id = f"{prefix}-{str(count + 1).zfill(4)}"
+        # One sequence per prefix (admins and super admins share ADM)
+        self.unique_id = next_code(db_session, prefix, User.unique_id)
         return self.unique_id
 
     def __repr__(self):
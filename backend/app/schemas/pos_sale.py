@@ -2,9 +2,11 @@
 POS Sale Schemas - For Point of Sale batch transactions
 """
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 
+MAX_BATCH_SALES = 500  # Sales accepted by one offline-sync request
+
 
 class UserSimple(BaseModel):
     """Simple user info for created_by field"""
@@ -37,6 +39,41 @@ class POSSaleCreate(BaseModel):
     notes: Optional[str] = None
 
 
+class POSSaleBatchEntry(POSSaleCreate):
+    """A POS sale the till recorded while offline"""
+    client_id: str = Field(..., min_length=1, max_length=64)  # UUID generated by the till
+    created_at: Optional[datetime] = None  # When the till recorded it (defaults to sync time)
+
+
+class POSSaleBatchCreate(BaseModel):
+    """
+    Offline-sync batch of POS sales, oldest first
+    Each entry is a POSSaleBatchEntry; entries are validated one by one so an
+    invalid sale is reported in its result instead of rejecting the batch.
+    """
+    sales: List[Dict[str, Any]] = Field(..., min_length=1, max_length=MAX_BATCH_SALES)
+    send_receipts: bool = True  # SMS receipts for the recorded sales
+
+
+class POSSaleBatchResult(BaseModel):
+    """Outcome of one sale in an offline-sync batch"""
+    index: int  # Position in the request
+    client_id: Optional[str] = None
+    status: str  # created, duplicate (synced before), failed
+    id: Optional[int] = None
+    transaction_id: Optional[str] = None
+    status_code: Optional[int] = None  # For failed sales, what POST /pos-sales/ would have answered
+    error: Optional[str] = None
+
+
+class POSSaleBatchResponse(BaseModel):
+    """Per-sale results of an offline-sync batch"""
+    created: int
+    duplicates: int
+    failed: int
+    results: List[POSSaleBatchResult]
+
+
 class POSItemResponse(BaseModel):
     """Individual item in POS sale response"""
     product_id: int
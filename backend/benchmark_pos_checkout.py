@@ -0,0 +1,185 @@
+"""
+POS checkout benchmark
+Drives the real checkout path (pos_sale_routes._checkout) against a SQLite file
+with the production profile (app/core/sqlite_pragmas.py):
+
+- race:    several tills keep selling one unit of the same product until it is
+           sold out; every unit must be sold exactly once (no overselling)
+- latency: checkouts with growing carts; statements and time per checkout
+           should stay about flat as the cart grows
+
+Run: python benchmark_pos_checkout.py [--tills 8] [--stock 50] [--carts 1 5 10 25 50] [--repeat 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core.query_stats import count_queries, install
+from app.core.sqlite_pragmas import apply_sqlite_pragmas
+from app.core.tenant import scope_session
+from app.models import Category, Customer, Product, StockMovement, User, UserRole
+from app.schemas.pos_sale import POSSaleCreate
+
+CATALOGUE = 100  # products besides the contested one
+
+
+def make_session_factory(path: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False},
+                           pool_size=32, max_overflow=0)
+    apply_sqlite_pragmas(engine, "production", 10000)
+    Base.metadata.create_all(engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def seed(Session, stock: int) -> dict:
+    """A manager, a shop keeper, one contested product with `stock` units and a catalogue"""
+    db = Session()
+    manager = User(username="bench_manager", email="bench_manager@x.com", full_name="Bench Manager",
+                   role=UserRole.MANAGER, hashed_password="x", is_active=1)
+    db.add(manager)
+    db.flush()
+    keeper = User(username="bench_keeper", email="bench_keeper@x.com", full_name="Bench Keeper",
+                  role=UserRole.SHOP_KEEPER, parent_user_id=manager.id, hashed_password="x", is_active=1)
+    category = Category(name="Accessories", created_by_user_id=manager.id)
+    db.add_all([keeper, category])
+    db.flush()
+    contested = Product(name="Last charger", category_id=category.id, cost_price=20, selling_price=35,
+                        quantity=stock, created_by_user_id=manager.id)
+    catalogue = [
+        Product(name=f"Item {i}", category_id=category.id, cost_price=20, selling_price=35,
+                quantity=1_000_000, created_by_user_id=manager.id)
+        for i in range(CATALOGUE)
+    ]
+    # The shared walk-in customer already exists in any shop that has sold something
+    walk_in = Customer(full_name="Walk-In Customer", phone_number="0000000000")
+    db.add_all([contested, walk_in])
+    db.add_all(catalogue)
+    db.commit()
+    ids = {"keeper": keeper.id, "contested": contested.id, "catalogue": [p.id for p in catalogue]}
+    db.close()
+    return ids
+
+
+def cart(product_ids, quantity: int = 1) -> POSSaleCreate:
+    return POSSaleCreate(
+        customer_name="Bench", customer_phone="0240000000",
+        items=[{"product_id": product_id, "quantity": quantity, "unit_price": 35} for product_id in product_ids]
+    )
+
+
+def checkout(Session, keeper_id: int, sale: POSSaleCreate) -> bool:
+    """One checkout in its own session; False when it was refused (e.g. out of stock)"""
+    from app.api.routes.pos_sale_routes import _checkout
+
+    db = Session()
+    try:
+        keeper = db.get(User, keeper_id)
+        scope_session(db, keeper)
+        try:
+            _checkout(db, sale, keeper)
+        except HTTPException:
+            db.rollback()
+            return False
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+
+def run_race(Session, ids: dict, tills: int, stock: int) -> dict:
+    """`tills` threads sell the contested product one unit at a time until none is left"""
+    sold = [0] * tills
+    errors = []
+
+    def till(n: int):
+        try:
+            while checkout(Session, ids["keeper"], cart([ids["contested"]])):
+                sold[n] += 1
+        except Exception as e:  # lock timeouts etc. are failures of the benchmark, not refusals
+            errors.append(repr(e))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=till, args=(n,)) for n in range(tills)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    db = Session()
+    remaining = db.get(Product, ids["contested"]).quantity
+    moved = -(db.query(func.sum(StockMovement.quantity)).filter(
+        StockMovement.product_id == ids["contested"]).scalar() or 0)
+    db.close()
+    return {
+        "stock": stock, "sold": sum(sold), "remaining": remaining, "stock_movements": moved,
+        "oversold": max(0, sum(sold) - stock), "errors": errors,
+        "checkouts_per_s": sum(sold) / elapsed if elapsed else 0.0,
+    }
+
+
+def run_latency(Session, ids: dict, sizes, repeat: int) -> list:
+    """(cart size, statements per checkout, median ms, p95 ms) for each cart size"""
+    install()
+    rows = []
+    for size in sizes:
+        sale = cart(ids["catalogue"][:size])
+        timings, statements = [], 0
+        for _ in range(repeat):
+            with count_queries() as stats:
+                started = time.perf_counter()
+                assert checkout(Session, ids["keeper"], sale)
+                timings.append((time.perf_counter() - started) * 1000)
+            statements = stats.count
+        timings.sort()
+        rows.append((size, statements, statistics.median(timings), timings[int(len(timings) * 0.95) - 1]))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="POS checkout concurrency and cart-size benchmark")
+    parser.add_argument("--tills", type=int, default=8)
+    parser.add_argument("--stock", type=int, default=50)
+    parser.add_argument("--carts", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    args.carts = [size for size in args.carts if size <= CATALOGUE]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, Session = make_session_factory(os.path.join(tmp, "bench.db"))
+        ids = seed(Session, args.stock)
+
+        print(f"📊 POS checkout race: {args.tills} tills, {args.stock} units of one product")
+        print("=" * 72)
+        race = run_race(Session, ids, args.tills, args.stock)
+        print(f"sold {race['sold']} / {race['stock']}, remaining {race['remaining']}, "
+              f"stock movements {race['stock_movements']}, oversold {race['oversold']}, "
+              f"{race['checkouts_per_s']:.0f} checkouts/s")
+        for error in race["errors"]:
+            print(f"❌ {error}")
+        ok = race["oversold"] == 0 and race["sold"] == race["stock"] and race["remaining"] == 0 and not race["errors"]
+        print("✅ No overselling" if ok else "❌ Stock accounting is wrong")
+
+        print(f"\n📊 Checkout cost by cart size ({args.repeat} checkouts each)")
+        print("=" * 72)
+        print(f"{'items':>6}{'statements':>12}{'median ms':>12}{'p95 ms':>10}")
+        for size, statements, median, p95 in run_latency(Session, ids, args.carts, args.repeat):
+            print(f"{size:>6}{statements:>12}{median:>12.2f}{p95:>10.2f}")
+        print("=" * 72)
+        engine.dispose()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
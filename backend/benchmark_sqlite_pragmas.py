@@ -0,0 +1,133 @@
+"""
+SQLite read/write concurrency benchmark
+Compares SQLite profiles (app/core/sqlite_pragmas.py) under a POS-like load:
+writer threads insert sales in short transactions while reader threads run
+dashboard-style aggregates against the same database file.
+
+Run: python benchmark_sqlite_pragmas.py [--seconds 5] [--writers 2] [--readers 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.core.sqlite_pragmas import apply_sqlite_pragmas
+
+SEED_ROWS = 20000
+
+
+def make_engine(path: str, profile: str):
+    # timeout=0: the profile's busy_timeout (if any) is the only lock wait
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 0})
+    apply_sqlite_pragmas(engine, profile)
+    return engine
+
+
+def seed(engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE pos_sales (id INTEGER PRIMARY KEY, company_id INTEGER, total_amount FLOAT, created_at TIMESTAMP)"
+        ))
+        conn.execute(text("CREATE INDEX ix_bench_company ON pos_sales(company_id, created_at)"))
+        conn.execute(
+            text("INSERT INTO pos_sales (company_id, total_amount, created_at) VALUES (:c, :t, datetime('now'))"),
+            [{"c": i % 10, "t": float(i % 500)} for i in range(SEED_ROWS)]
+        )
+
+
+def run_profile(profile: str, seconds: float, writers: int, readers: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        engine = make_engine(path, profile)
+        seed(engine)
+
+        counts = {"writes": 0, "reads": 0, "write_errors": 0, "read_errors": 0}
+        latencies = {"write": [], "read": []}
+        lock = threading.Lock()
+        stop = time.perf_counter() + seconds
+
+        def writer(worker_id: int):
+            while time.perf_counter() < stop:
+                started = time.perf_counter()
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(
+                            text("INSERT INTO pos_sales (company_id, total_amount, created_at) "
+                                 "VALUES (:c, 25.0, datetime('now'))"),
+                            {"c": worker_id % 10}
+                        )
+                    key, latency_key = "writes", "write"
+                except OperationalError:
+                    key, latency_key = "write_errors", None
+                with lock:
+                    counts[key] += 1
+                    if latency_key:
+                        latencies[latency_key].append(time.perf_counter() - started)
+
+        def reader(worker_id: int):
+            while time.perf_counter() < stop:
+                started = time.perf_counter()
+                try:
+                    with engine.connect() as conn:
+                        conn.execute(
+                            text("SELECT COUNT(*), SUM(total_amount) FROM pos_sales WHERE company_id = :c"),
+                            {"c": worker_id % 10}
+                        ).fetchone()
+                    key, latency_key = "reads", "read"
+                except OperationalError:
+                    key, latency_key = "read_errors", None
+                with lock:
+                    counts[key] += 1
+                    if latency_key:
+                        latencies[latency_key].append(time.perf_counter() - started)
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+        threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        engine.dispose()
+
+    def p95(values):
+        return sorted(values)[int(len(values) * 0.95)] * 1000 if values else 0.0
+
+    return {
+        "profile": profile,
+        "writes_per_s": counts["writes"] / seconds,
+        "reads_per_s": counts["reads"] / seconds,
+        "write_errors": counts["write_errors"],
+        "read_errors": counts["read_errors"],
+        "write_p95_ms": p95(latencies["write"]),
+        "read_p95_ms": p95(latencies["read"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite profile concurrency benchmark")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--profiles", nargs="+", default=["off", "production"])
+    args = parser.parse_args()
+
+    print(f"📊 SQLite concurrency benchmark: {args.writers} writer(s), {args.readers} reader(s), {args.seconds:.0f}s each")
+    print("=" * 96)
+    print(f"{'profile':<12}{'writes/s':>10}{'reads/s':>10}{'write err':>11}{'read err':>10}"
+          f"{'write p95 ms':>14}{'read p95 ms':>13}")
+    for profile in args.profiles:
+        r = run_profile(profile, args.seconds, args.writers, args.readers)
+        print(f"{r['profile']:<12}{r['writes_per_s']:>10.0f}{r['reads_per_s']:>10.0f}{r['write_errors']:>11}"
+              f"{r['read_errors']:>10}{r['write_p95_ms']:>14.2f}{r['read_p95_ms']:>13.2f}")
+    print("=" * 96)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,19 +2,20 @@
 SwapSync API - Main Application Entry Point
 Phone Swapping and Repair Shop Management System
 """
-from fastapi import FastAPI, Request, status, HTTPException
+import time
+_BOOT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, Request, Response, status, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from app.core.config import settings
-from app.core.database import init_db
 from app.api.routes import ping
 from app.api.routes import customer_routes, phone_routes, sale_routes, swap_routes, repair_routes, repair_item_routes, analytics_routes, maintenance_routes, auth_routes, staff_routes, dashboard_routes, invoice_routes, reports_routes, audit_routes, category_routes, brand_routes, websocket_routes, expiring_audit_routes, product_routes, product_sale_routes, pos_sale_routes, sms_config_routes, profile_routes, bulk_upload_routes, system_cleanup_routes, sms_broadcast_routes, pending_resale_routes, greetings, today_stats, otp_routes, admin_routes, training_routes, migration_routes, admin_reset_routes
 import migrate_repair_items_endpoint
 from app.api.routes import cleanup_routes
-from app.core.auth import create_default_admin
-from app.core.scheduler import start_scheduler, stop_scheduler
+from app.core.scheduler import stop_scheduler
 import traceback
 import logging
 
@@ -38,66 +39,22 @@ app = FastAPI(
 # Add GZip compression to reduce bandwidth (Railway optimization)
 app.add_middleware(GZipMiddleware, minimum_size=1000)  # Compress responses > 1KB
 
+# Query count / DB time per request: Server-Timing header and N+1 warnings
+from app.middleware.query_stats import QueryStatsMiddleware
+app.add_middleware(
+    QueryStatsMiddleware,
+    n_plus_one_threshold=settings.N_PLUS_ONE_THRESHOLD,
+    server_timing=settings.SERVER_TIMING_ENABLED
+)
+
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database tables on application startup"""
-    from app.core.database import SessionLocal
-    init_db()
-    
-    # Run migrations BEFORE querying database
-    try:
-        from run_migrations import run_migrations
-        logger.info("🔧 Running database migrations...")
-        run_migrations()
-        logger.info("✅ Migrations completed")
-    except Exception as e:
-        logger.warning(f"⚠️ Migration runner error: {e}")
-        logger.warning("Continuing with startup anyway...")
-    
-    # Create default admin if no users exist
-    db = SessionLocal()
-    try:
-        create_default_admin(db)
-    finally:
-        db.close()
-    
-    # Initialize SMS service from DATABASE (not JSON file!)
-    try:
-        from app.core.sms import configure_sms
-        from app.models.sms_config import SMSConfig
-        
-        # Load SMS config from database
-        db = SessionLocal()
-        try:
-            sms_config = db.query(SMSConfig).first()
-            if sms_config:
-                # Configure with decrypted values from database
-                configure_sms(
-                    arkasel_api_key=sms_config.get_arkasel_api_key() or "",
-                    arkasel_sender_id=sms_config.arkasel_sender_id or "SwapSync",
-                    hubtel_client_id=sms_config.get_hubtel_client_id() or "",
-                    hubtel_client_secret=sms_config.get_hubtel_client_secret() or "",
-                    hubtel_sender_id=sms_config.hubtel_sender_id or "SwapSync"
-                )
-                logger.info("✅ SMS service configured from database")
-                logger.info(f"   📱 Arkasel: {'✅ Enabled' if sms_config.arkasel_enabled else '❌ Disabled'}")
-                logger.info(f"   📱 Hubtel: {'✅ Enabled' if sms_config.hubtel_enabled else '❌ Disabled'}")
-            else:
-                logger.warning("⚠️ No SMS config in database. SMS service not configured.")
-                logger.warning("   💡 Configure SMS in Settings page")
-        finally:
-            db.close()
-    except Exception as e:
-        logger.error(f"❌ Failed to configure SMS service: {e}")
-        logger.warning("   SMS notifications will be disabled")
-    
-    # Start background scheduler
-    try:
-        start_scheduler()
-        logger.info("✅ Background scheduler initialized")
-    except Exception as e:
-        logger.error(f"❌ Failed to start scheduler: {e}")
+    """Run the boot phases of the configured startup profile (see app/core/startup.py)"""
+    from app.core.activity_logger import start_activity_log_writer
+    from app.core.startup import run_startup
+    start_activity_log_writer()
+    run_startup(imports_ms=(time.perf_counter() - _BOOT_STARTED) * 1000)
 
 
 @app.on_event("shutdown")
@@ -108,6 +65,22 @@ async def shutdown_event():
         logger.info("✅ Scheduler stopped gracefully")
     except Exception as e:
         logger.error(f"❌ Error stopping scheduler: {e}")
+    
+    # Stop the cache expiry sweeper and background refresh threads
+    try:
+        from app.core.cache import cache_engine, stop_background_refresh
+        cache_engine.stop_sweeper()
+        stop_background_refresh()
+    except Exception as e:
+        logger.error(f"❌ Error stopping cache sweeper: {e}")
+    
+    # Stop the dashboard query fan-out threads
+    from app.core.fan_out import shutdown as stop_query_fan_out
+    stop_query_fan_out()
+
+    # Write buffered activity logs before the process exits
+    from app.core.activity_logger import stop_activity_log_writer
+    stop_activity_log_writer()
 
 # Configure CORS (with improved settings for development, production, and local network)
 ADDITIONAL_ORIGINS = [
@@ -167,7 +140,7 @@ class ForceCORSMiddleware(BaseHTTPMiddleware):
                 headers={
                     "Access-Control-Allow-Origin": allowed_origin,
                     "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, PATCH, OPTIONS",
-                    "Access-Control-Allow-Headers": "Content-Type, Authorization, Accept, Origin, X-Requested-With",
+                    "Access-Control-Allow-Headers": "Content-Type, Authorization, Accept, Origin, X-Requested-With, Idempotency-Key",
                     "Access-Control-Allow-Credentials": "true",
                     "Access-Control-Max-Age": "3600",
                     "Vary": "Origin"
@@ -197,7 +170,7 @@ class ForceCORSMiddleware(BaseHTTPMiddleware):
         response.headers["Access-Control-Allow-Origin"] = allowed_origin
         response.headers["Access-Control-Allow-Credentials"] = "true"
         response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, PATCH, OPTIONS"
-        response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization, Accept, Origin, X-Requested-With"
+        response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization, Accept, Origin, X-Requested-With, Idempotency-Key"
         response.headers["Access-Control-Expose-Headers"] = "*"
         response.headers["Vary"] = "Origin"
         
@@ -310,16 +283,22 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     # Get origin and determine allowed origin for CORS
     origin = request.headers.get("origin", "https://swapsync.digitstec.store")
     allowed_origin = origin if origin in all_origins else "https://swapsync.digitstec.store"
+    headers = {
+        **(exc.headers or {}),  # ETag, Retry-After, WWW-Authenticate...
+        "Access-Control-Allow-Origin": allowed_origin,
+        "Access-Control-Allow-Credentials": "true",
+        "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, PATCH, OPTIONS",
+        "Access-Control-Allow-Headers": "*",
+    }
+    
+    # 304 Not Modified (conditional_etag) must not carry a body
+    if exc.status_code == status.HTTP_304_NOT_MODIFIED:
+        return Response(status_code=exc.status_code, headers=headers)
     
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail},
-        headers={
-            "Access-Control-Allow-Origin": allowed_origin,
-            "Access-Control-Allow-Credentials": "true",
-            "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, PATCH, OPTIONS",
-            "Access-Control-Allow-Headers": "*",
-        }
+        headers=headers
     )
 
 
@@ -355,7 +334,7 @@ async def options_handler(request: Request, path: str):
         headers={
             "Access-Control-Allow-Origin": allowed_origin,
             "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, PATCH, OPTIONS",
-            "Access-Control-Allow-Headers": "Content-Type, Authorization, X-Requested-With, Accept",
+            "Access-Control-Allow-Headers": "Content-Type, Authorization, X-Requested-With, Accept, Idempotency-Key",
             "Access-Control-Allow-Credentials": "true",
             "Access-Control-Max-Age": "3600",
         }
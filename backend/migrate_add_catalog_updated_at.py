@@ -0,0 +1,60 @@
+"""
+Migration: updated_at on categories and brands
+Applied by run_migrations.py (or run directly: python migrate_add_catalog_updated_at.py)
+
+Catalog listings answer If-None-Match from a version computed in the database
+(row count plus the latest updated_at). Products already had updated_at; this
+adds it to categories and brands so an edited name or icon changes the version.
+
+Safe to re-run: the column is only added when missing and only NULL values are backfilled.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, inspect, text
+from app.core.config import settings
+
+TABLES = ("categories", "brands")
+
+
+def upgrade(conn):
+    """Add and backfill updated_at (migration engine entry point, one transaction)"""
+    existing_tables = set(inspect(conn).get_table_names())
+
+    for table in TABLES:
+        if table not in existing_tables:
+            print(f"⏭️  {table}: table not found, skipping")
+            continue
+
+        columns = {c["name"] for c in inspect(conn).get_columns(table)}
+        if "updated_at" not in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN updated_at TIMESTAMP"))
+            print(f"✅ {table}: updated_at column added")
+        else:
+            print(f"✅ {table}: updated_at column already exists")
+
+        updated = conn.execute(text(
+            f"UPDATE {table} SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL"
+        )).rowcount
+        print(f"   📝 {table}: {updated} row(s) backfilled")
+
+
+def add_catalog_updated_at(engine=None):
+    """Add updated_at to categories and brands"""
+    engine = engine or create_engine(settings.DATABASE_URL)
+
+    print("🏷️  Adding updated_at to categories and brands...")
+    print("=" * 60)
+    with engine.begin() as conn:
+        upgrade(conn)
+    print("=" * 60)
+    print("✅ Catalog updated_at migration completed!")
+
+
+if __name__ == "__main__":
+    try:
+        add_catalog_updated_at()
+    except Exception as e:
+        print(f"❌ Catalog updated_at migration failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,114 @@
+"""
+Migration: Denormalized company_id on transactional tables
+Applied by run_migrations.py (or run directly: python migrate_add_company_id_columns.py)
+
+Tenant filters used `created_by_user_id IN (...staff ids...)`, which can't use an
+index prefix and loses rows when staff are reassigned or deleted. This adds a
+company_id column (the manager's user id) to every transactional table,
+backfills it from the users / customers tables and adds (company_id, created_at)
+indexes so company-scoped dashboard and report queries become index range scans.
+
+Safe to re-run: existing columns and indexes are skipped and only NULL
+company_id values are backfilled.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, inspect, text
+from app.core.config import settings
+
+# table -> (user column whose company owns the row, customer column used as fallback, time column)
+TABLES = {
+    "customers": ("created_by_user_id", None, "created_at"),
+    "products": ("created_by_user_id", None, "created_at"),
+    "stock_movements": ("created_by_user_id", None, "created_at"),
+    "pos_sales": ("created_by_user_id", None, "created_at"),
+    "product_sales": ("created_by_user_id", "customer_id", "created_at"),
+    "repairs": ("created_by_user_id", "customer_id", "created_at"),
+    "phones": ("created_by_user_id", None, "created_at"),
+    "swaps": (None, "customer_id", "created_at"),
+    "invoices": ("staff_id", "customer_id", "created_at"),
+    "activity_logs": ("user_id", None, "timestamp"),
+}
+
+# Same rule as app.core.company_filter.get_company_id (roles are stored by enum name)
+USER_COMPANY_SQL = """
+    SELECT CASE
+        WHEN CAST(u.role AS TEXT) IN ('SUPER_ADMIN', 'ADMIN') THEN NULL
+        WHEN CAST(u.role AS TEXT) IN ('MANAGER', 'CEO') THEN u.id
+        ELSE COALESCE(u.parent_user_id, u.id)
+    END
+    FROM users u WHERE u.id = {table}.{column}
+"""
+
+
+def upgrade(conn):
+    """Add, backfill and index company_id (migration engine entry point, one transaction)"""
+    upgrade_tables(conn, TABLES)
+
+
+def upgrade_tables(conn, tables: dict):
+    """Add, backfill and index company_id on the given tables (same shape as TABLES)"""
+    existing_tables = set(inspect(conn).get_table_names())
+
+    for table in tables:
+        if table not in existing_tables:
+            print(f"⏭️  {table}: table not found, skipping")
+            continue
+
+        columns = {c["name"] for c in inspect(conn).get_columns(table)}
+        if "company_id" not in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN company_id INTEGER"))
+            print(f"✅ {table}: column added")
+        else:
+            print(f"✅ {table}: column already exists")
+
+    # Backfill owner-based rows first so customer-based fallbacks can use customers.company_id
+    for table, (user_column, _, _) in tables.items():
+        if table not in existing_tables or not user_column:
+            continue
+        updated = conn.execute(text(
+            f"UPDATE {table} SET company_id = ({USER_COMPANY_SQL.format(table=table, column=user_column)}) "
+            f"WHERE company_id IS NULL AND {user_column} IS NOT NULL"
+        )).rowcount
+        print(f"   📝 {table}: {updated} row(s) backfilled from {user_column}")
+
+    for table, (_, customer_column, _) in tables.items():
+        if table not in existing_tables or not customer_column or "customers" not in existing_tables:
+            continue
+        updated = conn.execute(text(
+            f"UPDATE {table} SET company_id = "
+            f"(SELECT c.company_id FROM customers c WHERE c.id = {table}.{customer_column}) "
+            f"WHERE company_id IS NULL AND {customer_column} IS NOT NULL"
+        )).rowcount
+        print(f"   📝 {table}: {updated} row(s) backfilled from {customer_column}")
+
+    for table, (_, _, time_column) in tables.items():
+        if table not in existing_tables:
+            continue
+        index_name = f"ix_{table}_company_{time_column}"
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {index_name} ON {table}(company_id, {time_column})"
+        ))
+        print(f"   📊 {index_name} ready")
+
+
+def add_company_id_columns(engine=None):
+    """Add, backfill and index company_id on every transactional table"""
+    engine = engine or create_engine(settings.DATABASE_URL)
+
+    print("🏢 Adding company_id to transactional tables...")
+    print("=" * 60)
+    with engine.begin() as conn:
+        upgrade(conn)
+    print("=" * 60)
+    print("✅ company_id migration completed!")
+
+
+if __name__ == "__main__":
+    try:
+        add_company_id_columns()
+    except Exception as e:
+        print(f"❌ company_id migration failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,56 @@
+"""
+Migration: daily_company_metrics rollup table
+Applied by run_migrations.py (or run directly: python migrate_add_daily_company_metrics.py)
+
+Creates the per-company, per-day, per-hub metrics table read by the dashboard
+cards and period stats, and backfills it from existing sales, repairs and swaps.
+New writes keep it current (app/core/company_metrics.py); run
+rebuild_company_metrics.py to recompute it later.
+
+Safe to re-run: the table is only created when missing and the backfill
+replaces every metric row.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app.core.config import settings
+
+
+def upgrade(conn):
+    """Create and backfill daily_company_metrics (migration engine entry point, one transaction)"""
+    from app import models  # noqa: F401 - register every table
+    from app.core.company_metrics import rebuild_company_metrics
+    from app.models.daily_company_metric import DailyCompanyMetric
+
+    DailyCompanyMetric.__table__.create(conn, checkfirst=True)
+    print("✅ daily_company_metrics table ready")
+
+    db = Session(bind=conn)
+    try:
+        summary = rebuild_company_metrics(db)
+    finally:
+        db.close()
+    print(f"   📝 {summary['rows']} metric row(s) backfilled from {summary['source_rows']} transaction(s)")
+
+
+def add_daily_company_metrics(engine=None):
+    """Create and backfill the daily metrics rollup"""
+    engine = engine or create_engine(settings.DATABASE_URL)
+
+    print("📊 Adding daily_company_metrics...")
+    print("=" * 60)
+    with engine.begin() as conn:
+        upgrade(conn)
+    print("=" * 60)
+    print("✅ daily_company_metrics migration completed!")
+
+
+if __name__ == "__main__":
+    try:
+        add_daily_company_metrics()
+    except Exception as e:
+        print(f"❌ daily_company_metrics migration failed: {e}")
+        sys.exit(1)
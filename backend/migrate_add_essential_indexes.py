@@ -1,6 +1,6 @@
 """
 Add Essential Performance Indexes for Railway $5 Plan Optimization
-Run once: python migrate_add_essential_indexes.py
+Applied by run_migrations.py (or run directly: python migrate_add_essential_indexes.py)
 
 These indexes dramatically improve query performance without consuming much storage.
 """
@@ -8,52 +8,61 @@ from sqlalchemy import create_engine, text
 from app.core.config import settings
 import sys
 
+INDEXES = [
+    # Repairs: Status + Due Date (for scheduler and dashboard)
+    {
+        "name": "idx_repairs_status_due",
+        "sql": """CREATE INDEX IF NOT EXISTS idx_repairs_status_due 
+                 ON repairs(status, due_date) 
+                 WHERE status IN ('Pending', 'In Progress')""",
+        "description": "Speeds up repair dashboard and scheduler queries"
+    },
+
+    # Sales: Created Date (for reports and dashboard)
+    {
+        "name": "idx_sales_created_at",
+        "sql": """CREATE INDEX IF NOT EXISTS idx_sales_created_at 
+                 ON sales(created_at DESC)""",
+        "description": "Speeds up sales reports and recent transactions"
+    },
+
+    # Customers: Phone Number (for lookups during sales/repairs)
+    {
+        "name": "idx_customers_phone",
+        "sql": """CREATE INDEX IF NOT EXISTS idx_customers_phone 
+                 ON customers(phone_number)""",
+        "description": "Speeds up customer search by phone"
+    },
+
+    # Products: Category + Active (for inventory views)
+    {
+        "name": "idx_products_category_active",
+        "sql": """CREATE INDEX IF NOT EXISTS idx_products_category_active 
+                 ON products(category_id, is_active)""",
+        "description": "Speeds up product inventory queries"
+    },
+
+    # POS Sales: Created Date (for recent transactions)
+    {
+        "name": "idx_pos_sales_created_at",
+        "sql": """CREATE INDEX IF NOT EXISTS idx_pos_sales_created_at 
+                 ON pos_sales(created_at DESC)""",
+        "description": "Speeds up POS transaction history"
+    },
+]
+
+
+def upgrade(conn):
+    """Entry point for the migration engine (runs inside its transaction)"""
+    for idx in INDEXES:
+        conn.execute(text(idx['sql']))
+
+
 def add_essential_indexes():
     """Add only the most critical indexes for performance"""
     engine = create_engine(settings.DATABASE_URL)
     
-    indexes = [
-        # Repairs: Status + Due Date (for scheduler and dashboard)
-        {
-            "name": "idx_repairs_status_due",
-            "sql": """CREATE INDEX IF NOT EXISTS idx_repairs_status_due 
-                     ON repairs(status, due_date) 
-                     WHERE status IN ('Pending', 'In Progress')""",
-            "description": "Speeds up repair dashboard and scheduler queries"
-        },
-        
-        # Sales: Created Date (for reports and dashboard)
-        {
-            "name": "idx_sales_created_at",
-            "sql": """CREATE INDEX IF NOT EXISTS idx_sales_created_at 
-                     ON sales(created_at DESC)""",
-            "description": "Speeds up sales reports and recent transactions"
-        },
-        
-        # Customers: Phone Number (for lookups during sales/repairs)
-        {
-            "name": "idx_customers_phone",
-            "sql": """CREATE INDEX IF NOT EXISTS idx_customers_phone 
-                     ON customers(phone_number)""",
-            "description": "Speeds up customer search by phone"
-        },
-        
-        # Products: Category + Active (for inventory views)
-        {
-            "name": "idx_products_category_active",
-            "sql": """CREATE INDEX IF NOT EXISTS idx_products_category_active 
-                     ON products(category_id, is_active)""",
-            "description": "Speeds up product inventory queries"
-        },
-        
-        # POS Sales: Created Date (for recent transactions)
-        {
-            "name": "idx_pos_sales_created_at",
-            "sql": """CREATE INDEX IF NOT EXISTS idx_pos_sales_created_at 
-                     ON pos_sales(created_at DESC)""",
-            "description": "Speeds up POS transaction history"
-        },
-    ]
+    indexes = INDEXES
     
     print("🔧 Adding Essential Performance Indexes to Database...")
     print("=" * 60)
@@ -0,0 +1,64 @@
+"""
+Migration: id_counters table
+Applied by run_migrations.py (or run directly: python migrate_add_id_counters.py)
+
+Creates the counters behind the display IDs (CUST-0001, PROD-0001, REP-0001,
+PHON-0001, PRSL-0001, ADM/MGR/SHOP/TECH/USER-0001; app/core/sequences.py) and
+starts each one after the highest ID already stored, so no ID is handed out
+twice. Per-day counters (POS-YYYYMMDD, INV-YYYYMMDD) are created on first use.
+
+Safe to re-run: the table is only created when missing and existing counters
+are left alone.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine
+from app.core.config import settings
+
+
+def global_sequences():
+    """(counter name, column holding its IDs) for every non-daily sequence"""
+    from app.models import Customer, PendingResale, Phone, Product, Repair, User
+    sequences = [
+        ("CUST", Customer.unique_id), ("PROD", Product.unique_id), ("REP", Repair.unique_id),
+        ("PHON", Phone.unique_id), ("PRSL", PendingResale.unique_id),
+    ]
+    sequences += [(prefix, User.unique_id) for prefix in ("ADM", "MGR", "SHOP", "TECH", "USER")]
+    return sequences
+
+
+def upgrade(conn):
+    """Create id_counters and seed the global counters (migration engine entry point, one transaction)"""
+    from app import models  # noqa: F401 - register every table
+    from app.core.sequences import highest_suffix, reserve
+    from app.models.id_counter import IdCounter
+
+    IdCounter.__table__.create(conn, checkfirst=True)
+    print("✅ id_counters table ready")
+
+    for name, column in global_sequences():
+        # Adding 0 creates a missing counter at the highest stored ID and leaves existing ones as they are
+        value = reserve(conn, name, 0, seed=lambda c, column=column, name=name: highest_suffix(c, column, name))
+        print(f"   📝 {name}: next ID {name}-{str(value + 1).zfill(4)}")
+
+
+def add_id_counters(engine=None):
+    """Create and seed the display-ID counters"""
+    engine = engine or create_engine(settings.DATABASE_URL)
+
+    print("🔢 Adding id_counters...")
+    print("=" * 60)
+    with engine.begin() as conn:
+        upgrade(conn)
+    print("=" * 60)
+    print("✅ id_counters migration completed!")
+
+
+if __name__ == "__main__":
+    try:
+        add_id_counters()
+    except Exception as e:
+        print(f"❌ id_counters migration failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,44 @@
+"""
+Migration: idempotency_keys table
+Applied by run_migrations.py (or run directly: python migrate_add_idempotency_keys.py)
+
+Creates the table behind the Idempotency-Key header on POS, product sale, swap
+and repair creation (app/middleware/idempotency.py). Expired rows are removed
+by the regular cleanup (app/core/cleanup.py).
+
+Safe to re-run: the table is only created when missing.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine
+from app.core.config import settings
+
+
+def upgrade(conn):
+    """Create idempotency_keys (migration engine entry point, one transaction)"""
+    from app.models.idempotency_key import IdempotencyKey
+
+    IdempotencyKey.__table__.create(conn, checkfirst=True)
+    print("✅ idempotency_keys table ready")
+
+
+def add_idempotency_keys(engine=None):
+    """Create the Idempotency-Key table"""
+    engine = engine or create_engine(settings.DATABASE_URL)
+
+    print("🔁 Adding idempotency_keys...")
+    print("=" * 60)
+    with engine.begin() as conn:
+        upgrade(conn)
+    print("=" * 60)
+    print("✅ idempotency_keys migration completed!")
+
+
+if __name__ == "__main__":
+    try:
+        add_idempotency_keys()
+    except Exception as e:
+        print(f"❌ idempotency_keys migration failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,55 @@
+"""
+Migration: client_id on pos_sales
+Applied by run_migrations.py (or run directly: python migrate_add_pos_sale_client_id.py)
+
+Tills that lose connectivity queue their sales with a client-generated UUID and
+replay them through POST /api/pos-sales/batch. The UUID is stored on the sale
+and unique per company, so a batch sent twice records each sale once.
+
+Safe to re-run: the column and index are only added when missing.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, inspect, text
+from app.core.config import settings
+
+
+def upgrade(conn):
+    """Add client_id and its per-company unique index (migration engine entry point, one transaction)"""
+    if "pos_sales" not in inspect(conn).get_table_names():
+        print("⏭️  pos_sales: table not found, skipping")
+        return
+
+    columns = {c["name"] for c in inspect(conn).get_columns("pos_sales")}
+    if "client_id" not in columns:
+        conn.execute(text("ALTER TABLE pos_sales ADD COLUMN client_id VARCHAR(64)"))
+        print("✅ pos_sales: client_id column added")
+    else:
+        print("✅ pos_sales: client_id column already exists")
+
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_pos_sales_company_client_id ON pos_sales(company_id, client_id)"
+    ))
+    print("   📊 uq_pos_sales_company_client_id ready")
+
+
+def add_pos_sale_client_id(engine=None):
+    """Add the offline-sync client_id to POS sales"""
+    engine = engine or create_engine(settings.DATABASE_URL)
+
+    print("🧾 Adding client_id to pos_sales...")
+    print("=" * 60)
+    with engine.begin() as conn:
+        upgrade(conn)
+    print("=" * 60)
+    print("✅ pos_sales client_id migration completed!")
+
+
+if __name__ == "__main__":
+    try:
+        add_pos_sale_client_id()
+    except Exception as e:
+        print(f"❌ pos_sales client_id migration failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,51 @@
+"""
+Migration: line_number on product_sales
+Applied by run_migrations.py (or run directly: python migrate_add_product_sales_line_number.py)
+
+A POS checkout inserts all of its product sales in one statement and links
+each cart line's POS sale item to the id RETURNING hands back. The ids are
+matched to lines by this position on the cart, since multi-row RETURNING
+doesn't promise any order.
+
+Safe to re-run: the column is only added when missing. Existing rows keep NULL.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, inspect, text
+from app.core.config import settings
+
+
+def upgrade(conn):
+    """Add product_sales.line_number (migration engine entry point, one transaction)"""
+    if "product_sales" not in inspect(conn).get_table_names():
+        print("⏭️  product_sales: table not found, skipping")
+        return
+
+    columns = {c["name"] for c in inspect(conn).get_columns("product_sales")}
+    if "line_number" not in columns:
+        conn.execute(text("ALTER TABLE product_sales ADD COLUMN line_number INTEGER"))
+        print("✅ product_sales: line_number column added")
+    else:
+        print("✅ product_sales: line_number column already exists")
+
+
+def add_product_sales_line_number(engine=None):
+    """Add line_number to product_sales"""
+    engine = engine or create_engine(settings.DATABASE_URL)
+
+    print("🧾 Adding line_number to product_sales...")
+    print("=" * 60)
+    with engine.begin() as conn:
+        upgrade(conn)
+    print("=" * 60)
+    print("✅ Product sales line_number migration completed!")
+
+
+if __name__ == "__main__":
+    try:
+        add_product_sales_line_number()
+    except Exception as e:
+        print(f"❌ Product sales line_number migration failed: {e}")
+        sys.exit(1)
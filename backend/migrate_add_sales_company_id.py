@@ -0,0 +1,48 @@
+"""
+Migration: company_id on the legacy sales table
+Applied by run_migrations.py (or run directly: python migrate_add_sales_company_id.py)
+
+Tenant scoping (app/core/tenant.py) filters every model carrying company_id,
+and the weekly/monthly stats read the legacy sales table. This adds, backfills
+and indexes sales.company_id the same way migrate_add_company_id_columns.py did
+for the other transactional tables.
+
+Safe to re-run: the column and index are only added when missing and only NULL
+company_id values are backfilled.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine
+from app.core.config import settings
+from migrate_add_company_id_columns import upgrade_tables
+
+TABLES = {
+    "sales": ("created_by_user_id", "customer_id", "created_at"),
+}
+
+
+def upgrade(conn):
+    """Add, backfill and index sales.company_id (migration engine entry point, one transaction)"""
+    upgrade_tables(conn, TABLES)
+
+
+def add_sales_company_id(engine=None):
+    """Add company_id to the legacy sales table"""
+    engine = engine or create_engine(settings.DATABASE_URL)
+
+    print("🏢 Adding company_id to sales...")
+    print("=" * 60)
+    with engine.begin() as conn:
+        upgrade(conn)
+    print("=" * 60)
+    print("✅ sales company_id migration completed!")
+
+
+if __name__ == "__main__":
+    try:
+        add_sales_company_id()
+    except Exception as e:
+        print(f"❌ sales company_id migration failed: {e}")
+        sys.exit(1)
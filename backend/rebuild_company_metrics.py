@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Rebuild the daily_company_metrics rollup from the source tables
+Backfills new installs/upgrades and repairs drift (raw SQL edits, cost price
+changes, restored backups). Rows in scope are replaced in one transaction.
+
+Run: python rebuild_company_metrics.py [--company ID] [--since YYYY-MM-DD] [--until YYYY-MM-DD] [--check]
+"""
+import argparse
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.core.company_metrics import rebuild_company_metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild daily company metrics")
+    parser.add_argument("--company", type=int, default=None, help="Company (manager user id); default: all")
+    parser.add_argument("--since", default=None, help="First shop-local day (YYYY-MM-DD)")
+    parser.add_argument("--until", default=None, help="Last shop-local day (YYYY-MM-DD)")
+    parser.add_argument("--check", action="store_true", help="Only report drift, don't write")
+    args = parser.parse_args()
+
+    print("📊 Rebuilding daily company metrics...")
+    db = SessionLocal()
+    try:
+        summary = rebuild_company_metrics(db, company_id=args.company, start_date=args.since,
+                                          end_date=args.until, dry_run=args.check)
+        if args.check:
+            db.rollback()
+        else:
+            db.commit()
+    except ValueError as e:
+        print(f"❌ Invalid date: {e}")
+        return 1
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Rebuild failed: {e}")
+        return 1
+    finally:
+        db.close()
+
+    print(f"   Source rows:  {summary['source_rows']}")
+    print(f"   Metric rows:  {summary['rows']}")
+    print(f"   Drifted rows: {summary['drifted']}")
+    print("✅ Check finished (nothing written)" if args.check else "✅ Metrics rebuilt")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,57 +1,44 @@
 """
-Master migration runner - automatically runs all migration scripts
+Master migration runner - applies pending migrations in-process
+Used by the Procfile release step and by main.startup_event
+
+Applied scripts are recorded in the schema_migrations table and skipped on
+later runs (see app/core/migrations.py).
+
+Usage:
+    python run_migrations.py           # apply pending migrations
+    python run_migrations.py --status  # list applied / pending migrations
 """
-import os
+import logging
 import sys
-import subprocess
-import glob
+
 
 def run_migrations():
-    """Run all migration scripts in order"""
-    print("🔧 Running database migrations...")
-    
-    # Get all migration files (sorted alphabetically)
-    migration_files = sorted(glob.glob("migrate_*.py"))
-    
-    if not migration_files:
-        print("✅ No migration files found, skipping...")
-        return
-    
-    print(f"📋 Found {len(migration_files)} migration(s)")
-    
-    for migration_file in migration_files:
-        print(f"\n▶️  Running: {migration_file}")
-        try:
-            # Run migration as subprocess (safer than exec)
-            result = subprocess.run(
-                [sys.executable, migration_file],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            if result.returncode == 0:
-                print(f"✅ {migration_file} completed successfully!")
-                if result.stdout:
-                    print(result.stdout)
-            else:
-                # Migration failed, but don't crash
-                print(f"⚠️  {migration_file} had an issue (this may be normal if already applied)")
-                if result.stderr:
-                    print(f"   Error: {result.stderr[:200]}")  # Truncate long errors
-        except Exception as e:
-            # Don't fail if migration already applied or has minor errors
-            print(f"⚠️  {migration_file}: {str(e)}")
-            # Continue with other migrations
-            continue
-    
-    print("\n✅ All migrations completed!\n")
+    """Apply every pending migration script in order"""
+    from app.core.migrations import run_pending_migrations
+    return run_pending_migrations()
+
+
+def print_status():
+    from app.core.migrations import migration_status
+    status = migration_status()
+    print(f"✅ Applied: {len(status['applied'])}")
+    print(f"⏳ Pending: {len(status['pending'])}")
+    for version in status["pending"]:
+        print(f"   - {version}")
+
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     try:
-        run_migrations()
+        if "--status" in sys.argv:
+            print_status()
+        else:
+            print("🔧 Running database migrations...")
+            summary = run_migrations()
+            print(f"\n✅ Migrations done: {len(summary['applied'])} applied, "
+                  f"{len(summary['failed'])} failed, {summary['skipped']} already applied\n")
     except Exception as e:
         print(f"⚠️  Migration runner error: {e}")
         print("⚠️  Continuing to start server anyway...")
         # Don't exit with error code - allow server to start anyway
-
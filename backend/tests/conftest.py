@@ -0,0 +1,171 @@
+"""
+Shared fixtures: a multi-company dataset served by the real application
+
+`seeded_api` runs main.app against an in-memory SQLite database holding two
+companies (manager, shop keeper and repairer each) with customers, products,
+POS sales, product sales, phones, swaps, sales, repairs, invoices and activity
+logs. `seeded_api.grow()` adds another batch of the same rows, so a test can
+check that an endpoint's query count doesn't depend on the number of rows.
+"""
+from datetime import datetime, timedelta
+import itertools
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.auth import create_access_token
+from app.core.cache import cache_engine, VERSIONS_NAMESPACE
+from app.core.config import settings
+from app.core.database import Base, get_db
+from app.core.principal import PRINCIPAL_NAMESPACE
+from app.models import (
+    ActivityLog, Brand, Category, Customer, Invoice, Phone, PhoneStatus, POSSale, POSSaleItem,
+    Product, ProductSale, Repair, Sale, StockMovement, Swap, User, UserRole,
+)
+
+COMPANIES = ("alpha", "beta")
+ROLES = {"manager": UserRole.MANAGER, "shopkeeper": UserRole.SHOP_KEEPER, "repairer": UserRole.REPAIRER}
+BATCH = 12  # rows of each kind added per company by every seed batch
+
+
+class SeededAPI:
+    """TestClient over main.app plus helpers to authenticate and add data"""
+
+    def __init__(self, client: TestClient, session_factory):
+        self.client = client
+        self.Session = session_factory
+        self.users = {}  # "alpha.manager" -> user id
+        self._serial = itertools.count(1)
+        self._tokens = {}
+
+    def headers(self, who: str) -> dict:
+        """Bearer token for "<company>.<role>" or "admin" (one token per user, so the principal cache hits)"""
+        if who not in self._tokens:
+            self._tokens[who] = create_access_token({"sub": who.replace(".", "_"), "role": "x"})
+        return {"Authorization": f"Bearer {self._tokens[who]}"}
+
+    def get(self, path: str, who: str = "alpha.manager", **kwargs):
+        return self.client.get(path, headers=self.headers(who), **kwargs)
+
+    def seed_users(self):
+        db = self.Session()
+        admin = User(username="admin", email="admin@x.com", full_name="Admin", role=UserRole.SUPER_ADMIN,
+                     hashed_password="x", is_active=1)
+        db.add(admin)
+        for company in COMPANIES:
+            manager = User(username=f"{company}_manager", email=f"{company}_manager@x.com",
+                           full_name=f"{company.title()} Manager", role=UserRole.MANAGER,
+                           company_name=f"{company.title()} Phones", hashed_password="x", is_active=1)
+            db.add(manager)
+            db.flush()
+            self.users[f"{company}.manager"] = manager.id
+            for role_name in ("shopkeeper", "repairer"):
+                staff = User(username=f"{company}_{role_name}", email=f"{company}_{role_name}@x.com",
+                             full_name=f"{company.title()} {role_name.title()}", role=ROLES[role_name],
+                             parent_user_id=manager.id, hashed_password="x", is_active=1)
+                db.add(staff)
+                db.flush()
+                self.users[f"{company}.{role_name}"] = staff.id
+        db.flush()
+        self.users["admin"] = admin.id
+        for company in COMPANIES:
+            manager_id = self.users[f"{company}.manager"]
+            db.add(Category(name="Phones", created_by_user_id=manager_id))
+            db.add(Category(name="Accessories", created_by_user_id=manager_id))
+            db.add(Brand(name=f"{company.title()} Brand", created_by_user_id=manager_id))
+        db.commit()
+        db.close()
+
+    def grow(self, rows: int = BATCH):
+        """Add `rows` of every transactional record to each company"""
+        db = self.Session()
+        now = datetime.utcnow()
+        for company in COMPANIES:
+            manager_id = self.users[f"{company}.manager"]
+            keeper_id = self.users[f"{company}.shopkeeper"]
+            repairer_id = self.users[f"{company}.repairer"]
+            category = db.query(Category).filter(Category.created_by_user_id == manager_id).first()
+
+            for i in range(rows):
+                n = next(self._serial)
+                created_at = now - timedelta(days=n % 20, hours=n % 7)
+                creator_id = keeper_id if i % 2 else manager_id
+                customer = Customer(full_name=f"Customer {n}", phone_number=f"0240{n:06d}",
+                                    created_by_user_id=creator_id, created_at=created_at)
+                product = Product(name=f"Product {n}", category_id=category.id, cost_price=50, selling_price=80,
+                                  quantity=20, created_by_user_id=manager_id, created_at=created_at)
+                phone = Phone(brand="Brand", model=f"Model {n}", condition="Used", value=500, cost_price=400,
+                              created_by_user_id=keeper_id, created_at=created_at)
+                db.add_all([customer, product, phone])
+                db.flush()
+
+                pos_sale = POSSale(transaction_id=f"POS-T-{n:06d}", customer_id=customer.id,
+                                   customer_name=customer.full_name, customer_phone=customer.phone_number,
+                                   subtotal=160, total_amount=160, items_count=1, total_quantity=2,
+                                   created_by_user_id=creator_id, created_at=created_at)
+                db.add(pos_sale)
+                db.flush()
+                db.add_all([
+                    POSSaleItem(pos_sale_id=pos_sale.id, product_id=product.id, product_name=product.name,
+                                quantity=2, unit_price=80, subtotal=160, created_at=created_at),
+                    ProductSale(product_id=product.id, customer_id=customer.id, quantity=1, unit_price=80,
+                                total_amount=80, customer_phone=customer.phone_number,
+                                created_by_user_id=creator_id, created_at=created_at),
+                    StockMovement(product_id=product.id, movement_type="sale", quantity=-2,
+                                  created_by_user_id=creator_id, created_at=created_at),
+                    Repair(customer_id=customer.id, phone_description="Phone", issue_description="Screen",
+                           service_cost=100, cost=100, status=("Pending", "Completed", "Delivered")[n % 3],
+                           staff_id=repairer_id, created_by_user_id=repairer_id, created_at=created_at),
+                    Sale(customer_id=customer.id, phone_id=phone.id, original_price=500, amount_paid=500,
+                         created_by_user_id=keeper_id, created_at=created_at),
+                    Swap(customer_id=customer.id, given_phone_description="Old phone", given_phone_value=200,
+                         new_phone_id=phone.id, balance_paid=300, final_price=300, created_at=created_at),
+                    Invoice(invoice_number=f"INV-T-{n:06d}", transaction_type="sale", transaction_id=pos_sale.id,
+                            customer_id=customer.id, customer_name=customer.full_name,
+                            customer_phone=customer.phone_number, staff_id=keeper_id, original_price=160,
+                            final_amount=160, items_description='{"product": "Product", "quantity": 2}',
+                            created_at=created_at),
+                    ActivityLog(user_id=creator_id, action="Created sale", module="pos_sales",
+                                target_id=pos_sale.id, timestamp=created_at),
+                ])
+                phone.status = PhoneStatus.SOLD if n % 2 else PhoneStatus.AVAILABLE
+        db.commit()
+        db.close()
+
+    def reset_caches(self):
+        """Drop cached results (but not principals or version tokens) so the next request queries again"""
+        cache_engine.delete_matching(lambda namespace, key: namespace not in (PRINCIPAL_NAMESPACE, VERSIONS_NAMESPACE))
+
+
+@pytest.fixture
+def seeded_api():
+    import main
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    main.app.dependency_overrides[get_db] = override_db
+    cache_engine.clear()
+    # One process: its own commits reload the membership index, and periodic
+    # database checks would make per-request statement counts vary
+    check_seconds = settings.MEMBERSHIP_CHECK_SECONDS
+    settings.MEMBERSHIP_CHECK_SECONDS = 3600
+    api = SeededAPI(TestClient(main.app, raise_server_exceptions=False), Session)
+    api.seed_users()
+    api.grow()
+    yield api
+    settings.MEMBERSHIP_CHECK_SECONDS = check_seconds
+    main.app.dependency_overrides.pop(get_db, None)
+    cache_engine.clear()
+    engine.dispose()
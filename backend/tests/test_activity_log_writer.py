@@ -0,0 +1,196 @@
+"""
+Tests for the buffered activity-log writer (app/core/activity_logger.py)
+"""
+import threading
+
+import pytest
+
+from app.core import activity_logger
+from app.core.activity_logger import (
+    ActivityLogWriter, flush_activity_logs, log_activity, start_activity_log_writer, stop_activity_log_writer
+)
+from app.core.config import settings
+from app.models import ActivityLog, User, UserRole
+import benchmark_pos_checkout as bench
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    """Session factory on a SQLite file (a real pool, so logs may be buffered) with a manager and a keeper"""
+    engine, Session = bench.make_session_factory(str(tmp_path / "activity.db"))
+    db = Session()
+    manager = User(username="m", email="m@x.com", full_name="M", role=UserRole.MANAGER, hashed_password="x")
+    db.add(manager)
+    db.flush()
+    db.add(User(username="k", email="k@x.com", full_name="K", role=UserRole.SHOP_KEEPER, hashed_password="x",
+                parent_user_id=manager.id))
+    db.commit()
+    db.close()
+    stop_activity_log_writer()
+    start_activity_log_writer()
+    yield Session
+    stop_activity_log_writer()
+    start_activity_log_writer()
+    engine.dispose()
+
+
+def user(Session, username):
+    db = Session()
+    try:
+        return db.query(User).filter(User.username == username).one()
+    finally:
+        db.close()
+
+
+def logged(Session):
+    db = Session()
+    try:
+        return db.query(ActivityLog).order_by(ActivityLog.id).all()
+    finally:
+        db.close()
+
+
+def test_buffered_logs_are_written_in_batches(file_db, monkeypatch):
+    monkeypatch.setattr(settings, "ACTIVITY_LOG_BATCH_SIZE", 50)
+    keeper = user(file_db, "k")
+    batches = []
+    original = ActivityLogWriter._write
+    monkeypatch.setattr(ActivityLogWriter, "_write", lambda self, batch: (batches.append(len(batch)),
+                                                                          original(self, batch)))
+
+    db = file_db()
+    for n in range(120):
+        assert log_activity(db, keeper, f"sold item {n}", "sales", target_id=n) is None
+    db.close()
+    assert flush_activity_logs()
+
+    rows = logged(file_db)
+    assert [r.target_id for r in rows] == list(range(120))
+    # The bulk INSERT skips before_flush; company_id is still the keeper's manager
+    assert {r.company_id for r in rows} == {keeper.parent_user_id}
+    assert max(batches) <= 50 and len(batches) < 120
+
+
+def test_shutdown_writes_what_is_buffered(file_db, monkeypatch):
+    monkeypatch.setattr(settings, "ACTIVITY_LOG_FLUSH_INTERVAL", 5.0)
+    keeper = user(file_db, "k")
+    db = file_db()
+    for n in range(3):
+        log_activity(db, keeper, "viewed report", "reports", target_id=n)
+    db.close()
+    # Nothing forces the batch out before shutdown
+    stop_activity_log_writer()
+    assert len(logged(file_db)) == 3
+
+
+def test_full_buffer_writes_synchronously(file_db, monkeypatch):
+    keeper = user(file_db, "k")
+    writer = ActivityLogWriter(max_size=1, flush_interval=0)
+    release = threading.Event()
+    # Hold the writer thread so the buffer stays full
+    original = writer._write
+    writer._write = lambda batch: (release.wait(5), original(batch))
+    monkeypatch.setattr(activity_logger, "_writer", writer)
+    monkeypatch.setattr(settings, "ACTIVITY_LOG_PUT_TIMEOUT", 0.05)
+
+    db = file_db()
+    assert log_activity(db, keeper, "first", "sales") is None  # Taken by the writer, which is now held
+    assert writer.flush(0.2) is False
+    assert log_activity(db, keeper, "second", "sales") is None  # Fills the buffer
+    entry = log_activity(db, keeper, "third", "sales")  # No room: written here, not dropped
+    assert entry is not None and entry.id
+    db.close()
+
+    release.set()
+    assert writer.flush()
+    assert sorted(r.action for r in logged(file_db)) == ["first", "second", "third"]
+    writer.stop()
+
+
+def test_audit_actions_and_pending_changes_write_synchronously(file_db):
+    keeper = user(file_db, "k")
+    db = file_db()
+    entry = log_activity(db, keeper, "changed password", "security", sync=True)
+    assert entry is not None
+    assert [r.action for r in logged(file_db)] == ["changed password"]
+
+    # The caller relied on log_activity's commit to save its own change
+    db.get(User, keeper.id).full_name = "Renamed"
+    assert log_activity(db, keeper, "updated profile", "users") is not None
+    db.close()
+    assert user(file_db, "k").full_name == "Renamed"
+    assert activity_logger._writer is None  # Nothing was buffered
+
+
+def test_shared_connection_and_disabled_setting_write_synchronously(seeded_api, file_db, monkeypatch):
+    manager = seeded_api.Session().get(User, seeded_api.users["alpha.manager"])
+    db = seeded_api.Session()
+    # The in-memory test database has one connection; a second thread can't use it
+    assert log_activity(db, manager, "exported report", "reports") is not None
+    db.close()
+
+    monkeypatch.setattr(settings, "ACTIVITY_LOG_ASYNC", False)
+    db = file_db()
+    assert log_activity(db, user(file_db, "m"), "exported report", "reports") is not None
+    db.close()
+    assert activity_logger._writer is None
+
+
+def test_logs_after_shutdown_write_synchronously(file_db):
+    keeper = user(file_db, "k")
+    db = file_db()
+    assert log_activity(db, keeper, "before shutdown", "sales") is None
+    stop_activity_log_writer()
+    # No writer is started again; it would never be flushed
+    entry = log_activity(db, keeper, "after shutdown", "sales")
+    assert entry is not None and entry.id
+    db.close()
+    assert activity_logger._writer is None
+    assert [r.action for r in logged(file_db)] == ["before shutdown", "after shutdown"]
+
+
+def test_restarted_writer_buffers_again(file_db):
+    keeper = user(file_db, "k")
+    stop_activity_log_writer()
+    start_activity_log_writer()
+    db = file_db()
+    assert log_activity(db, keeper, "after restart", "sales") is None
+    db.close()
+    assert flush_activity_logs()
+    assert [r.action for r in logged(file_db)] == ["after restart"]
+
+
+def test_logs_after_a_flush_follow_the_callers_transaction(file_db):
+    keeper = user(file_db, "k")
+    db = file_db()
+    db.get(User, keeper.id).full_name = "Rolled back"
+    db.flush()
+    assert log_activity(db, keeper, "renamed, then failed", "users") is None
+    db.rollback()
+    db.get(User, keeper.id).full_name = "Committed"
+    db.flush()
+    assert log_activity(db, keeper, "renamed", "users") is None
+    assert flush_activity_logs() and logged(file_db) == []  # Nothing leaves before the commit
+    db.commit()
+    db.get(User, keeper.id).full_name = "Abandoned"
+    db.flush()
+    log_activity(db, keeper, "renamed, then closed", "users")
+    db.close()
+    assert flush_activity_logs()
+    assert [r.action for r in logged(file_db)] == ["renamed"]
+    assert user(file_db, "k").full_name == "Committed"
+
+
+def test_stopped_writer_refuses_rows():
+    writer = ActivityLogWriter()
+    writer.stop()
+    assert writer.submit(None, {"action": "late"}) is False
+    assert writer.stats()["buffered"] == 0
+
+
+def test_serverless_writes_synchronously(file_db, monkeypatch):
+    monkeypatch.setenv("VERCEL", "1")
+    db = file_db()
+    assert log_activity(db, user(file_db, "k"), "sold item", "sales") is not None
+    db.close()
+    assert activity_logger._writer is None
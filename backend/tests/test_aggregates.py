@@ -0,0 +1,76 @@
+"""
+Tests for single-pass conditional aggregation (app/core/aggregates.py)
+"""
+from sqlalchemy import func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from app.core.aggregates import aggregate, count_if, metric_column, sum_if, supports_filter_clause
+from app.models import Phone, Repair, Sale
+
+
+def compiled(expression, dialect) -> str:
+    return str(expression.compile(dialect=dialect)).lower()
+
+
+def test_filter_clause_on_postgres_and_sqlite():
+    metric = count_if(Repair.status == "Pending")
+    assert supports_filter_clause(postgresql.dialect())
+    assert "filter (where repairs.status" in compiled(metric_column(metric, True), postgresql.dialect())
+    assert supports_filter_clause(sqlite.dialect())  # bundled SQLite is newer than 3.30
+
+
+def test_case_fallback_elsewhere():
+    assert not supports_filter_clause(mysql.dialect())
+    count_sql = compiled(metric_column(count_if(Repair.status == "Pending"), False), mysql.dialect())
+    sum_sql = compiled(metric_column(sum_if(Repair.cost, Repair.status == "Completed"), False), mysql.dialect())
+    assert "case when" in count_sql and "filter" not in count_sql
+    assert "case when" in sum_sql and "coalesce(sum(" in sum_sql
+
+
+def test_aggregate_matches_separate_queries(seeded_api):
+    db = seeded_api.Session()
+    company_id = seeded_api.users["alpha.manager"]
+    totals = aggregate(db, Repair, {
+        "total": count_if(),
+        "pending": count_if(Repair.status == "Pending"),
+        "completed": count_if(Repair.status == "Completed"),
+        "revenue": sum_if(Repair.cost),
+        "completed_revenue": sum_if(Repair.cost, Repair.status == "Completed"),
+        "unmatched": sum_if(Repair.cost, Repair.status == "No such status"),
+    }, Repair.company_id == company_id)
+
+    repairs = db.query(Repair).filter(Repair.company_id == company_id)
+    assert totals["total"] == repairs.count()
+    assert totals["pending"] == repairs.filter(Repair.status == "Pending").count()
+    assert totals["completed"] == repairs.filter(Repair.status == "Completed").count()
+    assert totals["revenue"] == repairs.with_entities(func.sum(Repair.cost)).scalar()
+    assert totals["completed_revenue"] == repairs.filter(Repair.status == "Completed").with_entities(
+        func.sum(Repair.cost)).scalar()
+    assert totals["unmatched"] == 0.0 and isinstance(totals["unmatched"], float)
+    db.close()
+
+
+def test_aggregate_with_outer_join(seeded_api):
+    db = seeded_api.Session()
+    totals = aggregate(db, Sale, {"total": count_if(), "profit": sum_if(Sale.amount_paid - Phone.value)},
+                       outerjoins=[(Phone, Phone.id == Sale.phone_id)])
+    rows = db.query(Sale.amount_paid, Phone.value).outerjoin(Phone, Phone.id == Sale.phone_id).all()
+    assert totals["total"] == len(rows)
+    assert totals["profit"] == sum(paid - value for paid, value in rows if value is not None)
+    db.close()
+
+
+def test_overview_numbers(seeded_api):
+    overview = seeded_api.get("/api/analytics/overview").json()
+    assert overview["totals"]["repairs"] == sum(overview["repair_status"].values())
+    assert overview["revenue"]["total"] == round(
+        overview["revenue"]["from_repairs"] + overview["revenue"]["from_sales"] + overview["revenue"]["from_swaps"], 2)
+    assert len(overview["recent_repairs"]) == 5
+
+    summary = seeded_api.get("/api/analytics/dashboard-summary").json()["quick_stats"]
+    assert summary["total_repairs"] == overview["totals"]["repairs"]
+    assert summary["pending_repairs"] == overview["repair_status"]["pending"]
+
+    profit = seeded_api.get("/api/analytics/profit-loss").json()
+    assert profit["sales"]["total_count"] == overview["totals"]["sales"]
+    assert len(profit["swaps"]["transactions"]) == 10
@@ -0,0 +1,145 @@
+"""
+Tests for the bounded LRU + TTL cache engine
+Covers eviction, expiry, namespace limits and both cache decorators
+"""
+import time
+from types import SimpleNamespace
+
+from app.core.cache import CacheEngine, timed_cache, cache_engine, cached_route
+from app.core.company_filter import invalidate_company_cache
+from app.models.user import UserRole
+from app.middleware.caching import cache_response, invalidate_cache
+
+
+def test_lru_eviction_respects_max_entries():
+    """Least recently used entry is evicted when the engine is full"""
+    engine = CacheEngine(max_entries=2, max_bytes=0, sweep_interval=0)
+    engine.set("ns", "a", 1, ttl=60)
+    engine.set("ns", "b", 2, ttl=60)
+
+    # Touch "a" so "b" becomes least recently used
+    assert engine.get("ns", "a") == 1
+    engine.set("ns", "c", 3, ttl=60)
+
+    assert engine.get("ns", "b") is None
+    assert engine.get("ns", "a") == 1
+    assert engine.get("ns", "c") == 3
+    assert engine.stats()["evictions"] == 1
+
+
+def test_byte_budget_evicts_oldest():
+    """Total size stays under max_bytes"""
+    engine = CacheEngine(max_entries=100, max_bytes=50, sweep_interval=0)
+    engine.set("ns", "a", "x" * 20, ttl=60)
+    engine.set("ns", "b", "y" * 20, ttl=60)
+    engine.set("ns", "c", "z" * 20, ttl=60)
+
+    stats = engine.stats()
+    assert stats["total_bytes"] <= 50
+    assert engine.get("ns", "a") is None
+
+
+def test_oversized_value_is_not_cached():
+    """A value bigger than the whole budget is skipped"""
+    engine = CacheEngine(max_entries=10, max_bytes=10, sweep_interval=0)
+    engine.set("ns", "big", "x" * 100, ttl=60)
+    assert engine.get("ns", "big") is None
+    assert engine.stats()["total_entries"] == 0
+
+
+def test_expired_entries_are_removed():
+    """Expired entries miss on read and are dropped by the sweep"""
+    engine = CacheEngine(max_entries=10, max_bytes=0, sweep_interval=0)
+    engine.set("ns", "short", 1, ttl=0.01)
+    engine.set("ns", "long", 2, ttl=60)
+    time.sleep(0.02)
+
+    assert engine.sweep_expired() == 1
+    assert engine.get("ns", "short") is None
+    assert engine.get("ns", "long") == 2
+
+
+def test_namespace_limits_are_independent():
+    """A namespace limit only evicts within that namespace"""
+    engine = CacheEngine(max_entries=100, max_bytes=0, sweep_interval=0)
+    engine.configure_namespace("small", max_entries=1)
+    engine.set("other", "keep", 1, ttl=60)
+    engine.set("small", "a", 1, ttl=60)
+    engine.set("small", "b", 2, ttl=60)
+
+    assert engine.get("small", "a") is None
+    assert engine.get("small", "b") == 2
+    assert engine.get("other", "keep") == 1
+
+
+def test_timed_cache_uses_shared_engine():
+    """timed_cache stores results in the shared engine"""
+    calls = []
+
+    @timed_cache(seconds=60, namespace="test_timed_cache")
+    def compute(x):
+        calls.append(x)
+        return x * 2
+
+    assert compute(2) == 4
+    assert compute(2) == 4
+    assert calls == [2]
+    assert cache_engine.stats()["namespaces"]["test_timed_cache"]["entries"] == 1
+
+    compute.clear_cache()
+    assert compute(2) == 4
+    assert calls == [2, 2]
+
+
+def test_cache_response_and_invalidate():
+    """cache_response entries can be invalidated by pattern"""
+    calls = []
+
+    @cache_response(ttl_seconds=60)
+    def listing(page):
+        calls.append(page)
+        return {"page": page}
+
+    listing(1)
+    listing(1)
+    assert calls == [1]
+
+    invalidate_cache("listing")
+    listing(1)
+    assert calls == [1, 1]
+
+
+def test_tag_invalidation_is_company_scoped():
+    """A write in one company only drops that company's cached routes"""
+    calls = []
+    ceo_a = SimpleNamespace(id=1, role=UserRole.CEO, parent_user_id=None)
+    staff_a = SimpleNamespace(id=2, role=UserRole.SHOP_KEEPER, parent_user_id=1)
+    ceo_b = SimpleNamespace(id=3, role=UserRole.CEO, parent_user_id=None)
+    admin = SimpleNamespace(id=4, role=UserRole.SUPER_ADMIN, parent_user_id=None)
+
+    @cached_route(seconds=60, entities=["products"], namespace="test_tagged_route")
+    def cards(current_user=None):
+        calls.append(current_user.id)
+        return {"user": current_user.id}
+
+    for user in (ceo_a, ceo_b, admin):
+        cards(current_user=user)
+        cards(current_user=user)
+    assert calls == [1, 3, 4]
+
+    # Staff write in company A drops company A and the admin-wide view only
+    invalidate_company_cache(staff_a, "products")
+    for user in (ceo_a, ceo_b, admin):
+        cards(current_user=user)
+    assert calls == [1, 3, 4, 1, 4]
+
+    # Untracked entities leave entries alone
+    invalidate_company_cache(ceo_b, "repairs")
+    cards(current_user=ceo_b)
+    assert calls == [1, 3, 4, 1, 4]
+
+    # Admin writes are system-wide
+    invalidate_company_cache(admin, "products")
+    cards(current_user=ceo_b)
+    assert calls == [1, 3, 4, 1, 4, 3]
+    cards.clear_cache()
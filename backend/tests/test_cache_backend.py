@@ -0,0 +1,171 @@
+"""
+Tests for the pluggable cache backends
+The Redis backend runs against a small in-process stand-in for a Redis server
+"""
+import fnmatch
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from app.core.cache_backend import (
+    RedisCacheBackend, JsonSerializer, get_serializer, _MISSING
+)
+
+
+class InProcessRedis:
+    """Minimal Redis stand-in implementing the commands RedisCacheBackend uses"""
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    def _alive(self, key):
+        expires_at = self.expiry.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self.data.pop(key, None)
+            self.expiry.pop(key, None)
+        return key in self.data
+
+    def get(self, key):
+        return self.data[key] if self._alive(key) else None
+
+    def set(self, key, value, px=None):
+        self.data[key] = value
+        self.expiry.pop(key, None)
+        if px:
+            self.expiry[key] = time.time() + px / 1000
+
+    def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            if isinstance(key, bytes):
+                key = key.decode()
+            if self._alive(key):
+                removed += 1
+            self.data.pop(key, None)
+            self.expiry.pop(key, None)
+        return removed
+
+    def sadd(self, key, *members):
+        if not self._alive(key):
+            self.data[key] = set()
+        self.data[key].update(m.encode() for m in members)
+
+    def smembers(self, key):
+        return set(self.data[key]) if self._alive(key) else set()
+
+    def pttl(self, key):
+        if not self._alive(key):
+            return -2
+        if key not in self.expiry:
+            return -1
+        return int((self.expiry[key] - time.time()) * 1000)
+
+    def pexpire(self, key, ms):
+        self.expiry[key] = time.time() + ms / 1000
+
+    def scan_iter(self, match="*", count=None):
+        return [k.encode() for k in list(self.data) if self._alive(k) and fnmatch.fnmatchcase(k, match)]
+
+    def close(self):
+        pass
+
+
+class BrokenRedis:
+    """Every command fails as if the server were unreachable"""
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("connection refused")
+        return fail
+
+
+def test_workers_share_entries():
+    """Two backends on the same server see each other's writes"""
+    server = InProcessRedis()
+    worker_a = RedisCacheBackend(server)
+    worker_b = RedisCacheBackend(server)
+
+    worker_a.set("dashboard", "cards:1", {"total": 5}, ttl=60)
+    assert worker_b.get("dashboard", "cards:1") == {"total": 5}
+    assert worker_b.lookup("dashboard", "missing") is _MISSING
+
+    worker_b.delete("dashboard", "cards:1")
+    assert worker_a.get("dashboard", "cards:1") is None
+
+
+def test_entries_expire():
+    """Entries use the server-side TTL"""
+    backend = RedisCacheBackend(InProcessRedis())
+    backend.set("ns", "short", 1, ttl=0.01)
+    time.sleep(0.02)
+    assert backend.get("ns", "short") is None
+
+
+def test_tag_invalidation_across_workers():
+    """A write in one worker drops tagged entries for all workers"""
+    server = InProcessRedis()
+    worker_a = RedisCacheBackend(server)
+    worker_b = RedisCacheBackend(server)
+
+    worker_a.set("stats", "1:today", {"sales": 3}, ttl=60, tags=["1:pos_sales"])
+    worker_a.set("stats", "2:today", {"sales": 7}, ttl=60, tags=["2:pos_sales"])
+
+    assert worker_b.invalidate_tags(["1:pos_sales"]) == 1
+    assert worker_a.get("stats", "1:today") is None
+    assert worker_a.get("stats", "2:today") == {"sales": 7}
+
+
+def test_clear_and_delete_matching():
+    """Namespace clears and pattern deletes only touch matching keys"""
+    backend = RedisCacheBackend(InProcessRedis())
+    backend.set("responses", "listing_a", 1, ttl=60)
+    backend.set("responses", "detail_b", 2, ttl=60)
+    backend.set("other", "keep", 3, ttl=60)
+
+    assert backend.delete_matching(lambda ns, key: ns == "responses" and "listing" in key) == 1
+    assert backend.get("responses", "detail_b") == 2
+
+    backend.clear("responses")
+    assert backend.get("responses", "detail_b") is None
+    assert backend.get("other", "keep") == 3
+    assert backend.stats()["namespaces"] == {"other": {"entries": 1}}
+
+
+def test_route_payloads_round_trip():
+    """Dashboard-style dicts survive orjson and json serialization"""
+    payload = {
+        "status": "success",
+        "generated_at": datetime(2024, 1, 2, 3, 4, 5),
+        "revenue": Decimal("12.50"),
+        "counts": {1: 4},
+        "cards": [{"id": "sales", "value": 3}]
+    }
+    expected = {
+        "status": "success",
+        "generated_at": "2024-01-02T03:04:05",
+        "revenue": 12.5,
+        "counts": {"1": 4},
+        "cards": [{"id": "sales", "value": 3}]
+    }
+    for serializer in (get_serializer("orjson"), JsonSerializer()):
+        backend = RedisCacheBackend(InProcessRedis(), serializer=serializer)
+        backend.set("dashboard", "cards", payload, ttl=60)
+        assert backend.get("dashboard", "cards") == expected
+
+
+def test_unserializable_values_are_skipped():
+    """Values the serializer can't encode are not cached"""
+    backend = RedisCacheBackend(InProcessRedis())
+    backend.set("ns", "obj", object(), ttl=60)
+    assert backend.get("ns", "obj") is None
+
+
+def test_server_errors_degrade_to_misses():
+    """An unreachable server never raises into the request"""
+    backend = RedisCacheBackend(BrokenRedis())
+    backend.set("ns", "a", 1, ttl=60, tags=["t"])
+    assert backend.lookup("ns", "a") is _MISSING
+    assert backend.invalidate_tags(["t"]) == 0
+    backend.clear()
+    assert backend.stats()["errors"] >= 4
@@ -0,0 +1,135 @@
+"""
+Tests for the denormalized company_id column (stamping on insert + backfill migration)
+"""
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401 - register every mapper
+from app.core.company_filter import membership_index
+from app.core.database import Base
+from app.models import ActivityLog, Customer, Invoice, Phone, Product, Swap, User, UserRole
+from migrate_add_company_id_columns import add_company_id_columns
+from migrate_add_sales_company_id import add_sales_company_id
+
+
+@pytest.fixture
+def env():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    db = Session()
+    boss = User(username="boss", email="boss@x.com", full_name="Boss", role=UserRole.MANAGER,
+                hashed_password="x", is_active=1)
+    admin = User(username="root", email="root@x.com", full_name="Root", role=UserRole.SUPER_ADMIN,
+                 hashed_password="x", is_active=1)
+    db.add_all([boss, admin])
+    db.flush()
+    clerk = User(username="clerk", email="clerk@x.com", full_name="Clerk", role=UserRole.SHOP_KEEPER,
+                 hashed_password="x", is_active=1, parent_user_id=boss.id)
+    db.add(clerk)
+    db.commit()
+
+    membership_index.mark_changed()
+    yield engine, db, {"boss": boss.id, "clerk": clerk.id, "admin": admin.id}
+    db.close()
+    membership_index.mark_changed()
+
+
+def test_new_rows_get_company_of_creator(env):
+    """Rows created by staff belong to their manager's company"""
+    _, db, ids = env
+    customer = Customer(full_name="Ama", phone_number="0240000001", created_by_user_id=ids["clerk"])
+    product = Product(name="Case", category_id=1, cost_price=1, selling_price=2, created_by_user_id=ids["boss"])
+    log = ActivityLog(user_id=ids["clerk"], action="created", module="customers")
+    admin_log = ActivityLog(user_id=ids["admin"], action="login", module="auth")
+    db.add_all([customer, product, log, admin_log])
+    db.commit()
+
+    assert customer.company_id == ids["boss"]
+    assert product.company_id == ids["boss"]
+    assert log.company_id == ids["boss"]
+    assert admin_log.company_id is None
+
+
+def test_swap_and_invoice_inherit_from_customer(env):
+    """Tables without a creator column take the customer's company"""
+    _, db, ids = env
+    customer = Customer(full_name="Kofi", phone_number="0240000002", created_by_user_id=ids["clerk"])
+    phone = Phone(brand="Apple", model="X", condition="Used", value=100, created_by_user_id=ids["clerk"])
+    db.add_all([customer, phone])
+    db.commit()
+
+    swap = Swap(customer_id=customer.id, given_phone_description="Old", given_phone_value=10,
+                new_phone_id=phone.id, final_price=90)
+    invoice = Invoice(invoice_number="INV-1", transaction_type="swap", transaction_id=1, customer_id=customer.id,
+                      customer_name="Kofi", customer_phone="0240000002", original_price=100, final_amount=90,
+                      items_description="{}")
+    db.add_all([swap, invoice])
+    db.commit()
+
+    assert swap.company_id == ids["boss"]
+    assert invoice.company_id == ids["boss"]
+
+
+def test_explicit_company_id_is_kept(env):
+    """Writers that already know the company are not overridden"""
+    _, db, ids = env
+    customer = Customer(full_name="Esi", phone_number="0240000003", created_by_user_id=ids["admin"],
+                        company_id=ids["boss"])
+    db.add(customer)
+    db.commit()
+    assert customer.company_id == ids["boss"]
+
+
+def test_migration_backfills_and_indexes(env):
+    """Existing rows get company_id from their creator, or via their customer"""
+    engine, db, ids = env
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO customers (id, full_name, phone_number, created_by_user_id) VALUES (50, 'Yaw', '0240000004', :u)"
+        ), {"u": ids["clerk"]})
+        conn.execute(text(
+            "INSERT INTO swaps (customer_id, given_phone_description, given_phone_value, new_phone_id, "
+            "balance_paid, discount_amount, final_price, resale_status) VALUES (50, 'Old', 1, 1, 0, 0, 1, 'PENDING')"
+        ))
+        conn.execute(text(
+            "INSERT INTO activity_logs (user_id, action, module, timestamp) VALUES (:u, 'x', 'y', '2025-01-01')"
+        ), {"u": ids["admin"]})
+
+    add_company_id_columns(engine)
+    add_company_id_columns(engine)  # re-runnable
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT company_id FROM customers WHERE id = 50")).scalar() == ids["boss"]
+        assert conn.execute(text("SELECT company_id FROM swaps")).scalar() == ids["boss"]
+        assert conn.execute(text("SELECT company_id FROM activity_logs")).scalar() is None
+
+    index_names = {ix["name"] for ix in inspect(engine).get_indexes("pos_sales")}
+    assert "ix_pos_sales_company_created_at" in index_names
+
+
+def test_sales_migration_upgrades_databases_already_migrated(env):
+    """A database that recorded the company_id migration before sales was covered still gets sales.company_id"""
+    engine, db, ids = env
+    db.close()
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE sales"))
+        conn.execute(text(
+            "CREATE TABLE sales (id INTEGER PRIMARY KEY, customer_id INTEGER, created_by_user_id INTEGER, "
+            "created_at TIMESTAMP)"
+        ))
+        conn.execute(text("INSERT INTO customers (id, full_name, phone_number, company_id) "
+                          "VALUES (60, 'Abena', '0240000005', :boss)"), {"boss": ids["boss"]})
+        conn.execute(text("INSERT INTO sales (customer_id, created_by_user_id, created_at) "
+                          "VALUES (NULL, :clerk, '2025-01-01'), (60, NULL, '2025-01-02')"), {"clerk": ids["clerk"]})
+
+    add_sales_company_id(engine)
+    add_sales_company_id(engine)  # re-runnable
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT company_id FROM sales ORDER BY id")).scalars().all() == [ids["boss"]] * 2
+    assert "ix_sales_company_created_at" in {ix["name"] for ix in inspect(engine).get_indexes("sales")}
+
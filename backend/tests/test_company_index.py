@@ -0,0 +1,131 @@
+"""
+Tests for the in-memory company membership index behind get_company_user_ids
+"""
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401 - register every mapper the User relationships refer to
+from app.core.company_filter import MEMBERSHIP_COUNTER, get_company_user_ids, membership_index
+from app.core.config import settings
+from app.core.database import Base
+from app.core.sequences import reserve
+from app.models.user import User, UserRole
+
+
+def make_user(username, role, parent_user_id=None):
+    return User(username=username, email=f"{username}@x.com", full_name=username.title(), role=role,
+                hashed_password="x", is_active=1, parent_user_id=parent_user_id)
+
+
+@pytest.fixture
+def env():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    db = Session()
+    boss = make_user("boss", UserRole.MANAGER)
+    other = make_user("other", UserRole.CEO)
+    admin = make_user("root", UserRole.SUPER_ADMIN)
+    db.add_all([boss, other, admin])
+    db.flush()
+    clerk = make_user("clerk", UserRole.SHOP_KEEPER, boss.id)
+    fixer = make_user("fixer", UserRole.REPAIRER, boss.id)
+    db.add_all([clerk, fixer])
+    db.commit()
+
+    membership_index.mark_changed()
+    membership_index.load(db)
+    yield db, statements
+    db.close()
+    membership_index.mark_changed()
+
+
+def user(db, username):
+    return db.query(User).filter(User.username == username).one()
+
+
+def test_same_results_without_queries(env):
+    """Manager, staff and admin scopes come from the index"""
+    db, statements = env
+    boss, clerk, other, admin = (user(db, n) for n in ("boss", "clerk", "other", "root"))
+    fixer = user(db, "fixer")
+    statements.clear()
+
+    assert sorted(get_company_user_ids(db, boss)) == sorted([boss.id, clerk.id, fixer.id])
+    assert sorted(get_company_user_ids(db, clerk)) == sorted([boss.id, clerk.id, fixer.id])
+    assert get_company_user_ids(db, other) == [other.id]
+    assert get_company_user_ids(db, admin) is None
+    assert statements == []
+
+
+def test_new_staff_visible_after_commit(env):
+    """Creating a staff member reloads the index once"""
+    db, statements = env
+    boss = user(db, "boss")
+    db.add(make_user("newbie", UserRole.SHOP_KEEPER, boss.id))
+    db.commit()
+
+    assert user(db, "newbie").id in get_company_user_ids(db, boss)
+    statements.clear()
+    get_company_user_ids(db, boss)
+    assert statements == []
+
+
+def test_reassign_and_delete(env):
+    """Moving and deleting staff update both companies"""
+    db, _ = env
+    boss, other, clerk, fixer = (user(db, n) for n in ("boss", "other", "clerk", "fixer"))
+
+    clerk.parent_user_id = other.id
+    db.commit()
+    assert sorted(get_company_user_ids(db, other)) == sorted([other.id, clerk.id])
+    assert clerk.id not in get_company_user_ids(db, boss)
+
+    db.delete(fixer)
+    db.commit()
+    assert get_company_user_ids(db, boss) == [boss.id]
+
+
+def test_unrelated_update_keeps_index(env):
+    """Profile edits don't force a reload"""
+    db, _ = env
+    reloads = membership_index.reloads
+    user(db, "clerk").full_name = "Renamed"
+    db.commit()
+    get_company_user_ids(db, user(db, "boss"))
+    assert membership_index.reloads == reloads
+
+
+def test_other_workers_changes_are_picked_up(env, monkeypatch):
+    """A change committed elsewhere (another worker, a script) is seen after the check interval"""
+    db, statements = env
+    boss, other, clerk = (user(db, n) for n in ("boss", "other", "clerk"))
+    # Another process moves the clerk; this process's index never heard about it
+    db.execute(text("UPDATE users SET parent_user_id = :other WHERE id = :clerk"),
+               {"other": other.id, "clerk": clerk.id})
+    reserve(db.connection(), MEMBERSHIP_COUNTER)
+    db.commit()
+    for u in (boss, other, clerk):
+        db.refresh(u)
+
+    # Within the interval the index is trusted without a query
+    statements.clear()
+    assert clerk.id in get_company_user_ids(db, boss)
+    assert statements == []
+
+    monkeypatch.setattr(settings, "MEMBERSHIP_CHECK_SECONDS", 0)
+    assert clerk.id not in get_company_user_ids(db, boss)
+    assert clerk.id in get_company_user_ids(db, other)
+
+    # Nothing changed since: the check costs one statement and no reload
+    reloads = membership_index.reloads
+    statements.clear()
+    get_company_user_ids(db, boss)
+    assert membership_index.reloads == reloads
+    assert len(statements) == 1
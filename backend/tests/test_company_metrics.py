@@ -0,0 +1,181 @@
+"""
+Tests for the daily_company_metrics rollup (app/core/company_metrics.py)
+"""
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.core.company_metrics import (
+    PHONES_HUB, PRODUCTS_HUB, REPAIRS_HUB, SWAPS_HUB, company_metrics, rebuild_company_metrics,
+)
+from app.core.time_windows import local_day, today_window
+from app.models import DailyCompanyMetric, Product, Repair, RepairSale, Swap, ResaleStatus
+from migrate_add_daily_company_metrics import upgrade
+
+
+def check_no_drift(api):
+    db = api.Session()
+    try:
+        return rebuild_company_metrics(db, dry_run=True)["drifted"]
+    finally:
+        db.close()
+
+
+def totals(api, company="alpha", window=None):
+    db = api.Session()
+    try:
+        return company_metrics(db, api.users[f"{company}.manager"], window)
+    finally:
+        db.close()
+
+
+def test_writes_keep_rollup_equal_to_rebuild(seeded_api):
+    assert check_no_drift(seeded_api) == 0
+    seeded_api.grow(5)
+    assert check_no_drift(seeded_api) == 0
+
+    alpha = totals(seeded_api)
+    # 17 rows of each kind per company: one POS checkout, a 2-unit POS line and a 1-unit product sale
+    assert alpha[PRODUCTS_HUB]["transactions"] == 17
+    assert alpha[PRODUCTS_HUB]["units"] == 17
+    assert alpha[PHONES_HUB]["revenue"] == 17 * 500
+    assert alpha[SWAPS_HUB]["transactions"] == 17
+    # Companies don't see each other's rows
+    assert totals(seeded_api, "beta")[PHONES_HUB]["transactions"] == 17
+
+
+def test_pos_checkout_and_delete(seeded_api):
+    db = seeded_api.Session()
+    product = db.query(Product).filter(Product.created_by_user_id == seeded_api.users["alpha.manager"]).first()
+    product_id, cost_price = product.id, product.cost_price
+    db.close()
+    before = totals(seeded_api, window=today_window())[PRODUCTS_HUB]
+
+    response = seeded_api.client.post("/api/pos-sales/", headers=seeded_api.headers("alpha.shopkeeper"), json={
+        "customer_name": "Walk-in", "customer_phone": "0240000000", "overall_discount": 10,
+        "items": [{"product_id": product_id, "quantity": 3, "unit_price": 80}],
+    })
+    assert response.status_code == 201, response.text
+
+    after = totals(seeded_api, window=today_window())[PRODUCTS_HUB]
+    assert after["transactions"] == before["transactions"] + 1
+    assert after["units"] == before["units"] + 3
+    assert after["revenue"] == before["revenue"] + 240 - 10
+    assert after["profit"] == before["profit"] + 240 - 10 - 3 * cost_price
+    assert check_no_drift(seeded_api) == 0
+
+    deleted = seeded_api.client.delete(f"/api/pos-sales/{response.json()['id']}",
+                                       headers=seeded_api.headers("alpha.manager"))
+    assert deleted.status_code == 200, deleted.text
+    assert totals(seeded_api, window=today_window())[PRODUCTS_HUB]["transactions"] == before["transactions"]
+    assert check_no_drift(seeded_api) == 0
+
+
+def test_updates_move_repair_and_swap_profit(seeded_api):
+    db = seeded_api.Session()
+    company_id = seeded_api.users["alpha.manager"]
+    repair = db.query(Repair).filter(Repair.company_id == company_id, Repair.status == "Pending").first()
+    swap = db.query(Swap).filter(Swap.company_id == company_id).first()
+    before = company_metrics(db, company_id)
+
+    repair.status = "Completed"
+    db.add(RepairSale(repair_id=repair.id, product_id=1, repairer_id=seeded_api.users["alpha.repairer"],
+                      quantity=2, unit_price=30, cost_price=20, profit=20))
+    swap.resale_status = ResaleStatus.SOLD
+    swap.profit_or_loss = 75
+    db.commit()
+
+    after = company_metrics(db, company_id)
+    assert after[REPAIRS_HUB]["revenue"] == before[REPAIRS_HUB]["revenue"] + repair.cost + 60
+    assert after[REPAIRS_HUB]["profit"] == before[REPAIRS_HUB]["profit"] + repair.cost + 20
+    assert after[SWAPS_HUB]["profit"] == before[SWAPS_HUB]["profit"] + 75
+    db.close()
+    assert check_no_drift(seeded_api) == 0
+
+
+def test_bulk_delete_rebuilds_before_commit(seeded_api):
+    db = seeded_api.Session()
+    company_id = seeded_api.users["alpha.manager"]
+    db.query(Swap).filter(Swap.company_id == company_id).delete(synchronize_session=False)
+    db.commit()
+    assert company_metrics(db, company_id)[SWAPS_HUB]["transactions"] == 0
+    db.close()
+    assert check_no_drift(seeded_api) == 0
+
+
+def test_unscoped_bulk_update_rebuilds_only_touched_days(seeded_api, monkeypatch):
+    """An admin/maintenance bulk write rebuilds the matched rows' companies and days, not all history"""
+    from app.core import company_metrics as rollup
+
+    calls = []
+    original = rollup.rebuild_company_metrics
+    monkeypatch.setattr(rollup, "rebuild_company_metrics",
+                        lambda db, **scope: (calls.append(scope), original(db, **scope))[1])
+    db = seeded_api.Session()
+    beta_id = seeded_api.users["beta.manager"]
+    swap = db.query(Swap).filter(Swap.company_id == beta_id).first()
+    swap_id, day = swap.id, local_day(swap.created_at)
+    db.query(Swap).filter(Swap.id == swap_id).update({"balance_paid": 999}, synchronize_session=False)
+    db.commit()
+    db.close()
+
+    assert calls == [{"company_id": beta_id, "start_date": day, "end_date": day}]
+    assert check_no_drift(seeded_api) == 0
+
+
+def test_admin_reset_rebuilds_rollup(seeded_api):
+    """The raw SQL reset routes bypass the hooks and rebuild the rollup themselves"""
+    response = seeded_api.client.post("/api/admin/reset/sales", headers=seeded_api.headers("admin"))
+    assert response.status_code == 200, response.text
+    assert totals(seeded_api)[PHONES_HUB]["transactions"] == 0
+    assert totals(seeded_api)[SWAPS_HUB]["transactions"] == 0
+    assert check_no_drift(seeded_api) == 0
+
+
+def test_rebuild_repairs_drift(seeded_api):
+    db = seeded_api.Session()
+    db.execute(text("UPDATE sales SET amount_paid = amount_paid + 1"))
+    db.commit()
+    assert rebuild_company_metrics(db, dry_run=True)["drifted"] > 0
+
+    summary = rebuild_company_metrics(db)
+    db.commit()
+    assert summary["drifted"] > 0
+    assert rebuild_company_metrics(db, dry_run=True)["drifted"] == 0
+    assert company_metrics(db, seeded_api.users["alpha.manager"])[PHONES_HUB]["revenue"] == 12 * 501
+    db.close()
+
+
+def test_rebuild_day_range_only_touches_that_range(seeded_api):
+    db = seeded_api.Session()
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+    outside = db.query(DailyCompanyMetric).filter(DailyCompanyMetric.day < datetime.utcnow().date()).count()
+    db.execute(text("DELETE FROM daily_company_metrics"))
+    rebuild_company_metrics(db, start_date=today, end_date=today)
+    db.commit()
+    days = {day for (day,) in db.query(DailyCompanyMetric.day).distinct()}
+    assert days <= {datetime.utcnow().date()}
+    assert outside > 0
+    db.close()
+
+
+def test_migration_backfills(seeded_api):
+    db = seeded_api.Session()
+    expected = company_metrics(db, seeded_api.users["alpha.manager"])
+    db.execute(text("DELETE FROM daily_company_metrics"))
+    db.commit()
+    with db.get_bind().begin() as conn:
+        upgrade(conn)
+    assert company_metrics(db, seeded_api.users["alpha.manager"]) == expected
+    db.close()
+
+
+def test_dashboard_reads_rollup(seeded_api):
+    cards = {c["id"]: c for c in seeded_api.get("/api/dashboard/cards").json()["cards"]}
+    alpha = totals(seeded_api)
+    assert cards["product_hub_profit"]["value"] == f"₵{alpha[PRODUCTS_HUB]['profit']:.2f}"
+    assert cards["repairer_hub_profit"]["value"] == f"₵{alpha[REPAIRS_HUB]['profit']:.2f}"
+
+    stats = seeded_api.get("/api/dashboard/monthly-stats").json()
+    assert stats["sales_count"] > 0
+    assert stats["products_sold"] > 0
@@ -0,0 +1,61 @@
+"""
+Tests for ETag / If-None-Match conditional responses
+"""
+from app.models import Category, Product
+
+
+def get(api, path, who, etag=None):
+    headers = api.headers(who)
+    if etag:
+        headers["If-None-Match"] = etag
+    return api.client.get(path, headers=headers)
+
+
+def test_unchanged_catalog_returns_304(seeded_api):
+    """Repeating a request with its ETag skips the route body"""
+    first = get(seeded_api, "/api/products/", "alpha.manager")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    second = get(seeded_api, "/api/products/", "alpha.manager", etag)
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+
+
+def test_company_write_changes_etag(seeded_api):
+    """Any write to a company's rows changes its version, even one made outside the routes"""
+    etag_a = get(seeded_api, "/api/products/", "alpha.manager").headers["etag"]
+    etag_b = get(seeded_api, "/api/products/", "beta.manager").headers["etag"]
+
+    # A script (or another worker) changes a price without touching any cache
+    db = seeded_api.Session()
+    product = db.query(Product).filter(Product.created_by_user_id == seeded_api.users["alpha.manager"]).first()
+    product.selling_price = (product.selling_price or 0) + 1
+    db.commit()
+    db.close()
+
+    assert get(seeded_api, "/api/products/", "alpha.manager", etag_a).status_code == 200
+    assert get(seeded_api, "/api/products/", "beta.manager", etag_b).status_code == 304
+
+
+def test_category_edit_changes_etag(seeded_api):
+    db = seeded_api.Session()
+    category = Category(name="Chargers", created_by_user_id=seeded_api.users["alpha.manager"])
+    db.add(category)
+    db.commit()
+    etag = get(seeded_api, "/api/categories/", "alpha.manager").headers["etag"]
+    assert get(seeded_api, "/api/categories/", "alpha.manager", etag).status_code == 304
+
+    category.icon = "plug"
+    db.commit()
+    db.close()
+    assert get(seeded_api, "/api/categories/", "alpha.manager", etag).status_code == 200
+
+
+def test_etag_is_per_user_and_url(seeded_api):
+    """Another user or query string never matches"""
+    etag = get(seeded_api, "/api/products/", "alpha.manager").headers["etag"]
+
+    assert get(seeded_api, "/api/products/?limit=5", "alpha.manager", etag).status_code == 200
+    assert get(seeded_api, "/api/products/", "alpha.shopkeeper", etag).status_code == 200
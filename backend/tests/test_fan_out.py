@@ -0,0 +1,181 @@
+"""
+Tests for concurrent read-only queries (app/core/fan_out.py)
+"""
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core.fan_out import can_run_concurrently, fan_out
+from app.core.query_stats import count_queries, install
+from app.core.tenant import set_tenant
+from app.models import Customer, Product, User
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    """File-backed SQLite on a real connection pool, so queries can run in parallel"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'fan_out.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+    for company_id in (1, 1, 1, 2):
+        db.add(Customer(full_name="C", phone_number=f"024{db.query(Customer).count():07d}", company_id=company_id))
+        db.flush()
+    db.commit()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def slow(seconds, value=None):
+    def query(session):
+        time.sleep(seconds)
+        return value if value is not None else threading.current_thread().name
+    return query
+
+
+def test_queries_run_concurrently(file_db):
+    assert can_run_concurrently(file_db)
+    started = time.monotonic()
+    results = fan_out(file_db, {f"q{i}": slow(0.3) for i in range(3)}, deadline=5)
+    elapsed = time.monotonic() - started
+
+    assert not results.failed
+    assert len(set(results.values())) == 3  # one worker thread each
+    assert elapsed < 0.8  # not 3 x 0.3s
+
+
+def test_failures_and_deadline_degrade(file_db):
+    def broken(session):
+        raise RuntimeError("boom")
+
+    started = time.monotonic()
+    results = fan_out(file_db, {
+        "customers": lambda session: session.query(Customer).count(),
+        "broken": broken,
+        "late": slow(2),
+    }, defaults={"broken": 0}, deadline=0.3)
+
+    assert time.monotonic() - started < 1.5
+    assert results["customers"] == 4
+    assert results["broken"] == 0
+    assert "late" not in results
+    assert set(results.failed) == {"broken", "late"}
+    assert results.failed["late"] == "deadline"
+
+
+def test_workers_keep_tenant_scope_and_are_counted(file_db):
+    install()
+    set_tenant(file_db, 1)
+    with count_queries() as stats:
+        results = fan_out(file_db, {
+            "customers": lambda session: session.query(Customer).count(),
+            "products": lambda session: session.query(Product).count(),
+        })
+    assert results == {"customers": 3, "products": 0}
+    assert stats.count == 2
+
+
+def test_app_engine_workers_have_their_own_pool(tmp_path, monkeypatch):
+    """Workers don't wait on the request pool, even when requests hold all of it"""
+    from app.core import database, fan_out as fan_out_module
+
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    args = {"check_same_thread": False}
+    app_engine = create_engine(url, connect_args=args, pool_size=1, max_overflow=0, pool_timeout=5)
+    monkeypatch.setattr(database, "engine", app_engine)
+    monkeypatch.setattr(database, "create_fanout_engine", lambda pool_size, pool_timeout: create_engine(
+        url, connect_args=args, pool_size=pool_size, max_overflow=0, pool_timeout=pool_timeout))
+    fan_out_module.shutdown()
+
+    db = sessionmaker(bind=app_engine)()
+    db.execute(text("SELECT 1"))  # The request holds the only connection of its pool
+    started = time.perf_counter()
+    results = fan_out(db, {name: lambda s: s.execute(text("SELECT 1")).scalar() for name in "abc"}, deadline=2.0)
+    assert dict(results) == {"a": 1, "b": 1, "c": 1} and not results.failed
+    assert time.perf_counter() - started < 1.0
+    db.close()
+    fan_out_module.shutdown()
+    app_engine.dispose()
+
+
+def test_fanout_engine_pool_is_sized_for_the_workers():
+    from app.core.database import create_fanout_engine
+
+    engine = create_fanout_engine(pool_size=3, pool_timeout=0.5)
+    assert engine.pool.size() == 3
+    assert engine.pool.timeout() == 0.5
+    engine.dispose()
+
+
+def test_static_pool_runs_in_sequence(seeded_api):
+    db = seeded_api.Session()
+    assert not can_run_concurrently(db)
+    results = fan_out(db, {
+        "thread": lambda session: threading.current_thread().name,
+        "customers": lambda session: session.query(Customer).count(),
+    })
+    assert results["thread"] == threading.current_thread().name
+    assert results["customers"] == db.query(Customer).count()
+    db.close()
+
+
+def test_dashboard_cards_from_fan_out(seeded_api):
+    cards = {c["id"]: c for c in seeded_api.get("/api/dashboard/cards").json()["cards"]}
+    db = seeded_api.Session()
+    in_stock = db.query(Product).filter(
+        Product.created_by_user_id == seeded_api.users["alpha.manager"], Product.quantity > 0).all()
+    db.close()
+    assert cards["inventory_status"]["value"] == f"{len(in_stock)} items"
+    assert cards["total_inventory_value"]["value"] == f"₵{sum(p.quantity * p.selling_price for p in in_stock):.2f}"
+    assert cards["shopkeeper_performance"]["value"] == "6 sales"
+    assert cards["repairer_performance"]["value"] == "12 repairs"
+    assert "total_system_profit" in cards
+
+
+def test_failed_dashboard_metric_is_not_cached(seeded_api, monkeypatch):
+    """A card whose query failed is reported as partial and the next request recomputes it"""
+    from app.api.routes import dashboard_routes
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("inventory unavailable")
+
+    original = dashboard_routes.aggregate
+    monkeypatch.setattr(dashboard_routes, "aggregate", broken)
+    data = seeded_api.get("/api/dashboard/cards").json()
+    assert data["status"] == "partial"
+    assert data["failed_metrics"] == ["inventory"]
+    assert "inventory_status" not in {c["id"] for c in data["cards"]}
+
+    monkeypatch.setattr(dashboard_routes, "aggregate", original)
+    data = seeded_api.get("/api/dashboard/cards").json()
+    assert data["status"] == "success" and data["failed_metrics"] == []
+    assert "inventory_status" in {c["id"] for c in data["cards"]}
+
+
+@pytest.mark.parametrize("entity", ["swaps", "sales"])
+def test_swap_and_sale_writes_drop_cached_cards(seeded_api, entity):
+    from app.core.company_filter import invalidate_company_cache
+
+    assert seeded_api.get("/api/dashboard/cards").headers["x-cache"] == "MISS"
+    assert seeded_api.get("/api/dashboard/cards").headers["x-cache"] == "HIT"
+    db = seeded_api.Session()
+    invalidate_company_cache(db.get(User, seeded_api.users["alpha.manager"]), entity)
+    db.close()
+    assert seeded_api.get("/api/dashboard/cards").headers["x-cache"] == "MISS"
+
+
+def test_manager_business_stats(seeded_api):
+    manager_id = seeded_api.users["alpha.manager"]
+    stats = seeded_api.get(f"/api/staff/admin/company/{manager_id}/business-stats", who="admin").json()["business_stats"]
+    # 12 of each per company; sales count phone sales and POS checkouts
+    assert stats["total_customers"] == 12
+    assert stats["total_phones"] == 12
+    assert stats["total_swaps"] == 12
+    assert stats["total_sales"] == 24
+    assert stats["total_repairs"] == 12
+    assert stats["total_revenue"] == stats["sales_revenue"] + stats["repair_revenue"]
@@ -0,0 +1,165 @@
+"""
+Tests for Idempotency-Key handling on create endpoints (app/middleware/idempotency.py)
+"""
+import json
+import threading
+from datetime import datetime, timedelta
+
+from fastapi.responses import JSONResponse
+
+from app.core.cleanup import clean_expired_idempotency_keys
+from app.core.config import settings
+from app.middleware.idempotency import COMPLETED, IN_PROGRESS, finish_key, request_hash
+from app.models import Customer, IdempotencyKey, POSSale, Product, ProductSale
+
+
+def alpha_product(api):
+    db = api.Session()
+    product = db.query(Product).filter(Product.created_by_user_id == api.users["alpha.manager"]).first()
+    result = product.id, product.quantity
+    db.close()
+    return result
+
+
+def post(api, path, payload, key, who="alpha.shopkeeper"):
+    headers = {**api.headers(who), "Idempotency-Key": key, "Content-Type": "application/json"}
+    return api.client.post(path, headers=headers, content=json.dumps(payload))
+
+
+def pos_payload(product_id, quantity=1):
+    return {"customer_name": "Walk-in", "customer_phone": "0240000000",
+            "items": [{"product_id": product_id, "quantity": quantity, "unit_price": 80}]}
+
+
+def count(api, model):
+    db = api.Session()
+    try:
+        return db.query(model).count()
+    finally:
+        db.close()
+
+
+def test_retried_checkout_replays_first_response(seeded_api):
+    product_id, stock = alpha_product(seeded_api)
+    sales_before = count(seeded_api, POSSale)
+
+    first = post(seeded_api, "/api/pos-sales/", pos_payload(product_id, 2), "till-1-0001")
+    retry = post(seeded_api, "/api/pos-sales/", pos_payload(product_id, 2), "till-1-0001")
+    assert first.status_code == retry.status_code == 201, retry.text
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+
+    assert count(seeded_api, POSSale) == sales_before + 1
+    db = seeded_api.Session()
+    assert db.get(Product, product_id).quantity == stock - 2
+    db.close()
+
+    # A new key is a new sale
+    other = post(seeded_api, "/api/pos-sales/", pos_payload(product_id, 2), "till-1-0002")
+    assert other.status_code == 201
+    assert other.json()["id"] != first.json()["id"]
+
+
+def test_key_reused_for_different_request_is_rejected(seeded_api):
+    product_id, _ = alpha_product(seeded_api)
+    assert post(seeded_api, "/api/pos-sales/", pos_payload(product_id, 1), "reused").status_code == 201
+    response = post(seeded_api, "/api/pos-sales/", pos_payload(product_id, 3), "reused")
+    assert response.status_code == 422
+    assert "different request" in response.json()["detail"]
+
+
+def test_keys_are_per_user_and_per_endpoint(seeded_api):
+    product_id, _ = alpha_product(seeded_api)
+    sale = {"product_id": product_id, "quantity": 1, "unit_price": 80, "customer_phone": "0240000000"}
+    sales_before = count(seeded_api, ProductSale)
+    assert post(seeded_api, "/api/product-sales/", sale, "shared-key").status_code == 201
+    replay = post(seeded_api, "/api/product-sales/", sale, "shared-key")
+    assert replay.status_code == 201 and replay.headers["Idempotent-Replayed"] == "true"
+    assert count(seeded_api, ProductSale) == sales_before + 1
+
+    # The same key from another user (and endpoint) is a separate request
+    db = seeded_api.Session()
+    customer_id = db.query(Customer.id).filter(
+        Customer.created_by_user_id == seeded_api.users["alpha.manager"]).first()[0]
+    db.close()
+    repair = {"customer_id": customer_id, "phone_description": "Cracked screen", "issue_description": "Screen",
+              "cost": 100}
+    created = post(seeded_api, "/api/repairs/", repair, "shared-key", who="alpha.repairer")
+    assert created.status_code == 201, created.text
+    assert "Idempotent-Replayed" not in created.headers
+
+
+def test_failed_request_releases_key(seeded_api):
+    product_id, stock = alpha_product(seeded_api)
+    refused = post(seeded_api, "/api/pos-sales/", pos_payload(product_id, stock + 1), "too-many")
+    assert refused.status_code == 422
+    db = seeded_api.Session()
+    assert db.query(IdempotencyKey).filter(IdempotencyKey.key == "too-many").count() == 0
+    db.close()
+    # Nothing was stored, so the retry runs (and is refused) again rather than replaying
+    again = post(seeded_api, "/api/pos-sales/", pos_payload(product_id, stock + 1), "too-many")
+    assert again.status_code == 422 and "Idempotent-Replayed" not in again.headers
+
+
+def test_duplicate_waits_for_request_in_flight(seeded_api, monkeypatch):
+    product_id, _ = alpha_product(seeded_api)
+    payload = pos_payload(product_id)
+    db = seeded_api.Session()
+    now = datetime.utcnow()
+    row = IdempotencyKey(user_id=seeded_api.users["alpha.shopkeeper"], key="in-flight", status=IN_PROGRESS,
+                         request_hash=request_hash("POST", "/api/pos-sales/", json.dumps(payload).encode()),
+                         created_at=now, expires_at=now + timedelta(hours=1))
+    db.add(row)
+    db.commit()
+    row_id, bind = row.id, db.get_bind()
+    db.close()
+
+    # Still running after the wait: 409, and the route never ran
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT", 0.2)
+    sales_before = count(seeded_api, POSSale)
+    assert post(seeded_api, "/api/pos-sales/", payload, "in-flight").status_code == 409
+    assert count(seeded_api, POSSale) == sales_before
+
+    # Finishes while the duplicate waits: the duplicate gets its response
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT", 5.0)
+    first = JSONResponse({"id": 12345}, status_code=201)
+    timer = threading.Timer(0.3, finish_key, args=(bind, row_id, first))
+    timer.start()
+    response = post(seeded_api, "/api/pos-sales/", payload, "in-flight")
+    timer.join()
+    assert response.status_code == 201
+    assert response.json() == {"id": 12345}
+    assert count(seeded_api, POSSale) == sales_before
+
+
+def test_expired_keys_run_again_and_are_cleaned_up(seeded_api):
+    product_id, _ = alpha_product(seeded_api)
+    first = post(seeded_api, "/api/pos-sales/", pos_payload(product_id), "yesterday")
+    db = seeded_api.Session()
+    row = db.query(IdempotencyKey).filter(IdempotencyKey.key == "yesterday").one()
+    assert row.status == COMPLETED
+    row.expires_at = datetime.utcnow() - timedelta(minutes=1)
+    db.commit()
+    db.close()
+
+    again = post(seeded_api, "/api/pos-sales/", pos_payload(product_id), "yesterday")
+    assert again.status_code == 201 and again.json()["id"] != first.json()["id"]
+
+    db = seeded_api.Session()
+    db.query(IdempotencyKey).update({IdempotencyKey.expires_at: datetime.utcnow() - timedelta(minutes=1)})
+    db.commit()
+    assert clean_expired_idempotency_keys(db)["deleted"] == 1
+    assert db.query(IdempotencyKey).count() == 0
+    db.close()
+
+
+def test_requests_without_key_are_unchanged(seeded_api):
+    product_id, _ = alpha_product(seeded_api)
+    sales_before = count(seeded_api, POSSale)
+    for _ in range(2):
+        response = seeded_api.client.post("/api/pos-sales/", headers=seeded_api.headers("alpha.shopkeeper"),
+                                          json=pos_payload(product_id))
+        assert response.status_code == 201
+    assert count(seeded_api, POSSale) == sales_before + 2
+    assert count(seeded_api, IdempotencyKey) == 0
@@ -0,0 +1,87 @@
+"""
+Import-time and memory budget for a web-only worker
+Boots `main` in a fresh interpreter with `python -X importtime`, runs the "web"
+startup profile and fails if heavy optional libraries were loaded or the
+import time / peak RSS exceed their budgets.
+
+Budgets can be tuned per machine with IMPORT_BUDGET_MS and RSS_BUDGET_MB.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Loaded on first use only (bulk upload, PDF exports, training manuals)
+LAZY_MODULES = ("pandas", "numpy", "openpyxl", "reportlab")
+
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "3000"))
+RSS_BUDGET_MB = float(os.getenv("RSS_BUDGET_MB", "130"))
+
+BOOT_SCRIPT = """
+import json, resource, sys
+import main
+from app.core.startup import run_startup
+run_startup("web")
+def peak_rss_kb():
+    # ru_maxrss survives exec on Linux, so it would include the forking pytest
+    # process; VmHWM is this process's own high-water mark
+    try:
+        with open("/proc/self/status") as status:
+            return next(int(l.split()[1]) for l in status if l.startswith("VmHWM:"))
+    except (OSError, StopIteration):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print("BUDGET" + json.dumps({
+    "rss_kb": peak_rss_kb(),
+    "lazy_loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (LAZY_MODULES,)
+
+
+def parse_importtime(stderr: str) -> dict:
+    """module -> cumulative import time (microseconds)"""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = (part.strip() for part in line[len("import time:"):].split("|"))
+        if cumulative.isdigit():
+            timings[module] = int(cumulative)
+    return timings
+
+
+@pytest.fixture(scope="module")
+def boot(tmp_path_factory):
+    db_path = tmp_path_factory.mktemp("boot") / "budget.db"
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", STARTUP_PROFILE="web", LOG_LEVEL="WARNING")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", BOOT_SCRIPT],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    line = next(l for l in result.stdout.splitlines() if l.startswith("BUDGET"))
+    return json.loads(line[len("BUDGET"):]), parse_importtime(result.stderr)
+
+
+def test_heavy_libraries_stay_unloaded(boot):
+    """pandas / numpy / openpyxl / reportlab are not imported by a web worker"""
+    stats, _ = boot
+    assert stats["lazy_loaded"] == []
+
+
+def test_import_time_budget(boot):
+    """Importing main stays within the import-time budget"""
+    _, timings = boot
+    main_ms = timings["main"] / 1000
+    assert main_ms <= IMPORT_BUDGET_MS, f"import main took {main_ms:.0f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)"
+
+
+def test_rss_budget(boot):
+    """Peak RSS after the web profile boots stays within budget"""
+    stats, _ = boot
+    rss_mb = stats["rss_kb"] / 1024
+    assert rss_mb <= RSS_BUDGET_MB, f"peak RSS {rss_mb:.0f} MB (budget {RSS_BUDGET_MB:.0f} MB)"
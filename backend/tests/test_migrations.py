@@ -0,0 +1,147 @@
+"""
+Tests for the in-process versioned migration engine (app/core/migrations.py)
+"""
+import logging
+import textwrap
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app.core.migrations import migration_status, run_pending_migrations
+
+
+def write(directory, name, body):
+    (directory / name).write_text(textwrap.dedent(body))
+
+
+@pytest.fixture
+def env(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    scripts = tmp_path / "scripts"
+    scripts.mkdir()
+    return engine, scripts, tmp_path
+
+
+def test_applies_in_order_and_skips_applied(env):
+    """Each script runs once, in name order, and is recorded"""
+    engine, scripts, tmp_path = env
+    log = tmp_path / "ran.txt"
+    write(scripts, "migrate_001_widgets.py", """
+        from sqlalchemy import text
+
+        def upgrade(conn):
+            conn.execute(text("CREATE TABLE widgets (id INTEGER PRIMARY KEY)"))
+    """)
+    write(scripts, "migrate_002_legacy.py", f"""
+        if __name__ == "__main__":
+            with open({str(log)!r}, "a") as f:
+                f.write("legacy\\n")
+    """)
+
+    first = run_pending_migrations(engine, scripts)
+    second = run_pending_migrations(engine, scripts)
+
+    assert first["applied"] == ["migrate_001_widgets", "migrate_002_legacy"]
+    assert second == {"applied": [], "failed": [], "skipped": 2}
+    assert log.read_text() == "legacy\n"
+    assert "widgets" in inspect(engine).get_table_names()
+
+
+def test_failed_upgrade_is_rolled_back_and_retried(env):
+    """A failing upgrade() leaves no partial changes and stays pending"""
+    engine, scripts, _ = env
+    write(scripts, "migrate_001_broken.py", """
+        from sqlalchemy import text
+
+        def upgrade(conn):
+            conn.execute(text("INSERT INTO schema_migrations (version, applied_at) VALUES ('ghost', '2025-01-01')"))
+            raise RuntimeError("boom")
+    """)
+
+    summary = run_pending_migrations(engine, scripts)
+    assert summary["failed"] == ["migrate_001_broken"]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM schema_migrations")).scalar() == 0
+    assert migration_status(engine, scripts)["pending"] == ["migrate_001_broken"]
+
+
+def test_legacy_exit_status(env):
+    """sys.exit(1) in a legacy script is a failure; sys.exit(0) is not"""
+    engine, scripts, _ = env
+    write(scripts, "migrate_001_ok.py", """
+        import sys
+        if __name__ == "__main__":
+            sys.exit(0)
+    """)
+    write(scripts, "migrate_002_bad.py", """
+        import sys
+        if __name__ == "__main__":
+            sys.exit(1)
+    """)
+
+    summary = run_pending_migrations(engine, scripts)
+    assert summary["applied"] == ["migrate_001_ok"]
+    assert summary["failed"] == ["migrate_002_bad"]
+
+
+def test_legacy_swallowed_errors_are_not_recorded(env):
+    """A legacy script that catches its own error and only reports it stays pending"""
+    engine, scripts, _ = env
+    write(scripts, "migrate_001_printed.py", """
+        if __name__ == "__main__":
+            try:
+                raise RuntimeError("no such table: phones")
+            except Exception as e:
+                print(f"❌ Migration failed: {e}")
+    """)
+    write(scripts, "migrate_002_logged.py", """
+        import logging
+        if __name__ == "__main__":
+            logging.getLogger("legacy").error("❌ Error creating table")
+    """)
+    write(scripts, "migrate_003_warning.py", """
+        if __name__ == "__main__":
+            print("⚠️ Column already exists, skipping...")
+    """)
+
+    summary = run_pending_migrations(engine, scripts)
+    assert summary["failed"] == ["migrate_001_printed", "migrate_002_logged"]
+    assert summary["applied"] == ["migrate_003_warning"]
+    assert migration_status(engine, scripts)["pending"] == ["migrate_001_printed", "migrate_002_logged"]
+
+
+
+def test_hanging_legacy_script_times_out(env):
+    """A legacy script that never finishes is given up on and stays pending"""
+    engine, scripts, _ = env
+    write(scripts, "migrate_001_hangs.py", """
+        import time
+        if __name__ == "__main__":
+            time.sleep(30)
+    """)
+    write(scripts, "migrate_002_ok.py", """
+        if __name__ == "__main__":
+            print("✅ done")
+    """)
+
+    summary = run_pending_migrations(engine, scripts, timeout=0.2)
+    assert summary["failed"] == ["migrate_001_hangs"]
+    assert summary["applied"] == ["migrate_002_ok"]
+
+
+def test_other_threads_errors_do_not_fail_a_migration(env):
+    """Errors logged or printed by other threads meanwhile aren't the script's"""
+    engine, scripts, _ = env
+    write(scripts, "migrate_001_slow.py", """
+        import time
+        if __name__ == "__main__":
+            time.sleep(0.3)
+    """)
+    noise = threading.Thread(target=lambda: (time.sleep(0.1), print("❌ request failed"),
+                                             logging.getLogger("app").error("❌ request failed")))
+    noise.start()
+    summary = run_pending_migrations(engine, scripts)
+    noise.join()
+    assert summary["applied"] == ["migrate_001_slow"]
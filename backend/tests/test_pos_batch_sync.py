@@ -0,0 +1,151 @@
+"""
+Tests for the offline-sync endpoint POST /api/pos-sales/batch
+"""
+from datetime import datetime, timedelta
+
+from app.api.routes.pos_sale_routes import _begin_outer_transaction
+from app.core.config import settings
+from app.core.company_metrics import rebuild_company_metrics
+from app.models import Customer, POSSale, Product, StockMovement
+import benchmark_pos_checkout as bench
+
+
+def alpha_products(api, n):
+    db = api.Session()
+    products = db.query(Product).filter(Product.created_by_user_id == api.users["alpha.manager"]).limit(n).all()
+    result = [(p.id, p.quantity) for p in products]
+    db.close()
+    return result
+
+
+def entry(client_id, items, **extra):
+    return {"client_id": client_id, "customer_name": "Walk-in", "customer_phone": "0240000000",
+            "items": [{"product_id": pid, "quantity": qty, "unit_price": 80} for pid, qty in items], **extra}
+
+
+def sync(api, sales, who="alpha.shopkeeper"):
+    return api.client.post("/api/pos-sales/batch", headers=api.headers(who), json={"sales": sales})
+
+
+def stock(api, product_id):
+    db = api.Session()
+    try:
+        return db.get(Product, product_id).quantity
+    finally:
+        db.close()
+
+
+def test_batch_reports_each_sale(seeded_api):
+    (a, stock_a), (b, stock_b) = alpha_products(seeded_api, 2)
+    response = sync(seeded_api, [
+        entry("till-1", [(a, 1)]),
+        entry("till-2", [(a, 2), (b, 1)]),
+        {"client_id": "till-3", "customer_name": "Walk-in", "items": []},  # Invalid: no phone, no items
+        entry("till-4", [(b, stock_b + 5)]),  # More than is left
+        entry("till-5", [(999999, 1)]),  # Unknown product
+        entry("till-6", [(b, 1)]),
+    ])
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["created"], body["duplicates"], body["failed"]) == (3, 0, 3)
+    statuses = {r["client_id"]: (r["status"], r["status_code"]) for r in body["results"]}
+    assert statuses == {
+        "till-1": ("created", None), "till-2": ("created", None), "till-3": ("failed", 422),
+        "till-4": ("failed", 422), "till-5": ("failed", 404), "till-6": ("created", None),
+    }
+    assert [r["index"] for r in body["results"]] == list(range(6))
+    assert "customer_phone" in body["results"][2]["error"]
+
+    # Stock was taken for the recorded sales only
+    assert stock(seeded_api, a) == stock_a - 3
+    assert stock(seeded_api, b) == stock_b - 2
+    db = seeded_api.Session()
+    sales = db.query(POSSale).filter(POSSale.client_id.isnot(None)).all()
+    assert sorted(s.client_id for s in sales) == ["till-1", "till-2", "till-6"]
+    assert len({s.transaction_id for s in sales}) == 3
+    # Walk-in checkouts share one customer, even across savepoints
+    assert db.query(Customer).filter(Customer.phone_number == "0000000000").count() == 1
+    assert rebuild_company_metrics(db, dry_run=True)["drifted"] == 0
+    db.close()
+
+
+def test_resent_batch_records_nothing_twice(seeded_api):
+    (a, stock_a), = alpha_products(seeded_api, 1)
+    sales = [entry(f"till-{n}", [(a, 1)]) for n in range(5)]
+    first = sync(seeded_api, sales).json()
+    assert first["created"] == 5
+
+    # The response was lost: the till sends the whole batch again, plus one new sale
+    again = sync(seeded_api, sales + [entry("till-5", [(a, 1)]), entry("till-5", [(a, 1)])]).json()
+    assert (again["created"], again["duplicates"], again["failed"]) == (1, 6, 0)
+    assert [r["id"] for r in again["results"][:5]] == [r["id"] for r in first["results"]]
+    assert again["results"][6]["id"] == again["results"][5]["id"]
+    assert stock(seeded_api, a) == stock_a - 6
+
+    # client_id is unique per company: the other company can use the same one
+    db = seeded_api.Session()
+    beta_product = db.query(Product.id).filter(
+        Product.created_by_user_id == seeded_api.users["beta.manager"]).first()[0]
+    db.close()
+    beta = sync(seeded_api, [entry("till-0", [(beta_product, 1)])], who="beta.shopkeeper").json()
+    assert beta["created"] == 1
+
+
+def test_till_timestamps_date_the_sale(seeded_api):
+    (a, _), = alpha_products(seeded_api, 1)
+    sold_at = (datetime.utcnow() - timedelta(days=1)).replace(hour=9, minute=30, microsecond=0)
+    body = sync(seeded_api, [
+        entry("yesterday", [(a, 1)], created_at=sold_at.isoformat() + "Z"),
+        entry("future", [(a, 1)], created_at=(datetime.utcnow() + timedelta(days=2)).isoformat()),
+    ]).json()
+    assert body["created"] == 2, body
+    assert body["results"][0]["transaction_id"].startswith(f"POS-{sold_at:%Y%m%d}-")
+
+    db = seeded_api.Session()
+    yesterday = db.query(POSSale).filter(POSSale.client_id == "yesterday").one()
+    assert yesterday.created_at == sold_at
+    movement = db.query(StockMovement).filter(StockMovement.reference_id == yesterday.id,
+                                              StockMovement.reference_type == "pos_sale").one()
+    assert movement.created_at == sold_at
+    # A till clock running ahead is clamped to the sync time
+    assert db.query(POSSale).filter(POSSale.client_id == "future").one().created_at <= datetime.utcnow()
+    assert rebuild_company_metrics(db, dry_run=True)["drifted"] == 0
+    db.close()
+
+
+def test_stale_till_timestamps_are_rejected(seeded_api, monkeypatch):
+    monkeypatch.setattr(settings, "POS_SYNC_MAX_AGE_HOURS", 48)
+    (a, stock_a), = alpha_products(seeded_api, 1)
+    body = sync(seeded_api, [
+        entry("last-month", [(a, 1)], created_at=(datetime.utcnow() - timedelta(days=30)).isoformat()),
+        entry("this-morning", [(a, 1)], created_at=(datetime.utcnow() - timedelta(hours=3)).isoformat()),
+    ]).json()
+    assert body["created"] == 1, body
+    stale = body["results"][0]
+    assert (stale["status"], stale["status_code"]) == ("failed", 422)
+    assert "48 hours" in stale["error"]
+    assert body["results"][1]["status"] == "created"
+    assert stock(seeded_api, a) == stock_a - 1
+
+    db = seeded_api.Session()
+    assert db.query(POSSale).filter(POSSale.client_id == "last-month").count() == 0
+    db.close()
+
+
+def test_only_shopkeepers_sync(seeded_api):
+    (a, _), = alpha_products(seeded_api, 1)
+    assert sync(seeded_api, [entry("x", [(a, 1)])], who="alpha.repairer").status_code == 403
+
+
+def test_sqlite_savepoints_stay_inside_one_transaction(tmp_path):
+    # Without an explicit BEGIN, pysqlite would commit each released savepoint on its own
+    engine, Session = bench.make_session_factory(str(tmp_path / "batch.db"))
+    db = Session()
+    _begin_outer_transaction(db)
+    for n in range(3):
+        with db.begin_nested():
+            db.add(Customer(full_name=f"Customer {n}", phone_number=f"020000000{n}"))
+    db.rollback()
+    assert db.query(Customer).count() == 0
+    db.close()
+    engine.dispose()
@@ -0,0 +1,140 @@
+"""
+Tests for the set-based POS checkout (pos_sale_routes._checkout) and benchmark_pos_checkout.py
+"""
+import re
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.routes.pos_sale_routes import _take_stock
+from app.core.company_metrics import rebuild_company_metrics
+from app.models import POSSale, POSSaleItem, Product, ProductSale, StockMovement
+import benchmark_pos_checkout as bench
+
+
+def alpha_products(api, n):
+    db = api.Session()
+    products = db.query(Product).filter(Product.created_by_user_id == api.users["alpha.manager"]).limit(n).all()
+    result = [(p.id, p.quantity) for p in products]
+    db.close()
+    return result
+
+
+def checkout(api, items, **extra):
+    return api.client.post("/api/pos-sales/", headers=api.headers("alpha.shopkeeper"), json={
+        "customer_name": "Walk-in", "customer_phone": "0240000000",
+        "items": [{"product_id": pid, "quantity": qty, "unit_price": 80} for pid, qty in items], **extra,
+    })
+
+
+def test_checkout_takes_stock_and_writes_rows(seeded_api):
+    (a, stock_a), (b, stock_b) = alpha_products(seeded_api, 2)
+    response = checkout(seeded_api, [(a, 2), (b, 1), (a, 3)])
+    assert response.status_code == 201, response.text
+    sale_id = response.json()["id"]
+
+    db = seeded_api.Session()
+    assert db.get(Product, a).quantity == stock_a - 5
+    assert db.get(Product, b).quantity == stock_b - 1
+    sale = db.get(POSSale, sale_id)
+    items = db.query(POSSaleItem).filter(POSSaleItem.pos_sale_id == sale_id).all()
+    assert sorted(i.quantity for i in items) == [1, 2, 3]
+    # Each line points at its own product sale with the same product and quantity
+    for item in items:
+        product_sale = db.get(ProductSale, item.product_sale_id)
+        assert (product_sale.product_id, product_sale.quantity) == (item.product_id, item.quantity)
+        assert product_sale.company_id == sale.company_id == seeded_api.users["alpha.manager"]
+    movements = db.query(StockMovement).filter(StockMovement.reference_id == sale_id,
+                                               StockMovement.reference_type == "pos_sale").all()
+    assert sorted(m.quantity for m in movements) == [-3, -2, -1]
+    assert {m.company_id for m in movements} == {sale.company_id}
+    # Bulk-inserted product sales still reach the daily metrics
+    assert rebuild_company_metrics(db, dry_run=True)["drifted"] == 0
+    db.close()
+
+
+def test_checkout_without_multi_row_returning(seeded_api, monkeypatch):
+    """Databases without multi-row INSERT .. RETURNING insert the product sales through the ORM"""
+    dialect = seeded_api.Session().get_bind().dialect
+    # What SQLAlchemy reports for SQLite < 3.35
+    for flag in ("insert_returning", "insert_executemany_returning",
+                 "insert_executemany_returning_sort_by_parameter_order"):
+        monkeypatch.setattr(dialect, flag, False)
+    (a, _), (b, _) = alpha_products(seeded_api, 2)
+    response = checkout(seeded_api, [(a, 2), (b, 1), (a, 3)])
+    assert response.status_code == 201, response.text
+
+    db = seeded_api.Session()
+    for item in db.query(POSSaleItem).filter(POSSaleItem.pos_sale_id == response.json()["id"]):
+        product_sale = db.get(ProductSale, item.product_sale_id)
+        assert (product_sale.product_id, product_sale.quantity) == (item.product_id, item.quantity)
+    assert rebuild_company_metrics(db, dry_run=True)["drifted"] == 0
+    db.close()
+
+
+def test_insufficient_stock_changes_nothing(seeded_api):
+    (a, stock_a), (b, stock_b) = alpha_products(seeded_api, 2)
+    db = seeded_api.Session()
+    sales_before = db.query(POSSale).count()
+    db.close()
+
+    response = checkout(seeded_api, [(a, 1), (b, stock_b + 1)])
+    assert response.status_code == 422
+    assert f"Available: {stock_b}" in response.json()["detail"]
+
+    db = seeded_api.Session()
+    assert db.get(Product, a).quantity == stock_a
+    assert db.query(POSSale).count() == sales_before
+    db.close()
+
+
+def test_stock_taken_by_another_till_is_refused(seeded_api):
+    (a, stock_a), (b, _) = alpha_products(seeded_api, 2)
+    db = seeded_api.Session()
+    products = {p.id: p for p in db.query(Product).filter(Product.id.in_([a, b]))}
+
+    # Another till sells all but one unit after this one loaded the products
+    other = seeded_api.Session()
+    other.get(Product, a).quantity = 1
+    other.commit()
+    other.close()
+
+    with pytest.raises(HTTPException) as refused:
+        _take_stock(db, products, {a: 2, b: 1})
+    assert refused.value.status_code == 422
+    assert products[a].name in refused.value.detail
+    db.rollback()
+    assert db.get(Product, a).quantity == 1
+    db.close()
+
+
+def test_walk_in_checkouts_share_one_customer(seeded_api):
+    (a, _), = alpha_products(seeded_api, 1)
+    first = checkout(seeded_api, [(a, 1)])
+    second = checkout(seeded_api, [(a, 1)])
+    assert first.status_code == second.status_code == 201, second.text
+    assert first.json()["customer_id"] == second.json()["customer_id"]
+
+
+def test_statements_do_not_grow_with_cart(seeded_api):
+    products = alpha_products(seeded_api, 10)
+    checkout(seeded_api, [(products[0][0], 1)])  # Creates the walk-in customer
+    counts = []
+    for n in (1, 10):
+        response = checkout(seeded_api, [(pid, 1) for pid, _ in products[:n]])
+        assert response.status_code == 201, response.text
+        counts.append(int(re.search(r'desc="(\d+) queries"', response.headers["server-timing"]).group(1)))
+    assert counts[0] == counts[1]
+
+
+def test_benchmark_race_never_oversells(tmp_path):
+    engine, Session = bench.make_session_factory(str(tmp_path / "bench.db"))
+    ids = bench.seed(Session, stock=10)
+    race = bench.run_race(Session, ids, tills=4, stock=10)
+    assert race["errors"] == []
+    assert race["sold"] == race["stock_movements"] == 10
+    assert race["remaining"] == 0 and race["oversold"] == 0
+
+    [(size, statements, _, _)] = bench.run_latency(Session, ids, [5], repeat=2)
+    assert size == 5 and statements > 0
+    engine.dispose()
@@ -0,0 +1,132 @@
+"""
+Tests for the authenticated principal cache behind get_current_user
+"""
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401 - register every mapper the User relationships refer to
+from app.core.auth import create_access_token, get_current_user
+from app.core.cache import cache_engine
+from app.core.database import get_db
+from app.core.principal import PRINCIPAL_NAMESPACE, Principal, invalidate_principal, invalidate_company_principals
+from app.models.id_counter import IdCounter
+from app.models.user import User, UserRole
+
+
+@pytest.fixture
+def env():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    User.__table__.create(engine)
+    IdCounter.__table__.create(engine)  # User writes bump the membership counter
+    Session = sessionmaker(bind=engine)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    db = Session()
+    manager = User(username="boss", email="boss@x.com", full_name="Boss", role=UserRole.MANAGER,
+                   hashed_password="x", is_active=1, company_name="Boss Phones")
+    db.add(manager)
+    db.flush()
+    staff = User(username="clerk", email="clerk@x.com", full_name="Clerk", role=UserRole.SHOP_KEEPER,
+                 hashed_password="x", is_active=1, parent_user_id=manager.id)
+    db.add(staff)
+    db.commit()
+    ids = {"manager": manager.id, "staff": staff.id}
+    db.close()
+
+    app = FastAPI()
+
+    @app.get("/whoami")
+    def whoami(current_user: User = Depends(get_current_user)):
+        return {"id": current_user.id, "role": current_user.role.value, "company_id": current_user.company_id}
+
+    @app.get("/company-name")
+    def company_name(current_user: User = Depends(get_current_user)):
+        return {"company_name": current_user.company_name}
+
+    def override_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_db
+    cache_engine.clear(PRINCIPAL_NAMESPACE)
+    yield TestClient(app), Session, statements, ids
+    cache_engine.clear(PRINCIPAL_NAMESPACE)
+
+
+def auth(username, role, session_id):
+    token = create_access_token({"sub": username, "role": role, "session_id": session_id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def user_queries(statements):
+    return [s for s in statements if "FROM users" in s]
+
+
+def test_second_request_skips_user_query(env):
+    """The principal is served from cache after the first request"""
+    client, _, statements, ids = env
+    headers = auth("clerk", "shop_keeper", 11)
+
+    first = client.get("/whoami", headers=headers)
+    assert first.json() == {"id": ids["staff"], "role": "shop_keeper", "company_id": ids["manager"]}
+    statements.clear()
+
+    assert client.get("/whoami", headers=headers).status_code == 200
+    assert user_queries(statements) == []
+
+
+def test_other_attributes_load_the_row(env):
+    """Non-principal attributes fall through to the User row"""
+    client, _, _, _ = env
+    response = client.get("/company-name", headers=auth("boss", "manager", 12))
+    assert response.json() == {"company_name": "Boss Phones"}
+
+
+def test_invalidation_applies_account_changes(env):
+    """Deactivation takes effect once the user's principals are invalidated"""
+    client, Session, _, ids = env
+    headers = auth("clerk", "shop_keeper", 13)
+    assert client.get("/whoami", headers=headers).status_code == 200
+
+    db = Session()
+    db.get(User, ids["staff"]).is_active = 0
+    db.commit()
+    db.close()
+
+    invalidate_principal(ids["staff"])
+    assert client.get("/whoami", headers=headers).status_code == 403
+
+
+def test_company_invalidation_covers_staff(env):
+    """Locking a manager drops cached principals of their staff too"""
+    client, _, statements, ids = env
+    headers = auth("clerk", "shop_keeper", 14)
+    client.get("/whoami", headers=headers)
+
+    invalidate_company_principals(ids["manager"])
+    statements.clear()
+    client.get("/whoami", headers=headers)
+    assert len(user_queries(statements)) == 1
+
+
+def test_principal_writes_reach_the_row(env):
+    """Setting an attribute on the principal updates the loaded row"""
+    _, Session, _, ids = env
+    db = Session()
+    principal = Principal.from_user(db.get(User, ids["manager"]), db)
+    principal.full_name = "New Name"
+    principal.username = "boss2"
+    db.commit()
+
+    assert principal.username == "boss2"
+    assert db.get(User, ids["manager"]).full_name == "New Name"
+    db.close()
@@ -0,0 +1,110 @@
+"""
+Query-count budgets for the API routes (uses the seeded_api fixture in conftest.py)
+
+The count comes from the Server-Timing header added by QueryStatsMiddleware,
+measured on a warm request (principal cached) with result caches cleared, so it
+is the work the route itself does.
+"""
+import re
+
+import pytest
+from fastapi.routing import APIRoute
+
+# (path, user) -> max statements per request
+BUDGETS = {
+    ("/api/customers/", "alpha.manager"): 3,
+    ("/api/customers/", "alpha.shopkeeper"): 3,
+    ("/api/products/", "alpha.manager"): 2,  # Listing + ETag data version
+    ("/api/products/summary", "alpha.manager"): 3,
+    ("/api/pos-sales/", "alpha.manager"): 3,
+    ("/api/pos-sales/summary", "alpha.manager"): 3,
+    ("/api/product-sales/", "alpha.manager"): 2,
+    ("/api/product-sales/summary", "alpha.manager"): 1,
+    ("/api/repairs/", "alpha.manager"): 1,
+    ("/api/swaps/", "alpha.manager"): 1,
+    ("/api/invoices/", "alpha.manager"): 2,
+    ("/api/analytics/profit-loss", "alpha.manager"): 4,
+    ("/api/analytics/dashboard-summary", "alpha.manager"): 4,
+    ("/api/analytics/overview", "alpha.manager"): 6,
+    ("/api/dashboard/cards", "alpha.manager"): 9,
+    ("/api/dashboard/today-stats", "alpha.manager"): 3,
+    ("/api/dashboard/monthly-stats", "alpha.manager"): 3,
+    ("/api/reports/profit-summary", "alpha.manager"): 6,
+    ("/api/reports/sales-swaps", "alpha.shopkeeper"): 2,
+    ("/api/reports/pending-resales-detailed", "alpha.shopkeeper"): 1,
+    ("/api/staff/admin/companies", "admin"): 3,
+}
+
+# Users the row-growth check runs every parameterless GET route as
+GROWTH_USERS = ("alpha.manager", "alpha.shopkeeper", "admin")
+
+_TIMING_COUNT = re.compile(r'desc="(\d+) queries"')
+
+
+def measure(api, path, who, **params):
+    """(response, statement count) of a warm request with result caches cleared
+
+    The count is None for unhandled errors (the 500 page is rendered outside the middleware).
+    """
+    api.get(path, who, params=params)
+    api.reset_caches()
+    response = api.get(path, who, params=params)
+    match = _TIMING_COUNT.search(response.headers.get("server-timing", ""))
+    return response, int(match.group(1)) if match else None
+
+
+def get_routes():
+    """Parameterless GET routes defined under app/api/routes"""
+    import main
+    return sorted(
+        route.path for route in main.app.routes
+        if isinstance(route, APIRoute) and "GET" in route.methods and "{" not in route.path
+        and route.endpoint.__module__.startswith("app.api.routes")
+    )
+
+
+@pytest.mark.parametrize("path,who", sorted(BUDGETS))
+def test_route_query_budget(seeded_api, path, who):
+    """Each budgeted route stays within its statement count"""
+    response, count = measure(seeded_api, path, who)
+    assert response.status_code == 200, response.text[:200]
+    assert count <= BUDGETS[(path, who)], f"{path} as {who}: {count} queries (budget {BUDGETS[(path, who)]})"
+
+
+def test_customer_list_independent_of_page_size(seeded_api):
+    """GET /api/customers costs the same for 5 or 50 rows"""
+    _, small = measure(seeded_api, "/api/customers/", "alpha.manager", limit=5)
+    _, large = measure(seeded_api, "/api/customers/", "alpha.manager", limit=50)
+    assert small == large <= 3
+
+
+def test_query_counts_do_not_grow_with_rows(seeded_api):
+    """No route issues more statements after every table has grown (no N+1 loops)"""
+    paths = get_routes()
+    before = {}
+    for path in paths:
+        for who in GROWTH_USERS:
+            response, count = measure(seeded_api, path, who)
+            if response.status_code == 200:
+                before[(path, who)] = count
+
+    seeded_api.grow()
+
+    grown = []
+    for (path, who), count in sorted(before.items()):
+        response, after = measure(seeded_api, path, who)
+        assert after is not None, f"{path} as {who} failed after the data grew ({response.status_code})"
+        if after > count:
+            grown.append(f"{path} as {who}: {count} -> {after}")
+    assert not grown, "Query count grows with rows:\n" + "\n".join(grown)
+
+
+def test_admin_companies_lists_staff_and_activity(seeded_api):
+    """The batched companies view still groups staff and recent activity per company"""
+    data = seeded_api.get("/api/staff/admin/companies", "admin").json()
+    assert data["total_companies"] == 2
+    for company in data["companies"]:
+        assert company["staff_count"] == 2
+        assert 0 < len(company["recent_activities"]) <= 10
+        staff_names = {s["username"] for s in company["staff"]} | {company["manager"]["username"]}
+        assert {a["username"] for a in company["recent_activities"]} <= staff_names
@@ -0,0 +1,92 @@
+"""
+Tests for per-request SQL instrumentation (app/core/query_stats.py, app/middleware/query_stats.py)
+"""
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import StaticPool
+
+from app.core.query_stats import count_queries, install, statement_shape
+from app.middleware.query_stats import QueryStatsMiddleware
+
+
+def _app(threshold=3):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO items (name) VALUES ('a'), ('b'), ('c'), ('d'), ('e')"))
+
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, n_plus_one_threshold=threshold)
+
+    @app.get("/loop")
+    def loop():
+        # One query per row - the pattern the detector is for
+        with engine.connect() as conn:
+            ids = [row[0] for row in conn.execute(text("SELECT id FROM items"))]
+            return [conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": i}).scalar() for i in ids]
+
+    @app.get("/single")
+    def single():
+        with engine.connect() as conn:
+            return [row[0] for row in conn.execute(text("SELECT name FROM items"))]
+
+    return app
+
+
+def test_server_timing_header_counts_queries():
+    """The header reports the request's statement count and DB time"""
+    response = TestClient(_app()).get("/loop")
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    assert 'desc="6 queries"' in timing
+    assert timing.startswith("db;dur=") and "app;dur=" in timing
+
+
+def test_repeated_statement_logged_as_n_plus_one(caplog):
+    """A shape repeated above the threshold is logged once with its count"""
+    client = TestClient(_app(threshold=3))
+    with caplog.at_level(logging.WARNING, logger="app.core.query_stats"):
+        client.get("/loop")
+    warnings = [r.getMessage() for r in caplog.records if "N+1" in r.getMessage()]
+    assert len(warnings) == 1
+    assert "GET /loop: 5x SELECT name FROM items WHERE id = ?" in warnings[0]
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger="app.core.query_stats"):
+        client.get("/single")
+    assert not [r for r in caplog.records if "N+1" in r.getMessage()]
+
+
+def test_statement_shape_and_count_queries():
+    """Literals collapse into one shape; statements outside a block aren't counted"""
+    assert statement_shape("SELECT * FROM t WHERE id = 12 AND name = 'x'") == \
+        statement_shape("SELECT * FROM t WHERE id = 7 AND name = 'y'")
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?)") == "SELECT * FROM t WHERE id IN (?)"
+
+    install()
+    engine = create_engine("sqlite://")
+    with count_queries() as stats:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 3"))
+    assert stats.count == 2
+
+
+def test_failed_statement_is_not_counted():
+    """A statement that raises is skipped and later ones on the connection are still timed"""
+    install()
+    engine = create_engine("sqlite://")
+    with count_queries() as stats:
+        with engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+            conn.execute(text("SELECT 1"))
+    assert stats.count == 1
+    assert 0 < stats.db_seconds < 1
@@ -0,0 +1,185 @@
+"""
+Tests for the display-ID sequences (app/core/sequences.py) and migrate_add_id_counters.py
+"""
+import re
+import threading
+import time
+from datetime import date
+
+import pytest
+
+from app.core import sequences
+from app.core.invoice_generator import generate_invoice_number
+from app.models import Customer, IdCounter, Phone, POSSale, Product, User, UserRole
+import benchmark_pos_checkout as bench
+from migrate_add_id_counters import upgrade
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    """Session factory on a SQLite file, so several threads can write at once"""
+    engine, Session = bench.make_session_factory(str(tmp_path / "sequences.db"))
+    sequences.allocator.reset()
+    yield Session
+    sequences.allocator.reset()
+    engine.dispose()
+
+
+def run_threads(target, count):
+    errors = []
+
+    def guarded(n):
+        try:
+            target(n)
+        except Exception as e:
+            errors.append(repr(e))
+
+    threads = [threading.Thread(target=guarded, args=(n,)) for n in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors, errors
+
+
+def test_concurrent_customers_get_distinct_ids(file_db):
+    def add_customers(n):
+        for i in range(10):
+            db = file_db()
+            customer = Customer(full_name=f"Customer {n}-{i}", phone_number=f"02{n:04}{i:04}")
+            customer.generate_unique_id(db)
+            db.add(customer)
+            db.commit()
+            db.close()
+
+    run_threads(add_customers, 6)
+    db = file_db()
+    ids = sorted(unique_id for (unique_id,) in db.query(Customer.unique_id))
+    assert ids == [f"CUST-{n:04}" for n in range(1, 61)]
+    db.close()
+
+
+def test_blocks_are_reserved_per_worker(file_db, monkeypatch):
+    # Server-database mode: numbers come from blocks reserved in their own transaction
+    monkeypatch.setattr(sequences, "uses_own_transaction", lambda bind: True)
+    workers = [sequences.SequenceAllocator(block_size=5) for _ in range(3)]
+    taken = [[] for _ in workers]
+
+    def take(n):
+        db = file_db()
+        for _ in range(12):
+            taken[n].append(workers[n].next(db, "TEST"))
+        db.close()
+
+    run_threads(take, len(workers))
+    numbers = [value for values in taken for value in values]
+    assert len(set(numbers)) == len(numbers) == 36
+    db = file_db()
+    # 12 numbers per worker use three blocks of 5 each
+    assert db.get(IdCounter, "TEST").value == 45
+    db.close()
+
+
+def test_block_reservation_does_not_block_other_counters(file_db, monkeypatch):
+    """A thread reserving a block holds no lock others need to serve numbers they already have"""
+    monkeypatch.setattr(sequences, "uses_own_transaction", lambda bind: True)
+    allocator = sequences.SequenceAllocator(block_size=5)
+    db = file_db()
+    assert allocator.next(db, "FAST") == 1
+
+    entered, release = threading.Event(), threading.Event()
+    original = sequences.reserve
+
+    def slow_reserve(conn, name, count=1, seed=None):
+        if name == "SLOW":
+            entered.set()
+            release.wait(5)
+        return original(conn, name, count, seed)
+
+    monkeypatch.setattr(sequences, "reserve", slow_reserve)
+    other = file_db()
+    thread = threading.Thread(target=lambda: allocator.next(other, "SLOW"))
+    thread.start()
+    assert entered.wait(5)
+    started = time.perf_counter()
+    assert allocator.next(db, "FAST") == 2
+    assert time.perf_counter() - started < 1
+    release.set()
+    thread.join()
+    other.close()
+    db.close()
+
+
+def test_counter_starts_after_existing_ids(file_db):
+    db = file_db()
+    db.add(Customer(full_name="Old", phone_number="0200000001", unique_id="CUST-0041"))
+    db.add(Phone(brand="X", model="Y", condition="New", value=10, unique_id="PHON-0007"))
+    db.commit()
+
+    assert sequences.next_code(db, "CUST", Customer.unique_id) == "CUST-0042"
+    phone = Phone(brand="X", model="Z", condition="New", value=10)
+    assert phone.generate_unique_id(db) == "PHON-0008"
+    db.commit()
+    db.close()
+
+
+def test_rollback_returns_the_number(file_db):
+    db = file_db()
+    assert sequences.next_code(db, "CUST", Customer.unique_id) == "CUST-0001"
+    db.rollback()
+    assert sequences.next_code(db, "CUST", Customer.unique_id) == "CUST-0001"
+    db.commit()
+    assert sequences.next_code(db, "CUST", Customer.unique_id) == "CUST-0002"
+    db.close()
+
+
+def test_daily_scopes_restart_each_day(file_db, monkeypatch):
+    db = file_db()
+    monkeypatch.setattr(sequences, "local_today", lambda: date(2025, 1, 20))
+    assert POSSale.generate_transaction_id(db) == "POS-20250120-001"
+    assert POSSale.generate_transaction_id(db) == "POS-20250120-002"
+    assert generate_invoice_number(db) == "INV-20250120-0001"
+    monkeypatch.setattr(sequences, "local_today", lambda: date(2025, 1, 21))
+    assert POSSale.generate_transaction_id(db) == "POS-20250121-001"
+    assert generate_invoice_number(db) == "INV-20250121-0001"
+    db.commit()
+    db.close()
+
+
+def test_user_ids_follow_role_prefix(file_db):
+    db = file_db()
+    manager = User(username="m", email="m@x.com", role=UserRole.MANAGER, hashed_password="x")
+    keeper = User(username="k", email="k@x.com", role=UserRole.SHOP_KEEPER, hashed_password="x")
+    assert manager.generate_unique_id(db) == "MGR-0001"
+    assert keeper.generate_unique_id(db) == "SHOP-0001"
+    db.close()
+
+
+def test_checkouts_number_transactions(seeded_api):
+    db = seeded_api.Session()
+    product_id = db.query(Product.id).filter(Product.created_by_user_id == seeded_api.users["alpha.manager"]).first()[0]
+    db.close()
+    ids = []
+    for _ in range(3):
+        response = seeded_api.client.post("/api/pos-sales/", headers=seeded_api.headers("alpha.shopkeeper"), json={
+            "customer_name": "Walk-in", "customer_phone": "0240000000",
+            "items": [{"product_id": product_id, "quantity": 1, "unit_price": 80}],
+        })
+        assert response.status_code == 201, response.text
+        ids.append(response.json()["transaction_id"])
+    assert len(set(ids)) == 3
+    numbers = [int(re.fullmatch(r"POS-\d{8}-(\d{3})", i).group(1)) for i in ids]
+    assert numbers == sorted(numbers)
+
+
+def test_migration_seeds_global_counters(file_db):
+    db = file_db()
+    db.add(Customer(full_name="Old", phone_number="0200000001", unique_id="CUST-0120"))
+    db.commit()
+    with db.get_bind().begin() as conn:
+        upgrade(conn)
+        upgrade(conn)  # Re-running leaves counters alone
+    assert db.get(IdCounter, "CUST").value == 120
+    assert db.get(IdCounter, "PROD").value == 0
+    assert sequences.next_code(db, "CUST", Customer.unique_id) == "CUST-0121"
+    db.close()
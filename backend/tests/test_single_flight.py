@@ -0,0 +1,162 @@
+"""
+Tests for single-flight request coalescing
+"""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.cache import cached_route
+from app.core.single_flight import SingleFlight, SingleFlightTimeout
+from app.models.user import UserRole
+
+
+def run_concurrently(target, count):
+    results, errors = [], []
+
+    def worker():
+        try:
+            results.append(target())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_sync_calls_share_one_computation():
+    """Followers get the leader's result without running the function"""
+    flight = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"total": 42}
+
+    results, errors = run_concurrently(lambda: flight.do("cards", slow), 5)
+
+    assert errors == []
+    assert results == [{"total": 42}] * 5
+    assert len(calls) == 1
+    assert flight.stats()["coalesced"] == 4
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_leader_error_propagates_to_followers():
+    """Every waiting caller sees the leader's exception"""
+    flight = SingleFlight()
+
+    def failing():
+        time.sleep(0.1)
+        raise HTTPException(status_code=500, detail="boom")
+
+    results, errors = run_concurrently(lambda: flight.do("cards", failing), 3)
+
+    assert results == []
+    assert len(errors) == 3
+    assert all(isinstance(e, HTTPException) for e in errors)
+
+    # The failed call is not remembered
+    assert flight.do("cards", lambda: "ok") == "ok"
+
+
+def test_follower_times_out():
+    """A follower stops waiting after the timeout"""
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.3)
+        return 1
+
+    leader = threading.Thread(target=lambda: flight.do("k", slow))
+    leader.start()
+    started.wait()
+
+    with pytest.raises(SingleFlightTimeout):
+        flight.do("k", slow, timeout=0.05)
+    leader.join()
+
+
+def test_async_calls_share_one_computation():
+    """Coroutines with the same key await one computation"""
+    flight = SingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "stats"
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("today", slow) for _ in range(4)))
+
+    assert asyncio.run(main()) == ["stats"] * 4
+    assert len(calls) == 1
+
+
+def test_cached_route_coalesces_identical_misses():
+    """Concurrent identical route calls run the body once and fill the cache"""
+    calls = []
+    manager = SimpleNamespace(id=7, role=UserRole.MANAGER, parent_user_id=None)
+
+    @cached_route(seconds=60, entities=["pos_sales"], namespace="test_coalesced_route")
+    def cards(current_user=None, period="today"):
+        calls.append(period)
+        time.sleep(0.1)
+        return {"period": period}
+
+    results, errors = run_concurrently(lambda: cards(current_user=manager, period="today"), 4)
+    assert errors == []
+    assert results == [{"period": "today"}] * 4
+    assert calls == ["today"]
+
+    # Different params are a different flight
+    cards(current_user=manager, period="week")
+    assert calls == ["today", "week"]
+    cards.clear_cache()
+
+
+def test_company_routes_coalesce_across_staff():
+    """per_user=False shares one computation between staff of a company with the same role"""
+    calls = []
+    keepers = [SimpleNamespace(id=20 + n, role=UserRole.SHOP_KEEPER, parent_user_id=7) for n in range(4)]
+    other_company = SimpleNamespace(id=30, role=UserRole.SHOP_KEEPER, parent_user_id=8)
+    repairer = SimpleNamespace(id=40, role=UserRole.REPAIRER, parent_user_id=7)
+
+    @cached_route(seconds=60, entities=["pos_sales"], namespace="test_company_route",
+                  per_user=lambda user: user.role == UserRole.REPAIRER)
+    def stats(current_user=None):
+        calls.append(current_user.id)
+        time.sleep(0.1)
+        return {"company": current_user.parent_user_id}
+
+    users = iter(keepers)
+    lock = threading.Lock()
+
+    def next_keeper():
+        with lock:
+            return next(users)
+
+    results, errors = run_concurrently(lambda: stats(current_user=next_keeper()), 4)
+    assert errors == []
+    assert results == [{"company": 7}] * 4
+    assert len(calls) == 1
+
+    # Another company, and a per-user role, compute their own
+    stats(current_user=other_company)
+    stats(current_user=repairer)
+    assert len(calls) == 3
+    stats(current_user=SimpleNamespace(id=41, role=UserRole.REPAIRER, parent_user_id=7))
+    assert len(calls) == 4
+    stats.clear_cache()
+
@@ -0,0 +1,43 @@
+"""
+Tests for the SQLite connection profiles (app/core/sqlite_pragmas.py)
+"""
+from sqlalchemy import create_engine, text
+
+from app.core.sqlite_pragmas import apply_sqlite_pragmas, sqlite_pragmas
+
+
+def _pragma(engine, name):
+    with engine.connect() as conn:
+        return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_production_profile_applied_to_new_connections(tmp_path):
+    """WAL, synchronous=NORMAL and busy_timeout on every pooled connection"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'prod.db'}")
+    applied = apply_sqlite_pragmas(engine, "production", busy_timeout_ms=4000)
+
+    assert applied["journal_mode"] == "WAL"
+    assert _pragma(engine, "journal_mode") == "wal"
+    assert _pragma(engine, "synchronous") == 1  # NORMAL
+    assert _pragma(engine, "busy_timeout") == 4000
+    assert _pragma(engine, "temp_store") == 2  # MEMORY
+
+
+def test_off_profile_keeps_sqlite_defaults(tmp_path):
+    """'off' registers nothing and keeps the rollback journal"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'off.db'}")
+    assert apply_sqlite_pragmas(engine, "off") == {}
+    assert _pragma(engine, "journal_mode") == "delete"
+
+
+def test_unknown_profile_and_other_dialects():
+    """Unknown profiles fall back to defaults; non-SQLite engines are left alone"""
+    assert sqlite_pragmas("bogus", 5000) == {}
+    assert sqlite_pragmas("safe", 5000)["synchronous"] == "FULL"
+
+    from sqlalchemy.dialects import postgresql
+
+    class FakeEngine:
+        dialect = postgresql.dialect()
+
+    assert apply_sqlite_pragmas(FakeEngine(), "production") == {}
@@ -0,0 +1,84 @@
+"""
+Tests for stale-while-revalidate caching and cache age headers
+"""
+import time
+from types import SimpleNamespace
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.auth import get_current_user
+from app.core.cache import CacheEngine, cached_route, cache_engine
+from app.models.user import UserRole
+
+MANAGER = SimpleNamespace(id=301, role=UserRole.MANAGER, parent_user_id=None)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_engine_serves_stale_until_ceiling():
+    """Expired entries stay readable as stale until the ceiling, then disappear"""
+    engine = CacheEngine(max_entries=10, max_bytes=0, sweep_interval=0)
+    engine.set("ns", "k", "v", ttl=0.05, stale_ttl=0.1)
+
+    value, _, is_stale = engine.lookup_stale("ns", "k")
+    assert (value, is_stale) == ("v", False)
+
+    time.sleep(0.07)
+    assert engine.get("ns", "k") is None
+    value, _, is_stale = engine.lookup_stale("ns", "k")
+    assert (value, is_stale) == ("v", True)
+
+    time.sleep(0.1)
+    assert engine.sweep_expired() == 1
+    assert engine.stats()["total_entries"] == 0
+
+
+def test_stale_value_served_while_refreshing():
+    """A stale hit returns immediately and refreshes in the background"""
+    calls = []
+
+    @cached_route(seconds=0.05, stale_seconds=5, entities=["pos_sales"], namespace="test_swr_route")
+    def cards(current_user=None):
+        calls.append(time.time())
+        return {"version": len(calls)}
+
+    assert cards(current_user=MANAGER) == {"version": 1}
+    time.sleep(0.07)
+
+    # Stale value comes back straight away...
+    assert cards(current_user=MANAGER) == {"version": 1}
+    # ...and the refresh replaces it
+    assert wait_for(lambda: len(calls) == 2)
+    assert wait_for(lambda: cards(current_user=MANAGER) == {"version": 2})
+    cards.clear_cache()
+
+
+def test_age_headers_expose_cache_status():
+    """Responses report MISS/HIT with the value's age"""
+    app = FastAPI()
+
+    @app.get("/cards")
+    @cached_route(seconds=60, stale_seconds=60, entities=["pos_sales"], namespace="test_swr_headers")
+    def cards(current_user=Depends(get_current_user)):
+        return {"ok": True}
+
+    app.dependency_overrides[get_current_user] = lambda: MANAGER
+    client = TestClient(app)
+
+    first = client.get("/cards")
+    assert first.json() == {"ok": True}
+    assert first.headers["x-cache"] == "MISS"
+    assert first.headers["age"] == "0"
+
+    second = client.get("/cards")
+    assert second.headers["x-cache"] == "HIT"
+    assert "x-cache-generated-at" in second.headers
+    cache_engine.clear("test_swr_headers")
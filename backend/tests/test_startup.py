@@ -0,0 +1,54 @@
+"""
+Tests for startup profiles and the schema fingerprint check (app/core/startup.py)
+"""
+from sqlalchemy import create_engine, event, inspect
+
+from app.core.database import Base
+from app.core.startup import PROFILES, ensure_schema, resolve_profile, run_startup, schema_fingerprint
+
+
+def test_unchanged_schema_skips_ddl(tmp_path):
+    """create_all only runs until the fingerprint is recorded"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'boot.db'}")
+    assert ensure_schema(engine) is True
+    assert "users" in inspect(engine).get_table_names()
+
+    ddl = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: ddl.append(statement) if statement.startswith("CREATE") else None)
+    assert ensure_schema(engine) is False
+    assert ddl == []
+
+
+def test_fingerprint_tracks_dialect_ddl():
+    """The fingerprint is stable and depends on the compiled DDL"""
+    sqlite = create_engine("sqlite://").dialect
+    assert schema_fingerprint(Base.metadata, sqlite) == schema_fingerprint(Base.metadata, sqlite)
+
+    from sqlalchemy.dialects import postgresql
+    assert schema_fingerprint(Base.metadata, sqlite) != schema_fingerprint(Base.metadata, postgresql.dialect())
+
+
+def test_profiles():
+    """web skips the scheduler but still migrates; unknown names fall back to full"""
+    assert "scheduler" not in PROFILES["web"] and "migrations" in PROFILES["web"]
+    assert "scheduler" in PROFILES["worker"]
+    assert resolve_profile("WEB") == "web"
+    assert resolve_profile("bogus") == "full"
+
+
+def test_report_times_phases_and_survives_failures(monkeypatch):
+    """A failing phase is reported and the remaining phases still run"""
+    from app.core import startup
+
+    ran = []
+    monkeypatch.setitem(startup.PROFILES, "test", ("first", "second"))
+    monkeypatch.setitem(startup.PHASES, "first", lambda: 1 / 0)
+    monkeypatch.setitem(startup.PHASES, "second", lambda: ran.append("second"))
+
+    report = run_startup("test", imports_ms=12.5)
+    summary = report.to_dict()
+    assert ran == ["second"]
+    assert [p["phase"] for p in summary["phases"]] == ["imports", "first", "second"]
+    assert summary["phases"][1]["status"] == "error"
+    assert summary["total_ms"] >= 12.5
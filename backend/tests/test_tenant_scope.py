@@ -0,0 +1,129 @@
+"""
+Tests for automatic tenant scoping of ORM selects (app/core/tenant.py)
+"""
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401 - register every mapper
+from app.api.routes.analytics_routes import router as analytics_router
+from app.core.auth import get_current_user
+from app.core.company_filter import membership_index
+from app.core.database import Base, get_db
+from app.core.principal import Principal
+from app.core.tenant import scope_session, set_tenant, unscoped
+from app.models import Customer, Repair, User, UserRole
+
+
+@pytest.fixture
+def env():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    membership_index.mark_changed()
+
+    db = Session()
+    users = {}
+    for name, role in [("alpha", UserRole.MANAGER), ("beta", UserRole.MANAGER), ("root", UserRole.SUPER_ADMIN)]:
+        users[name] = User(username=name, email=f"{name}@x.com", full_name=name, role=role,
+                           hashed_password="x", is_active=1)
+    db.add_all(users.values())
+    db.flush()
+    users["clerk"] = User(username="clerk", email="clerk@x.com", full_name="Clerk", role=UserRole.SHOP_KEEPER,
+                          hashed_password="x", is_active=1, parent_user_id=users["alpha"].id)
+    db.add(users["clerk"])
+    db.flush()
+
+    for i, owner in enumerate(["clerk", "alpha", "beta"]):
+        customer = Customer(full_name=f"C{i}", phone_number=f"02400000{i}", created_by_user_id=users[owner].id)
+        db.add(customer)
+        db.flush()
+        db.add(Repair(customer_id=customer.id, phone_description="Phone", issue_description="Screen",
+                      cost=10, created_by_user_id=users[owner].id))
+    db.commit()
+    ids = {name: user.id for name, user in users.items()}
+    db.close()
+
+    yield Session, ids
+    membership_index.mark_changed()
+
+
+def test_selects_are_limited_to_the_tenant(env):
+    """Entity, aggregate and get() lookups only see the scoped company"""
+    Session, ids = env
+    db = Session()
+    set_tenant(db, ids["alpha"])
+
+    assert db.query(Customer).count() == 2
+    assert db.query(func.count(Repair.id)).scalar() == 2
+    beta_customer_id = db.query(Customer.id).execution_options(tenant_unscoped=True).filter(
+        Customer.created_by_user_id == ids["beta"]
+    ).scalar()
+    assert db.get(Customer, beta_customer_id) is None
+
+    # Switching tenant re-binds the criteria (no stale cached statement)
+    set_tenant(db, ids["beta"])
+    assert db.query(Customer).count() == 1
+    db.close()
+
+
+def test_joins_are_scoped_too(env):
+    """Every tenant-owned entity in a join gets the criteria"""
+    Session, ids = env
+    db = Session()
+    set_tenant(db, ids["beta"])
+    rows = db.query(Repair, Customer).join(Customer, Repair.customer_id == Customer.id).all()
+    assert len(rows) == 1
+    assert rows[0][1].created_by_user_id == ids["beta"]
+    db.close()
+
+
+def test_escape_hatches(env):
+    """unscoped() and super admins see every company"""
+    Session, ids = env
+    db = Session()
+    set_tenant(db, ids["alpha"])
+    with unscoped(db):
+        assert db.query(Customer).count() == 3
+    assert db.query(Customer).count() == 2
+
+    admin = Principal(db, ids["root"], "root", UserRole.SUPER_ADMIN, None, None, 1)
+    scope_session(db, admin)
+    assert db.query(Customer).count() == 3
+    db.close()
+
+
+def test_unauthenticated_session_is_unscoped(env):
+    """Background jobs using a plain session keep seeing everything"""
+    Session, _ = env
+    db = Session()
+    assert db.query(Repair).count() == 3
+    db.close()
+
+
+def test_weekly_stats_only_counts_own_company(env):
+    """weekly-stats used to count every tenant's repairs"""
+    Session, ids = env
+    app = FastAPI()
+    app.include_router(analytics_router, prefix="/api")
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def override_user(db=Depends(get_db)):
+        principal = Principal(db, ids["clerk"], "clerk", UserRole.SHOP_KEEPER, ids["alpha"], ids["alpha"], 1)
+        scope_session(db, principal)
+        return principal
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = override_user
+
+    data = TestClient(app).get("/api/analytics/weekly-stats").json()
+    assert sum(day["count"] for day in data["last_7_days"]["repairs"]) == 2
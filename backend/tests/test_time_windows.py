@@ -0,0 +1,126 @@
+"""
+Tests for shop-local time windows (app/core/time_windows.py)
+"""
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, select
+from sqlalchemy.orm import declarative_base
+
+from app.core.time_windows import (
+    TimeWindow, calendar_month_window, in_window, last_days_window, month_window,
+    period_window, range_window, today_window, week_window,
+)
+from app.models import POSSale, Product, ProductSale
+
+ACCRA = ZoneInfo("Africa/Accra")
+LAGOS = ZoneInfo("Africa/Lagos")  # UTC+1, shows the shift to UTC
+
+Base = declarative_base()
+
+
+class Row(Base):
+    __tablename__ = "time_window_rows"
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime)
+
+
+def test_today_is_half_open_day():
+    now = datetime(2025, 3, 12, 15, 30)
+    window = today_window(now, ACCRA)
+    assert window == TimeWindow(datetime(2025, 3, 12), datetime(2025, 3, 13))
+    assert window.contains(datetime(2025, 3, 12, 23, 59, 59, 999999))
+    assert not window.contains(datetime(2025, 3, 13))
+
+
+def test_today_follows_shop_timezone():
+    # 23:30 UTC on the 12th is already the 13th in Lagos
+    window = today_window(datetime(2025, 3, 12, 23, 30), LAGOS)
+    assert window == TimeWindow(datetime(2025, 3, 12, 23), datetime(2025, 3, 13, 23))
+
+
+def test_week_starts_monday():
+    sunday = datetime(2025, 3, 16, 10)
+    window = week_window(sunday, ACCRA)
+    assert window.start == datetime(2025, 3, 10)
+    assert window.end == datetime(2025, 3, 17)
+    monday = week_window(datetime(2025, 3, 10, 0, 5), ACCRA)
+    assert monday == TimeWindow(datetime(2025, 3, 10), datetime(2025, 3, 11))
+
+
+def test_month_and_calendar_month_boundaries():
+    assert month_window(datetime(2024, 2, 29, 12), ACCRA) == TimeWindow(datetime(2024, 2, 1), datetime(2024, 3, 1))
+    assert calendar_month_window(2024, 12, ACCRA) == TimeWindow(datetime(2024, 12, 1), datetime(2025, 1, 1))
+    assert calendar_month_window(2025, 2, ACCRA).end == datetime(2025, 3, 1)
+
+
+def test_last_days_includes_today():
+    window = last_days_window(7, datetime(2025, 3, 12, 8), ACCRA)
+    assert window == TimeWindow(datetime(2025, 3, 6), datetime(2025, 3, 13))
+
+
+def test_period_window():
+    now = datetime(2025, 3, 12, 8)
+    assert period_window("today", now, ACCRA) == today_window(now, ACCRA)
+    assert period_window("month", now, ACCRA) == month_window(now, ACCRA)
+    assert period_window("all", now, ACCRA) is None
+
+
+def test_range_window_end_date_is_inclusive():
+    window = range_window("2025-01-01", "2025-01-31", ACCRA)
+    assert window == TimeWindow(datetime(2025, 1, 1), datetime(2025, 2, 1))
+    assert window.contains(datetime(2025, 1, 31, 23, 59, 59, 500000))
+    assert range_window(date(2025, 1, 1), None, ACCRA).end == datetime.max
+    assert range_window(None, None) is None
+    with pytest.raises(ValueError):
+        range_window("01/02/2025", None, ACCRA)
+
+
+def test_in_window_is_a_plain_column_range():
+    window = TimeWindow(datetime(2025, 1, 1), datetime(2025, 1, 2))
+    sql = str(select(Row.id).where(in_window(Row.created_at, window)).compile()).lower()
+    assert "time_window_rows.created_at >=" in sql
+    assert "time_window_rows.created_at <" in sql
+    assert "date(" not in sql and "extract" not in sql
+
+
+def test_in_window_open_sides():
+    open_end = range_window("2025-01-01", None, ACCRA)
+    sql = str(select(Row.id).where(in_window(Row.created_at, open_end)).compile()).lower()
+    assert ">=" in sql and "<" not in sql.replace("<=", "")
+    assert str(in_window(Row.created_at, None).compile()).lower() == "true"
+
+
+def test_today_stats_count_sales_made_today(seeded_api):
+    """The period stats used to read non-existent columns and always return zeros"""
+    before = seeded_api.get("/api/dashboard/today-stats").json()
+    db = seeded_api.Session()
+    keeper_id = seeded_api.users["alpha.shopkeeper"]
+    product = db.query(Product).filter(Product.created_by_user_id == seeded_api.users["alpha.manager"]).first()
+    db.add_all([
+        POSSale(transaction_id="POS-TODAY-1", customer_name="Walk-in", customer_phone="0240000000",
+                subtotal=90, total_amount=90, created_by_user_id=keeper_id),
+        ProductSale(product_id=product.id, quantity=1, unit_price=90, total_amount=90,
+                    customer_phone="0240000000", created_by_user_id=keeper_id),
+    ])
+    db.commit()
+    db.close()
+    seeded_api.reset_caches()
+
+    after = seeded_api.get("/api/dashboard/today-stats").json()
+    assert after["sales_count"] == before["sales_count"] + 1
+    assert after["sales_total"] == before["sales_total"] + 90
+    monthly = seeded_api.get("/api/dashboard/monthly-stats").json()
+    assert monthly["sales_count"] >= after["sales_count"]
+    assert monthly["total_profit"] > 0
+
+
+def test_pos_sales_date_filter(seeded_api):
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+    month_ago = (datetime.utcnow() - timedelta(days=40)).strftime("%Y-%m-%d")
+    everything = seeded_api.get("/api/pos-sales/", params={"start_date": month_ago, "end_date": today}).json()
+    assert len(everything) == len(seeded_api.get("/api/pos-sales/").json())
+    bad = seeded_api.get("/api/pos-sales/", params={"end_date": "31-01-2025"})
+    assert bad.status_code == 422
+    assert "end_date" in bad.json()["detail"]